@@ -0,0 +1,534 @@
+"""
+Exportação colunar para análises do Bolão Copa do Mundo 2026
+
+As telas de estatística agregam todos os palpites do bolão. Em vez de
+percorrer as tabelas do Neon linha a linha pelo ORM a cada acesso, leem
+um arquivo colunar com o estado do bolão, mapeado em memória (np.memmap):
+cada coluna é um array contíguo, e as agregações são feitas com numpy.
+
+Tabelas do arquivo (uma linha por registro, colunas de tipo fixo):
+  - users              : id, active, admin, paid (nome no dicionário 'user')
+  - matches            : match_number, kickoff, phase, group, team1, team2,
+                         score1, score2, scored, finished
+  - predictions        : palpites de jogo já juntados com o jogo e o
+                         participante — user, match (linha em matches),
+                         match_number, phase, team1, team2, pred1, pred2,
+                         real1, real2, points, points_type
+  - group_predictions  : user, group, first, second, points
+  - podium_predictions : user, champion, runner_up, third, points
+
+Códigos de seleção (e placeholders como "1A"/"W73"), fases, grupos e
+nomes são codificados em dicionário (índice int8/int32 numa lista do
+cabeçalho); placares são int8, com -1 para ausente. Os pontos seguem
+scoring.get_user_stats: os de jogo são recalculados do placar (só jogos já
+iniciados com placar), os de grupo e de pódio só contam quando o grupo / o
+campeão estão definidos.
+
+Formato do arquivo (parecido com o Arrow IPC, mas só com numpy — que o app
+já usa — em vez de pyarrow):
+    b'BOLAOCOL' | tamanho do cabeçalho (uint32 LE) | cabeçalho JSON |
+    colunas, cada uma alinhada em ALIGN bytes
+O cabeçalho traz as versões de data_version.py com que o arquivo foi
+gerado; get_analytics() só o reaproveita enquanto elas não mudarem — a de
+jogos (que sobe a cada gol ao vivo) com uma carência de
+ANALYTICS_EXPORT_DEBOUNCE segundos, para não regerar a cada gol. A
+gravação é atômica (arquivo temporário + os.replace), então quem está
+lendo o arquivo anterior não é afetado — e cada arquivo é também um
+retrato do bolão naquele instante.
+
+Quem regera o arquivo é o próprio app, na primeira leitura depois que as
+versões mudam (o run_post do cron incrementa MATCHES): o cron roda em outra
+máquina e não enxerga o disco do app. Para um retrato avulso, use a linha
+de comando.
+
+Variáveis de ambiente:
+    ANALYTICS_EXPORT_PATH    : caminho do arquivo (padrão /tmp/bolao_analytics.col)
+    ANALYTICS_EXPORT_MAX_AGE : segundos até regerar mesmo sem mudança de
+                               versão — palpites salvos não mudam versão
+                               nenhuma (padrão 600)
+    ANALYTICS_EXPORT_DEBOUNCE: segundos em que uma mudança só de placares
+                               (versão de jogos) ainda não regera (padrão 120)
+
+Uso (linha de comando):
+    python analytics_export.py [caminho]
+"""
+
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+import pytz
+from sqlalchemy import select
+
+from models import (
+    User, Team, Match, Prediction, GroupPrediction, PodiumPrediction,
+    GroupResult, TournamentResult
+)
+from scoring import get_scoring_config
+from scoring_rules import POINTS_TYPES, calculate_match_points_batch
+
+EXPORT_PATH = os.environ.get('ANALYTICS_EXPORT_PATH', '/tmp/bolao_analytics.col')
+EXPORT_MAX_AGE = float(os.environ.get('ANALYTICS_EXPORT_MAX_AGE', '600'))
+EXPORT_DEBOUNCE = float(os.environ.get('ANALYTICS_EXPORT_DEBOUNCE', '120'))
+
+FORMAT_VERSION = 2
+MAGIC = b'BOLAOCOL'
+ALIGN = 64
+BATCH = 20_000
+MISSING = -1
+
+_cache = {}  # caminho -> (mtime, ColumnarExport)
+_lock = threading.Lock()
+_build_lock = threading.Lock()  # uma regeração por vez no processo
+
+
+def _now_brazil_naive():
+    return datetime.now(pytz.timezone('America/Sao_Paulo')).replace(tzinfo=None)
+
+
+def _encode(values, dictionary, dtype=np.int8):
+    """Índices de `values` em `dictionary` (lista); None/desconhecido → -1."""
+    index = {value: i for i, value in enumerate(dictionary)}
+    return np.fromiter((index.get(v, MISSING) for v in values), dtype=dtype, count=len(values))
+
+
+def _small(values):
+    """Placar (int ou None) como int8, com -1 para ausente."""
+    array = np.fromiter((MISSING if v is None else v for v in values), dtype=np.int64, count=len(values))
+    if len(array) and (array.min() < MISSING or array.max() > np.iinfo(np.int8).max):
+        raise ValueError("Placar fora do intervalo de int8")
+    return array.astype(np.int8)
+
+
+# =============================================================================
+# Geração
+# =============================================================================
+
+def _read_predictions(session):
+    """(user_id, match_id, pred1, pred2) de todos os palpites, em lotes."""
+    query = select(
+        Prediction.user_id, Prediction.match_id,
+        Prediction.pred_team1_score, Prediction.pred_team2_score
+    ).order_by(Prediction.user_id, Prediction.match_id).execution_options(yield_per=BATCH)
+
+    parts = [np.array(chunk, dtype=np.int64).reshape(-1, 4)
+             for chunk in session.execute(query).partitions()]
+    if not parts:
+        return np.zeros((0, 4), dtype=np.int64)
+    return np.concatenate(parts)
+
+
+def build_tables(session, now=None):
+    """
+    Lê o banco e monta (dicionários, tabelas) do arquivo colunar — tabelas
+    como {nome: {coluna: array}}.
+    """
+    now = now or _now_brazil_naive()
+
+    teams = session.query(Team.id, Team.code, Team.name, Team.flag).order_by(Team.id).all()
+    matches = session.query(Match).order_by(Match.match_number).all()
+    users = session.query(User.id, User.name, User.active, User.role, User.paid).order_by(User.id).all()
+
+    # Dicionário de códigos: seleções primeiro, depois os placeholders
+    team_codes = [t.code for t in teams]
+    known = set(team_codes)
+    placeholders = sorted({c for m in matches for c in (m.team1_code, m.team2_code)
+                           if c and c not in known})
+    codes = team_codes + placeholders
+    code_by_team_id = {t.id: t.code for t in teams}
+    phases = sorted({m.phase for m in matches if m.phase})
+    groups = sorted({m.group for m in matches if m.group})
+    dictionaries = {
+        'team': codes,
+        'team_name': [t.name for t in teams] + [None] * len(placeholders),
+        'team_flag': [t.flag for t in teams] + [None] * len(placeholders),
+        'phase': phases,
+        'group': groups,
+        'points_type': list(POINTS_TYPES),
+        'user': [u.name for u in users],
+    }
+
+    def team_column(values):
+        return _encode(values, codes)
+
+    match_row = {m.id: i for i, m in enumerate(matches)}
+    score1, score2 = _small([m.team1_score for m in matches]), _small([m.team2_score for m in matches])
+    kickoff = np.array([m.datetime for m in matches], dtype='datetime64[s]')
+    match_table = {
+        'match_number': np.array([m.match_number for m in matches], dtype=np.int16),
+        'kickoff': kickoff,
+        'phase': _encode([m.phase for m in matches], phases),
+        'group': _encode([m.group for m in matches], groups),
+        'team1': team_column([code_by_team_id.get(m.team1_id, m.team1_code) for m in matches]),
+        'team2': team_column([code_by_team_id.get(m.team2_id, m.team2_code) for m in matches]),
+        'score1': score1,
+        'score2': score2,
+        'scored': (score1 >= 0) & (score2 >= 0) & (kickoff <= np.datetime64(now, 's')),
+        'finished': np.array([m.status == 'finished' for m in matches], dtype=bool),
+    }
+    # team1/team2 nos palpites: só seleções definidas (placeholder → -1),
+    # como o "confronto definido" de get_user_stats
+    defined1 = np.array([m.team1_id is not None for m in matches], dtype=bool)
+    defined2 = np.array([m.team2_id is not None for m in matches], dtype=bool)
+
+    user_row = {u.id: i for i, u in enumerate(users)}
+    user_table = {
+        'id': np.array([u.id for u in users], dtype=np.int32),
+        'active': np.array([bool(u.active) for u in users], dtype=bool),
+        'admin': np.array([u.role == 'admin' for u in users], dtype=bool),
+        'paid': np.array([bool(u.paid) for u in users], dtype=bool),
+    }
+
+    raw = _read_predictions(session)
+    rows = np.array([match_row.get(m, MISSING) for m in raw[:, 1]], dtype=np.int32)
+    known = rows >= 0
+    raw, rows = raw[known], rows[known]
+    # Pontos recalculados do placar, só nos jogos iniciados com placar,
+    # como em get_user_stats (não dependem de o cron já ter pontuado)
+    points = np.zeros(len(rows), dtype=np.int16)
+    points_type = np.full(len(rows), MISSING, dtype=np.int8)
+    scored = match_table['scored'][rows]
+    if scored.any():
+        values, types = calculate_match_points_batch(
+            raw[scored, 2], raw[scored, 3], score1[rows][scored], score2[rows][scored],
+            get_scoring_config(session)
+        )
+        points[scored], points_type[scored] = values, types
+
+    prediction_table = {
+        'user': np.array([user_row[u] for u in raw[:, 0]], dtype=np.int32),
+        'match': rows,
+        'match_number': match_table['match_number'][rows],
+        'phase': match_table['phase'][rows],
+        'team1': np.where(defined1[rows], match_table['team1'][rows], MISSING).astype(np.int8),
+        'team2': np.where(defined2[rows], match_table['team2'][rows], MISSING).astype(np.int8),
+        'pred1': _small(raw[:, 2].tolist()),
+        'pred2': _small(raw[:, 3].tolist()),
+        'real1': score1[rows],
+        'real2': score2[rows],
+        'points': points,
+        'points_type': points_type,
+    }
+
+    decided_groups = {
+        g.group_name for g in session.query(GroupResult).all()
+        if g.first_place_team_id and g.second_place_team_id
+    }
+    group_preds = session.query(GroupPrediction).order_by(GroupPrediction.user_id, GroupPrediction.group_name).all()
+    group_table = {
+        'user': np.array([user_row[g.user_id] for g in group_preds], dtype=np.int32),
+        'group': _encode([g.group_name for g in group_preds], groups),
+        'first': team_column([code_by_team_id.get(g.first_place_team_id) for g in group_preds]),
+        'second': team_column([code_by_team_id.get(g.second_place_team_id) for g in group_preds]),
+        'points': np.array([(g.points_awarded or 0) if g.group_name in decided_groups else 0
+                            for g in group_preds], dtype=np.int16),
+    }
+
+    champion = session.query(TournamentResult).filter_by(result_type='champion').first()
+    podium_decided = bool(champion and champion.team_id)
+    podium_preds = session.query(PodiumPrediction).order_by(PodiumPrediction.user_id).all()
+    podium_table = {
+        'user': np.array([user_row[p.user_id] for p in podium_preds], dtype=np.int32),
+        'champion': team_column([code_by_team_id.get(p.champion_team_id) for p in podium_preds]),
+        'runner_up': team_column([code_by_team_id.get(p.runner_up_team_id) for p in podium_preds]),
+        'third': team_column([code_by_team_id.get(p.third_place_team_id) for p in podium_preds]),
+        'points': np.array([(p.points_awarded or 0) if podium_decided else 0
+                            for p in podium_preds], dtype=np.int16),
+    }
+
+    return dictionaries, {
+        'users': user_table,
+        'matches': match_table,
+        'predictions': prediction_table,
+        'group_predictions': group_table,
+        'podium_predictions': podium_table,
+    }
+
+
+def _aligned(n):
+    return (n + ALIGN - 1) // ALIGN * ALIGN
+
+
+def write_columnar(path, tables, dictionaries, meta=None):
+    """Grava o arquivo colunar em `path` de forma atômica. Retorna o tamanho em bytes."""
+    layout, offset = {}, 0
+    for name, columns in tables.items():
+        rows = len(next(iter(columns.values()))) if columns else 0
+        layout[name] = {'rows': rows, 'columns': {}}
+        for column, array in columns.items():
+            array = np.ascontiguousarray(array)
+            columns[column] = array
+            layout[name]['columns'][column] = {'dtype': array.dtype.str, 'offset': offset}
+            offset = _aligned(offset + array.nbytes)
+
+    header = json.dumps({
+        'format': FORMAT_VERSION,
+        **(meta or {}),
+        'dictionaries': dictionaries,
+        'tables': layout,
+    }, ensure_ascii=False).encode('utf-8')
+    data_start = _aligned(len(MAGIC) + 4 + len(header))
+
+    # Nome temporário único: sessões do Streamlit são threads do mesmo processo
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)),
+                                    prefix=os.path.basename(path) + '.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(MAGIC)
+            f.write(len(header).to_bytes(4, 'little'))
+            f.write(header)
+            for name, columns in tables.items():
+                for column, array in columns.items():
+                    f.seek(data_start + layout[name]['columns'][column]['offset'])
+                    f.write(array.tobytes())
+            f.truncate(data_start + offset)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return data_start + offset
+
+
+def export_analytics(session, path=EXPORT_PATH, engine=None):
+    """
+    Gera o arquivo colunar a partir do banco. As versões são lidas antes dos
+    dados: se algo mudar durante a leitura, o arquivo já nasce desatualizado
+    e o próximo get_analytics o regera.
+    """
+    from data_version import invalidate_data_versions
+
+    engine = engine or session.get_bind()
+    invalidate_data_versions()
+    key = _freshness_key(session, engine)
+    dictionaries, tables = build_tables(session)
+    size = write_columnar(path, tables, dictionaries, meta={
+        'generated_at': datetime.utcnow().isoformat(),
+        'key': key,
+    })
+    with _lock:
+        _cache.pop(path, None)
+    return {name: len(next(iter(columns.values()))) for name, columns in tables.items()}, size
+
+
+def _freshness_key(session, engine):
+    """Versões que invalidam a exportação (como a chave de ranking_cache);
+    a de jogos vem primeiro (ver _is_fresh)."""
+    from data_version import get_data_versions, MATCHES, GROUP_RESULTS, PODIUM
+    from db import get_config_value, CONFIG_VERSION_KEY
+
+    versions = get_data_versions(engine)
+    return [versions.get(MATCHES, 0), versions.get(GROUP_RESULTS, 0), versions.get(PODIUM, 0),
+            get_config_value(session, CONFIG_VERSION_KEY, '0')]
+
+
+# =============================================================================
+# Leitura
+# =============================================================================
+
+class ColumnarExport:
+    """Arquivo colunar aberto: colunas como np.memmap somente leitura."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} não é uma exportação colunar do bolão")
+            size = int.from_bytes(f.read(4), 'little')
+            self.header = json.loads(f.read(size).decode('utf-8'))
+        if self.header.get('format') != FORMAT_VERSION:
+            raise ValueError(f"Versão de formato não suportada: {self.header.get('format')}")
+        self._data_start = _aligned(len(MAGIC) + 4 + size)
+        self.dictionaries = self.header['dictionaries']
+        self._tables = {}
+
+    @property
+    def generated_at(self):
+        return datetime.fromisoformat(self.header['generated_at'])
+
+    def table(self, name) -> dict:
+        """{coluna: array} da tabela, mapeada do arquivo sob demanda."""
+        if name not in self._tables:
+            spec = self.header['tables'][name]
+            rows = spec['rows']
+            columns = {}
+            for column, info in spec['columns'].items():
+                dtype = np.dtype(info['dtype'])
+                if rows == 0:
+                    columns[column] = np.empty(0, dtype=dtype)
+                else:
+                    columns[column] = np.memmap(self.path, dtype=dtype, mode='r',
+                                                offset=self._data_start + info['offset'], shape=(rows,))
+            self._tables[name] = columns
+        return self._tables[name]
+
+    def decode(self, dictionary, code):
+        """Valor de um código de dicionário (None para -1)."""
+        values = self.dictionaries[dictionary]
+        return values[code] if 0 <= code < len(values) else None
+
+    def team_label(self, code):
+        """"🇧🇷 Brasil" para seleção, o próprio código para placeholder."""
+        name = self.decode('team_name', code)
+        if name is None:
+            return self.decode('team', code) or '?'
+        return f"{self.decode('team_flag', code) or ''} {name}".strip()
+
+
+def open_export(path=EXPORT_PATH):
+    """Exportação em `path`, ou None se ausente ou ilegível."""
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return None
+    with _lock:
+        cached = _cache.get(path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+    try:
+        export = ColumnarExport(path)
+    except (OSError, ValueError, KeyError):
+        return None
+    with _lock:
+        _cache[path] = (mtime, export)
+    return export
+
+
+def _is_fresh(export, key):
+    """
+    Mesmas versões e menos de EXPORT_MAX_AGE segundos; se só a versão de
+    jogos (key[0]) mudou, vale até EXPORT_DEBOUNCE segundos.
+    """
+    if export is None:
+        return False
+    stored = export.header.get('key')
+    age = (datetime.utcnow() - export.generated_at).total_seconds()
+    if stored == key:
+        return age < EXPORT_MAX_AGE
+    return bool(stored) and stored[1:] == key[1:] and age < EXPORT_DEBOUNCE
+
+
+def get_analytics(engine, path=EXPORT_PATH) -> ColumnarExport:
+    """
+    Exportação atual para as telas de estatística: a do disco enquanto as
+    versões dos dados (e da pontuação) forem as mesmas com que foi gerada
+    e ela tiver menos de EXPORT_MAX_AGE segundos; senão, regera antes.
+
+    A regeração é feita por uma sessão de cada vez (_build_lock): quem
+    esperava confere de novo e usa o arquivo que a outra acabou de gravar.
+    """
+    from db import session_scope
+
+    with session_scope(engine) as session:
+        key = _freshness_key(session, engine)
+        export = open_export(path)
+        if _is_fresh(export, key):
+            return export
+        with _build_lock:
+            export = open_export(path)
+            if _is_fresh(export, key):
+                return export
+            export_analytics(session, path, engine)
+            return open_export(path)
+
+
+# =============================================================================
+# Agregações usadas pelas telas
+# =============================================================================
+
+def user_totals(export) -> dict:
+    """
+    Por participante (índice da tabela users): pontos totais, placares
+    exatos e resultados corretos — os mesmos números de
+    scoring.get_user_stats, para todos de uma vez.
+    """
+    n = len(export.table('users')['id'])
+    preds = export.table('predictions')
+    scored = export.table('matches')['scored'][preds['match']]
+    user, points_type = preds['user'][scored], preds['points_type'][scored]
+    exact = points_type == POINTS_TYPES.index('placar_exato')
+    correct = np.isin(points_type, [POINTS_TYPES.index(t) for t in ('placar_exato', 'resultado_gols', 'resultado')])
+
+    groups, podium = export.table('group_predictions'), export.table('podium_predictions')
+    total = (np.bincount(user, weights=preds['points'][scored], minlength=n)
+             + np.bincount(groups['user'], weights=groups['points'], minlength=n)
+             + np.bincount(podium['user'], weights=podium['points'], minlength=n))
+    return {
+        'total_pontos': total.astype(np.int64),
+        'placares_exatos': np.bincount(user[exact], minlength=n),
+        'resultados_corretos': np.bincount(user[correct], minlength=n),
+    }
+
+
+def top_scores(export, limit=10) -> list:
+    """[(gols1, gols2, palpites)] dos placares mais apostados."""
+    preds = export.table('predictions')
+    pairs = preds['pred1'].astype(np.int32) * 256 + preds['pred2'].astype(np.int32)
+    values, counts = np.unique(pairs, return_counts=True)
+    order = np.argsort(-counts, kind='stable')[:limit]
+    return [(int(values[i] // 256), int(values[i] % 256), int(counts[i])) for i in order]
+
+
+def top_champions(export) -> list:
+    """[(código do time no dicionário, palpites)] dos campeões mais apostados."""
+    champion = export.table('podium_predictions')['champion']
+    champion = champion[champion >= 0]
+    counts = np.bincount(champion, minlength=len(export.dictionaries['team']))
+    order = np.argsort(-counts, kind='stable')
+    return [(int(code), int(counts[code])) for code in order if counts[code]]
+
+
+def exact_scores_by_match(export, limit=5) -> list:
+    """[(linha em matches, placares exatos)] dos jogos encerrados com mais
+    placares exatos — jogo ao vivo não entra, como no original."""
+    preds = export.table('predictions')
+    matches = export.table('matches')
+    exact = ((preds['points_type'] == POINTS_TYPES.index('placar_exato'))
+             & matches['finished'][preds['match']])
+    counts = np.bincount(preds['match'][exact], minlength=len(matches['match_number']))
+    order = np.argsort(-counts, kind='stable')[:limit]
+    return [(int(row), int(counts[row])) for row in order if counts[row]]
+
+
+def user_points_by_day(export, user_id, now=None) -> dict:
+    """{'dd/mm': pontos} dos jogos já iniciados do participante, em ordem de data."""
+    users = export.table('users')
+    found = np.flatnonzero(users['id'] == user_id)
+    if not len(found):
+        return {}
+    preds = export.table('predictions')
+    matches = export.table('matches')
+    mine = (preds['user'] == found[0]) & (preds['points'] > 0)
+    rows = preds['match'][mine]
+    kickoff = matches['kickoff'][rows]
+    started = kickoff <= np.datetime64(now or _now_brazil_naive(), 's')
+    days = kickoff[started].astype('datetime64[D]')
+    points = preds['points'][mine][started]
+
+    by_day = {}
+    for day in np.unique(days):
+        label = day.astype(datetime).strftime('%d/%m')
+        by_day[label] = int(points[days == day].sum())
+    return by_day
+
+
+def main():
+    from db import get_engine, session_scope
+
+    path = sys.argv[1] if len(sys.argv) > 1 else EXPORT_PATH
+    database_url = os.environ.get('NEON_CONNECTION_STRING', '').strip() or None
+    engine = get_engine(database_url)
+    start = time.perf_counter()
+    with session_scope(engine) as session:
+        counts, size = export_analytics(session, path, engine)
+    print(f"Exportação colunar gravada em {path} ({size / 1024:.0f} KB, "
+          f"{time.perf_counter() - start:.1f}s): {counts}")
+
+
+if __name__ == '__main__':
+    main()
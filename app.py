@@ -15,8 +15,8 @@ from streamlit_cookies_controller import CookieController
 cookie_controller = CookieController()
 
 from db import (
-    init_database, get_session, get_engine, get_config_value, set_config_value,
-    init_database_with_copa2026, session_scope
+    init_database, get_session, get_engine, get_config_value, set_config_value, set_config_values,
+    init_database_with_copa2026, session_scope, get_pool_metrics
 )
 from auth import authenticate_user, hash_password, change_password, create_user
 from models import (
@@ -32,12 +32,18 @@ from novas_funcionalidades import (
     render_ranking_evolution_chart, render_achievements,
     render_best_predictions, render_comparison,
     page_regras, render_general_stats,
-    export_ranking_pdf, admin_backup_database
+    export_ranking_pdf, admin_backup_database, admin_bulk_receipts
 )
+from ranking_state import get_incremental_ranking, clear_user_state
+from data_version import get_data_versions, MATCHES, GROUP_RESULTS, PODIUM, PRIZE_STATUS
+from ranking_cache import get_cached_ranking, mark_ranking_changed, get_ranking_cache_stats
+from prize_status import get_prize_status, STATUS_LABELS, CLINCHED, ELIMINATED
+from predictions import get_user_predictions, save_predictions_bulk
 from bracket_propagation import (
     propagate_all, propagate_after_group_result, propagate_after_match_result
 )
 from pdf_generator import generate_user_backup_pdf, get_brazil_time_str
+from receipts_batch import collect_receipt_data
 
 SELECOES_REPESCAGEM = {
     # Repescagem Europa (4 vagas)
@@ -1139,12 +1145,38 @@ def init_app():
 engine = init_app()
 
 # =============================================================================
-# CACHE DO RANKING (TTL 60s para reduzir carga no banco)
+# CACHE DO RANKING (compartilhado por todas as sessões - ranking_cache.py)
 # =============================================================================
-@st.cache_data(ttl=60)
 def cached_ranking(_engine):
-    with session_scope(_engine) as session:
-        return get_ranking(session)
+    # Recalculado só quando placares, grupos, pódio, pontuação ou
+    # participantes mudam; as escritas do app e do cron avisam o cache
+    return get_cached_ranking(_engine)
+
+
+# =============================================================================
+# DADOS DAS TELAS AO VIVO (recalculados só quando a versão de dados muda)
+# =============================================================================
+def version_cached(name, loader, keys=(MATCHES,), max_age=300):
+    """
+    Resultado de loader() guardado na sessão do navegador, reaproveitado
+    enquanto as versões de dados em `keys` (data_version.py) não mudarem.
+    Nos refresh automáticos dos fragments sem mudança, nenhuma consulta é
+    feita além da leitura das versões (compartilhada pelo processo).
+
+    max_age: segundos até recarregar mesmo sem mudança de versão (cobre o
+    que depende do relógio, como jogo "ao vivo" pelo horário de início).
+    """
+    versions = get_data_versions(engine)
+    stamp = tuple(versions.get(k, 0) for k in keys)
+    cache = st.session_state.setdefault('_version_cache', {})
+    entry = cache.get(name)
+    now = time.monotonic()
+    if entry and entry[0] == stamp and now - entry[1] < max_age:
+        return entry[2]
+
+    value = loader()
+    cache[name] = (stamp, now, value)
+    return value
 
 # =============================================================================
 # GERENCIAMENTO DE SESSÃO
@@ -1356,7 +1388,11 @@ def _live_jogos_home_fragment():
 
     _now_br = get_brazil_time().replace(tzinfo=None)
     with session_scope(engine) as session:
-        _jogos_live = [m for m in _get_ongoing(session) if m['is_live']]
+        _jogos_live = version_cached(
+            'home_jogos_live',
+            lambda: [m for m in _get_ongoing(session) if m['is_live']],
+            max_age=60
+        )
 
     if _jogos_live:
         st.markdown("### 🔴 Jogos ao Vivo")
@@ -1538,31 +1574,83 @@ def _save_palpite_jogo(user_id, match_id, manually_confirmed=False):
     antigo ainda carregado num navegador aberto desde antes do início do
     jogo podia, ao disparar o on_change por qualquer motivo, regravar um
     palpite desatualizado por cima de um ajuste mais recente do agente
-    (foi exatamente o que aconteceu com o jogo de Portugal x Uzbequistão)."""
+    (foi exatamente o que aconteceu com o jogo de Portugal x Uzbequistão).
+
+    O comando fica em predictions.save_predictions_bulk, o mesmo usado pelo
+    modo lista (vários jogos de uma vez)."""
     gols1 = st.session_state.get(f"gols1_{match_id}")
     gols2 = st.session_state.get(f"gols2_{match_id}")
     if gols1 is None or gols2 is None:
         return
 
-    now_brt = get_brazil_time().replace(tzinfo=None)
-
     with session_scope(engine) as session:
-        session.execute(
-            text("""
-                INSERT INTO predictions (user_id, match_id, pred_team1_score, pred_team2_score, manually_confirmed, created_at, updated_at)
-                SELECT :user_id, :match_id, :g1, :g2, :confirmed, :now, :now
-                FROM matches
-                WHERE id = :match_id AND status = 'scheduled' AND datetime > :now_brt
-                ON CONFLICT (user_id, match_id) DO UPDATE
-                SET pred_team1_score = EXCLUDED.pred_team1_score,
-                    pred_team2_score = EXCLUDED.pred_team2_score,
-                    manually_confirmed = CASE WHEN :confirmed THEN TRUE ELSE predictions.manually_confirmed END,
-                    updated_at = EXCLUDED.updated_at
-                WHERE predictions.locked_at IS NULL
-            """),
-            {"user_id": user_id, "match_id": match_id, "g1": gols1, "g2": gols2,
-             "confirmed": manually_confirmed, "now": datetime.utcnow(), "now_brt": now_brt}
-        )
+        save_predictions_bulk(session, user_id, {match_id: (int(gols1), int(gols2))},
+                              manually_confirmed=manually_confirmed)
+
+
+def _form_palpites_em_lote(session, user_id, jogos, palpites):
+    """Modo lista: todos os jogos ainda abertos do filtro num único formulário,
+    gravados de uma vez com save_predictions_bulk (um só INSERT ... ON CONFLICT).
+    Jogos sem palpite começam em branco e só entram no envio se o participante
+    preencher os dois placares — nada de 0x0 confirmado que ele não digitou.
+    O prazo de cada jogo é conferido de novo no banco no momento do envio."""
+    # Resultado do último envio: gravado antes do st.rerun, mostrado aqui
+    for tipo, mensagem in st.session_state.pop('palpites_lote_msgs', []):
+        getattr(st, tipo)(mensagem)
+
+    abertos = [m for m in jogos if can_predict_match(m)]
+    if not abertos:
+        st.info("Nenhum jogo aberto para palpite com esses filtros.")
+        return
+
+    with st.form("palpites_em_lote"):
+        for match in abertos:
+            pred = palpites.get(match.id)
+            team1_display = get_team_display(match.team1, match.team1_code)
+            team2_display = get_team_display(match.team2, match.team2_code)
+            col_jogo, col1, col2 = st.columns([3, 1, 1])
+            with col_jogo:
+                salvo = " ✅" if pred else ""
+                st.markdown(f"{format_time(match.datetime)} — **{team1_display}** x **{team2_display}**{salvo}")
+            with col1:
+                st.number_input(
+                    f"Gols {team1_display}", min_value=0, max_value=20,
+                    value=pred.pred_team1_score if pred else None, placeholder="-",
+                    key=f"lote1_{match.id}", label_visibility="collapsed"
+                )
+            with col2:
+                st.number_input(
+                    f"Gols {team2_display}", min_value=0, max_value=20,
+                    value=pred.pred_team2_score if pred else None, placeholder="-",
+                    key=f"lote2_{match.id}", label_visibility="collapsed"
+                )
+        enviado = st.form_submit_button("💾 Salvar palpites", use_container_width=True)
+
+    if enviado:
+        lote, incompletos = {}, 0
+        for m in abertos:
+            gols1 = st.session_state.get(f"lote1_{m.id}")
+            gols2 = st.session_state.get(f"lote2_{m.id}")
+            if gols1 is None and gols2 is None:
+                continue  # em branco: o participante não palpitou neste jogo
+            if gols1 is None or gols2 is None:
+                incompletos += 1
+                continue
+            lote[m.id] = (int(gols1), int(gols2))
+        salvos = save_predictions_bulk(session, user_id, lote, manually_confirmed=True)
+        session.commit()
+        recusados = len(lote) - len(salvos)
+        mensagens = [('success', f"✅ {len(salvos)} palpites salvos com sucesso!")] if salvos else []
+        if incompletos:
+            mensagens.append(('warning', f"✏️ {incompletos} palpite(s) com só um placar preenchido "
+                                         "não foram salvos."))
+        if recusados:
+            mensagens.append(('warning', f"⏰ {recusados} palpite(s) não foram salvos: "
+                                         "o jogo já começou ou o palpite está travado."))
+        if not mensagens:
+            mensagens.append(('info', "Nenhum placar preenchido."))
+        st.session_state['palpites_lote_msgs'] = mensagens
+        st.rerun()
 
 
 def page_palpites_jogos():
@@ -1592,6 +1680,14 @@ def page_palpites_jogos():
         
         jogos = query.all()
         
+        # Todos os palpites do usuário numa consulta (em vez de uma por jogo)
+        user_id = st.session_state.user['id']
+        palpites = get_user_predictions(session, user_id)
+
+        if st.toggle("📋 Modo lista (salvar vários palpites de uma vez)", key="palpites_modo_lista"):
+            _form_palpites_em_lote(session, user_id, jogos, palpites)
+            return
+
         # Agrupa por data
         jogos_por_data = {}
         for jogo in jogos:
@@ -1634,11 +1730,7 @@ def page_palpites_jogos():
                     st.markdown(f"{fase_badge_html(match.phase)} &nbsp; 📍 {match.city}{grupo_info}", unsafe_allow_html=True)
 
                     
-                    # Busca palpite existente
-                    pred = session.query(Prediction).filter_by(
-                        user_id=st.session_state.user['id'],
-                        match_id=match.id
-                    ).first()
+                    pred = palpites.get(match.id)
                     
                     # Mostra indicação de palpite salvo
                     if pred:
@@ -2339,6 +2431,15 @@ def _ranking_live_fragment(qtd_rebaixados):
             3: get_config_value(_cfg_session, 'premiacao_terceiro', ''),
         }
 
+    # Garantidos/eliminados da premiação (prize_status.py, gravado pelo cron)
+    def _load_prize_status():
+        with session_scope(engine) as _ps_session:
+            try:
+                return get_prize_status(_ps_session)
+            except Exception:
+                return {}  # tabela ainda não criada pelo cron
+    situacao_premio = version_cached('prize_status', _load_prize_status, keys=(PRIZE_STATUS,))
+
     # Adiciona marca d'água do logo Copa 2026
     st.markdown('<div class="ranking-watermark"></div>', unsafe_allow_html=True)
         
@@ -2452,6 +2553,13 @@ def _ranking_live_fragment(qtd_rebaixados):
             if pontos_grupos > 0 else ''
         )
         badge_podio = f'<span class="ranking-podio" title="Pontos de pódio">🏆 {pontos_podio}</span>'
+        situacao = situacao_premio.get(r.get('user_id'))
+        badge_premio = (
+            f'<span class="ranking-premio" title="{STATUS_LABELS[situacao["status"]]} '
+            f'(posição final possível: {situacao["melhor_posicao"]}º a {situacao["pior_posicao"]}º)">'
+            f'{STATUS_LABELS[situacao["status"]].split(" ")[0]}</span>'
+            if situacao and situacao['status'] in (CLINCHED, ELIMINATED) else ''
+        )
 
         # Verifica se está na zona de rebaixamento
         is_rebaixado = posicao > inicio_rebaixamento and qtd_rebaixados > 0
@@ -2484,6 +2592,7 @@ def _ranking_live_fragment(qtd_rebaixados):
             f'<span class="ranking-exatos">🎯 {placares_exatos}</span>'
             f'{badge_grupos}'
             f'{badge_podio}'
+            f'{badge_premio}'
             f'<div class="ranking-pontos">{pontos} pts</div>'
         )
 
@@ -2772,6 +2881,12 @@ def page_ranking():
                 white-space: nowrap;
             }
 
+            .ranking-premio {
+                font-size: 0.85rem;
+                padding: 4px 6px;
+                cursor: help;
+            }
+
             /* Agrupa os badges (aproveitamento, exatos, pontos) à direita do
                nome. Em telas largas ficam numa linha só; em telas estreitas
                quebram para uma linha abaixo do nome, em vez de espremer ou
@@ -3042,126 +3157,101 @@ def page_estatisticas():
         # ========================================
         st.subheader("📈 Evolução de Pontos")
         
-        # Busca todos os palpites do usuário com pontos de jogos que já iniciaram
-        from datetime import datetime
-        import pytz
-        
-        now = datetime.now(pytz.timezone('America/Sao_Paulo'))
+        # Pontos por dia dos jogos que já iniciaram, da exportação colunar
+        # (analytics_export.py) — sem uma consulta por palpite
+        from analytics_export import get_analytics, user_points_by_day
         
-        # Busca palpites com pontos
-        user_predictions = session.query(Prediction).filter(
-            Prediction.user_id == st.session_state.user['id'],
-            Prediction.points_awarded > 0
-        ).all()
+        pontos_por_data = user_points_by_day(get_analytics(engine), st.session_state.user['id'])
         
-        if user_predictions:
-            # Agrupa pontos por data do jogo (apenas jogos que já iniciaram)
-            pontos_por_data = {}
-            for pred in user_predictions:
-                match = session.query(Match).get(pred.match_id)
-                if match and match.datetime:
-                    # Só considera se o jogo já iniciou
-                    match_time = match.datetime
-                    if match_time.tzinfo is None:
-                        match_time = pytz.timezone('America/Sao_Paulo').localize(match_time)
-                    
-                    if match_time <= now:
-                        data_str = match.datetime.strftime('%d/%m')
-                        if data_str not in pontos_por_data:
-                            pontos_por_data[data_str] = 0
-                        pontos_por_data[data_str] += pred.points_awarded
+        if pontos_por_data:
+            # Ordena por data
+            datas = list(pontos_por_data.keys())
+            pontos = list(pontos_por_data.values())
             
-            if pontos_por_data:
-                # Ordena por data
-                datas = list(pontos_por_data.keys())
-                pontos = list(pontos_por_data.values())
-                
-                # Calcula pontos acumulados
-                pontos_acumulados = []
-                acumulado = 0
-                for p in pontos:
-                    acumulado += p
-                    pontos_acumulados.append(acumulado)
-                
-                # Calcula limites dinâmicos para os eixos
-                max_acumulado = max(pontos_acumulados) if pontos_acumulados else 0
-                max_dia = max(pontos) if pontos else 0
-                
-                # Usa o maior valor entre os dois para ter a mesma escala
-                y_max = max(max_acumulado, max_dia) * 1.2 if max(max_acumulado, max_dia) > 0 else 10
-                
-                # Cria gráfico com Plotly
-                fig = go.Figure()
-                
-                # Linha de evolução
-                fig.add_trace(go.Scatter(
-                    x=datas,
-                    y=pontos_acumulados,
-                    mode='lines+markers',
-                    name='Pontos Acumulados',
-                    line=dict(color='#3498db', width=3),
-                    marker=dict(size=10, color='#2980b9'),
-                    fill='tozeroy',
-                    fillcolor='rgba(52, 152, 219, 0.2)'
-                ))
-                
-                # Barras de pontos por dia
-                fig.add_trace(go.Bar(
-                    x=datas,
-                    y=pontos,
-                    name='Pontos no Dia',
-                    marker_color='rgba(46, 204, 113, 0.7)',
-                    yaxis='y2',
-                    width=0.4,  # Largura mais fina das barras
-                    opacity=0.6
-                ))
-                
-                fig.update_layout(
-                    title='🏆 Sua Evolução no Bolão',
-                    xaxis_title='Data',
-                    yaxis=dict(
-                        title='Pontos Acumulados',
-                        range=[0, y_max]
-                    ),
-                    yaxis2=dict(
-                        title='Pontos no Dia',
-                        overlaying='y',
-                        side='right',
-                        range=[0, y_max]  # Mesma escala do eixo esquerdo
-                    ),
-                    legend=dict(
-                        orientation='h',
-                        yanchor='bottom',
-                        y=1.02,
-                        xanchor='right',
-                        x=1
-                    ),
-                    hovermode='x unified',
-                    plot_bgcolor='white',
-                    paper_bgcolor='white'
-                )
-                
-                # Atualiza cores dos eixos e linhas de grade
-                fig.update_xaxes(
-                    title_font_color='black', 
-                    tickfont_color='black',
-                    showgrid=True,
-                    gridcolor='rgba(200, 200, 200, 0.3)',
-                    gridwidth=1
-                )
-                fig.update_yaxes(
-                    title_font_color='black', 
-                    tickfont_color='black',
-                    showgrid=True,
-                    gridcolor='rgba(200, 200, 200, 0.3)',
-                    gridwidth=1
-                )
-                # Remove linhas de grade do eixo Y secundário para evitar duplicação
-                fig.update_yaxes(showgrid=False, selector=dict(overlaying='y'))
-                
-                st.plotly_chart(fig, use_container_width=True)
-            else:
-                st.info("📊 Ainda não há dados suficientes para o gráfico de evolução.")
+            # Calcula pontos acumulados
+            pontos_acumulados = []
+            acumulado = 0
+            for p in pontos:
+                acumulado += p
+                pontos_acumulados.append(acumulado)
+            
+            # Calcula limites dinâmicos para os eixos
+            max_acumulado = max(pontos_acumulados) if pontos_acumulados else 0
+            max_dia = max(pontos) if pontos else 0
+            
+            # Usa o maior valor entre os dois para ter a mesma escala
+            y_max = max(max_acumulado, max_dia) * 1.2 if max(max_acumulado, max_dia) > 0 else 10
+            
+            # Cria gráfico com Plotly
+            fig = go.Figure()
+            
+            # Linha de evolução
+            fig.add_trace(go.Scatter(
+                x=datas,
+                y=pontos_acumulados,
+                mode='lines+markers',
+                name='Pontos Acumulados',
+                line=dict(color='#3498db', width=3),
+                marker=dict(size=10, color='#2980b9'),
+                fill='tozeroy',
+                fillcolor='rgba(52, 152, 219, 0.2)'
+            ))
+            
+            # Barras de pontos por dia
+            fig.add_trace(go.Bar(
+                x=datas,
+                y=pontos,
+                name='Pontos no Dia',
+                marker_color='rgba(46, 204, 113, 0.7)',
+                yaxis='y2',
+                width=0.4,  # Largura mais fina das barras
+                opacity=0.6
+            ))
+            
+            fig.update_layout(
+                title='🏆 Sua Evolução no Bolão',
+                xaxis_title='Data',
+                yaxis=dict(
+                    title='Pontos Acumulados',
+                    range=[0, y_max]
+                ),
+                yaxis2=dict(
+                    title='Pontos no Dia',
+                    overlaying='y',
+                    side='right',
+                    range=[0, y_max]  # Mesma escala do eixo esquerdo
+                ),
+                legend=dict(
+                    orientation='h',
+                    yanchor='bottom',
+                    y=1.02,
+                    xanchor='right',
+                    x=1
+                ),
+                hovermode='x unified',
+                plot_bgcolor='white',
+                paper_bgcolor='white'
+            )
+            
+            # Atualiza cores dos eixos e linhas de grade
+            fig.update_xaxes(
+                title_font_color='black', 
+                tickfont_color='black',
+                showgrid=True,
+                gridcolor='rgba(200, 200, 200, 0.3)',
+                gridwidth=1
+            )
+            fig.update_yaxes(
+                title_font_color='black', 
+                tickfont_color='black',
+                showgrid=True,
+                gridcolor='rgba(200, 200, 200, 0.3)',
+                gridwidth=1
+            )
+            # Remove linhas de grade do eixo Y secundário para evitar duplicação
+            fig.update_yaxes(showgrid=False, selector=dict(overlaying='y'))
+            
+            st.plotly_chart(fig, use_container_width=True)
         else:
             st.info("📊 Você ainda não pontuou em nenhum jogo. Aguarde os resultados!")
         
@@ -4216,6 +4306,47 @@ document.getElementById('ph-leg').innerHTML=TRIO.map(legHTML).join('');
 
     st.components.v1.html(html, height=3200, scrolling=True)
 
+    # ── chances de título (simulação Monte Carlo) ─────────────────────────────
+    st.markdown("### 🎲 Chances de título")
+    st.caption("Sorteia os jogos que faltam e pontua cada torneio simulado com as regras do bolão. "
+               "Força das seleções: Power Ranking FIFA ou Elo dos jogos internacionais.")
+    col_src, col_n = st.columns(2)
+    with col_src:
+        fonte = st.radio("Força das seleções", ['fifa', 'elo'], horizontal=True, key="sim_fonte",
+                         format_func=lambda f: "Ranking FIFA" if f == 'fifa' else "Elo (international_results)")
+    with col_n:
+        # Roda na requisição: até 20.000 sorteios (erro padrão < 0,4 p.p.)
+        n_sims = st.select_slider("Simulações", options=[5_000, 10_000, 20_000], value=10_000, key="sim_n")
+
+    if st.button("▶️ Simular", key="btn_simular"):
+        from tournament_simulator import load_model, simulate
+
+        def _run_simulation():
+            with session_scope(engine) as session:
+                model = load_model(session, source=fonte)
+            return simulate(model, n_simulations=n_sims)
+
+        with st.spinner("Simulando..."):
+            st.session_state['simulacao_titulo'] = version_cached(
+                f"simulacao_{fonte}_{n_sims}", _run_simulation,
+                keys=(MATCHES, GROUP_RESULTS, PODIUM), max_age=3600
+            )
+
+    sim = st.session_state.get('simulacao_titulo')
+    if sim and sim['rows']:
+        import pandas as pd
+        df_sim = pd.DataFrame([{
+            'Participante': r['nome'],
+            'Pontos': r['pontos_atuais'],
+            'Média final': r['pontos_medios'],
+            '🥇 1º': f"{r['p_primeiro']:.1%}",
+            '🥈 2º': f"{r['p_segundo']:.1%}",
+            '🥉 3º': f"{r['p_terceiro']:.1%}",
+            '⬇️ Rebaixamento': f"{r['p_rebaixamento']:.1%}",
+        } for r in sim['rows']])
+        st.dataframe(df_sim, use_container_width=True, hide_index=True)
+        st.caption(f"{sim['simulations']:,} simulações em {sim['elapsed_ms'] / 1000:.1f}s".replace(',', '.'))
+
 
 # =============================================================================
 # PÁGINA DE ADMINISTRAÇÃO
@@ -4229,6 +4360,19 @@ def page_admin():
     render_page_header()
     st.markdown("## 🔧 Painel Administrativo")
     
+    _cache_stats = get_ranking_cache_stats()
+    st.caption(
+        f"Cache do ranking: {_cache_stats['hits']} acertos, {_cache_stats['misses']} recálculos, "
+        f"{_cache_stats['invalidations']} invalidações"
+        + (f" | último recálculo {_cache_stats['last_compute_ms']} ms" if _cache_stats['last_compute_ms'] is not None else "")
+    )
+    _pool = get_pool_metrics(engine)
+    st.caption(
+        f"Pool do banco: {_pool.get('checkedout', 0)} em uso, {_pool.get('checkedin', 0)} livres, "
+        f"{_pool.get('connects', 0)} conexões abertas, {_pool.get('checkouts', 0)} usos"
+        + (f" | abertura média {_pool['connect_ms_avg']} ms" if _pool.get('connect_ms_avg') is not None else "")
+    )
+    
     with session_scope(engine) as session:
         tabs = st.tabs([
             "👥 Participantes",
@@ -4280,6 +4424,8 @@ def page_admin():
 
         with tabs[11]:
             admin_backup_database(session)
+            st.divider()
+            admin_bulk_receipts(session)
 
 
 def admin_participantes(session):
@@ -4352,6 +4498,8 @@ def admin_participantes(session):
                             session.query(Prediction).filter(Prediction.user_id == user.id).delete()
                             session.query(GroupPrediction).filter(GroupPrediction.user_id == user.id).delete()
                             session.query(PodiumPrediction).filter(PodiumPrediction.user_id == user.id).delete()
+                            # Estado do ranking incremental referencia o usuário
+                            clear_user_state(session, user.id)
                             
                             # Registrar ação antes de deletar
                             log_action(session, st.session_state.user['id'], 'participante_excluido', user.id, 
@@ -4743,6 +4891,7 @@ def admin_grupos(session):
             
             # Remove todos os resultados de grupo
             session.query(GroupResult).delete()
+            mark_ranking_changed(session, GROUP_RESULTS)
             session.commit()
             
             st.success("✅ Todos os resultados de grupos apagados!")
@@ -4849,6 +4998,7 @@ def admin_grupos(session):
                     
                     # Remove o resultado do grupo
                     session.delete(result)
+                    mark_ranking_changed(session, GROUP_RESULTS)
                     session.commit()
                     
                     st.success(f"Resultado do Grupo {grupo} apagado!")
@@ -4933,6 +5083,7 @@ def admin_podio(session):
             
             # Remove os resultados do pódio
             session.query(TournamentResult).delete()
+            mark_ranking_changed(session, PODIUM)
             session.commit()
             
             st.success("Pódio apagado!")
@@ -4950,8 +5101,8 @@ def admin_pontuacao(session):
     pontos_config = {
         'placar_exato': ('Placar Exato (acertou tudo)', 20),
         'resultado_gols': ('Resultado + Gols de um time', 15),
-        'apenas_resultado': ('Apenas Resultado (vitória/empate)', 10),
-        'apenas_gols': ('Apenas Gols de um time', 5),
+        'resultado': ('Apenas Resultado (vitória/empate)', 10),
+        'gols': ('Apenas Gols de um time', 5),
         'nenhum': ('Nenhum acerto', 0),
     }
     
@@ -4962,8 +5113,8 @@ def admin_pontuacao(session):
             pontos_values[key] = st.number_input(label, min_value=0, max_value=100, value=int(current), key=f"pts_{key}")
         
         if st.form_submit_button("💾 Salvar Pontuação de Jogos"):
-            for key, value in pontos_values.items():
-                set_config_value(session, f'pontos_{key}', value, category='pontuacao')
+            set_config_values(session, {f'pontos_{key}': value for key, value in pontos_values.items()},
+                              category='pontuacao')
             st.success("Pontuação de jogos salva!")
     
     # Pontuação de grupos
@@ -4982,8 +5133,8 @@ def admin_pontuacao(session):
             grupo_values[key] = st.number_input(label, min_value=0, max_value=100, value=int(current), key=f"grp_{key}")
         
         if st.form_submit_button("💾 Salvar Pontuação de Grupos"):
-            for key, value in grupo_values.items():
-                set_config_value(session, f'grupo_{key}', value, category='grupo')
+            set_config_values(session, {f'grupo_{key}': value for key, value in grupo_values.items()},
+                              category='grupo')
             st.success("Pontuação de grupos salva!")
     
     # Pontuação de pódio
@@ -5004,8 +5155,8 @@ def admin_pontuacao(session):
             podio_values[key] = st.number_input(label, min_value=0, max_value=500, value=int(current), key=f"pod_{key}")
         
         if st.form_submit_button("💾 Salvar Pontuação de Pódio"):
-            for key, value in podio_values.items():
-                set_config_value(session, f'podio_{key}', value, category='podio')
+            set_config_values(session, {f'podio_{key}': value for key, value in podio_values.items()},
+                              category='podio')
             st.success("Pontuação de pódio salva!")
     
     # Data de início da Copa
@@ -5071,11 +5222,13 @@ def admin_premiacao(session):
         )
         
         if st.form_submit_button("💾 Salvar Premiação"):
-            set_config_value(session, 'premiacao_valor_inscricao', valor_inscricao, category='premiacao')
-            set_config_value(session, 'premiacao_primeiro', premio_1, category='premiacao')
-            set_config_value(session, 'premiacao_segundo', premio_2, category='premiacao')
-            set_config_value(session, 'premiacao_terceiro', premio_3, category='premiacao')
-            set_config_value(session, 'premiacao_observacoes', observacoes, category='premiacao')
+            set_config_values(session, {
+                'premiacao_valor_inscricao': valor_inscricao,
+                'premiacao_primeiro': premio_1,
+                'premiacao_segundo': premio_2,
+                'premiacao_terceiro': premio_3,
+                'premiacao_observacoes': observacoes,
+            }, category='premiacao')
             st.success("Premiação salva!")
 
 
@@ -5480,11 +5633,17 @@ def _live_view_ao_vivo_fragment(selected_match_id):
     import streamlit as st
     from live_scoring import (
         get_ongoing_matches, get_live_match_predictions,
-        calculate_live_ranking, get_podium_zone_info
+        calculate_live_ranking, get_podium_zone_info,
+        get_whatif_table, whatif_live_view, get_next_goal_scenarios
     )
 
     with session_scope(engine) as session:
-        matches = get_ongoing_matches(session, today_only=False)
+        # Cada leitura abaixo só vai ao banco quando a versão de dados mudou
+        # (ou a cada 60s, pelo horário dos jogos); sem isso, cada navegador
+        # aberto refaz todas as consultas a cada 15s
+        matches = version_cached(
+            'ao_vivo_jogos', lambda: get_ongoing_matches(session, today_only=False), max_age=60
+        )
         started_matches = [m for m in matches if m['has_started']]
         todays_matches = [m for m in started_matches if m.get('is_today')]
 
@@ -5519,15 +5678,17 @@ def _live_view_ao_vivo_fragment(selected_match_id):
             st.subheader(titulo_pontuacao)
             
             # Dicionário para somar pontos de cada usuário
-            total_points_by_user = {}
-
-            for match in todays_matches:
-                predictions = get_live_match_predictions(session, match['id'])
-                for pred in predictions:
-                    user_name = pred['user_name']
-                    if user_name not in total_points_by_user:
-                        total_points_by_user[user_name] = {'points': 0, 'user_id': pred['user_id']}
-                    total_points_by_user[user_name]['points'] += pred['points']
+            def _load_total_points():
+                total = {}
+                for match in todays_matches:
+                    for pred in get_live_match_predictions(session, match['id']):
+                        user_name = pred['user_name']
+                        if user_name not in total:
+                            total[user_name] = {'points': 0, 'user_id': pred['user_id']}
+                        total[user_name]['points'] += pred['points']
+                return total
+
+            total_points_by_user = version_cached('ao_vivo_pontos_dia', _load_total_points)
             
             # Ordena por pontos (maior primeiro)
             sorted_users = sorted(total_points_by_user.items(), key=lambda x: x[1]['points'], reverse=True)
@@ -5535,7 +5696,10 @@ def _live_view_ao_vivo_fragment(selected_match_id):
             # Mostra pontuação total em tabela
             if sorted_users:
                 # Calcula ranking ao vivo para variação
-                live_ranking = calculate_live_ranking(session, todays_matches[0]['id'] if todays_matches else None)
+                ref_match_id = todays_matches[0]['id'] if todays_matches else None
+                live_ranking = version_cached(
+                    f'ao_vivo_ranking_{ref_match_id}', lambda: calculate_live_ranking(session, ref_match_id)
+                )
                 variacao_map = {user['user_id']: user for user in live_ranking}
                 
                 # Pega informações de pódio e rebaixamento
@@ -5736,16 +5900,33 @@ def _live_view_ao_vivo_fragment(selected_match_id):
         
         st.divider()
         
-        # Pega palpites de todos os participantes
-        predictions = get_live_match_predictions(session, selected_match_id)
+        # Jogo com placar: palpites e ranking vêm da tabela "e se?" do jogo
+        # (pré-calculada para todos os placares até 6x6)
+        score1, score2 = selected_match['team1_score'], selected_match['team2_score']
+        
+        def _load_live_view():
+            whatif_table = None
+            live_view = None
+            if score1 is not None and score2 is not None:
+                whatif_table = get_whatif_table(session, selected_match_id)
+                live_view = whatif_live_view(whatif_table, score1, score2)
+            if live_view:
+                return live_view + (whatif_table,)
+            # Placar fora da tabela ou ainda sem placar: cálculo direto
+            return (
+                get_live_match_predictions(session, selected_match_id),
+                calculate_live_ranking(session, selected_match_id),
+                whatif_table
+            )
+        
+        predictions, live_ranking, whatif_table = version_cached(
+            f'ao_vivo_jogo_{selected_match_id}', _load_live_view
+        )
         
         if not predictions:
             st.info("Nenhum palpite registrado para este jogo.")
             return
         
-        # Calcula ranking ao vivo
-        live_ranking = calculate_live_ranking(session, selected_match_id)
-        
         # Cria mapa de variação de posição
         variacao_map = {user['user_id']: user for user in live_ranking}
         
@@ -5924,6 +6105,24 @@ def _live_view_ao_vivo_fragment(selected_match_id):
         </div>
         """, unsafe_allow_html=True)
         
+        # Painel "e se o próximo gol for de...?" (lido da tabela "e se?")
+        if selected_match['is_live'] and whatif_table:
+            scenarios = get_next_goal_scenarios(whatif_table, score1, score2)
+            if scenarios:
+                import pandas as pd
+                with st.expander("🔮 E se sair o próximo gol?"):
+                    def _cenario(pontos, posicao, posicao_agora):
+                        delta = posicao_agora - posicao
+                        seta = f"⬆️ +{delta}" if delta > 0 else (f"⬇️ {delta}" if delta < 0 else "➡️")
+                        return f"{pontos} pts · {posicao}º {seta}"
+                    df_gol = pd.DataFrame([{
+                        'Participante': sc['user_name'],
+                        'Agora': f"{sc['pontos']} pts · {sc['posicao']}º",
+                        f"Gol {selected_match['team1']} ({score1 + 1}x{score2})": _cenario(sc['team1_pontos'], sc['team1_posicao'], sc['posicao']),
+                        f"Gol {selected_match['team2']} ({score1}x{score2 + 1})": _cenario(sc['team2_pontos'], sc['team2_posicao'], sc['posicao']),
+                    } for sc in scenarios])
+                    st.dataframe(df_gol, use_container_width=True, hide_index=True)
+        
         # Botão de atualização
         st.divider()
         col1, col2, col3 = st.columns([1, 1, 1])
@@ -6071,54 +6270,9 @@ def page_meus_comprovantes():
         
         if st.button("🚀 Gerar Comprovante Completo (PDF)", use_container_width=True):
             with st.spinner("Coletando seus palpites e gerando o documento..."):
-                # 1. Coleta Palpites de Jogos
-                match_preds = session.query(Prediction, Match).join(Match).filter(
-                    Prediction.user_id == user_id
-                ).order_by(Match.match_number).all()
-                
-                match_list = []
-                for pred, match in match_preds:
-                    # Garante que temos os nomes dos times, mesmo se forem placeholders
-                    t1_name = match.team1.name if (hasattr(match, 'team1') and match.team1) else getattr(match, 'team1_placeholder', "TBD")
-                    t2_name = match.team2.name if (hasattr(match, 'team2') and match.team2) else getattr(match, 'team2_placeholder', "TBD")
-                    
-                    # Data/hora de salvamento: usa updated_at se existir, senão created_at
-                    save_time = pred.updated_at if pred.updated_at else pred.created_at
-                    
-                    match_list.append({
-                        'number': getattr(match, 'match_number', 0),
-                        'match_time': get_brazil_time_str(getattr(match, 'datetime', None)),
-                        'team1': t1_name,
-                        'team2': t2_name,
-                        'pred1': getattr(pred, 'pred_team1_score', 0),
-                        'pred2': getattr(pred, 'pred_team2_score', 0),
-                        'phase': getattr(match, 'phase', ""),
-                        'updated_at': get_brazil_time_str(save_time)
-                    })
-                
-                # 2. Coleta Palpites de Grupos
-                group_preds = session.query(GroupPrediction).filter_by(user_id=user_id).order_by(GroupPrediction.group_name).all()
-                group_list = []
-                for gp in group_preds:
-                    gp_save_time = gp.updated_at if gp.updated_at else gp.created_at
-                    group_list.append({
-                        'group': gp.group_name,
-                        'first': gp.first_place_team.name if gp.first_place_team else "Não definido",
-                        'second': gp.second_place_team.name if gp.second_place_team else "Não definido",
-                        'updated_at': get_brazil_time_str(gp_save_time)
-                    })
-                
-                # 3. Coleta Palpite de Pódio
-                podium = session.query(PodiumPrediction).filter_by(user_id=user_id).first()
-                podium_data = None
-                if podium:
-                    podium_save_time = podium.updated_at if podium.updated_at else podium.created_at
-                    podium_data = {
-                        'champion': podium.champion_team.name if podium.champion_team else "Não definido",
-                        'runner_up': podium.runner_up_team.name if podium.runner_up_team else "Não definido",
-                        'third_place': podium.third_place_team.name if podium.third_place_team else "Não definido",
-                        'updated_at': get_brazil_time_str(podium_save_time)
-                    }
+                # Palpites de jogos, grupos e pódio (mesma coleta do lote de
+                # comprovantes, receipts_batch.py)
+                _, match_list, group_list, podium_data = collect_receipt_data(session, [user_id])[user_id]
                 
                 # Gera o PDF
                 pdf_bytes = generate_user_backup_pdf(user_name, match_list, group_list, podium_data)
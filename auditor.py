@@ -3,22 +3,36 @@ VAR — Verificação e Auditoria do Resultado
 Agente de auditoria do Bolão Copa 2026.
 
 Lê o banco, verifica integridade dos palpites, alerta usuários via Telegram.
-Nunca altera palpites — somente leitura (exceto contador de controle na config).
+Nunca altera palpites — somente leitura (exceto contador de controle e
+marcas d'água na config).
+
+O banco é lido uma vez (read_snapshot: uma consulta agregada por tabela) e a
+conexão volta ao pool; as verificações rodam em memória sobre o snapshot e
+o tempo de cada uma é impresso no fim (CHECK_TIMINGS).
+
+Auditoria incremental: as marcas d'água (maior id e updated_at auditados de
+cada tabela) e as pendências ainda abertas ficam na config
+('var_watermarks'); cada execução só reexamina o que mudou desde então,
+com uma varredura completa a cada AUDIT_FULL_SWEEP_HOURS (padrão 24h).
 
 Uso:
   python auditor.py          # modo normal (envia Telegram só se houver alertas ou jogo próximo)
   python auditor.py --full   # força relatório completo mesmo sem alertas (primeiro uso)
+  python auditor.py --sweep  # força a varredura completa do banco
 """
 
 import json
 import os
 import sys
+import time
 import urllib.request
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 
-import psycopg2
 import pytz
 
+from pg_pool import get_pooled_connection, get_pool_metrics, close_all_pools
+
 BRAZIL_TZ = pytz.timezone("America/Sao_Paulo")
 WINDOW_HOURS = 2.5   # alerta para jogos que começam em até X horas
 
@@ -48,7 +62,7 @@ def get_connection():
     conn_str = os.environ.get("NEON_CONNECTION_STRING") or os.environ.get("DATABASE_URL")
     if not conn_str:
         raise RuntimeError("NEON_CONNECTION_STRING não configurada")
-    return psycopg2.connect(conn_str.strip())
+    return get_pooled_connection(conn_str)
 
 
 def now_brazil():
@@ -56,203 +70,423 @@ def now_brazil():
 
 
 # ---------------------------------------------------------------------------
-# Verificações
+# Snapshot
+# ---------------------------------------------------------------------------
+
+GROUPS = "ABCDEFGHIJKL"
+
+# Auditoria incremental: estado na config, varredura completa periódica
+WATERMARKS_KEY = "var_watermarks"
+AUDIT_FULL_SWEEP_HOURS = float(os.environ.get("AUDIT_FULL_SWEEP_HOURS", "24"))
+WATERMARK_OVERLAP = timedelta(minutes=5)
+
+# Tempo (ms) de cada leitura do snapshot e de cada verificação nesta execução
+CHECK_TIMINGS = {}
+
+
+@contextmanager
+def timed_check(name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        CHECK_TIMINGS[name] = (time.perf_counter() - start) * 1000
+
+
+class AuditSnapshot:
+    """
+    Tudo o que as verificações leem, numa leitura só: uma consulta agregada
+    por tabela, dentro de uma transação REPEATABLE READ (todas enxergam o
+    mesmo instante do banco). As verificações rodam em memória sobre ele.
+
+    Na varredura incremental, os agregados de palpites cobrem só as linhas
+    alteradas desde a última auditoria (marcas d'água), as pendências ainda
+    abertas e os jogos que as verificações sempre precisam ver inteiros.
+    """
+
+    def __init__(self):
+        self.now = None
+        self.mode = "completa"
+        self.users = {}              # id -> (nome, ativo e não admin)
+        self.participants = []       # [(id, nome)] ativos e não admin, por nome
+        self.matches = {}            # id -> dict (número, data, status, times)
+        self.predictions = {}        # match_id -> agregados dos palpites do jogo
+        self.prediction_count = 0
+        self.group_predictions = {}  # user_id -> agregados dos palpites de grupo
+        self.group_count = 0
+        self.podium_predictions = {}  # user_id -> (completo, com time repetido)
+        self.podium_count = 0
+        self.config = {}
+        self.watermarks = {}         # estado a gravar para a próxima execução
+
+
+def load_watermarks(config) -> dict:
+    """Estado da última auditoria (config 'var_watermarks'), ou {} se não há."""
+    try:
+        return json.loads(config.get(WATERMARKS_KEY) or "{}")
+    except ValueError:
+        return {}
+
+
+def _parse_ts(value):
+    return datetime.fromisoformat(value) if value else None
+
+
+def _iso(value):
+    return value.isoformat() if value else None
+
+
+def _table_marks(cur, table):
+    """(linhas, maior id, maior updated_at) — max() pelos índices de id e updated_at."""
+    cur.execute(f"SELECT COUNT(*), MAX(id), MAX(updated_at) FROM {table}")
+    return cur.fetchone()
+
+
+def _since(marks, table):
+    """Filtro incremental de uma tabela: (id a partir do qual, updated_at a partir do qual)."""
+    mark = marks.get("tables", {}).get(table, {})
+    updated_at = _parse_ts(mark.get("updated_at"))
+    if updated_at:
+        # Folga para transações que gravaram um updated_at anterior ao commit
+        updated_at -= WATERMARK_OVERLAP
+    return mark.get("id") or 0, updated_at
+
+
+def copa_start_from_config(config):
+    """Início da Copa (config 'data_inicio_copa'), com o padrão de 11/06/2026 13:00."""
+    raw = (config.get("data_inicio_copa") or "").strip()
+    for fmt in ("%Y-%m-%d %H:%M", "%Y-%m-%d %H:%M:%S", "%d/%m/%Y %H:%M", "%Y-%m-%d"):
+        try:
+            return datetime.strptime(raw, fmt)
+        except ValueError:
+            continue
+    # Default: 11/06/2026 13:00 (início da Copa 2026)
+    return datetime(2026, 6, 11, 13, 0)
+
+
+def pre_copa_days(snap):
+    """Dias até a Copa, se estiver na janela do lembrete (0 a 8 dias); senão None."""
+    dias = (copa_start_from_config(snap.config) - snap.now).days
+    return dias if 0 <= dias <= 8 else None
+
+
+def read_snapshot(cur, now=None, full_sweep=False) -> AuditSnapshot:
+    """
+    Lê o snapshot (uma consulta por tabela). O chamador faz o commit.
+
+    Varredura completa na primeira execução, com full_sweep ou quando a
+    última completa tem mais de AUDIT_FULL_SWEEP_HOURS; senão incremental.
+    """
+    snap = AuditSnapshot()
+    snap.now = now or now_brazil()
+    limite = snap.now + timedelta(hours=WINDOW_HOURS)
+    cur.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ, READ ONLY")
+
+    with timed_check("snapshot_config"):
+        cur.execute("""
+            SELECT key, value FROM config
+            WHERE key IN ('var_pred_count_last', 'data_inicio_copa', %s)
+        """, (WATERMARKS_KEY,))
+        snap.config = dict(cur.fetchall())
+
+    marks = load_watermarks(snap.config)
+    last_sweep = _parse_ts(marks.get("full_sweep_at"))
+    incremental = (
+        not full_sweep and last_sweep is not None
+        and snap.now - last_sweep < timedelta(hours=AUDIT_FULL_SWEEP_HOURS)
+    )
+    snap.mode = "incremental" if incremental else "completa"
+    opened = marks.get("open", {}) if incremental else {}
+
+    with timed_check("snapshot_users"):
+        cur.execute("SELECT id, name, active = true AND role != 'admin' FROM users ORDER BY name")
+        for user_id, name, participant in cur.fetchall():
+            snap.users[user_id] = (name, participant)
+            if participant:
+                snap.participants.append((user_id, name))
+
+    with timed_check("snapshot_matches"):
+        cur.execute("""
+            SELECT m.id, m.match_number, m.datetime, m.status, m.updated_at,
+                   COALESCE(t1.flag || ' ' || t1.name, m.team1_code) AS team1,
+                   COALESCE(t2.flag || ' ' || t2.name, m.team2_code) AS team2
+            FROM matches m
+            LEFT JOIN teams t1 ON m.team1_id = t1.id
+            LEFT JOIN teams t2 ON m.team2_id = t2.id
+            ORDER BY m.match_number
+        """)
+        for match_id, number, match_dt, status, updated_at, team1, team2 in cur.fetchall():
+            snap.matches[match_id] = {
+                "match_number": number, "datetime": match_dt, "status": status,
+                "updated_at": updated_at, "team1": team1, "team2": team2,
+            }
+    upcoming_ids = [
+        mid for mid, m in snap.matches.items()
+        if m["status"] == "scheduled" and m["datetime"] and snap.now < m["datetime"] <= limite
+    ]
+
+    # Quem palpitou só é listado para os jogos da janela (o resto é contagem)
+    with timed_check("snapshot_predictions"):
+        pred_marks = _table_marks(cur, "predictions")
+        snap.prediction_count = pred_marks[0]
+        if incremental:
+            # Só linhas novas/alteradas, jogos da janela, jogos encerrados
+            # desde a última auditoria e jogos com pendência aberta. Cada
+            # condição é uma faixa de índice (id, updated_at, match_id); a
+            # duplicidade é conferida pela constraint única (user_id, match_id).
+            last_id, since = _since(marks, "predictions")
+            _, matches_since = _since(marks, "matches")
+            recheck = set(upcoming_ids) | set(opened.get("prediction_matches", []))
+            recheck |= {
+                mid for mid, m in snap.matches.items()
+                if m["status"] == "finished" and m["updated_at"]
+                and (matches_since is None or m["updated_at"] > matches_since)
+            }
+            where = "WHERE p.id > %(last_id)s OR p.updated_at > %(since)s OR p.match_id = ANY(%(recheck)s)"
+            duplicates = """COUNT(*) FILTER (WHERE EXISTS (
+                       SELECT 1 FROM predictions o
+                       WHERE o.user_id = p.user_id AND o.match_id = p.match_id AND o.id <> p.id))"""
+            params = {"last_id": last_id, "since": since, "recheck": sorted(recheck)}
+        else:
+            where = ""
+            duplicates = "COUNT(*) - COUNT(DISTINCT p.user_id)"
+            params = {}
+        params["upcoming"] = upcoming_ids
+        cur.execute(f"""
+            SELECT p.match_id,
+                   COUNT(*),
+                   {duplicates},
+                   COUNT(*) FILTER (WHERE p.points_awarded IS NULL),
+                   COUNT(*) FILTER (WHERE p.pred_team1_score IS NULL OR p.pred_team2_score IS NULL),
+                   (ARRAY_AGG(p.user_id ORDER BY p.id)
+                        FILTER (WHERE p.pred_team1_score IS NULL OR p.pred_team2_score IS NULL))[1:5],
+                   ARRAY_AGG(p.user_id) FILTER (
+                       WHERE p.match_id = ANY(%(upcoming)s)
+                         AND p.pred_team1_score IS NOT NULL
+                         AND p.pred_team2_score IS NOT NULL
+                         AND (p.pred_team1_score != 0 OR p.pred_team2_score != 0
+                              OR p.manually_confirmed = TRUE)
+                   )
+            FROM predictions p
+            {where}
+            GROUP BY p.match_id
+        """, params)
+        for match_id, total, duplicates, unscored, null_scores, null_users, confirmed in cur.fetchall():
+            snap.predictions[match_id] = {
+                "total": total, "duplicates": duplicates, "unscored": unscored,
+                "null_scores": null_scores, "null_users": null_users or [],
+                "confirmed_users": set(confirmed or []),
+            }
+
+    # Grupos e pódio: o lembrete pré-Copa precisa de todos os participantes
+    partial = incremental and pre_copa_days(snap) is None
+
+    with timed_check("snapshot_group_predictions"):
+        group_marks = _table_marks(cur, "group_predictions")
+        snap.group_count = group_marks[0]
+        where, params = "", {}
+        if partial:
+            last_id, since = _since(marks, "group_predictions")
+            where = "WHERE id > %(last_id)s OR updated_at > %(since)s OR user_id = ANY(%(users)s)"
+            params = {"last_id": last_id, "since": since, "users": opened.get("group_users", [])}
+        cur.execute(f"""
+            SELECT user_id,
+                   ARRAY_AGG(DISTINCT group_name) FILTER (
+                       WHERE first_place_team_id IS NOT NULL AND second_place_team_id IS NOT NULL),
+                   ARRAY_AGG(group_name ORDER BY group_name) FILTER (
+                       WHERE first_place_team_id IS NOT NULL
+                         AND first_place_team_id = second_place_team_id)
+            FROM group_predictions
+            {where}
+            GROUP BY user_id
+        """, params)
+        for user_id, complete, invalid in cur.fetchall():
+            snap.group_predictions[user_id] = {
+                "complete_groups": set(complete or []), "invalid_groups": invalid or [],
+            }
+
+    with timed_check("snapshot_podium_predictions"):
+        podium_marks = _table_marks(cur, "podium_predictions")
+        snap.podium_count = podium_marks[0]
+        where, params = "", {}
+        if partial:
+            last_id, since = _since(marks, "podium_predictions")
+            where = "WHERE id > %(last_id)s OR updated_at > %(since)s OR user_id = ANY(%(users)s)"
+            params = {"last_id": last_id, "since": since, "users": opened.get("podium_users", [])}
+        cur.execute(f"""
+            SELECT user_id,
+                   BOOL_OR(champion_team_id IS NOT NULL
+                           AND runner_up_team_id IS NOT NULL
+                           AND third_place_team_id IS NOT NULL),
+                   BOOL_OR(champion_team_id IS NOT NULL AND (
+                           champion_team_id = runner_up_team_id OR
+                           champion_team_id = third_place_team_id OR
+                           runner_up_team_id = third_place_team_id))
+            FROM podium_predictions
+            {where}
+            GROUP BY user_id
+        """, params)
+        for user_id, complete, repeated in cur.fetchall():
+            snap.podium_predictions[user_id] = (bool(complete), bool(repeated))
+
+    # Próxima execução parte daqui; pendências ficam abertas até sumirem
+    matches_updated = max((m["updated_at"] for m in snap.matches.values() if m["updated_at"]), default=None)
+    snap.watermarks = {
+        "full_sweep_at": _iso(snap.now) if not incremental else marks.get("full_sweep_at"),
+        "tables": {
+            "predictions": {"id": pred_marks[1], "updated_at": _iso(pred_marks[2])},
+            "group_predictions": {"id": group_marks[1], "updated_at": _iso(group_marks[2])},
+            "podium_predictions": {"id": podium_marks[1], "updated_at": _iso(podium_marks[2])},
+            "matches": {"updated_at": _iso(matches_updated)},
+        },
+        "open": {
+            "prediction_matches": sorted(
+                mid for mid, agg in snap.predictions.items()
+                if agg["null_scores"] or agg["duplicates"]
+                or (agg["unscored"] and snap.matches.get(mid, {}).get("status") == "finished")
+            ),
+            "group_users": sorted(uid for uid, agg in snap.group_predictions.items() if agg["invalid_groups"]),
+            "podium_users": sorted(uid for uid, (_, repeated) in snap.podium_predictions.items() if repeated),
+        },
+    }
+    return snap
+
+
+def save_watermarks(cur, snap):
+    """Grava as marcas d'água e pendências abertas (config 'var_watermarks')."""
+    value = json.dumps(snap.watermarks)
+    if WATERMARKS_KEY in snap.config:
+        cur.execute("UPDATE config SET value = %s WHERE key = %s", (value, WATERMARKS_KEY))
+    else:
+        cur.execute(
+            "INSERT INTO config (key, value, description, category) VALUES (%s, %s, %s, %s)",
+            (WATERMARKS_KEY, value, "Marcas d'água da auditoria incremental do VAR", "sistema")
+        )
+
+
+# ---------------------------------------------------------------------------
+# Verificações (em memória, sobre o snapshot)
 # ---------------------------------------------------------------------------
 
-def check_db_health(cur) -> list[str]:
+def check_db_health(snap) -> list[str]:
     """Verifica conectividade e contagens básicas."""
     alerts = []
-    cur.execute("SELECT COUNT(*) FROM predictions")
-    pred_count = cur.fetchone()[0]
-    cur.execute("SELECT COUNT(*) FROM group_predictions")
-    group_count = cur.fetchone()[0]
-    cur.execute("SELECT COUNT(*) FROM podium_predictions")
-    podium_count = cur.fetchone()[0]
-    cur.execute("SELECT COUNT(*) FROM users WHERE active = true AND role != 'admin'")
-    user_count = cur.fetchone()[0]
-
-    if pred_count == 0 and user_count > 0:
+    user_count = len(snap.participants)
+    if snap.prediction_count == 0 and user_count > 0:
         alerts.append("⚠️ Nenhum palpite de jogo encontrado no banco!")
-    return alerts, pred_count, group_count, podium_count, user_count
+    return alerts, snap.prediction_count, snap.group_count, snap.podium_count, user_count
 
 
-def check_upcoming_no_prediction(cur):
+def check_upcoming_no_prediction(snap):
     """Jogos iniciando nas próximas WINDOW_HOURS — sempre reporta status de palpites."""
     alerts = []        # jogos com palpites faltando
     ok_alerts = []     # jogos em que todos palpitaram
-    now = now_brazil()
+    now = snap.now
     limite = now + timedelta(hours=WINDOW_HOURS)
 
-    cur.execute("""
-        SELECT m.id, m.match_number, m.datetime,
-               COALESCE(t1.flag || ' ' || t1.name, m.team1_code) AS team1,
-               COALESCE(t2.flag || ' ' || t2.name, m.team2_code) AS team2
-        FROM matches m
-        LEFT JOIN teams t1 ON m.team1_id = t1.id
-        LEFT JOIN teams t2 ON m.team2_id = t2.id
-        WHERE m.status = 'scheduled'
-          AND m.datetime > %s
-          AND m.datetime <= %s
-        ORDER BY m.datetime
-    """, (now, limite))
-    upcoming = cur.fetchall()
-
-    if not upcoming:
-        return alerts, ok_alerts
-
-    cur.execute("""
-        SELECT id, name FROM users
-        WHERE active = true AND role != 'admin'
-        ORDER BY name
-    """)
-    users = cur.fetchall()
-    if not users:
+    upcoming = sorted(
+        (m for m in snap.matches.items()
+         if m[1]["status"] == "scheduled" and m[1]["datetime"] and now < m[1]["datetime"] <= limite),
+        key=lambda item: item[1]["datetime"]
+    )
+    if not upcoming or not snap.participants:
         return alerts, ok_alerts
 
-    user_ids = {u[0]: u[1] for u in users}
-
-    for match_id, match_num, match_dt, team1, team2 in upcoming:
-        cur.execute("""
-            SELECT user_id FROM predictions
-            WHERE match_id = %s
-              AND pred_team1_score IS NOT NULL
-              AND pred_team2_score IS NOT NULL
-              AND (
-                pred_team1_score != 0 OR pred_team2_score != 0
-                OR manually_confirmed = TRUE
-              )
-        """, (match_id,))
-        palpitaram = {r[0] for r in cur.fetchall()}
-
-        faltam = [name for uid, name in user_ids.items() if uid not in palpitaram]
+    for match_id, match in upcoming:
+        palpitaram = snap.predictions.get(match_id, {}).get("confirmed_users", set())
+        faltam = [name for uid, name in snap.participants if uid not in palpitaram]
+        match_dt = match["datetime"]
         hora_jogo = match_dt.strftime("%H:%M")
         minutos = int((match_dt - now).total_seconds() / 60)
+        header = (f"<b>Jogo #{match['match_number']} em {minutos}min ({hora_jogo} Brasília)</b>\n"
+                  f"   {match['team1']} x {match['team2']}\n")
 
         if faltam:
             faltam_str = ", ".join(faltam)
-            alerts.append(
-                f"⏰ <b>Jogo #{match_num} em {minutos}min ({hora_jogo} Brasília)</b>\n"
-                f"   {team1} x {team2}\n"
-                f"   Sem palpite: {faltam_str}"
-            )
+            alerts.append(f"⏰ {header}   Sem palpite: {faltam_str}")
         else:
-            ok_alerts.append(
-                f"✅ <b>Jogo #{match_num} em {minutos}min ({hora_jogo} Brasília)</b>\n"
-                f"   {team1} x {team2}\n"
-                f"   Todos os {len(user_ids)} participantes palpitaram!"
-            )
+            ok_alerts.append(f"✅ {header}   Todos os {len(snap.participants)} participantes palpitaram!")
 
     return alerts, ok_alerts
 
 
-def check_invalid_predictions(cur) -> list[str]:
+def check_invalid_predictions(snap) -> list[str]:
     """Palpites com valores NULL onde não deveria ter."""
     alerts = []
-    cur.execute("""
-        SELECT p.id, u.name, m.match_number
-        FROM predictions p
-        JOIN users u ON p.user_id = u.id
-        JOIN matches m ON p.match_id = m.id
-        WHERE p.pred_team1_score IS NULL OR p.pred_team2_score IS NULL
-        ORDER BY p.id
-    """)
-    rows = cur.fetchall()
-    if rows:
-        detalhe = ", ".join(f"{r[1]} (jogo #{r[2]})" for r in rows[:5])
-        extras = f" e mais {len(rows)-5}" if len(rows) > 5 else ""
-        alerts.append(f"🚨 {len(rows)} palpite(s) com placar NULL: {detalhe}{extras}")
+    total = 0
+    detalhes = []
+    for match_id, match in snap.matches.items():
+        agg = snap.predictions.get(match_id)
+        if not agg or not agg["null_scores"]:
+            continue
+        total += agg["null_scores"]
+        detalhes.extend(
+            f"{snap.users[uid][0]} (jogo #{match['match_number']})"
+            for uid in agg["null_users"] if uid in snap.users
+        )
+    if total:
+        detalhe = ", ".join(detalhes[:5])
+        extras = f" e mais {total-5}" if total > 5 else ""
+        alerts.append(f"🚨 {total} palpite(s) com placar NULL: {detalhe}{extras}")
     return alerts
 
 
-def check_duplicate_predictions(cur) -> list[str]:
+def check_duplicate_predictions(snap) -> list[str]:
     """Palpites duplicados (mesmo user_id + match_id)."""
     alerts = []
-    cur.execute("""
-        SELECT user_id, match_id, COUNT(*) AS cnt
-        FROM predictions
-        GROUP BY user_id, match_id
-        HAVING COUNT(*) > 1
-    """)
-    rows = cur.fetchall()
-    if rows:
-        alerts.append(f"🚨 {len(rows)} combinação(ões) user+jogo com palpites DUPLICADOS")
+    jogos = [mid for mid, agg in snap.predictions.items() if agg["duplicates"]]
+    if jogos:
+        extras = sum(snap.predictions[mid]["duplicates"] for mid in jogos)
+        alerts.append(
+            f"🚨 {extras} palpite(s) DUPLICADO(s) (mesmo user+jogo) em {len(jogos)} jogo(s)"
+        )
     return alerts
 
 
-def check_invalid_group_predictions(cur) -> list[str]:
+def check_invalid_group_predictions(snap) -> list[str]:
     """GroupPrediction com 1º == 2º lugar."""
     alerts = []
-    cur.execute("""
-        SELECT gp.id, u.name, gp.group_name
-        FROM group_predictions gp
-        JOIN users u ON gp.user_id = u.id
-        WHERE gp.first_place_team_id IS NOT NULL
-          AND gp.first_place_team_id = gp.second_place_team_id
-    """)
-    rows = cur.fetchall()
-    if rows:
-        detalhe = ", ".join(f"{r[1]} Grupo {r[2]}" for r in rows)
-        alerts.append(f"🚨 Palpites de grupo inválidos (1º = 2º): {detalhe}")
+    detalhes = [
+        f"{name} Grupo {group}"
+        for user_id, (name, _) in snap.users.items()
+        for group in snap.group_predictions.get(user_id, {}).get("invalid_groups", [])
+    ]
+    if detalhes:
+        alerts.append(f"🚨 Palpites de grupo inválidos (1º = 2º): {', '.join(detalhes)}")
     return alerts
 
 
-def check_invalid_podium_predictions(cur) -> list[str]:
+def check_invalid_podium_predictions(snap) -> list[str]:
     """PodiumPrediction com times duplicados nas 3 posições."""
     alerts = []
-    cur.execute("""
-        SELECT pp.id, u.name
-        FROM podium_predictions pp
-        JOIN users u ON pp.user_id = u.id
-        WHERE pp.champion_team_id IS NOT NULL
-          AND (
-            pp.champion_team_id = pp.runner_up_team_id OR
-            pp.champion_team_id = pp.third_place_team_id OR
-            pp.runner_up_team_id = pp.third_place_team_id
-          )
-    """)
-    rows = cur.fetchall()
-    if rows:
-        detalhe = ", ".join(r[1] for r in rows)
-        alerts.append(f"🚨 Palpites de pódio com times repetidos: {detalhe}")
+    nomes = [
+        name for user_id, (name, _) in snap.users.items()
+        if snap.podium_predictions.get(user_id, (False, False))[1]
+    ]
+    if nomes:
+        alerts.append(f"🚨 Palpites de pódio com times repetidos: {', '.join(nomes)}")
     return alerts
 
 
-def check_unscored_finished(cur) -> list[str]:
+def check_unscored_finished(snap) -> list[str]:
     """Jogos finalizados com palpites que ainda não foram pontuados."""
     alerts = []
-    cur.execute("""
-        SELECT m.match_number,
-               COALESCE(t1.flag || ' ' || t1.name, m.team1_code) AS team1,
-               COALESCE(t2.flag || ' ' || t2.name, m.team2_code) AS team2,
-               COUNT(p.id) AS sem_pontos
-        FROM matches m
-        JOIN predictions p ON p.match_id = m.id
-        LEFT JOIN teams t1 ON m.team1_id = t1.id
-        LEFT JOIN teams t2 ON m.team2_id = t2.id
-        WHERE m.status = 'finished'
-          AND p.points_awarded IS NULL
-        GROUP BY m.id, m.match_number, team1, team2
-        ORDER BY m.match_number
-    """)
-    rows = cur.fetchall()
-    if rows:
-        for match_num, team1, team2, cnt in rows:
+    for match_id, match in snap.matches.items():
+        cnt = snap.predictions.get(match_id, {}).get("unscored", 0)
+        if match["status"] == "finished" and cnt:
             alerts.append(
-                f"⚠️ Jogo #{match_num} ({team1} x {team2}) finalizado "
+                f"⚠️ Jogo #{match['match_number']} ({match['team1']} x {match['team2']}) finalizado "
                 f"sem pontuação para {cnt} palpite(s)"
             )
     return alerts
 
 
-def check_prediction_count_drop(cur) -> list[str]:
+def check_prediction_count_drop(cur, snap) -> list[str]:
     """Verifica se a contagem total de palpites caiu (possível deleção acidental)."""
     alerts = []
-    cur.execute("SELECT COUNT(*) FROM predictions")
-    current = cur.fetchone()[0]
-
-    cur.execute("SELECT value FROM config WHERE key = 'var_pred_count_last'")
-    row = cur.fetchone()
-    previous = int(row[0]) if row else None
+    current = snap.prediction_count
+    row = snap.config.get("var_pred_count_last")
+    previous = int(row) if row is not None else None
 
     if previous is not None and current < previous:
         diff = previous - current
@@ -276,57 +510,25 @@ def check_prediction_count_drop(cur) -> list[str]:
     return alerts
 
 
-def check_pre_copa_missing_predictions(cur) -> list[str]:
+def check_pre_copa_missing_predictions(snap) -> list[str]:
     """Quando a Copa começa em até 8 dias, lista quem não salvou pódio/grupos."""
     alerts = []
-    now = now_brazil()
-
-    cur.execute("SELECT value FROM config WHERE key = 'data_inicio_copa'")
-    row = cur.fetchone()
-
-    raw = row[0].strip() if row else ""
-    copa_start = None
-    for fmt in ("%Y-%m-%d %H:%M", "%Y-%m-%d %H:%M:%S", "%d/%m/%Y %H:%M", "%Y-%m-%d"):
-        try:
-            copa_start = datetime.strptime(raw, fmt)
-            break
-        except ValueError:
-            continue
-    if not copa_start:
-        # Default: 11/06/2026 13:00 (início da Copa 2026)
-        copa_start = datetime(2026, 6, 11, 13, 0)
 
-    dias_ate_copa = (copa_start - now).days
-    if dias_ate_copa > 8 or dias_ate_copa < 0:
+    dias_ate_copa = pre_copa_days(snap)
+    if dias_ate_copa is None:
         return alerts
+    copa_start = copa_start_from_config(snap.config)
 
-    cur.execute(
-        "SELECT id, name FROM users WHERE active = true AND role != 'admin' ORDER BY name"
-    )
-    users = cur.fetchall()
-
+    users = snap.participants
     sem_podio = []
     grupos_incompletos = []
 
     for user_id, name in users:
-        cur.execute("""
-            SELECT id FROM podium_predictions
-            WHERE user_id = %s
-              AND champion_team_id IS NOT NULL
-              AND runner_up_team_id IS NOT NULL
-              AND third_place_team_id IS NOT NULL
-        """, (user_id,))
-        if not cur.fetchone():
+        if not snap.podium_predictions.get(user_id, (False, False))[0]:
             sem_podio.append(name)
 
-        cur.execute("""
-            SELECT DISTINCT group_name FROM group_predictions
-            WHERE user_id = %s
-              AND first_place_team_id IS NOT NULL
-              AND second_place_team_id IS NOT NULL
-        """, (user_id,))
-        feitos = {r[0] for r in cur.fetchall()}
-        faltando = sorted(set("ABCDEFGHIJKL") - feitos)
+        feitos = snap.group_predictions.get(user_id, {}).get("complete_groups", set())
+        faltando = sorted(set(GROUPS) - feitos)
         if faltando:
             grupos_incompletos.append((name, len(feitos), faltando))
 
@@ -377,6 +579,7 @@ def check_pre_copa_missing_predictions(cur) -> list[str]:
 
 def main():
     force_full = "--full" in sys.argv
+    full_sweep = "--sweep" in sys.argv
 
     token = os.environ.get("TELEGRAM_BOT_TOKEN", "")
     chat_id = os.environ.get("TELEGRAM_CHAT_ID", "")
@@ -389,20 +592,37 @@ def main():
 
     conn = get_connection()
     cur = conn.cursor()
-
-    # --- Saúde do banco ---
-    health_alerts, pred_count, group_count, podium_count, user_count = check_db_health(cur)
-
-    # --- Todas as verificações ---
-    pre_copa_alerts          = check_pre_copa_missing_predictions(cur)
-    upcoming_alerts, upcoming_ok = check_upcoming_no_prediction(cur)
-    invalid_preds            = check_invalid_predictions(cur)
-    duplicate_preds          = check_duplicate_predictions(cur)
-    invalid_groups           = check_invalid_group_predictions(cur)
-    invalid_podium           = check_invalid_podium_predictions(cur)
-    unscored                 = check_unscored_finished(cur)
-    count_drop               = check_prediction_count_drop(cur)
-    conn.commit()
+    try:
+        # --- Snapshot: uma leitura agregada por tabela ---
+        snap = read_snapshot(cur, now, full_sweep=full_sweep)
+        conn.commit()
+        print(f"Varredura {snap.mode}")
+
+        # --- Contador de palpites e marcas d'água (únicas escritas) ---
+        with timed_check("check_prediction_count_drop"):
+            count_drop = check_prediction_count_drop(cur, snap)
+        save_watermarks(cur, snap)
+        conn.commit()
+    finally:
+        # A conexão volta ao pool antes das verificações (que rodam em memória)
+        cur.close()
+        conn.close()
+    print(f"Pool de conexões: {get_pool_metrics()}")
+    close_all_pools()
+
+    # --- Todas as verificações, em memória ---
+    def run_check(check):
+        with timed_check(check.__name__):
+            return check(snap)
+
+    health_alerts, pred_count, group_count, podium_count, user_count = run_check(check_db_health)
+    pre_copa_alerts          = run_check(check_pre_copa_missing_predictions)
+    upcoming_alerts, upcoming_ok = run_check(check_upcoming_no_prediction)
+    invalid_preds            = run_check(check_invalid_predictions)
+    duplicate_preds          = run_check(check_duplicate_predictions)
+    invalid_groups           = run_check(check_invalid_group_predictions)
+    invalid_podium           = run_check(check_invalid_podium_predictions)
+    unscored                 = run_check(check_unscored_finished)
 
     all_alerts = (
         health_alerts + pre_copa_alerts + upcoming_alerts + invalid_preds +
@@ -426,8 +646,10 @@ def main():
     if not all_alerts and not upcoming_ok:
         print("Nenhum alerta — sistema saudável.")
 
-    cur.close()
-    conn.close()
+    # Tempo de cada leitura e verificação, da mais lenta para a mais rápida
+    print("Tempos (ms): " + ", ".join(
+        f"{name} {ms:.1f}" for name, ms in sorted(CHECK_TIMINGS.items(), key=lambda t: -t[1])
+    ))
 
     # --- Telegram ---
     # Envia se houver alertas, jogos próximos (mesmo com todos palpitados) ou --full
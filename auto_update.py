@@ -10,11 +10,12 @@ import sys
 import logging
 from datetime import datetime
 import requests
-import psycopg2
 from psycopg2.extras import execute_values
 import csv
 from io import StringIO
 
+from pg_pool import get_pooled_connection, get_pool_metrics, close_all_pools
+
 # Configuração de logging
 LOG_FILE = '/home/ubuntu/analise-copa-2026/auto_update.log'
 logging.basicConfig(
@@ -154,7 +155,7 @@ def main():
     try:
         # Conectar ao banco
         logging.info("Conectando ao banco Neon PostgreSQL...")
-        conn = psycopg2.connect(NEON_CONNECTION_STRING)
+        conn = get_pooled_connection(NEON_CONNECTION_STRING)
         logging.info("Conexão estabelecida com sucesso")
         
         # Obter última data
@@ -186,7 +187,8 @@ def main():
     finally:
         if conn:
             conn.close()
-            logging.info("Conexão com banco fechada")
+            logging.info(f"Conexão com banco fechada (pool: {get_pool_metrics()})")
+        close_all_pools()
     
     logging.info("=" * 80)
     logging.info("ATUALIZAÇÃO FINALIZADA")
@@ -0,0 +1,325 @@
+"""
+Backup em fluxo do Bolão Copa do Mundo 2026
+
+Em vez de montar um dicionário com o banco inteiro na memória, percorre
+cada tabela em lotes (yield_per — cursor do lado do servidor no Postgres) e
+grava uma linha NDJSON por registro, comprimida em gzip à medida que é lida:
+a memória fica constante, não importa quantos palpites houver.
+
+Formato (um objeto JSON por linha):
+    {"type": "header", "version": "2.0", "mode": "full" | "incremental", "since": ...}
+    {"table": "users", "row": {...colunas, exceto as de EXCLUDED_COLUMNS...}}
+    ...
+    {"type": "end", "counts": {"users": 120, "predictions": 12480, ...}}
+
+As tabelas saem na ordem das chaves estrangeiras, então a restauração
+(restore_backup) também é em fluxo: lê linha a linha e grava em lotes com
+upsert pelo id. O rodapé confere se o arquivo chegou inteiro.
+
+A restauração é uma MESCLA: registros do arquivo criam ou sobrescrevem os do
+banco, e registros que não estão no arquivo continuam lá. Os hashes de
+senha não vão para o backup (como no backup original): participantes que já
+existem mantêm a senha; os recriados pela restauração precisam que o admin
+redefina a senha. Chaves internas da config (SKIP_CONFIG_KEYS) não são
+restauradas, e no fim as versões de dados e os caches do app são renovados.
+
+Modo incremental: só jogos e palpites de jogo criados/alterados desde o
+último backup (config 'backup_last_at') — palpites de jogos encerrados
+desde então também entram, pois o cron os pontua sem mexer em updated_at.
+As demais tabelas são pequenas e vão inteiras. Exclusões não aparecem no
+incremental: restaure o último completo e os incrementais por cima, em ordem.
+
+Uso (linha de comando):
+    python backup_stream.py backup arquivo.ndjson.gz [--incremental]
+    python backup_stream.py restore arquivo.ndjson.gz
+"""
+
+import gzip
+import io
+import json
+import sys
+from datetime import datetime, date
+
+from sqlalchemy import select, or_, text, DateTime
+from sqlalchemy.dialects import postgresql, sqlite
+
+from models import (
+    User, Team, Match, Prediction, GroupPrediction, PodiumPrediction, Config
+)
+from db import CONFIG_VERSION_KEY, _bump_config_version, invalidate_config_cache
+from data_version import MATCHES, GROUP_RESULTS, PODIUM, PRIZE_STATUS
+from ranking_cache import mark_ranking_changed
+from ranking_state import WATERMARK_KEY, clear_ranking_state
+from ranking_snapshots import DIGESTS_KEY
+
+BACKUP_VERSION = '2.0'
+BATCH = 2000
+LAST_BACKUP_KEY = 'backup_last_at'
+
+# Ordem das chaves estrangeiras (a restauração grava nessa ordem)
+BACKUP_TABLES = [
+    ('users', User),
+    ('teams', Team),
+    ('matches', Match),
+    ('predictions', Prediction),
+    ('group_predictions', GroupPrediction),
+    ('podium_predictions', PodiumPrediction),
+    ('configs', Config),
+]
+MODELS = dict(BACKUP_TABLES)
+# Tabelas restauradas pela chave natural em vez do id (os ids da config
+# mudam quando o banco é recriado e populado de novo)
+NATURAL_KEYS = {'configs': 'key'}
+# Colunas que não saem no backup
+EXCLUDED_COLUMNS = {'users': {'password_hash'}}
+# Participante recriado pela restauração: hash inválido, nenhuma senha confere
+RESTORED_PASSWORD_HASH = '!'
+# Config derivada do estado deste banco — restaurá-la deixaria o ranking
+# incremental, as fotos e o cache de config apontando para dados errados
+SKIP_CONFIG_KEYS = {WATERMARK_KEY, DIGESTS_KEY, CONFIG_VERSION_KEY, LAST_BACKUP_KEY}
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} não serializável")
+
+
+def _incremental_filter(name, since):
+    """Filtro do modo incremental para a tabela, ou None (vai inteira)."""
+    if name == 'matches':
+        return or_(Match.created_at > since, Match.updated_at > since)
+    if name == 'predictions':
+        changed_matches = select(Match.id).where(Match.updated_at > since)
+        return or_(Prediction.created_at > since, Prediction.updated_at > since,
+                   Prediction.match_id.in_(changed_matches))
+    return None
+
+
+def iter_backup_lines(session, since=None, counts=None):
+    """
+    Linhas NDJSON (str, com '\\n') do backup, tabela por tabela, em lotes de
+    BATCH linhas. Com `since`, modo incremental. `counts` (dict), se
+    informado, recebe o número de linhas por tabela.
+    """
+    yield json.dumps({
+        'type': 'header', 'version': BACKUP_VERSION,
+        'generated_at': datetime.now().isoformat(),
+        'mode': 'incremental' if since else 'full',
+        'since': since.isoformat() if since else None,
+        'tables': [name for name, _ in BACKUP_TABLES],
+    }) + '\n'
+
+    counts = {} if counts is None else counts
+    for name, model in BACKUP_TABLES:
+        excluded = EXCLUDED_COLUMNS.get(name, set())
+        columns = [c for c in model.__table__.columns if c.name not in excluded]
+        query = select(*columns).order_by(model.__table__.c.id)
+        if since is not None:
+            condition = _incremental_filter(name, since)
+            if condition is not None:
+                query = query.where(condition)
+        keys = [c.name for c in columns]
+        counts[name] = 0
+        for row in session.execute(query.execution_options(yield_per=BATCH)):
+            counts[name] += 1
+            yield json.dumps({'table': name, 'row': dict(zip(keys, row))},
+                             ensure_ascii=False, default=_json_default) + '\n'
+
+    yield json.dumps({'type': 'end', 'counts': counts}) + '\n'
+
+
+def last_backup_at(session):
+    """Início do último backup registrado (config 'backup_last_at'), ou None."""
+    row = session.query(Config).filter(Config.key == LAST_BACKUP_KEY).first()
+    if not row or not row.value:
+        return None
+    try:
+        return datetime.fromisoformat(row.value)
+    except ValueError:
+        return None
+
+
+def _mark_backup(session, started_at):
+    row = session.query(Config).filter(Config.key == LAST_BACKUP_KEY).first()
+    if row is None:
+        row = Config(key=LAST_BACKUP_KEY, description='Início do último backup', category='sistema')
+        session.add(row)
+    row.value = started_at.isoformat()
+    session.commit()
+
+
+def write_backup(session, fileobj, incremental=False, compress=True):
+    """
+    Grava o backup em `fileobj` (binário) à medida que lê o banco e registra
+    o início do backup para o próximo incremental. Retorna
+    (modo, linhas por tabela).
+
+    O instante registrado é o de antes da leitura: o que mudar durante o
+    backup entra de novo no próximo incremental.
+    """
+    started_at = datetime.utcnow()
+    since = last_backup_at(session) if incremental else None
+    if incremental and since is None:
+        incremental = False  # sem backup anterior: vai completo
+
+    out = gzip.GzipFile(fileobj=fileobj, mode='wb') if compress else fileobj
+    counts = {}
+    try:
+        for line in iter_backup_lines(session, since, counts):
+            out.write(line.encode('utf-8'))
+    finally:
+        if compress:
+            out.close()
+    _mark_backup(session, started_at)
+    return ('incremental' if incremental else 'full'), counts
+
+
+# =============================================================================
+# Restauração
+# =============================================================================
+
+def _open_lines(fileobj):
+    """Linhas de um backup, comprimido ou não (detecta pelo cabeçalho gzip)."""
+    raw = fileobj if hasattr(fileobj, 'peek') else io.BufferedReader(fileobj)
+    if raw.peek(2)[:2] == b'\x1f\x8b':
+        raw = gzip.GzipFile(fileobj=raw, mode='rb')
+    return io.TextIOWrapper(raw, encoding='utf-8')
+
+
+def _upsert(session, name, rows):
+    """Insere ou atualiza (pelo id ou pela chave natural) um lote de linhas."""
+    model = MODELS[name]
+    key = NATURAL_KEYS.get(name, 'id')
+    excluded = EXCLUDED_COLUMNS.get(name, set())
+    rows = [{k: v for k, v in row.items() if k not in excluded and (key == 'id' or k != 'id')}
+            for row in rows]
+    if name == 'users':
+        # Só vale na inserção: no update, password_hash fica fora do SET
+        for row in rows:
+            row['password_hash'] = RESTORED_PASSWORD_HASH
+    dialect = session.get_bind().dialect.name
+    insert = postgresql.insert if dialect == 'postgresql' else sqlite.insert
+    stmt = insert(model.__table__)
+    columns = [c.name for c in model.__table__.columns
+               if c.name not in ('id', key) and c.name not in excluded]
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[key],
+        set_={column: stmt.excluded[column] for column in columns}
+    )
+    session.execute(stmt, rows)
+
+
+def _parse_row(model, row):
+    for column in model.__table__.columns:
+        value = row.get(column.name)
+        if isinstance(value, str) and isinstance(column.type, DateTime):
+            row[column.name] = datetime.fromisoformat(value)
+    return row
+
+
+def restore_backup(session, fileobj):
+    """
+    Restaura um backup em fluxo: lê linha a linha e grava em lotes de BATCH
+    com upsert pelo id, tudo numa transação. Retorna as contagens
+    restauradas por tabela. Falha (sem gravar nada) se o arquivo não
+    terminar no rodapé ou se as contagens não baterem.
+
+    Mescla, não substitui: o que está no banco e não está no arquivo fica.
+    """
+    counts, read = {}, {}
+    pending, current = [], None
+    header = footer = None
+
+    def flush():
+        if pending:
+            _upsert(session, current, pending)
+            counts[current] = counts.get(current, 0) + len(pending)
+            pending.clear()
+
+    try:
+        for line in _open_lines(fileobj):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if record.get('type') == 'header':
+                header = record
+                continue
+            if record.get('type') == 'end':
+                footer = record
+                break
+            if header is None:
+                raise ValueError("Arquivo sem cabeçalho de backup")
+            table = record['table']
+            if table not in MODELS:
+                raise ValueError(f"Tabela desconhecida no backup: {table}")
+            read[table] = read.get(table, 0) + 1
+            if table == 'configs' and record['row'].get('key') in SKIP_CONFIG_KEYS:
+                continue
+            if table != current or len(pending) >= BATCH:
+                flush()
+                current = table
+            pending.append(_parse_row(MODELS[table], record['row']))
+        flush()
+
+        if footer is None:
+            raise ValueError("Backup incompleto: o arquivo termina antes do rodapé")
+        expected = {name: n for name, n in footer['counts'].items() if n}
+        if expected != read:
+            raise ValueError(f"Contagens não conferem: esperado {expected}, lido {read}")
+
+        if session.get_bind().dialect.name == 'postgresql':
+            # Ids vieram do backup: as sequências seguem do maior id
+            for name, model in BACKUP_TABLES:
+                table = model.__tablename__
+                session.execute(text(
+                    f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+                    f"COALESCE((SELECT MAX(id) FROM {table}), 1))"
+                ))
+        _mark_restored(session)
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    invalidate_config_cache()
+    return counts
+
+
+def _mark_restored(session):
+    """
+    Depois da restauração (na mesma transação): o ranking incremental é
+    refeito do zero e todas as versões sobem, para o app em execução largar
+    rankings, config e telas ao vivo de antes da restauração.
+    """
+    clear_ranking_state(session)
+    for key in (MATCHES, GROUP_RESULTS, PODIUM, PRIZE_STATUS):
+        mark_ranking_changed(session, key)
+    _bump_config_version(session)
+
+
+def main():
+    from db import get_engine, get_session, create_tables
+
+    if len(sys.argv) < 3 or sys.argv[1] not in ('backup', 'restore'):
+        print(__doc__.split('Uso (linha de comando):')[1])
+        sys.exit(1)
+    command, path = sys.argv[1], sys.argv[2]
+    engine = get_engine()
+    create_tables(engine)
+    session = get_session(engine)
+    try:
+        if command == 'backup':
+            with open(path, 'wb') as f:
+                mode, counts = write_backup(session, f, incremental='--incremental' in sys.argv,
+                                            compress=path.endswith('.gz'))
+            print(f"Backup {mode} gravado em {path}: {counts}")
+        else:
+            with open(path, 'rb') as f:
+                counts = restore_backup(session, f)
+            print(f"Backup restaurado: {counts}")
+    finally:
+        session.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1 @@
+"""Scripts de benchmark e verificação do Bolão Copa do Mundo 2026."""
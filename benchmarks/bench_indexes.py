@@ -0,0 +1,215 @@
+"""
+Plano de consultas dos filtros mais usados, sem e com os índices de models.py
+
+Popula um banco sintético (benchmarks/synthetic.py), remove os índices
+declarados nos modelos, mede get_ranking, get_user_stats,
+update_completed_group_results e lock_missing_predictions, recria os índices
+(db.create_indexes) e mede de novo. Para cada função guarda o melhor tempo de
+--repeat execuções e o plano de cada consulta que ela emitiu:
+
+- Postgres: EXPLAIN (ANALYZE, FORMAT JSON), com o tempo de execução de cada
+  consulta (escritas rodam numa transação desfeita em seguida);
+- SQLite: EXPLAIN QUERY PLAN (sem tempos por consulta). As duas funções do
+  cron usam psycopg2 e só são medidas no Postgres.
+
+ATENÇÃO: apaga todas as tabelas do banco informado.
+
+Uso:
+    python -m benchmarks.bench_indexes [--database-url URL] [--users 3000]
+        [--played 60] [--repeat 3] [--output resultado.json]
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy import event, text
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.synthetic import build_database
+from db import create_indexes, drop_indexes, get_session
+
+EXPLAINABLE = ('SELECT', 'WITH', 'INSERT', 'UPDATE', 'DELETE')
+
+
+class _RecordingCursor:
+    """Cursor psycopg2 que anota cada comando executado."""
+
+    def __init__(self, cursor, log):
+        self._cursor = cursor
+        self._log = log
+
+    def execute(self, sql, params=None):
+        self._log.append((sql.decode() if isinstance(sql, bytes) else sql, params))
+        return self._cursor.execute(sql, params)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+
+class _RecordingConnection:
+    def __init__(self, conn, log):
+        self._conn = conn
+        self._log = log
+
+    def cursor(self, *args, **kwargs):
+        return _RecordingCursor(self._conn.cursor(*args, **kwargs), self._log)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+def _explain(engine, sql, params):
+    """Plano de uma consulta; no Postgres também o tempo de execução."""
+    with engine.connect() as conn:  # sem commit: escritas são desfeitas
+        if engine.dialect.name == 'postgresql':
+            row = conn.exec_driver_sql(f"EXPLAIN (ANALYZE, FORMAT JSON) {sql}", params).scalar()
+            plan = (json.loads(row) if isinstance(row, str) else row)[0]
+            return {'execution_ms': round(plan['Execution Time'], 3), 'plan': _summarize(plan['Plan'])}
+        rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+        return {'plan': [r[-1] for r in rows]}
+
+
+def _summarize(node):
+    """Nós do plano do Postgres como 'Index Scan using ix_... on matches'."""
+    label = node['Node Type']
+    if node.get('Index Name'):
+        label += f" using {node['Index Name']}"
+    if node.get('Relation Name'):
+        label += f" on {node['Relation Name']}"
+    return [label] + [line for child in node.get('Plans', []) for line in _summarize(child)]
+
+
+def _explain_all(engine, statements):
+    explained = []
+    for sql, params in statements:
+        if not sql.lstrip().upper().startswith(EXPLAINABLE):
+            continue
+        entry = {'sql': ' '.join(sql.split())[:160]}
+        try:
+            entry.update(_explain(engine, sql, params))
+        except Exception as e:
+            entry['erro'] = str(e).splitlines()[0]
+        explained.append(entry)
+    return explained
+
+
+def _measure(engine, run, reset=None, repeat=3, raw=False):
+    """Melhor tempo de `run` e os planos das consultas da última execução."""
+    best = None
+    for _ in range(repeat):
+        if reset:
+            reset()
+        statements = []
+        if raw:
+            dbapi_conn = engine.raw_connection()
+            target = _RecordingConnection(dbapi_conn, statements)
+        else:
+            target = get_session(engine)
+
+            def record(conn, cursor, statement, parameters, context, executemany):
+                if not executemany:
+                    statements.append((statement, parameters))
+            event.listen(engine, 'before_cursor_execute', record)
+        try:
+            start = time.perf_counter()
+            run(target)
+            elapsed = (time.perf_counter() - start) * 1000
+        finally:
+            if raw:
+                dbapi_conn.close()
+            else:
+                event.remove(engine, 'before_cursor_execute', record)
+                target.close()
+        best = elapsed if best is None else min(best, elapsed)
+    return {'ms': round(best, 1), 'consultas': _explain_all(engine, statements)}
+
+
+def run_phase(engine, user_id, repeat):
+    from scoring import get_ranking, get_user_stats
+
+    results = {
+        'get_ranking': _measure(engine, get_ranking, repeat=repeat),
+        'get_user_stats': _measure(engine, lambda s: get_user_stats(s, user_id), repeat=repeat),
+    }
+    if engine.dialect.name != 'postgresql':
+        skipped = {'pulado': 'usa psycopg2; medido apenas no Postgres'}
+        results['update_completed_group_results'] = skipped
+        results['lock_missing_predictions'] = skipped
+        return results
+
+    from update_results import update_completed_group_results, lock_missing_predictions
+
+    with engine.connect() as conn:
+        max_prediction_id = conn.execute(text("SELECT COALESCE(MAX(id), 0) FROM predictions")).scalar()
+
+    def reset_groups():
+        with engine.begin() as conn:
+            conn.execute(text("DELETE FROM group_results"))
+            conn.execute(text("UPDATE group_predictions SET breakdown = NULL, points_awarded = 0"))
+
+    def reset_locks():
+        # Desfaz os 0 x 0 criados na execução anterior
+        with engine.begin() as conn:
+            conn.execute(text("DELETE FROM predictions WHERE id > :id"), {'id': max_prediction_id})
+
+    results['update_completed_group_results'] = _measure(
+        engine, update_completed_group_results, reset=reset_groups, repeat=repeat, raw=True)
+    results['lock_missing_predictions'] = _measure(
+        engine, lock_missing_predictions, reset=reset_locks, repeat=repeat, raw=True)
+    reset_locks()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--database-url', help='padrão: SQLite temporário')
+    parser.add_argument('--users', type=int, default=3000)
+    parser.add_argument('--played', type=int, default=60, help='jogos já encerrados')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='arquivo JSON com o resultado completo')
+    args = parser.parse_args()
+
+    database_url = args.database_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+    engine, summary = build_database(database_url, args.users, args.played, seed=args.seed)
+    if engine.dialect.name == 'postgresql':
+        with engine.begin() as conn:
+            conn.execute(text("ANALYZE"))
+    user_id = args.users // 2 + 1
+
+    drop_indexes(engine)
+    before = run_phase(engine, user_id, args.repeat)
+    created = create_indexes(engine)
+    if engine.dialect.name == 'postgresql':
+        with engine.begin() as conn:
+            conn.execute(text("ANALYZE"))
+    after = run_phase(engine, user_id, args.repeat)
+
+    result = {
+        'banco': engine.dialect.name, 'dados': summary, 'indices': created,
+        'sem_indices': before, 'com_indices': after,
+    }
+    print(f"{engine.dialect.name}: {summary['users']} participantes, {summary['predictions']} palpites, "
+          f"{summary['played']} jogos encerrados")
+    for name in before:
+        if 'pulado' in before[name]:
+            print(f"  {name:<32} {before[name]['pulado']}")
+            continue
+        print(f"  {name:<32} sem índices {before[name]['ms']:>9.1f} ms   com índices {after[name]['ms']:>9.1f} ms")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(result, indent=2, ensure_ascii=False))
+        print(f"Resultado completo em {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,229 @@
+"""
+Carga sintética do bolão inteiro e tempo das funções principais
+
+Popula SQLite ou um Postgres local (benchmarks/synthetic.py) com o número de
+participantes pedido, palpites completos, palpites de grupo e de pódio e
+parte dos jogos encerrados, e mede:
+
+- rebuild_snapshots (fotos diárias do ranking, pré-requisito das telas)
+- get_ranking, calculate_live_ranking, calculate_ranking_changes
+- get_ranking_evolution_data (dados do gráfico de evolução)
+- get_best_predictions_by_round, write_backup (backup em fluxo, gravado
+  num arquivo temporário)
+- export_analytics (arquivo colunar das telas de estatística) e a leitura
+  das médias gerais sobre ele (analytics_export.user_totals)
+- update_results.run_post (só Postgres) contra um arquivo de fixtures
+  gravado — no formato da resposta da API-Football. Sem --fixtures, o
+  arquivo é gerado com os jogos "em andamento" do banco sintético.
+
+O resultado vai para JSON (--output); com --compare, os tempos são
+comparados com os de uma execução anterior para expor regressões.
+
+ATENÇÃO: apaga todas as tabelas do banco informado.
+
+Uso:
+    python -m benchmarks.bench_load [--database-url URL] [--users 5000]
+        [--played 60] [--in-progress 4] [--repeat 3]
+        [--fixtures gravacao.json] [--output resultado.json] [--compare anterior.json]
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+import pytz
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.synthetic import build_database, api_team_names, fixture_payload
+from db import get_session
+from models import Match
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, cwd=Path(__file__).resolve().parent.parent).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def _time(engine, func, repeat):
+    """Executa func(session) `repeat` vezes, cada uma com sessão nova."""
+    timings = []
+    for _ in range(repeat):
+        session = get_session(engine)
+        try:
+            start = time.perf_counter()
+            func(session)
+            timings.append((time.perf_counter() - start) * 1000)
+        finally:
+            session.close()
+    return {
+        'primeira_ms': round(timings[0], 1),
+        'mediana_ms': round(statistics.median(timings), 1),
+        'min_ms': round(min(timings), 1),
+        'execucoes': len(timings),
+    }
+
+
+def record_fixtures(engine, seed=42):
+    """
+    Fixtures no formato da API-Football para os jogos já iniciados e ainda
+    sem resultado, todos encerrados (FT) com placar aleatório.
+    """
+    api_names = api_team_names()
+    rng = random.Random(seed)
+    now_naive = datetime.now(pytz.timezone('America/Sao_Paulo')).replace(tzinfo=None)
+    session = get_session(engine)
+    try:
+        matches = session.query(Match).filter(
+            Match.status != 'finished', Match.datetime <= now_naive
+        ).order_by(Match.match_number).all()
+        fixtures = [
+            fixture_payload(m, api_names, 'FT', 90, rng.randint(0, 3), rng.randint(0, 3))
+            for m in matches if m.team1_code in api_names and m.team2_code in api_names
+        ]
+    finally:
+        session.close()
+    return {'results': len(fixtures), 'response': fixtures}
+
+
+def time_run_post(database_url, fixtures):
+    """run_post completo contra o banco sintético, com as fixtures gravadas no lugar da API."""
+    import update_results
+    from fixture_sources import ReplaySource
+
+    update_results.NEON_CONN = database_url
+    update_results.set_fixture_source(ReplaySource(fixtures))
+    start = time.perf_counter()
+    update_results.run_post()
+    return {'primeira_ms': round((time.perf_counter() - start) * 1000, 1), 'execucoes': 1,
+            'fixtures': len(fixtures.get('response', []))}
+
+
+def run(engine, database_url, repeat, fixtures):
+    from daily_summary import calculate_ranking_changes
+    from live_scoring import calculate_live_ranking
+    from novas_funcionalidades import (
+        get_ranking_evolution_data, get_best_predictions_by_round
+    )
+    from analytics_export import export_analytics, user_totals, ColumnarExport
+    from backup_stream import write_backup
+    from ranking_snapshots import rebuild_snapshots
+    from scoring import get_ranking
+
+    session = get_session(engine)
+    try:
+        last = session.query(Match).filter(Match.status == 'finished').order_by(Match.datetime.desc()).first()
+        last_id, last_datetime = (last.id, last.datetime) if last else (None, None)
+    finally:
+        session.close()
+
+    def snapshots(session):
+        rebuild_snapshots(session)
+        session.commit()
+
+    results = {'rebuild_snapshots': _time(engine, snapshots, 1)}
+    results['get_ranking'] = _time(engine, get_ranking, repeat)
+    results['calculate_live_ranking'] = _time(engine, lambda s: calculate_live_ranking(s, last_id), repeat)
+    results['calculate_ranking_changes'] = _time(
+        engine, lambda s: calculate_ranking_changes(s, target_date=last_datetime), repeat)
+    results['get_ranking_evolution_data'] = _time(engine, get_ranking_evolution_data, repeat)
+    results['get_best_predictions_by_round'] = _time(engine, get_best_predictions_by_round, repeat)
+
+    def backup(session):
+        with tempfile.TemporaryFile() as f:
+            write_backup(session, f)
+
+    results['write_backup'] = _time(engine, backup, repeat)
+
+    export_path = os.path.join(tempfile.mkdtemp(), 'bench_analytics.col')
+    results['export_analytics'] = _time(engine, lambda s: export_analytics(s, export_path), repeat)
+    results['user_totals'] = _time(engine, lambda s: user_totals(ColumnarExport(export_path)), repeat)
+
+    if engine.dialect.name == 'postgresql':
+        results['run_post'] = time_run_post(database_url, fixtures)
+    else:
+        results['run_post'] = {'pulado': 'usa psycopg2; medido apenas no Postgres'}
+    return results
+
+
+def compare(results, previous):
+    """Razão entre a mediana atual e a de uma execução anterior, por função."""
+    ratios = {}
+    for name, current in results.items():
+        before = previous.get('resultados', {}).get(name, {})
+        key = 'mediana_ms' if 'mediana_ms' in current else 'primeira_ms'
+        if current.get(key) and before.get(key):
+            ratios[name] = round(current[key] / before[key], 2)
+    return ratios
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--database-url', help='padrão: SQLite temporário')
+    parser.add_argument('--users', type=int, default=5000)
+    parser.add_argument('--played', type=int, default=60, help='jogos já encerrados')
+    parser.add_argument('--in-progress', type=int, default=4, help='jogos iniciados sem resultado (run_post)')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--fixtures', help='fixtures gravadas (JSON da API-Football) para o run_post')
+    parser.add_argument('--output', help='arquivo JSON com o resultado')
+    parser.add_argument('--compare', help='JSON de uma execução anterior')
+    args = parser.parse_args()
+
+    database_url = args.database_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+    start = time.perf_counter()
+    engine, summary = build_database(database_url, args.users, args.played,
+                                     in_progress=args.in_progress, seed=args.seed)
+    summary['carga_ms'] = round((time.perf_counter() - start) * 1000, 1)
+
+    if args.fixtures:
+        fixtures = json.loads(Path(args.fixtures).read_text())
+    else:
+        fixtures = record_fixtures(engine, args.seed)
+
+    results = run(engine, database_url, args.repeat, fixtures)
+    report = {
+        'gerado_em': datetime.now().isoformat(timespec='seconds'),
+        'commit': _git_commit(),
+        'python': platform.python_version(),
+        'banco': engine.dialect.name,
+        'dados': summary,
+        'resultados': results,
+    }
+
+    print(f"{engine.dialect.name}: {summary['users']} participantes, {summary['predictions']} palpites, "
+          f"{summary['played']} jogos encerrados (carga em {summary['carga_ms']:.0f} ms)")
+    ratios = {}
+    if args.compare:
+        ratios = compare(results, json.loads(Path(args.compare).read_text()))
+        report['comparacao'] = ratios
+    for name, r in results.items():
+        if 'pulado' in r:
+            print(f"  {name:<30} {r['pulado']}")
+            continue
+        line = f"  {name:<30} 1ª {r['primeira_ms']:>9.1f} ms"
+        if 'mediana_ms' in r:
+            line += f"   mediana {r['mediana_ms']:>9.1f} ms"
+        if name in ratios:
+            line += f"   x{ratios[name]:.2f} vs anterior"
+        print(line)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2, ensure_ascii=False))
+        print(f"Resultado em {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+"""
+Benchmark do pontuador em lote (scoring_rules)
+
+Mede o tempo de pontuar N palpites (padrão 100.000) com:
+  - original: o if/else de scoring.calculate_match_points antes de
+    scoring_rules (copiado abaixo) — a referência do ganho;
+  - escalar: scoring.calculate_match_points atual (tabela pré-calculada);
+  - lote: calculate_match_points_batch.
+A equivalência com as regras fica em tests/test_scoring_rules.py
+(python -m pytest tests).
+
+Uso:
+    python -m benchmarks.bench_scoring [--n 100000] [--seed 42]
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from scoring import calculate_match_points
+from scoring_rules import calculate_match_points_batch, np
+
+# Mesmos valores padrão de scoring.get_scoring_config
+CONFIG = {'placar_exato': 20, 'resultado_gols': 15, 'resultado': 10, 'gols': 5, 'nenhum': 0}
+
+
+def original_calculate_match_points(pred_team1, pred_team2, real_team1, real_team2, config):
+    """scoring.calculate_match_points como era antes de scoring_rules."""
+    if pred_team1 > pred_team2:
+        pred_result = 'team1'
+    elif pred_team1 < pred_team2:
+        pred_result = 'team2'
+    else:
+        pred_result = 'draw'
+
+    if real_team1 > real_team2:
+        real_result = 'team1'
+    elif real_team1 < real_team2:
+        real_result = 'team2'
+    else:
+        real_result = 'draw'
+
+    acertou_resultado = pred_result == real_result
+    acertou_gols_team1 = pred_team1 == real_team1
+    acertou_gols_team2 = pred_team2 == real_team2
+    acertou_placar = acertou_gols_team1 and acertou_gols_team2
+
+    if acertou_placar:
+        return config['placar_exato'], 'placar_exato', "Placar exato! 🎯"
+    elif acertou_resultado and (acertou_gols_team1 or acertou_gols_team2):
+        return config['resultado_gols'], 'resultado_gols', "Resultado + gols de um time ✓"
+    elif acertou_resultado:
+        return config['resultado'], 'resultado', "Resultado correto ✓"
+    elif acertou_gols_team1 or acertou_gols_team2:
+        return config['gols'], 'gols', "Gols de um time ✓"
+    else:
+        return config['nenhum'], 'nenhum', "Não pontuou"
+
+
+def _timed(fn, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run_benchmark(config, n, seed=42):
+    rng = random.Random(seed)
+    p1 = [rng.randint(0, 5) for _ in range(n)]
+    p2 = [rng.randint(0, 5) for _ in range(n)]
+    r1 = [rng.randint(0, 5) for _ in range(n)]
+    r2 = [rng.randint(0, 5) for _ in range(n)]
+
+    def original():
+        for a, b, c, d in zip(p1, p2, r1, r2):
+            original_calculate_match_points(a, b, c, d, config)
+
+    def scalar():
+        for a, b, c, d in zip(p1, p2, r1, r2):
+            calculate_match_points(a, b, c, d, config)
+
+    def batch():
+        calculate_match_points_batch(p1, p2, r1, r2, config)
+
+    return _timed(original), _timed(scalar), _timed(batch)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--n', type=int, default=100000, help='palpites no benchmark')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    config = dict(CONFIG)
+
+    original, scalar, batch = run_benchmark(config, args.n, seed=args.seed)
+    engine = 'NumPy' if np is not None else 'Python puro'
+    print(f"{args.n} palpites — original: {original * 1000:.1f} ms | "
+          f"escalar: {scalar * 1000:.1f} ms ({original / scalar:.1f}x) | "
+          f"lote ({engine}): {batch * 1000:.1f} ms ({original / batch:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""
+Benchmark da simulação Monte Carlo (tournament_simulator)
+
+Monta um bolão sintético sobre a tabela de copa2026_data (sem banco):
+participantes com palpites aleatórios para os jogos de grupo, classificação
+dos grupos e pódio, e os primeiros --played jogos já encerrados. Mede o tempo
+de --n simulações com 1 processo e com --workers processos e confere que, em
+cada posição, as probabilidades somam 100%.
+
+Uso:
+    python -m benchmarks.bench_simulator [--n 100000] [--users 30] [--played 24] [--workers 4]
+"""
+
+import argparse
+import random
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from copa2026_data import MATCHES_GROUP_STAGE, MATCHES_KNOCKOUT
+from tournament_simulator import build_model, ratings_from_power_ranking, simulate
+
+# Mesmos valores padrão de scoring.get_scoring_config
+CONFIG = {
+    'placar_exato': 20, 'resultado_gols': 15, 'resultado': 10, 'gols': 5, 'nenhum': 0,
+    'grupo_ordem_correta': 20, 'grupo_ordem_invertida': 10, 'grupo_um_certo': 5,
+    'podio_completo': 150, 'podio_campeao': 100, 'podio_vice': 50,
+    'podio_terceiro': 30, 'podio_fora_ordem': 20,
+}
+
+
+def synthetic_model(n_users, played, seed):
+    rng = random.Random(seed)
+    codes = sorted({code for m in MATCHES_GROUP_STAGE for code in m[2:4]})
+    team_id = {code: i + 1 for i, code in enumerate(codes)}
+    teams = [(team_id[code], code) for code in codes]
+
+    matches = []
+    for i, (number, group, code1, code2, *_) in enumerate(MATCHES_GROUP_STAGE):
+        finished = i < played
+        matches.append((number, number, 'Grupos', group, team_id[code1], team_id[code2],
+                        'finished' if finished else 'scheduled',
+                        rng.randint(0, 3) if finished else None,
+                        rng.randint(0, 3) if finished else None, None))
+    for number, phase, *_ in MATCHES_KNOCKOUT:
+        matches.append((number, number, phase, None, None, None, 'scheduled', None, None, None))
+
+    users = [(u, f"Participante {u}") for u in range(1, n_users + 1)]
+    predictions = [(u, m[0], rng.randint(0, 3), rng.randint(0, 3)) for u, _ in users for m in matches[:72]]
+    groups = {}
+    for _, group, code1, code2, *_ in MATCHES_GROUP_STAGE:
+        groups.setdefault(group, set()).update((team_id[code1], team_id[code2]))
+    group_predictions = [(u, g, *rng.sample(sorted(ids), 2)) for u, _ in users for g, ids in groups.items()]
+    podium_predictions = [(u, *rng.sample(list(team_id.values()), 3)) for u, _ in users]
+
+    return build_model(teams, matches, users, predictions, group_predictions, podium_predictions,
+                       {}, CONFIG, ratings_from_power_ranking(), relegation=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--n', type=int, default=100_000)
+    parser.add_argument('--users', type=int, default=30)
+    parser.add_argument('--played', type=int, default=24, help='jogos de grupo já encerrados')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    model = synthetic_model(args.users, args.played, args.seed)
+    for workers in sorted({1, args.workers}):
+        result = simulate(model, n_simulations=args.n, seed=args.seed, workers=workers)
+        print(f"{result['simulations']} simulações, {workers} processo(s): {result['elapsed_ms']:.0f} ms")
+
+    for key in ('p_primeiro', 'p_segundo', 'p_terceiro'):
+        total = sum(r[key] for r in result['rows'])
+        if abs(total - 1) > 1e-9:
+            print(f"FALHOU: {key} soma {total:.6f}")
+            sys.exit(1)
+    for r in result['rows'][:5]:
+        print(f"  {r['nome']:<16} atual {r['pontos_atuais']:>4}  média {r['pontos_medios']:>6}  "
+              f"1º {r['p_primeiro']:6.1%}  rebaixamento {r['p_rebaixamento']:6.1%}")
+
+
+if __name__ == '__main__':
+    main()
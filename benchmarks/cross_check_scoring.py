@@ -0,0 +1,173 @@
+"""
+Verificação cruzada das pontuações do app e do cron
+
+Prova que os dois caminhos de pontuação dão o mesmo resultado para todo o
+espaço de placares 0..10 × 0..10 (palpite × resultado):
+
+  - app  : scoring.calculate_match_points / calculate_group_points
+  - cron : update_results (caminho execute_values, em Python)
+  - SQL  : update_results (UPDATE ... FROM com CASE), só com --database-url —
+           roda em tabelas temporárias e desfaz tudo no final
+
+Usa uma pontuação diferente da padrão para pegar chaves de config trocadas.
+Qualquer divergência aborta o script com código de saída 1.
+
+Uso:
+    python -m benchmarks.cross_check_scoring [--database-url postgresql://...]
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import scoring
+import scoring_rules as rules
+import update_results
+
+MAX_GOLS = rules.LOOKUP_MAX_GOALS
+
+# Valores distintos por tipo de acerto (os padrões 20/15/10/5/0 esconderiam
+# uma troca entre 'nenhum' e algum tipo que valha 0)
+MATCH_VALUES = {'pontos_placar_exato': 17, 'pontos_resultado_gols': 13, 'pontos_resultado': 7,
+                'pontos_gols': 3, 'pontos_nenhum': 1}
+GROUP_VALUES = {'grupo_ordem_correta': 23, 'grupo_ordem_invertida': 11, 'grupo_um_certo': 4}
+
+# Palpites de classificação testados contra o resultado real (1º=1, 2º=2)
+GROUP_TEAMS = (None, 1, 2, 3, 4)
+REAL_FIRST, REAL_SECOND = 1, 2
+
+
+def _score_space():
+    goals = range(MAX_GOLS + 1)
+    return [(p1, p2, r1, r2) for p1 in goals for p2 in goals for r1 in goals for r2 in goals]
+
+
+def _expected_match(config):
+    """{(p1, p2, r1, r2): (pontos, tipo, descrição)} pelo caminho do app."""
+    return {case: scoring.calculate_match_points(*case, config) for case in _score_space()}
+
+
+def _expected_group(config):
+    return {
+        (first, second): scoring.calculate_group_points(first, second, REAL_FIRST, REAL_SECOND, config)
+        for first in GROUP_TEAMS for second in GROUP_TEAMS
+    }
+
+
+def _compare(name, expected, actual):
+    errors = [(case, expected[case], actual.get(case)) for case in expected if expected[case] != actual.get(case)]
+    for case, exp, got in errors[:10]:
+        print(f"  [{name}] {case}: app={exp} {name}={got}")
+    if errors:
+        raise AssertionError(f"{name}: {len(errors)} divergência(s)")
+    print(f"{name}: {len(expected)} casos idênticos ao app")
+
+
+def check_lookup_table():
+    """A tabela pré-calculada bate com a regra aplicada na hora (inclusive acima de 10)."""
+    goals = range(MAX_GOLS + 3)
+    cases = [(p1, p2, r1, r2) for p1 in goals for p2 in goals for r1 in goals for r2 in goals]
+    expected = {case: rules._classify(*case) for case in cases}
+    actual = {case: rules.classify(*case) for case in cases}
+    _compare('tabela', expected, actual)
+
+
+def check_cron_python(match_config, group_config):
+    """Caminho execute_values do cron (pontuação em Python antes do UPDATE)."""
+    points_by_type = rules.match_config_from_values(MATCH_VALUES)
+    cases = _score_space()
+    actual = {}
+    for r1 in range(MAX_GOLS + 1):
+        for r2 in range(MAX_GOLS + 1):
+            preds = [(i, p1, p2) for i, (p1, p2, c1, c2) in enumerate(cases) if (c1, c2) == (r1, r2)]
+            for pred_id, pts, tipo, desc in update_results._match_score_rows(preds, r1, r2, points_by_type):
+                actual[cases[pred_id]] = (pts, tipo, desc)
+    _compare('cron', _expected_match(match_config), actual)
+
+    config = rules.group_config_from_values(GROUP_VALUES)
+    actual = {}
+    for first in GROUP_TEAMS:
+        for second in GROUP_TEAMS:
+            desc, key = rules.GROUP_OUTCOMES[
+                rules.classify_group_prediction(first, second, REAL_FIRST, REAL_SECOND)
+            ]
+            actual[(first, second)] = (config[key] if key else 0, desc)
+    _compare('cron grupos', _expected_group(group_config), actual)
+
+
+def check_cron_sql(database_url, match_config, group_config):
+    """
+    Caminho SQL do cron, no Postgres. As tabelas temporárias têm os mesmos
+    nomes das reais e as encobrem nesta conexão; a transação é desfeita.
+    """
+    import psycopg2
+    from psycopg2.extras import execute_values
+
+    conn = psycopg2.connect(database_url)
+    try:
+        cursor = conn.cursor()
+        cursor.execute("""
+            CREATE TEMP TABLE config (key TEXT PRIMARY KEY, value TEXT);
+            CREATE TEMP TABLE predictions (
+                id INTEGER PRIMARY KEY, match_id INTEGER,
+                pred_team1_score INTEGER, pred_team2_score INTEGER,
+                points_awarded INTEGER, points_type TEXT, breakdown TEXT
+            );
+            CREATE TEMP TABLE group_predictions (
+                id INTEGER PRIMARY KEY, group_name TEXT,
+                first_place_team_id INTEGER, second_place_team_id INTEGER,
+                points_awarded INTEGER, breakdown TEXT
+            );
+        """)
+        execute_values(cursor, "INSERT INTO config (key, value) VALUES %s",
+                       [(k, str(v)) for k, v in {**MATCH_VALUES, **GROUP_VALUES}.items()])
+
+        # Um "jogo" por placar real, com todos os palpites 0..10 × 0..10
+        cases = _score_space()
+        execute_values(cursor, "INSERT INTO predictions (id, match_id, pred_team1_score, pred_team2_score) VALUES %s",
+                       [(i, r1 * (MAX_GOLS + 1) + r2, p1, p2) for i, (p1, p2, r1, r2) in enumerate(cases)],
+                       page_size=5000)
+        for r1 in range(MAX_GOLS + 1):
+            for r2 in range(MAX_GOLS + 1):
+                update_results._score_match_sql(cursor, r1 * (MAX_GOLS + 1) + r2, r1, r2)
+
+        cursor.execute("SELECT id, points_awarded, points_type, breakdown FROM predictions")
+        actual = {cases[pred_id]: (pts, tipo, desc) for pred_id, pts, tipo, desc in cursor.fetchall()}
+        _compare('SQL', _expected_match(match_config), actual)
+
+        combos = [(first, second) for first in GROUP_TEAMS for second in GROUP_TEAMS]
+        execute_values(cursor, "INSERT INTO group_predictions (id, group_name, first_place_team_id, second_place_team_id) VALUES %s",
+                       [(i, 'A', first, second) for i, (first, second) in enumerate(combos)])
+        update_results._score_group_sql(cursor, 'A', REAL_FIRST, REAL_SECOND)
+        cursor.execute("SELECT id, points_awarded, breakdown FROM group_predictions")
+        actual = {combos[pred_id]: (pts, desc) for pred_id, pts, desc in cursor.fetchall()}
+        _compare('SQL grupos', _expected_group(group_config), actual)
+    finally:
+        conn.rollback()
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--database-url', help='Postgres para verificar também o caminho SQL')
+    args = parser.parse_args()
+
+    match_config = rules.match_config_from_values(MATCH_VALUES)
+    group_config = rules.group_config_from_values(GROUP_VALUES)
+
+    try:
+        check_lookup_table()
+        check_cron_python(match_config, group_config)
+        if args.database_url:
+            check_cron_sql(args.database_url, match_config, group_config)
+        else:
+            print("SQL: ignorado (informe --database-url para verificar)")
+    except AssertionError as e:
+        print(f"FALHOU: {e}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
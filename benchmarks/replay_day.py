@@ -0,0 +1,265 @@
+"""
+Ensaio de um dia de jogos: update_results contra uma gravação reproduzida
+
+Popula um Postgres local (benchmarks/synthetic.py; update_results usa
+psycopg2), gera — ou lê, com --recording — a gravação de um dia de jogos
+com os jogos "em andamento" do banco sintético (início, gols, intervalo,
+fim) e a reproduz com fixture_sources.ReplaySource. A cada --tick segundos
+da gravação roda update_results.run_live, como o cron ao vivo; no fim roda
+run_post.
+
+Por padrão a reprodução avança passo a passo (seek), sem esperar — o
+resultado é determinístico. Com --realtime, o relógio da gravação anda
+--speed vezes mais rápido que o real e os ticks dormem entre si. Com
+--stand-in, as chamadas passam por um servidor HTTP local
+(fixture_sources.StandInServer) em vez de irem direto ao replayer.
+
+Relata o tempo por etapa (fetch, match, update, score, propagate, de
+update_results.STAGE_TIMINGS) e a latência de cada gol: do instante em que
+aparece na "API" até o placar estar gravado no banco.
+
+ATENÇÃO: apaga todas as tabelas do banco informado.
+
+Uso:
+    python -m benchmarks.replay_day --database-url postgresql://localhost/bolao_bench
+        [--users 1000] [--matches 4] [--tick 60] [--speed 600] [--realtime]
+        [--stand-in] [--recording dia.json] [--save-recording dia.json] [--output resultado.json]
+"""
+
+import argparse
+import json
+import random
+import statistics
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+from sqlalchemy import text
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.synthetic import build_database, api_team_names, fixture_payload, BRAZIL_TZ
+from db import get_session
+from fixture_sources import ApiFootballSource, ReplaySource, StandInServer
+from models import Match
+
+KICKOFF_GAP = 3 * 3600  # jogos do dia a cada 3h
+HALF_TIME_BREAK = 15 * 60
+
+
+def _match_clock(minute):
+    """Segundos desde o início do jogo em que o relógio marca `minute`."""
+    return minute * 60 if minute <= 45 else minute * 60 + HALF_TIME_BREAK
+
+
+def build_day_recording(engine, seed=42):
+    """
+    Gravação de um dia com os jogos iniciados e sem resultado do banco, um
+    a cada KICKOFF_GAP. Além dos frames, traz os eventos de gol (com o
+    match_id do banco) usados para medir a latência.
+    """
+    rng = random.Random(seed)
+    api_names = api_team_names()
+    session = get_session(engine)
+    try:
+        now_naive = datetime.now(BRAZIL_TZ).replace(tzinfo=None)
+        matches = [
+            m for m in session.query(Match).filter(
+                Match.status != 'finished', Match.datetime <= now_naive
+            ).order_by(Match.datetime, Match.match_number).all()
+            if m.team1_code in api_names and m.team2_code in api_names
+        ]
+
+        # (t, índice do jogo, status, minuto, gols casa, gols fora)
+        states = []
+        events = []
+        for i, m in enumerate(matches):
+            kickoff = i * KICKOFF_GAP
+            goals = sorted(rng.sample(range(1, 91), rng.randint(0, 5)))
+            home = away = 0
+            states.append((kickoff, i, '1H', 0, 0, 0))
+            for minute in goals:
+                if rng.random() < 0.5:
+                    home += 1
+                else:
+                    away += 1
+                t = kickoff + _match_clock(minute)
+                states.append((t, i, '1H' if minute <= 45 else '2H', minute, home, away))
+                events.append({'t': t, 'match_id': m.id, 'team1_score': home, 'team2_score': away})
+            half_time = _score_at(states, i, 45)
+            states.append((kickoff + 45 * 60, i, 'HT', 45, *half_time))
+            states.append((kickoff + 45 * 60 + HALF_TIME_BREAK, i, '2H', 46, *half_time))
+            states.append((kickoff + _match_clock(90) + 60, i, 'FT', 90, home, away))
+    finally:
+        session.close()
+
+    frames = []
+    current = {}
+    for t, i, status, minute, home, away in sorted(states, key=lambda s: (s[0], s[1])):
+        current[i] = fixture_payload(matches[i], api_names, status, minute, home, away)
+        if frames and frames[-1]['t'] == t:
+            frames[-1]['fixtures'] = list(current.values())
+        else:
+            frames.append({'t': t, 'fixtures': list(current.values())})
+
+    return {
+        'start': BRAZIL_TZ.localize(matches[0].datetime).isoformat() if matches else None,
+        'frames': frames,
+        'events': sorted(events, key=lambda e: e['t']),
+    }
+
+
+def _score_at(states, index, minute):
+    """Placar do jogo `index` no minuto dado, pelos estados já gerados."""
+    home = away = 0
+    for _, i, _, m, h, a in states:
+        if i == index and m <= minute:
+            home, away = h, a
+    return home, away
+
+
+def _percentiles(values):
+    if not values:
+        return {'n': 0}
+    ordered = sorted(values)
+    return {
+        'n': len(ordered),
+        'p50_ms': round(statistics.median(ordered), 1),
+        'p95_ms': round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 1),
+        'max_ms': round(ordered[-1], 1),
+        'total_ms': round(sum(ordered), 1),
+    }
+
+
+def _db_scores(engine, match_ids):
+    with engine.connect() as conn:
+        rows = conn.execute(
+            text("SELECT id, team1_score, team2_score FROM matches WHERE id = ANY(:ids)"),
+            {'ids': list(match_ids)}
+        ).fetchall()
+    return {r[0]: (r[1], r[2]) for r in rows}
+
+
+def replay(engine, database_url, recording, tick, speed, realtime, stand_in):
+    import update_results
+
+    replay_source = ReplaySource(recording, speed=speed)
+    server = None
+    if stand_in:
+        server = StandInServer(replay_source).start()
+        update_results.set_fixture_source(ApiFootballSource(api_key='', base_url=server.url))
+    else:
+        update_results.set_fixture_source(replay_source)
+    update_results.NEON_CONN = database_url
+    update_results.STAGE_TIMINGS.clear()
+
+    pending = list(recording.get('events', []))
+    latencies, lags = [], []
+    run_live_ms = []
+    started = time.perf_counter()
+    released = {}  # t do frame -> instante (perf_counter) em que ficou visível
+    try:
+        t = 0
+        while t <= replay_source.duration + tick:
+            if realtime:
+                wait = started + t / speed - time.perf_counter()
+                if wait > 0:
+                    time.sleep(wait)
+            else:
+                replay_source.seek(t)
+            now = time.perf_counter()
+            for frame in replay_source.frames:
+                if frame['t'] <= t and frame['t'] not in released:
+                    released[frame['t']] = started + frame['t'] / speed if realtime else now
+
+            start = time.perf_counter()
+            update_results.run_live()
+            done = time.perf_counter()
+            run_live_ms.append((done - start) * 1000)
+
+            due = [e for e in pending if e['t'] <= t]
+            if due:
+                scores = _db_scores(engine, {e['match_id'] for e in due})
+                for event in due:
+                    if scores.get(event['match_id']) == (event['team1_score'], event['team2_score']):
+                        latencies.append((done - released.get(event['t'], now)) * 1000)
+                        lags.append(t - event['t'])
+                        pending.remove(event)
+            t += tick
+
+        start = time.perf_counter()
+        update_results.run_post()
+        run_post_ms = (time.perf_counter() - start) * 1000
+    finally:
+        if server:
+            server.stop()
+
+    return {
+        'ticks': len(run_live_ms),
+        'requisicoes_api': replay_source.requests,
+        'run_live': _percentiles(run_live_ms),
+        'run_post_ms': round(run_post_ms, 1),
+        'etapas': {name: _percentiles(values) for name, values in update_results.STAGE_TIMINGS.items()},
+        'gols': {
+            'total': len(recording.get('events', [])),
+            'nao_gravados': len(pending),
+            'latencia': _percentiles(latencies),
+            # Quanto do atraso vem só da cadência do cron (segundos da gravação)
+            'atraso_do_tick_s': {'medio': round(statistics.mean(lags), 1) if lags else None,
+                                 'max': max(lags) if lags else None},
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--database-url', required=True, help='Postgres local (psycopg2)')
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--played', type=int, default=48, help='jogos já encerrados antes do dia')
+    parser.add_argument('--matches', type=int, default=4, help='jogos do dia reproduzido')
+    parser.add_argument('--tick', type=int, default=60, help='segundos da gravação entre execuções do run_live')
+    parser.add_argument('--speed', type=float, default=600.0, help='aceleração do relógio com --realtime')
+    parser.add_argument('--realtime', action='store_true')
+    parser.add_argument('--stand-in', action='store_true', help='passa pelo servidor HTTP local')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--recording', help='gravação a reproduzir (padrão: gerada do banco sintético)')
+    parser.add_argument('--save-recording', help='salva a gravação gerada')
+    parser.add_argument('--output', help='arquivo JSON com o resultado')
+    args = parser.parse_args()
+
+    if not args.database_url.startswith('postgres'):
+        parser.error('update_results usa psycopg2: informe um Postgres local')
+
+    engine, summary = build_database(args.database_url, args.users, args.played,
+                                     in_progress=args.matches, seed=args.seed)
+    if args.recording:
+        recording = json.loads(Path(args.recording).read_text())
+    else:
+        recording = build_day_recording(engine, args.seed)
+        if args.save_recording:
+            Path(args.save_recording).write_text(json.dumps(recording, ensure_ascii=False))
+
+    result = replay(engine, args.database_url, recording, args.tick, args.speed,
+                    args.realtime, args.stand_in)
+    result['dados'] = summary
+
+    print(f"{summary['users']} participantes, {summary['in_progress']} jogos reproduzidos, "
+          f"{result['ticks']} execuções do run_live, {result['requisicoes_api']} requisições à API")
+    for name, stats in result['etapas'].items():
+        if stats['n']:
+            print(f"  {name:<10} n={stats['n']:<5} p50 {stats['p50_ms']:>8.1f} ms   "
+                  f"p95 {stats['p95_ms']:>8.1f} ms   total {stats['total_ms']:>9.1f} ms")
+    gols = result['gols']
+    if gols['latencia']['n']:
+        print(f"  gols: {gols['latencia']['n']}/{gols['total']} gravados, latência p50 "
+              f"{gols['latencia']['p50_ms']:.1f} ms, p95 {gols['latencia']['p95_ms']:.1f} ms")
+    print(f"  run_post final: {result['run_post_ms']:.1f} ms")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(result, indent=2, ensure_ascii=False))
+        print(f"Resultado em {args.output}")
+
+
+if __name__ == '__main__':
+    main()
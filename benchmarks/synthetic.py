@@ -0,0 +1,140 @@
+"""
+Banco sintético para os benchmarks
+
+Cria (ou recria) o esquema em DATABASE_URL — SQLite ou um Postgres local —
+com os 104 jogos de copa2026_data, N participantes com palpites para todos
+os jogos, palpites de grupo e de pódio, e os primeiros `played` jogos (em
+ordem cronológica) encerrados com placar. Os horários dos jogos são
+deslocados para que os encerrados fiquem no passado e o restante no futuro,
+como no meio da Copa. Os `in_progress` jogos seguintes começaram há três
+horas mas ainda não têm placar — são os que um run_post viria a encerrar.
+
+ATENÇÃO: apaga todas as tabelas do banco informado.
+"""
+
+import random
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytz
+from sqlalchemy import insert
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from db import get_engine, create_tables, session_scope, populate_copa2026_data
+from models import (
+    Base, User, Team, Match, Prediction, GroupPrediction, PodiumPrediction
+)
+
+BATCH = 20_000
+BRAZIL_TZ = pytz.timezone('America/Sao_Paulo')
+
+
+def _insert_batched(session, model, rows):
+    for start in range(0, len(rows), BATCH):
+        session.execute(insert(model), rows[start:start + BATCH])
+
+
+def build_database(database_url, n_users=1000, played=48, in_progress=0, missing=0.02, seed=42):
+    """
+    Popula o banco e devolve (engine, resumo).
+
+    missing: fração dos palpites de jogos já iniciados que fica de fora,
+        para o lock_missing_predictions ter o que completar com 0 x 0
+    """
+    rng = random.Random(seed)
+    engine = get_engine(database_url)
+    Base.metadata.drop_all(engine)
+    create_tables(engine)
+
+    now_naive = datetime.now(BRAZIL_TZ).replace(tzinfo=None)
+
+    with session_scope(engine) as session:
+        populate_copa2026_data(session)
+        team_codes = {t.id: t.code for t in session.query(Team).all()}
+        team_ids = list(team_codes)
+        groups = {}
+        for team in session.query(Team).all():
+            groups.setdefault(team.group, []).append(team.id)
+
+        matches = session.query(Match).order_by(Match.datetime, Match.match_number).all()
+        played = min(played, len(matches))
+        in_progress = min(in_progress, len(matches) - played)
+        upcoming = played + in_progress
+        reference = matches[upcoming].datetime if upcoming < len(matches) else matches[-1].datetime
+        offset = now_naive - reference + timedelta(hours=1)
+        for i, m in enumerate(matches):
+            m.datetime = m.datetime + offset
+            if played <= i < upcoming:
+                m.datetime = now_naive - timedelta(hours=3)
+            if i < upcoming and (m.team1_id is None or m.team2_id is None):
+                m.team1_id, m.team2_id = rng.sample(team_ids, 2)
+                m.team1_code, m.team2_code = team_codes[m.team1_id], team_codes[m.team2_id]
+            if i < played:
+                m.status = 'finished'
+                m.team1_score = rng.randint(0, 3)
+                m.team2_score = rng.randint(0, 3)
+        match_ids = [m.id for m in matches]
+        started = {m.id for m in matches[:upcoming]}
+        session.flush()
+
+        created = datetime.utcnow()
+        _insert_batched(session, User, [
+            {'name': f'Participante {u}', 'username': f'user{u}', 'password_hash': 'x',
+             'role': 'player', 'active': True, 'created_at': created}
+            for u in range(1, n_users + 1)
+        ])
+        user_ids = [uid for (uid,) in session.query(User.id).filter(User.role != 'admin').all()]
+
+        predictions = [
+            {'user_id': uid, 'match_id': mid,
+             'pred_team1_score': rng.randint(0, 3), 'pred_team2_score': rng.randint(0, 3),
+             'created_at': created}
+            for uid in user_ids for mid in match_ids
+            if mid not in started or rng.random() >= missing
+        ]
+        _insert_batched(session, Prediction, predictions)
+        _insert_batched(session, GroupPrediction, [
+            {'user_id': uid, 'group_name': g,
+             'first_place_team_id': first, 'second_place_team_id': second}
+            for uid in user_ids for g, ids in sorted(groups.items()) if g
+            for first, second in [rng.sample(ids, 2)]
+        ])
+        _insert_batched(session, PodiumPrediction, [
+            {'user_id': uid, 'champion_team_id': c, 'runner_up_team_id': r, 'third_place_team_id': t}
+            for uid in user_ids for c, r, t in [rng.sample(team_ids, 3)]
+        ])
+
+    return engine, {
+        'users': len(user_ids), 'matches': len(match_ids), 'played': played,
+        'in_progress': in_progress, 'predictions': len(predictions),
+    }
+
+
+def api_team_names():
+    """Código do banco -> nome da seleção na API-Football."""
+    from update_results import API_NAME_TO_NEON_CODE
+
+    names = {}
+    for name, code in API_NAME_TO_NEON_CODE.items():
+        names.setdefault(code, name)
+    return names
+
+
+def fixture_payload(match, api_names, status, elapsed, home, away):
+    """Uma fixture no formato da API-Football para um Match do banco sintético."""
+    finished = status in ('FT', 'AET', 'PEN')
+    return {
+        'fixture': {
+            'id': 1_000_000 + match.match_number,
+            'date': BRAZIL_TZ.localize(match.datetime).isoformat(),
+            'status': {'short': status, 'elapsed': elapsed},
+        },
+        'teams': {'home': {'name': api_names[match.team1_code]}, 'away': {'name': api_names[match.team2_code]}},
+        'goals': {'home': home, 'away': away},
+        'score': {
+            'fulltime': {'home': home if finished else None, 'away': away if finished else None},
+            'penalty': {'home': None, 'away': None},
+        },
+    }
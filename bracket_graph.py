@@ -0,0 +1,132 @@
+"""
+Grafo do chaveamento do mata-mata, compartilhado pelo app
+(bracket_propagation.py, via SQLAlchemy) e pelo cron (update_results.py,
+via psycopg2).
+
+Cada vaga de um jogo do mata-mata que ainda tem placeholder é uma aresta
+vinda da sua origem:
+  - "W73" / "L101" → vencedor / perdedor do jogo 73 / 101
+  - "1A" / "2B"    → 1º do grupo A / 2º do grupo B (só vaga sem time)
+Os "3ABCDF" (melhores 3ºs) não entram: são resolvidos pelo admin ou pela API.
+
+O grafo é montado uma vez a partir das vagas abertas; resolve() recebe as
+origens já decididas e devolve só as vagas que elas preenchem — cada aresta
+é consumida uma vez — para serem gravadas de uma só vez. defined() diz quais
+jogos ficaram com os dois times definidos, para as etapas seguintes
+(trava de palpites, avisos) reagirem.
+
+Módulo puro (sem SQLAlchemy nem psycopg2), como scoring_rules.
+"""
+
+import re
+from collections import defaultdict, namedtuple
+
+PLACEHOLDER_RE = re.compile(r'^(?:([WL])(\d+)|([12])([A-L]))$')
+
+# Vaga preenchida: jogo, lado ('team1' / 'team2'), time e código do time
+SlotUpdate = namedtuple('SlotUpdate', 'match_number side team_id team_code placeholder')
+
+
+def parse_placeholder(code):
+    """
+    Origem de um placeholder: ('W', 73), ('L', 101), ('1', 'A'), ('2', 'B').
+    None para código de time ou placeholder não propagável ("3ABCDF").
+    """
+    found = PLACEHOLDER_RE.match(code or '')
+    if not found:
+        return None
+    if found.group(1):
+        return found.group(1), int(found.group(2))
+    return found.group(3), found.group(4)
+
+
+def knockout_outcome(team1_id, team2_id, team1_score, team2_score, penalty_winner_id=None):
+    """
+    (vencedor, perdedor) de um jogo do mata-mata encerrado, ou None se não
+    há como decidir (placar ausente ou empate sem penalty_winner_id).
+    O placar armazenado é o do tempo normal/prorrogação — sem pênaltis.
+    """
+    if None in (team1_id, team2_id, team1_score, team2_score):
+        return None
+    if team1_score > team2_score:
+        return team1_id, team2_id
+    if team2_score > team1_score:
+        return team2_id, team1_id
+    if penalty_winner_id is None:
+        return None
+    if penalty_winner_id == team1_id:
+        return team1_id, team2_id
+    return team2_id, team1_id
+
+
+def knockout_sources(match_number, outcome):
+    """Origens decididas por um jogo: {('W', n): vencedor, ('L', n): perdedor}."""
+    winner_id, loser_id = outcome
+    return {('W', match_number): winner_id, ('L', match_number): loser_id}
+
+
+def group_sources(group_name, first_id, second_id):
+    """Origens decididas por um grupo: {('1', g): 1º, ('2', g): 2º}."""
+    sources = {}
+    if first_id is not None:
+        sources[('1', group_name)] = first_id
+    if second_id is not None:
+        sources[('2', group_name)] = second_id
+    return sources
+
+
+class BracketGraph:
+    """
+    Vagas abertas do mata-mata indexadas pela origem.
+
+    slots: iteráveis (match_number, side, code, team_id) — uma entrada por
+    lado de cada jogo do mata-mata. Vaga W/L com o código ainda de
+    placeholder entra mesmo com team_id preenchido (estado inconsistente
+    que a propagação corrige); vaga de grupo só entra se estiver sem time.
+    """
+
+    def __init__(self, slots):
+        self.edges = defaultdict(list)   # origem -> [(match_number, side)]
+        self.slots = {}                  # (match_number, side) -> código atual
+        for match_number, side, code, team_id in slots:
+            self.slots[(match_number, side)] = code
+            source = parse_placeholder(code)
+            if source is None or (source[0] in '12' and team_id is not None):
+                continue
+            self.edges[source].append((match_number, side))
+
+    @property
+    def open_sources(self):
+        """Origens com alguma vaga esperando por elas."""
+        return set(self.edges)
+
+    def resolve(self, decided, team_codes):
+        """
+        Vagas preenchidas pelas origens decididas.
+
+        decided: {origem: team_id}
+        team_codes: {team_id: código do time}
+        Consome as arestas resolvidas e devolve [SlotUpdate].
+        """
+        updates = []
+        for source in sorted(set(decided) & set(self.edges), key=str):
+            team_id = decided[source]
+            code = team_codes.get(team_id)
+            if code is None:
+                continue
+            placeholder = f"{source[0]}{source[1]}"
+            for match_number, side in self.edges.pop(source):
+                updates.append(SlotUpdate(match_number, side, team_id, code, placeholder))
+                self.slots[(match_number, side)] = code
+        return sorted(updates)
+
+    def defined(self, updates):
+        """Jogos tocados por `updates` que agora têm os dois lados com time."""
+        touched = sorted({u.match_number for u in updates})
+        return [n for n in touched
+                if all(is_team_code(self.slots.get((n, side))) for side in ('team1', 'team2'))]
+
+
+def is_team_code(code):
+    """Código de seleção (não placeholder de grupo, de 3º ou de W/L)."""
+    return bool(code) and not code[0].isdigit() and parse_placeholder(code) is None
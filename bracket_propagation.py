@@ -6,238 +6,136 @@ Resolve placeholders dos jogos do mata-mata:
   - "3CDF" etc. → melhores 3ºs colocados (resolvido via admin ou API)
   - "W73", "W74" etc. → vencedor do jogo indicado
   - "L101", "L102" etc. → perdedor do jogo indicado (para disputa de 3º)
+
+O grafo das vagas abertas (bracket_graph.py) é o mesmo do cron
+(update_results.propagate_bracket).
 """
 
-import re
 import logging
 from sqlalchemy.orm import Session
+from bracket_graph import (
+    BracketGraph, knockout_outcome, knockout_sources, group_sources
+)
 from models import Match, Team, GroupResult
 
 logger = logging.getLogger(__name__)
 
 
+# ============================================================
+# GRAFO DO CHAVEAMENTO (bracket_graph.py)
+# ============================================================
+
+def _knockout_graph(session: Session):
+    """(grafo das vagas abertas, jogos do mata-mata por número)."""
+    matches = {m.match_number: m for m in session.query(Match).filter(Match.phase != 'Grupos').all()}
+    graph = BracketGraph(
+        slot
+        for m in matches.values()
+        for slot in ((m.match_number, 'team1', m.team1_code, m.team1_id),
+                     (m.match_number, 'team2', m.team2_code, m.team2_id))
+    )
+    return graph, matches
+
+
+def _apply_updates(session: Session, graph, matches, decided):
+    """Resolve as origens decididas no grafo e aplica as vagas nos jogos. Retorna os jogos alterados."""
+    teams = {t.id: t for t in session.query(Team).filter(Team.id.in_(set(decided.values()))).all()}
+    updates = graph.resolve(decided, {team_id: t.code for team_id, t in teams.items()})
+    changed = set()
+    for u in updates:
+        match = matches[u.match_number]
+        setattr(match, f'{u.side}_id', u.team_id)
+        setattr(match, f'{u.side}_code', u.team_code)
+        changed.add(u.match_number)
+        team = teams[u.team_id]
+        logger.info(f"Jogo #{u.match_number} {u.side}: {u.placeholder} -> {team.flag} {team.name}")
+    defined = graph.defined(updates)
+    if defined:
+        logger.info(f"Confrontos definidos: {', '.join(f'#{n}' for n in defined)}")
+    return changed
+
+
+def _group_decided(session: Session, graph, group_name=None):
+    query = session.query(GroupResult)
+    if group_name:
+        query = query.filter(GroupResult.group_name == group_name)
+    decided = {}
+    for gr in query.all():
+        decided.update(group_sources(gr.group_name, gr.first_place_team_id, gr.second_place_team_id))
+    return {source: team_id for source, team_id in decided.items() if source in graph.edges}
+
+
+def _knockout_decided(session: Session, graph, match_numbers=None):
+    wanted = sorted({n for kind, n in graph.open_sources if kind in 'WL'})
+    if match_numbers is not None:
+        wanted = [n for n in wanted if n in match_numbers]
+    if not wanted:
+        return {}
+    decided = {}
+    for m in session.query(Match).filter(Match.status == 'finished', Match.match_number.in_(wanted)).all():
+        outcome = knockout_outcome(m.team1_id, m.team2_id, m.team1_score, m.team2_score,
+                                   m.penalty_winner_id)
+        if outcome is None:
+            if m.team1_score is not None and m.team1_score == m.team2_score:
+                logger.warning(
+                    f"Jogo #{m.match_number} empatado ({m.team1_score}x{m.team2_score}) "
+                    f"sem penalty_winner_id — admin deve definir o vencedor."
+                )
+            continue
+        decided.update(knockout_sources(m.match_number, outcome))
+    return decided
+
+
 # ============================================================
 # RESOLUÇÃO DE PLACEHOLDERS DE GRUPOS (1º e 2º)
 # ============================================================
 
-def resolve_group_placeholders(session: Session):
+def resolve_group_placeholders(session: Session, group_name=None):
     """
     Resolve placeholders do tipo "1A", "2B" etc. nos jogos R32.
-    Usa os GroupResults definidos para encontrar os times classificados.
-    
+    Usa os GroupResults definidos para encontrar os times classificados
+    (só os do grupo informado, se houver).
+
     Retorna o número de jogos atualizados.
     """
-    updated = 0
-    
-    # Busca todos os resultados de grupo definidos
-    group_results = {}
-    for gr in session.query(GroupResult).all():
-        group_results[gr.group_name] = gr
-    
-    if not group_results:
-        logger.info("Nenhum resultado de grupo definido ainda")
+    graph, matches = _knockout_graph(session)
+    decided = _group_decided(session, graph, group_name)
+    if not decided:
+        logger.info("Nenhum classificado de grupo a propagar")
         return 0
-    
-    # Busca jogos R32 que ainda têm placeholders (team1_id ou team2_id é NULL)
-    r32_matches = session.query(Match).filter(
-        Match.phase == 'R32'
-    ).all()
-    
-    for match in r32_matches:
-        changed = False
-        
-        # Resolver team1
-        if match.team1_id is None and match.team1_code:
-            team = _resolve_position_code(session, match.team1_code, group_results)
-            if team:
-                match.team1_id = team.id
-                match.team1_code = team.code
-                changed = True
-                logger.info(f"Jogo #{match.match_number} team1: {match.team1_code} -> {team.flag} {team.name}")
-        
-        # Resolver team2
-        if match.team2_id is None and match.team2_code:
-            team = _resolve_position_code(session, match.team2_code, group_results)
-            if team:
-                match.team2_id = team.id
-                match.team2_code = team.code
-                changed = True
-                logger.info(f"Jogo #{match.match_number} team2: {match.team2_code} -> {team.flag} {team.name}")
-        
-        if changed:
-            updated += 1
-    
+
+    updated = len(_apply_updates(session, graph, matches, decided))
     if updated > 0:
         session.commit()
         logger.info(f"Resolvidos placeholders de grupo em {updated} jogos R32")
-    
     return updated
 
 
-def _resolve_position_code(session, code, group_results):
-    """
-    Resolve um código de posição como "1A" (1º do grupo A) ou "2B" (2º do grupo B).
-    Retorna o Team ou None se não puder resolver.
-    
-    Não resolve códigos de 3ºs colocados (ex: "3CDF") - esses são tratados
-    separadamente pelo admin ou pela API-Football.
-    """
-    # Padrão: "1X" ou "2X" onde X é a letra do grupo
-    match = re.match(r'^([12])([A-L])$', code)
-    if not match:
-        return None
-    
-    position = int(match.group(1))
-    group_letter = match.group(2)
-    
-    gr = group_results.get(group_letter)
-    if not gr:
-        return None
-    
-    if position == 1 and gr.first_place_team_id:
-        return session.query(Team).get(gr.first_place_team_id)
-    elif position == 2 and gr.second_place_team_id:
-        return session.query(Team).get(gr.second_place_team_id)
-    
-    return None
-
-
 # ============================================================
 # RESOLUÇÃO DE VENCEDORES/PERDEDORES DO MATA-MATA
 # ============================================================
 
-def resolve_knockout_winners(session: Session):
+def resolve_knockout_winners(session: Session, match_numbers=None):
     """
     Resolve placeholders do tipo "W73" (vencedor do jogo 73) e "L101" (perdedor do jogo 101)
-    nos jogos do mata-mata.
-    
+    nos jogos do mata-mata. Só lê os jogos de que alguma vaga aberta depende
+    (e, com match_numbers, só esses).
+
     Chamada após cada resultado de jogo do mata-mata ser finalizado.
     Retorna o número de jogos atualizados.
     """
-    updated = 0
-    
-    # Busca todos os jogos finalizados do mata-mata que têm ambos os times definidos
-    finished_knockout = session.query(Match).filter(
-        Match.phase != 'Grupos',
-        Match.status == 'finished',
-        Match.team1_id.isnot(None),
-        Match.team2_id.isnot(None),
-        Match.team1_score.isnot(None),
-        Match.team2_score.isnot(None)
-    ).all()
-    
-    # Mapeia match_number -> (winner_team, loser_team)
-    results = {}
-    for m in finished_knockout:
-        winner, loser = _determine_winner_loser(session, m)
-        if winner and loser:
-            results[m.match_number] = {
-                'winner': winner,
-                'loser': loser,
-                'match': m
-            }
-    
-    if not results:
+    graph, matches = _knockout_graph(session)
+    decided = _knockout_decided(session, graph, match_numbers)
+    if not decided:
         return 0
-    
-    # Busca todos os jogos que ainda têm placeholders W/L
-    all_knockout = session.query(Match).filter(
-        Match.phase != 'Grupos'
-    ).all()
-    
-    for match in all_knockout:
-        changed = False
 
-        # Resolver team1: verifica se o código ainda é um placeholder W/L
-        # (não checa team1_id IS None para cobrir estado inconsistente onde
-        # o id foi setado mas o code ficou como placeholder)
-        if match.team1_code and _resolve_wl_code(match.team1_code, results):
-            team = _resolve_wl_code(match.team1_code, results)
-            if team and match.team1_code != team.code:
-                match.team1_id = team.id
-                match.team1_code = team.code
-                changed = True
-                logger.info(f"Jogo #{match.match_number} team1: W/L -> {team.flag} {team.name}")
-
-        # Resolver team2
-        if match.team2_code and _resolve_wl_code(match.team2_code, results):
-            team = _resolve_wl_code(match.team2_code, results)
-            if team and match.team2_code != team.code:
-                match.team2_id = team.id
-                match.team2_code = team.code
-                changed = True
-                logger.info(f"Jogo #{match.match_number} team2: W/L -> {team.flag} {team.name}")
-        
-        if changed:
-            updated += 1
-    
+    updated = len(_apply_updates(session, graph, matches, decided))
     if updated > 0:
         session.commit()
         logger.info(f"Resolvidos {updated} confrontos do mata-mata com vencedores/perdedores")
-    
     return updated
 
 
-def _determine_winner_loser(session, match):
-    """
-    Determina o vencedor e perdedor de um jogo finalizado.
-    Placar armazenado = tempo normal/prorrogação (não inclui pênaltis).
-    Para jogos decididos nos pênaltis, usa penalty_winner_id.
-    Retorna (winner_team, loser_team) ou (None, None).
-    """
-    if match.team1_score is None or match.team2_score is None:
-        return None, None
-
-    team1 = session.query(Team).get(match.team1_id) if match.team1_id else None
-    team2 = session.query(Team).get(match.team2_id) if match.team2_id else None
-
-    if not team1 or not team2:
-        return None, None
-
-    if match.team1_score > match.team2_score:
-        return team1, team2
-    elif match.team2_score > match.team1_score:
-        return team2, team1
-    else:
-        # Empate no tempo normal/prorrogação — verificar vencedor nos pênaltis
-        pen_winner_id = getattr(match, 'penalty_winner_id', None)
-        if pen_winner_id is not None:
-            if pen_winner_id == team1.id:
-                return team1, team2
-            else:
-                return team2, team1
-        logger.warning(
-            f"Jogo #{match.match_number} empatado ({match.team1_score}x{match.team2_score}) "
-            f"sem penalty_winner_id — admin deve definir o vencedor."
-        )
-        return None, None
-
-
-def _resolve_wl_code(code, results):
-    """
-    Resolve um código "W73" (vencedor do jogo 73) ou "L101" (perdedor do jogo 101).
-    Retorna o Team ou None.
-    """
-    # Padrão: "W" ou "L" seguido do número do jogo
-    wl_match = re.match(r'^([WL])(\d+)$', code)
-    if not wl_match:
-        return None
-    
-    wl_type = wl_match.group(1)
-    match_number = int(wl_match.group(2))
-    
-    result = results.get(match_number)
-    if not result:
-        return None
-    
-    if wl_type == 'W':
-        return result['winner']
-    elif wl_type == 'L':
-        return result['loser']
-    
-    return None
-
-
 # ============================================================
 # FUNÇÃO PRINCIPAL DE PROPAGAÇÃO
 # ============================================================
@@ -250,11 +148,13 @@ def propagate_all(session: Session):
     
     Retorna o total de jogos atualizados.
     """
-    total = 0
-    total += resolve_group_placeholders(session)
-    total += resolve_knockout_winners(session)
-    
+    graph, matches = _knockout_graph(session)
+    decided = _group_decided(session, graph)
+    decided.update(_knockout_decided(session, graph))
+    total = len(_apply_updates(session, graph, matches, decided)) if decided else 0
+
     if total > 0:
+        session.commit()
         logger.info(f"Propagação total: {total} jogos atualizados")
     else:
         logger.info("Propagação: nenhum jogo atualizado")
@@ -268,7 +168,7 @@ def propagate_after_group_result(session: Session, group_name: str):
     Resolve os placeholders do tipo "1X" e "2X" para o grupo específico.
     """
     logger.info(f"Propagando classificados do Grupo {group_name}...")
-    updated = resolve_group_placeholders(session)
+    updated = resolve_group_placeholders(session, group_name)
     return updated
 
 
@@ -282,5 +182,5 @@ def propagate_after_match_result(session: Session, match_id: int):
         return 0
     
     logger.info(f"Propagando resultado do Jogo #{match.match_number}...")
-    updated = resolve_knockout_winners(session)
+    updated = resolve_knockout_winners(session, {match.match_number})
     return updated
@@ -10,17 +10,17 @@ DEFAULT_SCORING = {
     "placar_exato": 20,        # Acertou resultado + placar exato
     "resultado_gols": 15,      # Acertou resultado + gols de um time
     "resultado": 10,           # Acertou apenas o resultado (vencedor/empate)
-    "gols_um_time": 5,         # Acertou apenas gols de um time
-    "errou_tudo": 0            # Errou tudo
+    "gols": 5,                 # Acertou apenas gols de um time
+    "nenhum": 0                # Errou tudo
 }
 
 # =============================================================================
 # PONTUAÇÃO DE CLASSIFICAÇÃO DOS GRUPOS (Ajustável pelo Admin)
 # =============================================================================
 DEFAULT_GROUP_SCORING = {
-    "dois_corretos_ordem": 20,    # Acertou 1º e 2º na ordem correta
-    "dois_corretos_invertido": 10, # Acertou os 2 classificados, mas ordem invertida
-    "um_correto_errado": 5         # Acertou apenas 1 classificado na posição errada
+    "ordem_correta": 20,       # Acertou 1º e 2º na ordem correta
+    "ordem_invertida": 10,     # Acertou os 2 classificados, mas ordem invertida
+    "um_certo": 5              # Acertou apenas 1 classificado na posição errada
 }
 
 # =============================================================================
@@ -84,7 +84,7 @@ CRITERIOS_DESEMPATE = [
     ("placares_exatos", "Mais acertos de placares exatos"),
     ("resultado_gols", "Mais acertos de resultado + gols de uma equipe"),
     ("resultado", "Mais acertos de resultado sem gols"),
-    ("gols_um_time", "Mais acertos de gols de uma equipe"),
+    ("gols", "Mais acertos de apenas gols de uma equipe (sem o resultado)"),
     ("menos_zeros", "Menos palpites zerados"),
     ("ordem_inscricao", "Ordem de inscrição")
 ]
@@ -0,0 +1,39 @@
+"""
+Migração dos índices declarados em models.py
+
+Cria, num banco já existente, os índices que ainda não existem (create_all
+só os cria junto com tabelas novas) e atualiza as estatísticas do Postgres
+para o planejador passar a usá-los. Idempotente; o app faz o mesmo ao
+iniciar (db.create_tables), este script serve para aplicar antes do deploy.
+
+Uso:
+    NEON_CONNECTION_STRING=... python create_indexes.py
+"""
+
+import os
+
+from sqlalchemy import text
+
+from db import get_engine, create_indexes
+
+
+def main():
+    database_url = os.environ.get('NEON_CONNECTION_STRING', '').strip() or None
+    engine = get_engine(database_url)
+
+    created = create_indexes(engine)
+    if created and engine.dialect.name == 'postgresql':
+        with engine.begin() as conn:
+            conn.execute(text("ANALYZE matches"))
+            conn.execute(text("ANALYZE predictions"))
+            conn.execute(text("ANALYZE group_predictions"))
+            conn.execute(text("ANALYZE podium_predictions"))
+
+    if created:
+        print(f"Índices criados: {', '.join(created)}")
+    else:
+        print("Todos os índices já existem.")
+
+
+if __name__ == '__main__':
+    main()
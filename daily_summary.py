@@ -8,6 +8,7 @@ import pytz
 from sqlalchemy import and_
 from models import Match, Prediction, User
 from scoring import get_ranking, get_scoring_config, calculate_match_points
+from ranking_snapshots import get_positions_at
 
 
 def get_brazil_time():
@@ -160,17 +161,28 @@ def calculate_ranking_changes(session, target_date=None, end_date=None):
     for pred in session.query(Prediction).filter(Prediction.match_id.in_(match_ids)).all():
         daily_points_map[pred.user_id] += pred.points_awarded or 0
 
-    # Fotos reais do ranking (mesmos critérios oficiais de desempate)
-    previous_ranking = get_ranking(session, cutoff_datetime=day_start)
-    current_ranking = get_ranking(session, cutoff_datetime=day_end)
-
-    previous_positions = {r['user_id']: r['posicao'] for r in previous_ranking}
-    current_positions = {r['user_id']: r['posicao'] for r in current_ranking}
+    # Fotos reais do ranking (mesmos critérios oficiais de desempate), lidas
+    # de ranking_snapshots: foto do último dia de jogo antes do período e foto
+    # do último dia de jogo do período
+    previous_positions = get_positions_at(session, (day_start - timedelta(days=1)).date())
+    if previous_positions is None:
+        # Nenhum jogo antes do período: ranking "zerado" (só grupos/pódio)
+        previous_positions = {
+            r['user_id']: r['posicao']
+            for r in get_ranking(session, cutoff_datetime=day_start)
+        }
+    current_positions = get_positions_at(session, (day_end - timedelta(days=1)).date()) or {}
+
+    user_names = {
+        u.id: u.name for u in
+        session.query(User).filter_by(active=True).filter(User.role != 'admin').all()
+    }
 
     # Calcula variações
     changes = []
-    for user_data in current_ranking:
-        user_id = user_data['user_id']
+    for user_id in sorted(current_positions, key=current_positions.get):
+        if user_id not in user_names:
+            continue
         prev_pos = previous_positions.get(user_id)
         curr_pos = current_positions.get(user_id)
         if prev_pos is None or curr_pos is None:
@@ -180,7 +192,7 @@ def calculate_ranking_changes(session, target_date=None, end_date=None):
         if variation != 0:
             changes.append({
                 'user_id': user_id,
-                'user_name': user_data['nome'],
+                'user_name': user_names[user_id],
                 'previous_position': prev_pos,
                 'current_position': curr_pos,
                 'variation': variation,
@@ -0,0 +1,124 @@
+"""
+Feed de mudanças do Bolão Copa do Mundo 2026
+
+Cada tipo de dado tem um contador na tabela `data_versions`, incrementado
+por quem escreve:
+  - matches       : placar/status de jogos e palpites travados
+                    (update_results.update_match_live / update_match_result /
+                    lock_missing_predictions e scoring.process_match_predictions)
+  - group_results : classificados dos grupos e pontos dos palpites de grupo
+                    (update_results.score_group_predictions,
+                    scoring.process_group_predictions e admin_grupos)
+  - podium        : pódio do torneio (scoring.process_podium_predictions
+                    e admin_podio)
+  - prize_status  : garantidos/eliminados da premiação (prize_status.py)
+
+Além do contador, o cron emite NOTIFY no canal `bolao_data_version` (payload
+= chave), para quem quiser escutar com LISTEN.
+
+As telas ao vivo do app (fragments do Streamlit) leem as versões — uma
+consulta compartilhada por todo o processo a cada VERSION_POLL_TTL segundos —
+e só refazem as consultas pesadas quando a versão que as alimenta mudou.
+
+Não depende de SQLAlchemy no topo: os scripts de cron usam as funções *_pg
+com uma conexão psycopg2.
+"""
+
+import os
+import threading
+import time
+
+MATCHES = 'matches'
+GROUP_RESULTS = 'group_results'
+PODIUM = 'podium'
+PRIZE_STATUS = 'prize_status'
+
+NOTIFY_CHANNEL = 'bolao_data_version'
+
+# Quanto tempo uma leitura das versões é reaproveitada por todas as sessões
+VERSION_POLL_TTL = float(os.environ.get('DATA_VERSION_POLL_TTL', '3'))
+
+_CREATE_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS data_versions (
+        key VARCHAR(50) PRIMARY KEY,
+        version INTEGER NOT NULL DEFAULT 0,
+        updated_at TIMESTAMP
+    )
+"""
+
+_versions_cache = {}  # url do banco -> (lido_em, {chave: versão})
+_versions_lock = threading.Lock()
+_pg_table_ready = False
+
+
+# =============================================================================
+# CRON (psycopg2)
+# =============================================================================
+
+def bump_data_version_pg(conn, key):
+    """
+    Incrementa a versão `key` e notifica os ouvintes. Não faz commit: roda
+    na mesma transação da escrita que a motivou.
+    """
+    global _pg_table_ready
+    cursor = conn.cursor()
+    if not _pg_table_ready:
+        # O cron pode rodar antes de o app ter criado a tabela
+        cursor.execute(_CREATE_TABLE_SQL)
+        _pg_table_ready = True
+    cursor.execute("""
+        INSERT INTO data_versions (key, version, updated_at)
+        VALUES (%s, 1, NOW())
+        ON CONFLICT (key) DO UPDATE
+        SET version = data_versions.version + 1, updated_at = NOW()
+    """, (key,))
+    cursor.execute("SELECT pg_notify(%s, %s)", (NOTIFY_CHANNEL, key))
+    cursor.close()
+
+
+# =============================================================================
+# APP (SQLAlchemy)
+# =============================================================================
+
+def bump_data_version(session, key):
+    """Incrementa a versão `key` na transação da sessão (sem commit)."""
+    from sqlalchemy import text
+
+    updated = session.execute(
+        text("UPDATE data_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE key = :key"),
+        {'key': key}
+    ).rowcount
+    if not updated:
+        session.execute(
+            text("INSERT INTO data_versions (key, version, updated_at) VALUES (:key, 1, CURRENT_TIMESTAMP)"),
+            {'key': key}
+        )
+    invalidate_data_versions()
+
+
+def invalidate_data_versions():
+    """Força a próxima leitura das versões a ir ao banco."""
+    with _versions_lock:
+        _versions_cache.clear()
+
+
+def get_data_versions(engine) -> dict:
+    """
+    Versões atuais {chave: versão}. Leitura compartilhada pelo processo:
+    dentro de VERSION_POLL_TTL segundos, nenhuma consulta é feita.
+    """
+    from sqlalchemy import text
+
+    key = str(engine.url)
+    now = time.monotonic()
+    with _versions_lock:
+        cached = _versions_cache.get(key)
+    if cached and now - cached[0] < VERSION_POLL_TTL:
+        return cached[1]
+
+    with engine.connect() as conn:
+        versions = {k: v for k, v in conn.execute(text("SELECT key, version FROM data_versions"))}
+
+    with _versions_lock:
+        _versions_cache[key] = (now, versions)
+    return versions
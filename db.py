@@ -4,11 +4,14 @@ Suporta SQLite (desenvolvimento) e PostgreSQL (produção)
 """
 
 import os
-from sqlalchemy import create_engine
+import threading
+import time
+from sqlalchemy import create_engine, event, cast, inspect, text, Integer, String
 from sqlalchemy.orm import sessionmaker
 from contextlib import contextmanager
 
 from models import Base, Config
+from pg_pool import CONNECT_KWARGS
 from config import (
     DATABASE_NAME, ADMIN_DEFAULT, 
     DEFAULT_SCORING, DEFAULT_GROUP_SCORING, 
@@ -34,25 +37,176 @@ def get_database_url():
     return f"sqlite:///{DATABASE_NAME}"
 
 
-def get_engine():
-    """Cria e retorna o engine do SQLAlchemy"""
-    database_url = get_database_url()
+# =============================================================================
+# ENGINE E POOL DE CONEXÕES
+# =============================================================================
+# Um engine por URL, reaproveitado por todo o processo (páginas, fragments,
+# scripts). No Postgres (Neon, serverless) abrir conexão é o maior custo por
+# requisição: o pool mantém conexões abertas, testa antes de reusar
+# (pre-ping) e as recicla antes do timeout de ociosidade do servidor.
+DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', '5'))
+DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', '10'))
+DB_POOL_TIMEOUT = int(os.environ.get('DB_POOL_TIMEOUT', '30'))
+DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', '280'))
+
+_engines = {}  # url -> engine
+_engines_lock = threading.Lock()
+_pool_metrics = {}  # id(engine) -> contadores dos eventos do pool
+
+
+def _normalize_url(database_url):
+    if database_url is None:
+        return get_database_url()
+    if database_url.startswith("postgres://"):
+        return database_url.replace("postgres://", "postgresql://", 1)
+    return database_url
+
+
+def _track_pool(engine):
+    """Registra nos contadores as conexões abertas (e quanto levaram), checkouts e descartes."""
+    metrics = _pool_metrics.setdefault(id(engine), {
+        'connects': 0, 'connect_ms_total': 0.0, 'checkouts': 0, 'invalidated': 0
+    })
+    connect_started = threading.local()
+
+    @event.listens_for(engine, 'do_connect')
+    def _do_connect(dialect, conn_rec, cargs, cparams):
+        connect_started.value = time.perf_counter()
+
+    @event.listens_for(engine, 'connect')
+    def _connect(dbapi_conn, conn_rec):
+        metrics['connects'] += 1
+        started = getattr(connect_started, 'value', None)
+        if started is not None:
+            metrics['connect_ms_total'] += (time.perf_counter() - started) * 1000
+
+    @event.listens_for(engine, 'checkout')
+    def _checkout(dbapi_conn, conn_rec, conn_proxy):
+        metrics['checkouts'] += 1
+
+    @event.listens_for(engine, 'invalidate')
+    def _invalidate(dbapi_conn, conn_rec, exception):
+        metrics['invalidated'] += 1
+
+
+def get_engine(database_url=None):
+    """
+    Retorna o engine do SQLAlchemy (um por URL, criado na primeira chamada).
+    database_url: opcional — usado pelos scripts de cron, que recebem a
+    conexão por NEON_CONNECTION_STRING em vez de DATABASE_URL.
+    """
+    database_url = _normalize_url(database_url)
+    with _engines_lock:
+        engine = _engines.get(database_url)
+        if engine is not None:
+            return engine
     
-    if database_url.startswith("sqlite"):
-        engine = create_engine(
-            database_url,
-            connect_args={"check_same_thread": False},
-            echo=False
-        )
-    else:
-        engine = create_engine(database_url, echo=False)
+        if database_url.startswith("sqlite"):
+            engine = create_engine(
+                database_url,
+                connect_args={"check_same_thread": False},
+                echo=False
+            )
+        else:
+            engine = create_engine(
+                database_url,
+                echo=False,
+                pool_pre_ping=True,
+                pool_size=DB_POOL_SIZE,
+                max_overflow=DB_MAX_OVERFLOW,
+                pool_timeout=DB_POOL_TIMEOUT,
+                pool_recycle=DB_POOL_RECYCLE,
+                connect_args=dict(CONNECT_KWARGS)
+            )
+        _track_pool(engine)
+        _engines[database_url] = engine
     
     return engine
 
 
+def get_pool_metrics(engine) -> dict:
+    """Métricas do pool do engine: ocupação atual e contadores desde o início."""
+    metrics = dict(_pool_metrics.get(id(engine), {}))
+    pool = engine.pool
+    for attr in ('size', 'checkedin', 'checkedout', 'overflow'):
+        if hasattr(pool, attr):
+            metrics[attr] = getattr(pool, attr)()
+    connects = metrics.get('connects', 0)
+    if connects:
+        metrics['connect_ms_avg'] = round(metrics['connect_ms_total'] / connects, 1)
+        metrics['reused'] = max(0, metrics['checkouts'] - connects)
+    if 'connect_ms_total' in metrics:
+        metrics['connect_ms_total'] = round(metrics['connect_ms_total'], 1)
+    return metrics
+
+
 def create_tables(engine):
     """Cria todas as tabelas no banco de dados"""
     Base.metadata.create_all(engine)
+    create_missing_columns(engine)
+    create_indexes(engine)
+
+
+def create_missing_columns(engine) -> list:
+    """
+    Acrescenta às tabelas já existentes as colunas opcionais (nullable, sem
+    default no banco) declaradas nos modelos depois que a tabela foi criada
+    — create_all não altera tabelas existentes. Retorna "tabela.coluna" de
+    cada coluna criada.
+    """
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    created = []
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        existing = {c['name'] for c in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing or not column.nullable or column.server_default is not None:
+                continue
+            column_type = column.type.compile(dialect=engine.dialect)
+            with engine.begin() as conn:
+                conn.execute(text(
+                    f'ALTER TABLE {table.name} ADD COLUMN "{column.name}" {column_type}'
+                ))
+            created.append(f"{table.name}.{column.name}")
+    return created
+
+
+def create_indexes(engine) -> list:
+    """
+    Cria os índices declarados nos modelos que ainda não existem no banco.
+    create_all só cria índices junto com tabelas novas; aqui eles também
+    chegam às tabelas que já existiam antes de o índice ser declarado.
+    Retorna os nomes dos índices criados.
+    """
+    inspector = inspect(engine)
+    created = []
+    for table in Base.metadata.sorted_tables:
+        if not table.indexes:
+            continue
+        existing = {i['name'] for i in inspector.get_indexes(table.name)}
+        for index in sorted(table.indexes, key=lambda i: i.name):
+            if index.name not in existing:
+                index.create(engine)
+                created.append(index.name)
+    return created
+
+
+def drop_indexes(engine) -> list:
+    """Remove os índices declarados nos modelos (usado para comparar planos
+    de consulta com e sem eles em benchmarks/bench_indexes.py)."""
+    inspector = inspect(engine)
+    dropped = []
+    for table in Base.metadata.sorted_tables:
+        if not table.indexes:
+            continue
+        existing = {i['name'] for i in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name in existing:
+                index.drop(engine)
+                dropped.append(index.name)
+    return dropped
 
 
 def get_session(engine):
@@ -160,19 +314,91 @@ def init_database():
                 category='sistema'
             ))
     
+    # Chaves padrão recém-criadas
+    invalidate_config_cache()
     return engine
 
 
+# =============================================================================
+# CACHE DE CONFIGURAÇÕES
+# =============================================================================
+# As leituras de config (get_config_value, get_scoring_config) vêm de um
+# cache em memória do processo, por banco. A linha `config_version` da
+# tabela config é incrementada por set_config_value a cada alteração: depois
+# de CONFIG_CACHE_TTL segundos o leitor confere só essa linha e recarrega
+# todas as chaves (uma consulta) apenas se a versão mudou. Alterações feitas
+# neste processo (ex: admin_pontuacao) invalidam o cache na hora.
+
+CONFIG_VERSION_KEY = 'config_version'
+CONFIG_CACHE_TTL = float(os.environ.get('CONFIG_CACHE_TTL', '5'))
+
+_config_cache = {}  # url do banco -> {'version', 'values', 'checked_at'}
+_config_cache_lock = threading.Lock()
+
+
+def _cache_key(session):
+    return str(session.get_bind().url)
+
+
+def _read_config_version(session):
+    row = session.query(Config.value).filter_by(key=CONFIG_VERSION_KEY).first()
+    return int(row[0]) if row and row[0] else 0
+
+
+def _get_config_values(session) -> dict:
+    """Todas as configurações {chave: valor}, do cache quando ainda válido."""
+    key = _cache_key(session)
+    now = time.monotonic()
+    with _config_cache_lock:
+        entry = _config_cache.get(key)
+        if entry and now - entry['checked_at'] < CONFIG_CACHE_TTL:
+            return entry['values']
+
+    version = _read_config_version(session)
+    if entry and entry['version'] == version:
+        values = entry['values']
+    else:
+        values = {k: v for k, v in session.query(Config.key, Config.value).all()}
+
+    with _config_cache_lock:
+        _config_cache[key] = {'version': version, 'values': values, 'checked_at': now}
+    return values
+
+
+def invalidate_config_cache():
+    """Descarta o cache de configurações deste processo (todas as bases)."""
+    with _config_cache_lock:
+        _config_cache.clear()
+
+
+def get_config_version(session) -> int:
+    """Versão atual das configurações (incrementada por set_config_value)."""
+    return _read_config_version(session)
+
+
 def get_config_value(session, key, default=None):
-    """Obtém um valor de configuração do banco"""
-    config = session.query(Config).filter_by(key=key).first()
-    if config and config.value:
-        return config.value
+    """Obtém um valor de configuração do banco (via cache de configurações)"""
+    value = _get_config_values(session).get(key)
+    if value:
+        return value
     return default
 
 
-def set_config_value(session, key, value, description=None, category=None):
-    """Define um valor de configuração no banco"""
+def _bump_config_version(session):
+    updated = session.query(Config).filter_by(key=CONFIG_VERSION_KEY).update(
+        {Config.value: cast(cast(Config.value, Integer) + 1, String)},
+        synchronize_session=False
+    )
+    if not updated:
+        session.add(Config(
+            key=CONFIG_VERSION_KEY,
+            value='1',
+            description='Versão das configurações (incrementada a cada alteração)',
+            category='sistema'
+        ))
+
+
+def _write_config(session, key, value, description=None, category=None):
     from models import Config
     config = session.query(Config).filter_by(key=key).first()
     if config:
@@ -188,7 +414,24 @@ def set_config_value(session, key, value, description=None, category=None):
             description=description,
             category=category
         ))
+
+
+def set_config_value(session, key, value, description=None, category=None):
+    """Define um valor de configuração no banco"""
+    set_config_values(session, {key: value}, description=description, category=category)
+
+
+def set_config_values(session, values: dict, description=None, category=None):
+    """
+    Define vários valores de configuração ({chave: valor}) numa única
+    transação, com um só incremento da versão: quem lê nunca vê um
+    formulário aplicado pela metade.
+    """
+    for key, value in values.items():
+        _write_config(session, key, value, description=description, category=category)
+    _bump_config_version(session)
     session.commit()
+    invalidate_config_cache()
 
 
 def populate_copa2026_data(session):
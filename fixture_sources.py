@@ -0,0 +1,293 @@
+"""
+Fontes de fixtures da API-Football para update_results.py
+
+update_results.api_request não fala mais direto com a API: pede à fonte
+configurada, que pode ser
+
+- ApiFootballSource: o cliente HTTP de verdade (ou um stand-in local, basta
+  trocar a base_url);
+- ReplaySource: uma gravação em JSON reproduzida num relógio acelerado ou
+  avançada passo a passo (seek) — permite ensaiar um dia de jogos inteiro
+  sem a API;
+- RecordingSource: envolve outra fonte e grava as respostas no formato que
+  o ReplaySource lê;
+- StandInServer: servidor HTTP local que responde /fixtures como a
+  API-Football a partir de uma fonte qualquer (normalmente um ReplaySource),
+  para exercitar também o caminho HTTP.
+
+Formato da gravação:
+    {"start": "2026-06-20T16:00:00+00:00",
+     "frames": [{"t": 0, "fixtures": [...]}, {"t": 60, "fixtures": [...]}]}
+Cada frame é o estado completo das fixtures conhecidas `t` segundos após o
+início. Uma resposta crua da API ({"response": [...]}) também é aceita e
+vira uma gravação de um único frame.
+
+Variáveis de ambiente (fixture_source_from_env):
+    FIXTURE_REPLAY         : caminho de uma gravação a reproduzir
+    FIXTURE_REPLAY_SPEED   : aceleração do relógio da reprodução (padrão 60)
+    FIXTURE_REPLAY_STARTED_AT : instante (epoch) em que a reprodução começou,
+                             para vários processos do cron seguirem o mesmo
+                             relógio (padrão: o início do processo)
+    FIXTURE_RECORD         : grava as respostas da API neste arquivo
+    API_FOOTBALL_BASE_URL  : outra base para a API (ex: stand-in local)
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import urlparse, parse_qs
+
+API_BASE_URL = 'https://v3.football.api-sports.io'
+DEFAULT_REPLAY_SPEED = 60.0
+
+# Status da API-Football que indicam jogo finalizado
+FINISHED_STATUSES = {'FT', 'AET', 'PEN'}
+# Status da API-Football que indicam jogo em andamento
+LIVE_STATUSES = {'1H', '2H', 'HT', 'ET', 'BT', 'P', 'SUSP', 'INT', 'LIVE'}
+# Status que indicam jogo não iniciado
+NOT_STARTED_STATUSES = {'TBD', 'NS'}
+
+
+def _payload(fixtures):
+    return {'errors': [], 'results': len(fixtures), 'response': fixtures}
+
+
+def _fixture_utc_date(fixture):
+    raw = fixture['fixture'].get('date')
+    if not raw:
+        return None
+    return datetime.fromisoformat(raw).astimezone(timezone.utc).strftime('%Y-%m-%d')
+
+
+def filter_fixtures(fixtures, params=None):
+    """Aplica a fixtures os filtros de /fixtures usados pelo bolão (live, date, ids)."""
+    params = params or {}
+    if params.get('live'):
+        fixtures = [f for f in fixtures if f['fixture']['status']['short'] in LIVE_STATUSES]
+    if params.get('date'):
+        fixtures = [f for f in fixtures if _fixture_utc_date(f) == params['date']]
+    if params.get('ids'):
+        ids = {int(i) for i in str(params['ids']).split('-') if i}
+        fixtures = [f for f in fixtures if f['fixture']['id'] in ids]
+    return fixtures
+
+
+class ApiFootballSource:
+    """
+    Cliente HTTP da API-Football (ou de qualquer servidor com a mesma interface).
+
+    Guarda a última resposta de cada consulta com o ETag / Last-Modified
+    recebidos e os reenvia (If-None-Match / If-Modified-Since): quando o
+    servidor responde 304, a resposta guardada é reaproveitada sem baixar
+    nem decodificar o corpo de novo.
+    """
+
+    def __init__(self, api_key, base_url=API_BASE_URL, timeout=30):
+        import requests
+
+        self.api_key = api_key
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self._http = requests.Session()
+        self._cache = {}  # (endpoint, params) -> (validadores, resposta)
+        self.not_modified = 0
+
+    def request(self, endpoint, params=None):
+        key = (endpoint, tuple(sorted((params or {}).items())))
+        headers = {'x-apisports-key': self.api_key}
+        cached = self._cache.get(key)
+        if cached:
+            headers.update(cached[0])
+
+        response = self._http.get(
+            f'{self.base_url}/{endpoint}',
+            headers=headers, params=params, timeout=self.timeout
+        )
+        if response.status_code == 304 and cached:
+            self.not_modified += 1
+            return cached[1]
+        response.raise_for_status()
+        data = response.json()
+
+        validators = {}
+        if response.headers.get('ETag'):
+            validators['If-None-Match'] = response.headers['ETag']
+        if response.headers.get('Last-Modified'):
+            validators['If-Modified-Since'] = response.headers['Last-Modified']
+        if validators:
+            self._cache[key] = (validators, data)
+        return data
+
+
+class ReplaySource:
+    """
+    Reproduz uma gravação. O instante da reprodução anda sozinho
+    (relógio real × speed) até o primeiro seek(); depois disso só anda por
+    seek(), o que torna a execução determinística.
+    """
+
+    def __init__(self, recording, speed=DEFAULT_REPLAY_SPEED, clock=time.time, started_at=None):
+        if 'frames' not in recording:
+            recording = {'start': recording.get('start'),
+                         'frames': [{'t': 0, 'fixtures': recording.get('response', [])}]}
+        self.frames = sorted(recording['frames'], key=lambda f: f['t'])
+        start = recording.get('start')
+        self.start = datetime.fromisoformat(start) if start else datetime.now(timezone.utc)
+        self.speed = speed
+        self._clock = clock
+        self._started_at = clock() if started_at is None else started_at
+        self._position = None
+        self.requests = 0
+
+    @classmethod
+    def from_file(cls, path, **kwargs):
+        return cls(json.loads(Path(path).read_text()), **kwargs)
+
+    @property
+    def duration(self):
+        """Segundos (da gravação) até o último frame."""
+        return self.frames[-1]['t'] if self.frames else 0
+
+    @property
+    def position(self):
+        """Segundos (da gravação) já reproduzidos."""
+        if self._position is not None:
+            return self._position
+        return (self._clock() - self._started_at) * self.speed
+
+    @property
+    def finished(self):
+        return self.position >= self.duration
+
+    def seek(self, seconds):
+        self._position = seconds
+
+    def virtual_now(self):
+        return self.start + timedelta(seconds=self.position)
+
+    def current_frame(self):
+        position = self.position
+        current = None
+        for frame in self.frames:
+            if frame['t'] > position:
+                break
+            current = frame
+        return current
+
+    def request(self, endpoint, params=None):
+        if endpoint != 'fixtures':
+            return {'errors': {'endpoint': f'{endpoint} não gravado'}, 'results': 0, 'response': []}
+        self.requests += 1
+        frame = self.current_frame()
+        return _payload(filter_fixtures(frame['fixtures'] if frame else [], params))
+
+
+class RecordingSource:
+    """
+    Repassa as chamadas para `inner` e acrescenta cada estado visto ao
+    arquivo de gravação. Como os crons são processos curtos, a gravação é
+    relida e regravada a cada resposta: várias execuções do cron ao longo
+    do dia formam uma única gravação.
+    """
+
+    def __init__(self, inner, path):
+        self.inner = inner
+        self.path = Path(path)
+        if self.path.exists():
+            self.recording = json.loads(self.path.read_text())
+        else:
+            self.recording = {'start': datetime.now(timezone.utc).isoformat(), 'frames': []}
+        last = self.recording['frames'][-1]['fixtures'] if self.recording['frames'] else []
+        self._state = {f['fixture']['id']: f for f in last}
+
+    def request(self, endpoint, params=None):
+        data = self.inner.request(endpoint, params)
+        if endpoint == 'fixtures' and data and not data.get('errors'):
+            for fixture in data.get('response', []):
+                self._state[fixture['fixture']['id']] = fixture
+            start = datetime.fromisoformat(self.recording['start'])
+            elapsed = (datetime.now(timezone.utc) - start).total_seconds()
+            self.recording['frames'].append({'t': round(elapsed, 1), 'fixtures': list(self._state.values())})
+            self.path.write_text(json.dumps(self.recording, ensure_ascii=False))
+        return data
+
+
+class StandInServer:
+    """
+    Stand-in local da API-Football: GET /fixtures?live=all|date=...|ids=...
+    respondido a partir de `source`, com ETag (304 quando nada mudou). Uso:
+
+        with StandInServer(ReplaySource.from_file('dia.json')) as server:
+            source = ApiFootballSource(api_key='', base_url=server.url)
+    """
+
+    def __init__(self, source, host='127.0.0.1', port=0):
+        self.source = source
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlparse(self.path)
+                params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+                data = stand_in.source.request(url.path.strip('/'), params)
+                body = json.dumps(data).encode()
+                etag = '"%s"' % hashlib.sha1(body).hexdigest()
+                if self.headers.get('If-None-Match') == etag:
+                    self.send_response(304)
+                    self.send_header('ETag', etag)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header('ETag', etag)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def fixture_source_from_env(api_key):
+    """Fonte padrão dos crons, escolhida pelas variáveis de ambiente (ver topo)."""
+    replay = os.environ.get('FIXTURE_REPLAY', '').strip()
+    if replay:
+        speed = float(os.environ.get('FIXTURE_REPLAY_SPEED', DEFAULT_REPLAY_SPEED))
+        started_at = os.environ.get('FIXTURE_REPLAY_STARTED_AT', '').strip()
+        return ReplaySource.from_file(replay, speed=speed,
+                                      started_at=float(started_at) if started_at else None)
+
+    base_url = os.environ.get('API_FOOTBALL_BASE_URL', '').strip() or API_BASE_URL
+    source = ApiFootballSource(api_key, base_url=base_url)
+    record = os.environ.get('FIXTURE_RECORD', '').strip()
+    if record:
+        source = RecordingSource(source, record)
+    return source
@@ -0,0 +1,388 @@
+"""
+live_daemon.py - Atualizador ao vivo de longa duração (asyncio)
+
+Cada execução de `update_results.py --mode live` paga de novo a partida do
+Python, a conexão com o Neon, lock_missing_predictions e
+get_pending_matches, e só então consulta a API. O daemon faz isso uma vez:
+
+- mantém UMA conexão do pool (pg_pool.py) enquanto há jogo na janela e a
+  devolve entre os jogos;
+- mantém em memória o índice dos jogos pendentes (FixtureMatcher), relido
+  só quando um jogo termina ou a cada SCHEDULE_REFRESH;
+- segue a agenda de polling_schedule.py, mas com ciclo de
+  DAEMON_LIVE_INTERVAL segundos durante o jogo;
+- consulta a fonte de fixtures em paralelo — jogos ao vivo (live=all) e,
+  para os jogos que já podem ter acabado, a busca por id do modo post —
+  e só processa as fixtures que mudaram desde a consulta anterior;
+- grava o placar assim que ele chega; jogo encerrado é pontuado na hora e a
+  propagação do chaveamento, as fotos do ranking e a premiação rodam em
+  segundo plano, sem atrasar o próximo ciclo;
+- expõe GET /health (200/503) e GET /metrics (JSON) em
+  DAEMON_HEALTH_HOST:DAEMON_HEALTH_PORT;
+- encerra com SIGTERM/SIGINT terminando o ciclo em andamento, esperando o
+  pós-jogo em segundo plano e fechando as conexões.
+
+Uso:
+    python live_daemon.py
+
+Variáveis de ambiente: as de update_results.py, mais
+    DAEMON_LIVE_INTERVAL : segundos entre consultas durante o jogo (padrão 15)
+    DAEMON_HEALTH_HOST   : endereço do endpoint de saúde (padrão 127.0.0.1)
+    DAEMON_HEALTH_PORT   : porta do endpoint de saúde (padrão 8765; 0 desliga)
+"""
+
+import asyncio
+import json
+import os
+import signal
+import statistics
+import sys
+import time
+from datetime import datetime
+
+import pytz
+
+import update_results as ur
+from fixture_sources import FINISHED_STATUSES
+from pg_pool import get_pool_metrics, close_all_pools
+from polling_schedule import plan_poll, LIVE_INTERVAL, FULL_TIME_AFTER
+
+logger = ur.logger
+
+DAEMON_LIVE_INTERVAL = int(os.environ.get('DAEMON_LIVE_INTERVAL', '15'))
+DAEMON_HEALTH_HOST = os.environ.get('DAEMON_HEALTH_HOST', '127.0.0.1')
+DAEMON_HEALTH_PORT = int(os.environ.get('DAEMON_HEALTH_PORT', '8765'))
+# Amostras guardadas por métrica de tempo (o processo roda por dias)
+TIMING_SAMPLES = 1000
+
+
+def _stats(values):
+    if not values:
+        return {'n': 0}
+    ordered = sorted(values)
+    return {
+        'n': len(ordered),
+        'p50_ms': round(statistics.median(ordered), 1),
+        'p95_ms': round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 1),
+        'max_ms': round(ordered[-1], 1),
+    }
+
+
+class LiveDaemon:
+    def __init__(self, live_interval=DAEMON_LIVE_INTERVAL,
+                 health_host=DAEMON_HEALTH_HOST, health_port=DAEMON_HEALTH_PORT):
+        self.live_interval = live_interval
+        self.health_host = health_host
+        self.health_port = health_port
+        self.brazil_tz = pytz.timezone('America/Sao_Paulo')
+
+        self._stop = asyncio.Event()
+        self._db_lock = asyncio.Lock()   # uma conexão: operações no banco em fila
+        self._conn = None
+        self._pending = None
+        self._matcher = None
+        self._loaded_at = 0.0
+        self._locked_until = None        # kickoffs até aqui já passaram pelo lock 0x0
+        self._seen = {}                  # fixture id -> último ur.fixture_state processado
+        self._live_statuses = None
+        self._after_match = None         # tarefa do pós-jogo em segundo plano
+        self._after_match_again = False
+
+        self.started_at = time.time()
+        self.plan = None
+        self.metrics = {
+            'cycles': 0, 'fetches': 0, 'fixtures_changed': 0, 'updates': 0,
+            'finished': 0, 'errors': 0, 'reconnects': 0, 'after_match_runs': 0,
+            'last_cycle_at': None, 'last_success_at': None, 'last_update_at': None,
+            'last_error': None,
+        }
+        self.push_ms = []   # da resposta da API ao placar gravado
+
+    # ------------------------------------------------------------
+    # Banco
+    # ------------------------------------------------------------
+
+    async def _db(self, func, *args):
+        """Roda func(conn, *args) numa thread, com a conexão do daemon."""
+        async with self._db_lock:
+            if self._conn is None:
+                self._conn = await asyncio.to_thread(ur.get_db_connection)
+                if self._conn is None:
+                    raise ConnectionError('sem conexão com o banco')
+                self.metrics['reconnects'] += 1
+            try:
+                return await asyncio.to_thread(func, self._conn, *args)
+            except Exception:
+                # Conexão pode ter caído: devolve ao pool (que descarta se
+                # estiver quebrada) e pega outra no próximo uso
+                self._release_conn()
+                raise
+
+    def _release_conn(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    async def _load_pending(self):
+        self._pending = await self._db(ur.get_pending_matches)
+        self._matcher = ur.FixtureMatcher(self._pending)
+        self._loaded_at = time.monotonic()
+        # Fixtures de jogos que não estão mais pendentes não precisam de estado
+        live_ids = {m['api_fixture_id'] for m in self._pending if m.get('api_fixture_id')}
+        self._seen = {fid: st for fid, st in self._seen.items() if fid in live_ids}
+
+    async def _lock_kickoffs(self, now_naive):
+        """lock_missing_predictions só quando algum jogo começou desde a última vez."""
+        kickoffs = [m['datetime'] for m in self._pending
+                    if m['datetime'] and m['datetime'] <= now_naive]
+        latest = max(kickoffs, default=None)
+        if latest is None or (self._locked_until and latest <= self._locked_until):
+            return
+        await self._db(ur.lock_missing_predictions)
+        self._locked_until = latest
+
+    # ------------------------------------------------------------
+    # Ciclo
+    # ------------------------------------------------------------
+
+    def _post_candidates(self, now_naive):
+        """Jogos pendentes já perto do fim (ou depois dele): buscar o resultado final."""
+        return [m for m in self._pending
+                if m['datetime'] and m['datetime'] + FULL_TIME_AFTER <= now_naive]
+
+    async def _fetch(self, plan, now_naive):
+        jobs = []
+        if plan.live:
+            jobs.append(asyncio.to_thread(ur.get_live_fixtures))
+        candidates = self._post_candidates(now_naive) if plan.post else []
+        if candidates:
+            jobs.append(asyncio.to_thread(ur.get_recent_fixtures, candidates))
+        if not jobs:
+            return [], []
+
+        with ur.timed_stage('fetch'):
+            results = await asyncio.gather(*jobs)
+        self.metrics['fetches'] += len(jobs)
+        live = results[0] if plan.live else []
+
+        # Mesma fixture nas duas respostas: vale a mais adiantada (FT > ao vivo)
+        fixtures = {}
+        for batch in results:
+            for fixture in batch:
+                fid = fixture['fixture']['id']
+                current = fixtures.get(fid)
+                if current is None or fixture['fixture']['status']['short'] in FINISHED_STATUSES:
+                    fixtures[fid] = fixture
+        return live, list(fixtures.values())
+
+    def _apply(self, conn, fixtures):
+        """Grava as fixtures que mudaram (thread do banco). Retorna (atualizados, encerrados)."""
+        updated = finished = 0
+        for fixture in fixtures:
+            if ur.process_fixture(conn, fixture, self._matcher, mode='live'):
+                updated += 1
+                if fixture['fixture']['status']['short'] in FINISHED_STATUSES:
+                    finished += 1
+        self._matcher.save_fixture_ids(conn)
+        return updated, finished
+
+    async def cycle(self):
+        """Um ciclo: agenda, consulta e gravação. Retorna o intervalo até o próximo."""
+        if self._pending is None or time.monotonic() - self._loaded_at > ur.SCHEDULE_REFRESH:
+            await self._load_pending()
+
+        now_naive = datetime.now(self.brazil_tz).replace(tzinfo=None)
+        plan = plan_poll(now_naive, self._pending, self._live_statuses)
+        self.plan = plan
+        self.metrics['cycles'] += 1
+        self.metrics['last_cycle_at'] = time.time()
+
+        if not plan.live and not plan.post:
+            # Entre jogos: não segura conexões abertas com o Neon
+            async with self._db_lock:
+                self._release_conn()
+            close_all_pools()
+            self.metrics['last_success_at'] = time.time()
+            return plan.interval
+
+        await self._lock_kickoffs(now_naive)
+        live, fixtures = await self._fetch(plan, now_naive)
+        fetched_at = time.perf_counter()
+        self._live_statuses = [f['fixture']['status']['short'] for f in live] if plan.live else None
+
+        changed = [f for f in fixtures if self._seen.get(f['fixture']['id']) != ur.fixture_state(f)]
+        if changed:
+            self.metrics['fixtures_changed'] += len(changed)
+            updated, finished = await self._db(self._apply, changed)
+            for fixture in changed:
+                # Encerrado não fica marcado: um FT recusado (antes dos 85 min)
+                # volta a ser conferido; o aceito sai dos pendentes
+                if fixture['fixture']['status']['short'] not in FINISHED_STATUSES:
+                    self._seen[fixture['fixture']['id']] = ur.fixture_state(fixture)
+            if updated:
+                self.metrics['updates'] += updated
+                self.metrics['last_update_at'] = time.time()
+                self.push_ms = (self.push_ms + [(time.perf_counter() - fetched_at) * 1000])[-TIMING_SAMPLES:]
+                logger.info(f"Daemon: {updated} jogo(s) atualizado(s) "
+                            f"em {(time.perf_counter() - fetched_at) * 1000:.0f} ms")
+            if finished:
+                self.metrics['finished'] += finished
+                await self._load_pending()
+                self._schedule_after_match()
+
+        for name in list(ur.STAGE_TIMINGS):
+            del ur.STAGE_TIMINGS[name][:-TIMING_SAMPLES]
+        self.metrics['last_success_at'] = time.time()
+        # Ciclo ao vivo (e fim do intervalo do jogo, que plan_poll limita ao
+        # fim de HALF_TIME_WINDOW): no ritmo do daemon, nunca mais lento
+        if plan.interval <= LIVE_INTERVAL:
+            return min(plan.interval, self.live_interval)
+        return plan.interval
+
+    # ------------------------------------------------------------
+    # Pós-jogo em segundo plano
+    # ------------------------------------------------------------
+
+    def _schedule_after_match(self):
+        if self._after_match and not self._after_match.done():
+            self._after_match_again = True
+            return
+        self._after_match = asyncio.create_task(self._run_after_match())
+
+    async def _run_after_match(self):
+        while True:
+            self._after_match_again = False
+            try:
+                defined = await self._db(ur.propagate_results)
+                if defined:
+                    # Confrontos novos: o índice de pendentes ainda tem os
+                    # placeholders. Só marca para reler no próximo ciclo — o
+                    # ciclo em andamento pode estar suspenso usando _pending
+                    self._loaded_at = float('-inf')
+                # Usam o app via SQLAlchemy, com conexões próprias
+                await asyncio.to_thread(ur.refresh_ranking_snapshots)
+                await asyncio.to_thread(ur.refresh_prize_status)
+                self.metrics['after_match_runs'] += 1
+            except Exception as e:
+                self._record_error(e)
+            if not self._after_match_again:
+                return
+
+    # ------------------------------------------------------------
+    # Saúde e métricas
+    # ------------------------------------------------------------
+
+    def _record_error(self, error):
+        self.metrics['errors'] += 1
+        self.metrics['last_error'] = f"{type(error).__name__}: {error}"
+        logger.error(f"Daemon: {self.metrics['last_error']}")
+
+    def healthy(self):
+        """Saudável se o último ciclo bem-sucedido não está atrasado."""
+        last = self.metrics['last_success_at']
+        interval = self.plan.interval if self.plan else self.live_interval
+        return last is not None and time.time() - last <= 3 * max(interval, self.live_interval) + 60
+
+    def snapshot(self):
+        return {
+            'healthy': self.healthy(),
+            'uptime_s': round(time.time() - self.started_at),
+            'plan': self.plan._asdict() if self.plan else None,
+            'pending_matches': len(self._pending) if self._pending is not None else None,
+            'connection_held': self._conn is not None,
+            'metrics': self.metrics,
+            'push_ms': _stats(self.push_ms),
+            'stages': {name: _stats(values) for name, values in ur.STAGE_TIMINGS.items()},
+            'pool': get_pool_metrics(),
+        }
+
+    async def _handle_http(self, reader, writer):
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), timeout=5)
+            while (await asyncio.wait_for(reader.readline(), timeout=5)) not in (b'\r\n', b'\n', b''):
+                pass
+            parts = request_line.decode('latin-1').split()
+            path = parts[1] if len(parts) > 1 else '/'
+            if path == '/health':
+                healthy = self.healthy()
+                status, body = (200 if healthy else 503), {'healthy': healthy}
+            elif path == '/metrics':
+                status, body = 200, self.snapshot()
+            else:
+                status, body = 404, {'error': 'use /health ou /metrics'}
+            payload = json.dumps(body, default=str).encode()
+            reason = {200: 'OK', 503: 'Service Unavailable', 404: 'Not Found'}[status]
+            writer.write(f"HTTP/1.1 {status} {reason}\r\nContent-Type: application/json\r\n"
+                         f"Content-Length: {len(payload)}\r\nConnection: close\r\n\r\n".encode() + payload)
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    # ------------------------------------------------------------
+    # Execução
+    # ------------------------------------------------------------
+
+    def stop(self):
+        if not self._stop.is_set():
+            logger.info("Daemon: encerrando após o ciclo atual...")
+            self._stop.set()
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            try:
+                loop.add_signal_handler(sig, self.stop)
+            except (NotImplementedError, RuntimeError):
+                pass
+
+        server = None
+        if self.health_port:
+            server = await asyncio.start_server(self._handle_http, self.health_host, self.health_port)
+            logger.info(f"Daemon: saúde em http://{self.health_host}:{self.health_port}/health")
+
+        logger.info("=" * 50)
+        logger.info(f"MODO DAEMON - Atualização contínua (ciclo ao vivo de {self.live_interval}s)")
+        logger.info("=" * 50)
+        try:
+            while not self._stop.is_set():
+                try:
+                    interval = await self.cycle()
+                except Exception as e:
+                    self._record_error(e)
+                    interval = self.live_interval
+                try:
+                    await asyncio.wait_for(self._stop.wait(), timeout=interval)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            if self._after_match and not self._after_match.done():
+                logger.info("Daemon: aguardando o pós-jogo em andamento...")
+                await self._after_match
+            if server:
+                server.close()
+                await server.wait_closed()
+            async with self._db_lock:
+                self._release_conn()
+            logger.info(f"Daemon: {self.metrics}")
+            logger.info(f"Pool de conexoes: {get_pool_metrics()}")
+            close_all_pools()
+
+
+def run_daemon():
+    asyncio.run(LiveDaemon().run())
+
+
+def main():
+    if not ur.API_KEY and not os.environ.get('FIXTURE_REPLAY'):
+        logger.error("API_FOOTBALL_KEY não configurada!")
+        sys.exit(1)
+    if not ur.NEON_CONN:
+        logger.error("NEON_CONNECTION_STRING não configurada!")
+        sys.exit(1)
+    run_daemon()
+
+
+if __name__ == '__main__':
+    main()
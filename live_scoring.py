@@ -3,9 +3,17 @@ Módulo de pontuação ao vivo para visualização em tempo real
 Calcula pontos temporários e variação de ranking durante os jogos
 """
 
-from sqlalchemy import desc, or_
-from models import User, Match, Prediction
-from scoring import calculate_match_points, get_scoring_config, get_ranking
+import threading
+from collections import OrderedDict
+
+from sqlalchemy import desc, or_, func
+from models import (
+    User, Match, Prediction, GroupResult, TournamentResult, RankingMatchState
+)
+from scoring import calculate_match_points, get_scoring_config, _ranking_sort_key
+from scoring_rules import calculate_match_points_batch, POINTS_TYPES, BREAKDOWNS
+from ranking_state import get_incremental_ranking, sync_ranking_state, TYPE_COUNTERS
+from db import get_config_version
 
 
 def get_live_match_predictions(session, match_id: int) -> list:
@@ -86,8 +94,10 @@ def calculate_live_ranking(session, match_id: int = None) -> list:
     Returns:
         Lista (ordenada pela posição atual) com variação de posição
     """
-    # Ranking real, já incluindo este jogo (o jogo tem placar registrado)
-    current_ranking = get_ranking(session)
+    # Ranking real, já incluindo este jogo (o jogo tem placar registrado).
+    # Lido do estado incremental: só os palpites de jogos cujo placar mudou
+    # desde a última leitura são re-pontuados.
+    current_ranking = get_incremental_ranking(session)
 
     match = session.query(Match).filter_by(id=match_id).first() if match_id else None
 
@@ -99,9 +109,9 @@ def calculate_live_ranking(session, match_id: int = None) -> list:
             user_data['variacao'] = 0
         return current_ranking
 
-    # Ranking "antes" deste jogo: recalculado excluindo os pontos do jogo,
-    # com os mesmos critérios oficiais de desempate
-    ranking_anterior = get_ranking(session, exclude_match_id=match_id)
+    # Ranking "antes" deste jogo: desconta só a contribuição deste jogo do
+    # estado, com os mesmos critérios oficiais de desempate
+    ranking_anterior = get_incremental_ranking(session, exclude_match_id=match_id, sync=False)
     posicoes_anteriores = {u['user_id']: u['posicao'] for u in ranking_anterior}
 
     for i, user_data in enumerate(current_ranking):
@@ -208,3 +218,199 @@ def get_podium_zone_info(session) -> dict:
         'rebaixamento_inicio': None,  # Será calculado dinamicamente
         'rebaixamento_quantidade': rebaixamento_qty
     }
+
+
+# =============================================================================
+# TABELA "E SE?" DO JOGO AO VIVO
+# =============================================================================
+# Quando um jogo está ao vivo, a pontuação de cada participante nesse jogo e
+# as posições resultantes no ranking são pré-calculadas para todos os
+# placares de 0x0 a 6x6, a partir do ranking SEM esse jogo. A visualização ao
+# vivo vira uma consulta na tabela quando o placar muda, e o painel "próximo
+# gol" lê os dois placares vizinhos. A tabela é refeita só quando algo fora
+# deste jogo muda (outros placares, palpites, grupos, pódio ou pontuação).
+
+WHATIF_MAX_GOALS = 6
+# Tabelas guardadas no processo (LRU): no máximo 4 jogos simultâneos na Copa,
+# então as mais antigas são de jogos encerrados e podem sair
+WHATIF_CACHE_SIZE = 8
+
+_whatif_tables = OrderedDict()  # match_id -> tabela (dict) de build_whatif_table
+_whatif_lock = threading.Lock()
+
+
+def _whatif_fingerprint(session, match_id):
+    """Tudo que, fora o placar do próprio jogo, altera o ranking."""
+    applied = session.query(
+        RankingMatchState.match_id, RankingMatchState.team1_score,
+        RankingMatchState.team2_score, RankingMatchState.config_signature
+    ).filter(RankingMatchState.match_id != match_id).order_by(RankingMatchState.match_id).all()
+    groups = session.query(
+        GroupResult.group_name, GroupResult.first_place_team_id, GroupResult.second_place_team_id
+    ).order_by(GroupResult.group_name).all()
+    podium = session.query(
+        TournamentResult.result_type, TournamentResult.team_id
+    ).order_by(TournamentResult.result_type).all()
+    preds = session.query(func.count(Prediction.id), func.max(Prediction.id)).one()
+    users = session.query(User.id).filter_by(active=True).filter(User.role != 'admin').order_by(User.id).all()
+    return (
+        tuple(map(tuple, applied)), tuple(map(tuple, groups)), tuple(map(tuple, podium)),
+        tuple(preds), tuple(u for (u,) in users), get_config_version(session)
+    )
+
+
+def build_whatif_table(session, match_id: int, max_goals: int = WHATIF_MAX_GOALS) -> dict:
+    """
+    Pré-calcula pontos e posições de todos os participantes para cada placar
+    de 0x0 a max_goals x max_goals do jogo.
+
+    Returns:
+        dict com 'base_positions' {user_id: posição sem o jogo}, 'users'
+        {user_id: nome}, 'predictions' {user_id: (gols1, gols2)} e
+        'scorelines' {(gols1, gols2): {user_id: (pontos, tipo, posição)}}
+    """
+    config = get_scoring_config(session)
+    base = get_incremental_ranking(session, exclude_match_id=match_id, sync=False)
+    base_by_user = {r['user_id']: r for r in base}
+
+    predictions = {
+        user_id: (p1, p2) for user_id, p1, p2 in session.query(
+            Prediction.user_id, Prediction.pred_team1_score, Prediction.pred_team2_score
+        ).filter(
+            Prediction.match_id == match_id,
+            Prediction.pred_team1_score.isnot(None),
+            Prediction.pred_team2_score.isnot(None)
+        ).all()
+        if user_id in base_by_user
+    }
+    pred_users = list(predictions)
+    scorelines = [(s1, s2) for s1 in range(max_goals + 1) for s2 in range(max_goals + 1)]
+
+    # Um único lote: todos os palpites × todos os placares
+    points, codes = calculate_match_points_batch(
+        [predictions[u][0] for u in pred_users] * len(scorelines),
+        [predictions[u][1] for u in pred_users] * len(scorelines),
+        [s1 for s1, _ in scorelines for _ in pred_users],
+        [s2 for _, s2 in scorelines for _ in pred_users],
+        config
+    )
+
+    table = {}
+    n = len(pred_users)
+    for i, scoreline in enumerate(scorelines):
+        rows = {uid: dict(r) for uid, r in base_by_user.items()}
+        scored = {}
+        for user_id, pts, code in zip(pred_users, points[i * n:(i + 1) * n], codes[i * n:(i + 1) * n]):
+            row = rows[user_id]
+            row['total_pontos'] += pts
+            row[TYPE_COUNTERS[POINTS_TYPES[code]]] += 1
+            scored[user_id] = (pts, POINTS_TYPES[code])
+
+        ordered = sorted(rows.values(), key=_ranking_sort_key)
+        table[scoreline] = {
+            r['user_id']: scored.get(r['user_id'], (0, None)) + (pos,)
+            for pos, r in enumerate(ordered, 1)
+        }
+
+    return {
+        'match_id': match_id,
+        'base_positions': {r['user_id']: r['posicao'] for r in base},
+        'users': {r['user_id']: r['nome'] for r in base},
+        'predictions': predictions,
+        'scorelines': table,
+    }
+
+
+def get_whatif_table(session, match_id: int) -> dict:
+    """
+    Tabela "e se?" do jogo, do cache do processo; refeita só se algo fora
+    deste jogo mudou desde a última montagem.
+    """
+    sync_ranking_state(session)
+    fingerprint = _whatif_fingerprint(session, match_id)
+
+    with _whatif_lock:
+        cached = _whatif_tables.get(match_id)
+        if cached:
+            _whatif_tables.move_to_end(match_id)
+    if cached and cached['fingerprint'] == fingerprint:
+        return cached
+
+    table = build_whatif_table(session, match_id)
+    table['fingerprint'] = fingerprint
+    with _whatif_lock:
+        _whatif_tables[match_id] = table
+        _whatif_tables.move_to_end(match_id)
+        while len(_whatif_tables) > WHATIF_CACHE_SIZE:
+            _whatif_tables.popitem(last=False)
+    return table
+
+
+def whatif_live_view(table: dict, team1_score: int, team2_score: int):
+    """
+    Palpites e ranking ao vivo para um placar, lidos da tabela — mesmos
+    formatos de get_live_match_predictions e calculate_live_ranking.
+    Retorna None se o placar está fora da tabela.
+    """
+    scoreline = table['scorelines'].get((team1_score, team2_score))
+    if scoreline is None:
+        return None
+
+    predictions = []
+    for user_id, (p1, p2) in table['predictions'].items():
+        points, points_type, _ = scoreline[user_id]
+        predictions.append({
+            'user_id': user_id,
+            'user_name': table['users'][user_id],
+            'prediction': f"{p1} x {p2}",
+            'pred_team1_score': p1,
+            'pred_team2_score': p2,
+            'points': points,
+            'points_type': points_type,
+            'breakdown': BREAKDOWNS[POINTS_TYPES.index(points_type)]
+        })
+    predictions.sort(key=lambda x: x['points'], reverse=True)
+
+    ranking = []
+    for user_id, (_, _, posicao) in sorted(scoreline.items(), key=lambda item: item[1][2]):
+        anterior = table['base_positions'].get(user_id, posicao)
+        ranking.append({
+            'user_id': user_id,
+            'nome': table['users'][user_id],
+            'posicao': posicao,
+            'posicao_atual': posicao,
+            'posicao_anterior': anterior,
+            'variacao': anterior - posicao
+        })
+    return predictions, ranking
+
+
+def get_next_goal_scenarios(table: dict, team1_score: int, team2_score: int):
+    """
+    Painel "próximo gol": para cada participante, pontos e posição agora e
+    se o próximo gol for do time 1 ou do time 2.
+
+    Returns:
+        Lista ordenada pela posição atual, ou None se algum dos placares
+        estiver fora da tabela
+    """
+    scorelines = table['scorelines']
+    agora = scorelines.get((team1_score, team2_score))
+    gol_team1 = scorelines.get((team1_score + 1, team2_score))
+    gol_team2 = scorelines.get((team1_score, team2_score + 1))
+    if agora is None or gol_team1 is None or gol_team2 is None:
+        return None
+
+    scenarios = []
+    for user_id, (pontos, _, posicao) in sorted(agora.items(), key=lambda item: item[1][2]):
+        scenarios.append({
+            'user_id': user_id,
+            'user_name': table['users'][user_id],
+            'pontos': pontos,
+            'posicao': posicao,
+            'team1_pontos': gol_team1[user_id][0],
+            'team1_posicao': gol_team1[user_id][2],
+            'team2_pontos': gol_team2[user_id][0],
+            'team2_posicao': gol_team2[user_id][2],
+        })
+    return scenarios
@@ -2,7 +2,7 @@
 Modelos do banco de dados para o Bolão Copa do Mundo 2026
 """
 
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text, Float, UniqueConstraint
+from sqlalchemy import Column, Integer, String, Boolean, Date, DateTime, ForeignKey, Text, Float, UniqueConstraint, Index, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -72,6 +72,9 @@ class Match(Base):
     # Vencedor em AET ou pênaltis (preenchido quando status='AET' ou 'PEN').
     # O placar armazenado é sempre o dos 90min — gols de prorrogação não contam para o bolão.
     penalty_winner_id = Column(Integer, ForeignKey('teams.id'), nullable=True)
+    # Id da fixture na API-Football, gravado pelo cron na primeira vez que o
+    # jogo é reconhecido (update_results.FixtureMatcher)
+    api_fixture_id = Column(Integer)
     
     # Controle
     created_at = Column(DateTime, default=lambda: datetime.utcnow())
@@ -80,6 +83,18 @@ class Match(Base):
     team1 = relationship("Team", foreign_keys=[team1_id])
     team2 = relationship("Team", foreign_keys=[team2_id])
     predictions = relationship("Prediction", back_populates="match")
+
+    # Índices dos filtros mais frequentes (criados em bancos existentes por
+    # db.create_indexes). O parcial cobre "jogos que já começaram e têm
+    # placar" de get_ranking / get_user_stats sem varrer os jogos futuros.
+    __table_args__ = (
+        Index('ix_matches_phase_group_status', 'phase', 'group', 'status'),
+        Index('ix_matches_status', 'status'),
+        Index('ix_matches_api_fixture_id', 'api_fixture_id', unique=True),
+        Index('ix_matches_scored_datetime', 'datetime',
+              postgresql_where=text('team1_score IS NOT NULL AND team2_score IS NOT NULL'),
+              sqlite_where=text('team1_score IS NOT NULL AND team2_score IS NOT NULL')),
+    )
     
     def get_team1_display(self):
         """Retorna nome do time 1 para exibição"""
@@ -109,12 +124,17 @@ class Prediction(Base):
     created_at = Column(DateTime, default=lambda: datetime.utcnow())
     updated_at = Column(DateTime, onupdate=lambda: datetime.utcnow())
     locked_at = Column(DateTime)  # Quando foi travado
+    manually_confirmed = Column(Boolean, default=False)  # Salvo pelo botão (não só pelo auto-save)
 
     user = relationship("User", back_populates="predictions")
     match = relationship("Match", back_populates="predictions")
 
     __table_args__ = (
         UniqueConstraint('user_id', 'match_id', name='uq_predictions_user_match'),
+        # Filtros só por user_id já usam a constraint acima (user_id vem primeiro)
+        Index('ix_predictions_match_id', 'match_id'),
+        # Auditoria incremental (auditor.py): linhas alteradas desde a última execução
+        Index('ix_predictions_updated_at', 'updated_at'),
     )
 
 
@@ -136,6 +156,10 @@ class GroupPrediction(Base):
     first_place_team = relationship("Team", foreign_keys=[first_place_team_id])
     second_place_team = relationship("Team", foreign_keys=[second_place_team_id])
 
+    __table_args__ = (
+        Index('ix_group_predictions_updated_at', 'updated_at'),
+    )
+
 
 class PodiumPrediction(Base):
     """Tabela de palpites do pódio (campeão, vice, 3º lugar)"""
@@ -162,6 +186,10 @@ class PodiumPrediction(Base):
     runner_up_team = relationship("Team", foreign_keys=[runner_up_team_id])
     third_place_team = relationship("Team", foreign_keys=[third_place_team_id])
 
+    __table_args__ = (
+        Index('ix_podium_predictions_updated_at', 'updated_at'),
+    )
+
 
 class TournamentResult(Base):
     """Tabela com resultados oficiais do torneio (pódio real)"""
@@ -210,3 +238,101 @@ class AuditLog(Base):
     target_user_id = Column(Integer)  # ID do usuário afetado (se aplicável)
     details = Column(Text)
     created_at = Column(DateTime, default=lambda: datetime.utcnow())
+
+
+class RankingState(Base):
+    """
+    Estado persistente do ranking: totais e contadores de desempate de cada
+    participante, somados sobre os jogos já aplicados (ver ranking_state.py).
+    """
+    __tablename__ = 'ranking_state'
+
+    user_id = Column(Integer, ForeignKey('users.id'), primary_key=True)
+    pontos_jogos = Column(Integer, default=0, nullable=False)
+    placares_exatos = Column(Integer, default=0, nullable=False)
+    resultado_gols = Column(Integer, default=0, nullable=False)
+    resultado = Column(Integer, default=0, nullable=False)
+    gols = Column(Integer, default=0, nullable=False)
+    zeros = Column(Integer, default=0, nullable=False)
+    updated_at = Column(DateTime, default=lambda: datetime.utcnow(), onupdate=lambda: datetime.utcnow())
+
+
+class RankingMatchState(Base):
+    """Placar de cada jogo já aplicado ao RankingState (e a config usada)"""
+    __tablename__ = 'ranking_match_state'
+
+    match_id = Column(Integer, ForeignKey('matches.id'), primary_key=True)
+    team1_score = Column(Integer, nullable=False)
+    team2_score = Column(Integer, nullable=False)
+    config_signature = Column(String(100))  # Pontuação vigente quando o jogo foi aplicado
+    applied_at = Column(DateTime, default=lambda: datetime.utcnow(), onupdate=lambda: datetime.utcnow())
+
+
+class RankingContribution(Base):
+    """
+    Contribuição de um palpite ao RankingState. Permite desfazer exatamente
+    a parcela de um jogo quando o placar muda (delta por jogo).
+    """
+    __tablename__ = 'ranking_contributions'
+
+    match_id = Column(Integer, ForeignKey('matches.id'), primary_key=True)
+    user_id = Column(Integer, ForeignKey('users.id'), primary_key=True)
+    points = Column(Integer, default=0, nullable=False)
+    points_type = Column(String(50))
+
+
+class RankingSnapshot(Base):
+    """
+    Foto do ranking ao fim de cada dia com jogos (ver ranking_snapshots.py).
+    Alimenta o gráfico de evolução e o resumo diário sem recalcular o ranking.
+    """
+    __tablename__ = 'ranking_snapshots'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    snapshot_date = Column(Date, nullable=False)  # Dia do jogo (horário de Brasília)
+    user_id = Column(Integer, ForeignKey('users.id'), nullable=False)
+    posicao = Column(Integer, nullable=False)
+    total_pontos = Column(Integer, default=0)
+    placares_exatos = Column(Integer, default=0)
+    resultado_gols = Column(Integer, default=0)
+    resultado = Column(Integer, default=0)
+    gols = Column(Integer, default=0)
+    zeros = Column(Integer, default=0)
+    grupos_corretos = Column(Integer, default=0)
+    podio_corretos = Column(Integer, default=0)
+    created_at = Column(DateTime, default=lambda: datetime.utcnow())
+
+    __table_args__ = (
+        UniqueConstraint('snapshot_date', 'user_id', name='uq_ranking_snapshots_date_user'),
+    )
+
+
+class DataVersion(Base):
+    """
+    Contador de versão por tipo de dado (ver data_version.py). Incrementado a
+    cada escrita relevante — pelo cron e pelo app — para que as telas ao vivo
+    só voltem a consultar o banco quando algo realmente mudou.
+    """
+    __tablename__ = 'data_versions'
+
+    key = Column(String(50), primary_key=True)
+    version = Column(Integer, default=0, nullable=False)
+    updated_at = Column(DateTime, default=lambda: datetime.utcnow(), onupdate=lambda: datetime.utcnow())
+
+
+class PrizeStatus(Base):
+    """
+    Situação de cada participante na briga pela premiação (ver
+    prize_status.py): melhor e pior posição final ainda possíveis e o selo
+    garantido / eliminado / vivo. Regravada pelo cron após cada run_post.
+    """
+    __tablename__ = 'prize_status'
+
+    user_id = Column(Integer, ForeignKey('users.id'), primary_key=True)
+    pontos_atuais = Column(Integer, default=0)  # Só jogos encerrados, grupos e pódio definidos
+    pontos_maximos = Column(Integer, default=0)
+    melhor_posicao = Column(Integer, nullable=False)
+    pior_posicao = Column(Integer, nullable=False)
+    exato = Column(Boolean, default=True)  # False: busca interrompida, posições são limites seguros
+    status = Column(String(20), nullable=False)  # 'garantido', 'eliminado' ou 'vivo'
+    updated_at = Column(DateTime, default=lambda: datetime.utcnow(), onupdate=lambda: datetime.utcnow())
@@ -19,6 +19,7 @@ import pytz
 import json
 import os
 import shutil
+import tempfile
 from sqlalchemy import func, desc
 
 from models import (
@@ -26,6 +27,9 @@ from models import (
     GroupPrediction, PodiumPrediction, TournamentResult, GroupResult
 )
 from scoring import get_ranking, get_user_stats, get_scoring_config, calculate_match_points
+from scoring_rules import calculate_match_points_batch, POINTS_TYPES, PLACAR_EXATO
+from ranking_state import get_incremental_ranking
+from ranking_snapshots import get_positions_by_day
 
 
 # =============================================================================
@@ -187,13 +191,16 @@ def render_next_match_countdown(session):
 # =============================================================================
 # 2. GRÁFICO DE EVOLUÇÃO DO RANKING
 # =============================================================================
-def render_ranking_evolution_chart(session):
+def get_ranking_evolution_data(session):
     """
-    Gráfico mostrando a evolução de posição de cada participante ao longo da competição.
-    Agrupa por rodada (data) e mostra a posição de cada um.
+    Dados do gráfico de evolução no ranking: as datas com jogos encerrados e,
+    para cada participante (na ordem do ranking atual), a posição ao fim de
+    cada data, lida das fotos em ranking_snapshots.
+
+    Returns:
+        (dates, user_positions, final_order, n_users) — dates vazio quando
+        ainda não há jogos encerrados; n_users zero sem participantes
     """
-    st.subheader("📈 Evolução no Ranking")
-    
     tz_brazil = pytz.timezone('America/Sao_Paulo')
     now = datetime.now(tz_brazil).replace(tzinfo=None)
     
@@ -205,8 +212,7 @@ def render_ranking_evolution_chart(session):
     ).order_by(Match.datetime).all()
     
     if not matches_finished:
-        st.info("📊 Ainda não há jogos finalizados para mostrar a evolução.")
-        return
+        return [], {}, [], 0
     
     # Agrupa jogos por data
     matches_by_date = {}
@@ -218,35 +224,46 @@ def render_ranking_evolution_chart(session):
     
     # Busca todos os participantes ativos
     users = session.query(User).filter_by(active=True).filter(User.role != 'admin').all()
+    dates = sorted(matches_by_date.keys(), key=lambda d: matches_by_date[d][0].datetime)
     
     if not users:
-        st.info("Nenhum participante encontrado.")
-        return
-    
-    config = get_scoring_config(session)
+        return dates, {}, [], 0
     
-    # Para cada data, calcula o ranking acumulado até aquele ponto usando
-    # get_ranking com cutoff — inclui pontos de grupos e pódio além dos jogos
-    dates = sorted(matches_by_date.keys(), key=lambda d: matches_by_date[d][0].datetime)
+    # Posição de cada participante ao fim de cada data, lida das fotos
+    # materializadas em ranking_snapshots (uma consulta para todas as datas)
+    match_days = {date_key: matches_by_date[date_key][0].datetime.date() for date_key in dates}
+    positions_by_day = get_positions_by_day(session, match_days.values())
     user_positions = {u.id: {'name': u.name, 'positions': []} for u in users}
 
     for date_key in dates:
-        # Cutoff = fim do último jogo desta data (23:59:59)
-        last_match_dt = max(m.datetime for m in matches_by_date[date_key])
-        cutoff = last_match_dt.replace(hour=23, minute=59, second=59)
-        ranking_snapshot = get_ranking(session, cutoff_datetime=cutoff)
-        ranking_map = {r['user_id']: r['posicao'] for r in ranking_snapshot}
+        ranking_map = positions_by_day.get(match_days[date_key], {})
         for u in users:
             pos = ranking_map.get(u.id, len(users))
             user_positions[u.id]['positions'].append(pos)
 
     # Ordena user_positions pela posição final atual (igual ao ranking exibido)
-    final_ranking = get_ranking(session)
+    final_ranking = get_incremental_ranking(session)
     final_order = [r['user_id'] for r in final_ranking]
     user_positions_ordered = {uid: user_positions[uid] for uid in final_order if uid in user_positions}
     
-    if not dates or len(dates) < 1:
-        st.info("📊 Dados insuficientes para o gráfico de evolução.")
+    return dates, user_positions_ordered, final_order, len(users)
+
+
+def render_ranking_evolution_chart(session):
+    """
+    Gráfico mostrando a evolução de posição de cada participante ao longo da competição.
+    Agrupa por rodada (data) e mostra a posição de cada um.
+    """
+    st.subheader("📈 Evolução no Ranking")
+    
+    dates, user_positions_ordered, final_order, n_users = get_ranking_evolution_data(session)
+    
+    if not dates:
+        st.info("📊 Ainda não há jogos finalizados para mostrar a evolução.")
+        return
+    
+    if not n_users:
+        st.info("Nenhum participante encontrado.")
         return
     
     # Gráfico de linhas com:
@@ -255,7 +272,6 @@ def render_ranking_evolution_chart(session):
     # - nome de cada participante escrito na ponta direita da sua linha
     #   (posições finais são únicas, então os nomes não se sobrepõem)
     # - seletor para destacar outros participantes para comparação
-    n_users = len(users)
     _session_user = st.session_state.get('user') or {}
     try:
         current_user_id = int(_session_user.get('id'))
@@ -434,12 +450,16 @@ def get_user_achievements(session, user_id):
     pred_with_match = [(p, match_by_id[p.match_id]) for p in predictions if p.match_id in match_by_id]
     pred_with_match.sort(key=lambda x: x[1].datetime)
 
-    for pred, match in pred_with_match:
-        points, points_type, _ = calculate_match_points(
-            pred.pred_team1_score, pred.pred_team2_score,
-            match.team1_score, match.team2_score,
-            config
-        )
+    points_list, codes = calculate_match_points_batch(
+        [p.pred_team1_score for p, _ in pred_with_match],
+        [p.pred_team2_score for p, _ in pred_with_match],
+        [m.team1_score for _, m in pred_with_match],
+        [m.team2_score for _, m in pred_with_match],
+        config
+    )
+
+    for points, code in zip(points_list, codes):
+        points_type = POINTS_TYPES[code]
         total_pontos_jogos += points
 
         if points_type == 'placar_exato':
@@ -595,9 +615,17 @@ def get_best_predictions_by_round(session):
         preds = session.query(Prediction).filter(
             Prediction.match_id.in_(match_ids)
         ).all()
+        # Pontua todos os palpites da rodada em lote
+        points_list, codes = calculate_match_points_batch(
+            [p.pred_team1_score for p in preds],
+            [p.pred_team2_score for p in preds],
+            [match_by_id[p.match_id].team1_score for p in preds],
+            [match_by_id[p.match_id].team2_score for p in preds],
+            config
+        )
         preds_by_user = {}
-        for p in preds:
-            preds_by_user.setdefault(p.user_id, []).append(p)
+        for p, points, code in zip(preds, points_list, codes):
+            preds_by_user.setdefault(p.user_id, []).append((points, code))
 
         # Calcula pontos/exatos de cada participante que palpitou na rodada
         scored = []
@@ -607,14 +635,9 @@ def get_best_predictions_by_round(session):
                 continue
             user_points = 0
             user_exatos = 0
-            for p in user_preds:
-                m = match_by_id[p.match_id]
-                points, ptype, _ = calculate_match_points(
-                    p.pred_team1_score, p.pred_team2_score,
-                    m.team1_score, m.team2_score, config
-                )
+            for points, code in user_preds:
                 user_points += points
-                if ptype == 'placar_exato':
+                if code == PLACAR_EXATO:
                     user_exatos += 1
             scored.append({'name': user.name, 'points': user_points, 'exatos': user_exatos})
 
@@ -1027,27 +1050,28 @@ def page_regras(get_session_func, engine):
 # 7. ESTATÍSTICAS GERAIS
 # =============================================================================
 def render_general_stats(session):
-    """Página com estatísticas gerais do bolão."""
+    """
+    Página com estatísticas gerais do bolão. As agregações sobre todos os
+    palpites vêm da exportação colunar (analytics_export.py), não do banco.
+    """
+    from analytics_export import (
+        get_analytics, top_champions, top_scores, user_totals, exact_scores_by_match
+    )
+
     st.header("📊 Estatísticas Gerais do Bolão")
     
-    tz_brazil = pytz.timezone('America/Sao_Paulo')
-    now = datetime.now(tz_brazil).replace(tzinfo=None)
+    analytics = get_analytics(session.get_bind())
     
     # Seleção mais apostada como campeã
     st.subheader("🏆 Seleção Mais Apostada como Campeã")
     
-    champion_counts = session.query(
-        Team.name, Team.flag,
-        func.count(PodiumPrediction.id).label('count')
-    ).join(
-        PodiumPrediction, PodiumPrediction.champion_team_id == Team.id
-    ).group_by(Team.name, Team.flag).order_by(desc('count')).all()
+    champion_counts = top_champions(analytics)
     
     if champion_counts:
-        total_preds = sum(c.count for c in champion_counts)
+        total_preds = sum(count for _, count in champion_counts)
         
-        for i, c in enumerate(champion_counts[:10]):
-            pct = (c.count / total_preds * 100) if total_preds > 0 else 0
+        for i, (team, count) in enumerate(champion_counts[:10]):
+            pct = (count / total_preds * 100) if total_preds > 0 else 0
             bar_width = pct
             
             medal = ""
@@ -1061,8 +1085,8 @@ def render_general_stats(session):
             st.markdown(f"""
             <div style="margin: 6px 0;">
                 <div style="display: flex; justify-content: space-between; margin-bottom: 3px;">
-                    <span style="font-weight: 600; font-size: 0.9rem;">{medal}{c.flag} {c.name}</span>
-                    <span style="font-weight: 700; color: #1E3A5F;">{c.count} ({pct:.0f}%)</span>
+                    <span style="font-weight: 600; font-size: 0.9rem;">{medal}{analytics.team_label(team)}</span>
+                    <span style="font-weight: 700; color: #1E3A5F;">{count} ({pct:.0f}%)</span>
                 </div>
                 <div style="background: #e9ecef; border-radius: 5px; height: 8px; overflow: hidden;">
                     <div style="background: linear-gradient(90deg, #FFD700, #FFA500); width: {bar_width}%; height: 100%; border-radius: 5px;"></div>
@@ -1077,17 +1101,10 @@ def render_general_stats(session):
     # Placar mais repetido nos palpites
     st.subheader("📝 Placares Mais Apostados")
     
-    placar_counts = session.query(
-        Prediction.pred_team1_score,
-        Prediction.pred_team2_score,
-        func.count(Prediction.id).label('count')
-    ).group_by(
-        Prediction.pred_team1_score,
-        Prediction.pred_team2_score
-    ).order_by(desc('count')).limit(10).all()
+    placar_counts = top_scores(analytics, limit=10)
     
     if placar_counts:
-        for i, p in enumerate(placar_counts):
+        for i, (gols1, gols2, count) in enumerate(placar_counts):
             st.markdown(f"""
             <div style="
                 display: flex;
@@ -1100,10 +1117,10 @@ def render_general_stats(session):
                 border-left: 3px solid {'#FFD700' if i == 0 else '#dee2e6'};
             ">
                 <span style="font-weight: 700; font-size: 1.1rem; color: #1E3A5F;">
-                    {p.pred_team1_score} x {p.pred_team2_score}
+                    {gols1} x {gols2}
                 </span>
                 <span style="color: #666; font-size: 0.85rem;">
-                    {p.count} palpites
+                    {count} palpites
                 </span>
             </div>
             """, unsafe_allow_html=True)
@@ -1115,20 +1132,15 @@ def render_general_stats(session):
     # Média de acertos
     st.subheader("📈 Médias Gerais")
     
-    users = session.query(User).filter_by(active=True).filter(User.role != 'admin').all()
+    users = analytics.table('users')
+    participantes = users['active'] & ~users['admin']
+    n = int(participantes.sum())
     
-    if users:
-        total_pontos = 0
-        total_exatos = 0
-        total_resultados = 0
-        
-        for user in users:
-            stats = get_user_stats(session, user.id)
-            total_pontos += stats['total_pontos']
-            total_exatos += stats['placares_exatos']
-            total_resultados += stats['resultados_corretos']
-        
-        n = len(users)
+    if n:
+        totals = user_totals(analytics)
+        total_pontos = int(totals['total_pontos'][participantes].sum())
+        total_exatos = int(totals['placares_exatos'][participantes].sum())
+        total_resultados = int(totals['resultados_corretos'][participantes].sum())
         
         col1, col2, col3 = st.columns(3)
         with col1:
@@ -1143,20 +1155,13 @@ def render_general_stats(session):
     # Jogos com mais acertos
     st.subheader("🎯 Jogos com Mais Placares Exatos")
     
-    matches_with_exatos = session.query(
-        Match,
-        func.count(Prediction.id).label('exatos')
-    ).join(
-        Prediction, Prediction.match_id == Match.id
-    ).filter(
-        Prediction.points_type == 'placar_exato',
-        Match.team1_score.isnot(None)
-    ).group_by(Match.id).order_by(desc('exatos')).limit(5).all()
+    matches_with_exatos = exact_scores_by_match(analytics, limit=5)
+    jogos = analytics.table('matches')
     
     if matches_with_exatos:
-        for match, exatos in matches_with_exatos:
-            t1 = f"{match.team1.flag} {match.team1.name}" if match.team1 else match.team1_code
-            t2 = f"{match.team2.flag} {match.team2.name}" if match.team2 else match.team2_code
+        for row, exatos in matches_with_exatos:
+            t1 = analytics.team_label(jogos['team1'][row])
+            t2 = analytics.team_label(jogos['team2'][row])
             
             st.markdown(f"""
             <div style="
@@ -1169,7 +1174,7 @@ def render_general_stats(session):
                 align-items: center;
                 flex-wrap: wrap;
             ">
-                <span style="font-weight: 600;">{t1} {match.team1_score}x{match.team2_score} {t2}</span>
+                <span style="font-weight: 600;">{t1} {jogos['score1'][row]}x{jogos['score2'][row]} {t2}</span>
                 <span style="color: #2ECC71; font-weight: 700;">🎯 {exatos} placar(es) exato(s)</span>
             </div>
             """, unsafe_allow_html=True)
@@ -1264,125 +1269,120 @@ def export_ranking_pdf(session):
 # =============================================================================
 def admin_backup_database(session):
     """Interface de backup do banco de dados para admin."""
+    from backup_stream import write_backup, restore_backup, last_backup_at
+
     st.subheader("💾 Backup do Banco de Dados")
     
     st.markdown("""
     Faça backup dos dados do bolão para garantir a segurança das informações.
-    O backup inclui todos os participantes, palpites, resultados e configurações.
+    O backup inclui todos os participantes, palpites, resultados e configurações,
+    num arquivo NDJSON comprimido (.ndjson.gz) gerado em fluxo, tabela por tabela.
+    As senhas não entram no backup.
     """)
+
+    ultimo = last_backup_at(session)
+    opcoes = ["Completo"]
+    if ultimo:
+        opcoes.append(f"Incremental (desde {ultimo.strftime('%d/%m/%Y %H:%M')} UTC)")
+    tipo = st.radio("Tipo de backup", opcoes, horizontal=True, key="backup_tipo")
     
     if st.button("📥 Gerar Backup Agora", key="btn_backup"):
+        backup_path = None
         try:
-            backup_data = generate_backup(session)
-            
-            # Salva como JSON
-            backup_filename = f"backup_bolao_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-            backup_path = f"/tmp/{backup_filename}"
-            
-            with open(backup_path, 'w', encoding='utf-8') as f:
-                json.dump(backup_data, f, ensure_ascii=False, indent=2, default=str)
-            
+            incremental = tipo != "Completo"
+            sufixo = "_incremental" if incremental else ""
+            backup_filename = f"backup_bolao_{datetime.now().strftime('%Y%m%d_%H%M%S')}{sufixo}.ndjson.gz"
+
+            # Gravado em disco à medida que o banco é lido (memória constante);
+            # o arquivo temporário é apagado assim que o download é montado
+            fd, backup_path = tempfile.mkstemp(prefix='backup_bolao_', suffix='.ndjson.gz')
+            with os.fdopen(fd, 'wb') as f:
+                mode, counts = write_backup(session, f, incremental=incremental)
+            tamanho_kb = os.path.getsize(backup_path) / 1024
+
             with open(backup_path, 'rb') as f:
                 st.download_button(
                     label="⬇️ Baixar Backup",
-                    data=f,
+                    data=f.read(),
                     file_name=backup_filename,
-                    mime="application/json"
+                    mime="application/gzip"
                 )
             
-            st.success(f"✅ Backup gerado com sucesso! ({backup_filename})")
+            st.success(f"✅ Backup {'incremental' if mode == 'incremental' else 'completo'} "
+                       f"gerado com sucesso! ({backup_filename}, {tamanho_kb:.0f} KB)")
             
             # Estatísticas do backup
             st.markdown(f"""
             **Resumo do Backup:**
-            - Participantes: {len(backup_data.get('users', []))}
-            - Palpites de jogos: {len(backup_data.get('predictions', []))}
-            - Palpites de grupos: {len(backup_data.get('group_predictions', []))}
-            - Palpites de pódio: {len(backup_data.get('podium_predictions', []))}
-            - Jogos: {len(backup_data.get('matches', []))}
-            - Configurações: {len(backup_data.get('configs', []))}
+            - Participantes: {counts.get('users', 0)}
+            - Palpites de jogos: {counts.get('predictions', 0)}
+            - Palpites de grupos: {counts.get('group_predictions', 0)}
+            - Palpites de pódio: {counts.get('podium_predictions', 0)}
+            - Jogos: {counts.get('matches', 0)}
+            - Configurações: {counts.get('configs', 0)}
             """)
             
         except Exception as e:
             st.error(f"Erro ao gerar backup: {str(e)}")
+        finally:
+            if backup_path and os.path.exists(backup_path):
+                os.remove(backup_path)
+
+    st.markdown("---")
+    st.markdown("#### ♻️ Restaurar Backup")
+    st.caption("Restaure o último backup completo e depois os incrementais, em ordem. "
+               "A restauração mescla: registros do arquivo sobrescrevem os do banco, e os que "
+               "não estão no arquivo continuam. Participantes recriados precisam de nova senha.")
+    arquivo = st.file_uploader("Arquivo de backup (.ndjson.gz)", type=["gz", "ndjson"],
+                               key="backup_restore_file")
+    confirmar = st.checkbox("Confirmo que quero sobrescrever os dados atuais", key="backup_restore_ok")
+    if st.button("♻️ Restaurar", key="btn_restore", disabled=not (arquivo and confirmar)):
+        try:
+            counts = restore_backup(session, arquivo)
+            st.success("✅ Backup restaurado: " + ", ".join(f"{n} {t}" for t, n in counts.items()))
+        except Exception as e:
+            st.error(f"Erro ao restaurar backup: {str(e)}")
 
 
-def generate_backup(session):
-    """Gera dados de backup em formato JSON."""
-    from models import User, Match, Prediction, Team, Config, GroupPrediction, PodiumPrediction
-    
-    backup = {
-        'generated_at': datetime.now().isoformat(),
-        'version': '1.0',
-        'users': [],
-        'teams': [],
-        'matches': [],
-        'predictions': [],
-        'group_predictions': [],
-        'podium_predictions': [],
-        'configs': []
-    }
-    
-    # Usuários
-    for u in session.query(User).all():
-        backup['users'].append({
-            'id': u.id, 'name': u.name, 'username': u.username,
-            'role': u.role, 'active': u.active, 'created_at': str(u.created_at)
-        })
-    
-    # Times
-    for t in session.query(Team).all():
-        backup['teams'].append({
-            'id': t.id, 'name': t.name, 'code': t.code,
-            'group': t.group, 'flag': t.flag
-        })
-    
-    # Jogos
-    for m in session.query(Match).all():
-        backup['matches'].append({
-            'id': m.id, 'match_number': m.match_number,
-            'team1_code': m.team1_code, 'team2_code': m.team2_code,
-            'datetime': str(m.datetime), 'city': m.city,
-            'phase': m.phase, 'group': m.group,
-            'status': m.status,
-            'team1_score': m.team1_score, 'team2_score': m.team2_score
-        })
-    
-    # Palpites
-    for p in session.query(Prediction).all():
-        backup['predictions'].append({
-            'id': p.id, 'user_id': p.user_id, 'match_id': p.match_id,
-            'pred_team1_score': p.pred_team1_score,
-            'pred_team2_score': p.pred_team2_score,
-            'points_awarded': p.points_awarded,
-            'points_type': p.points_type
-        })
-    
-    # Palpites de grupos
-    for gp in session.query(GroupPrediction).all():
-        backup['group_predictions'].append({
-            'id': gp.id, 'user_id': gp.user_id,
-            'group_name': gp.group_name,
-            'first_place_team_id': gp.first_place_team_id,
-            'second_place_team_id': gp.second_place_team_id,
-            'points_awarded': gp.points_awarded
-        })
-    
-    # Palpites de pódio
-    for pp in session.query(PodiumPrediction).all():
-        backup['podium_predictions'].append({
-            'id': pp.id, 'user_id': pp.user_id,
-            'champion_team_id': pp.champion_team_id,
-            'runner_up_team_id': pp.runner_up_team_id,
-            'third_place_team_id': pp.third_place_team_id,
-            'points_awarded': pp.points_awarded
-        })
-    
-    # Configurações
-    for c in session.query(Config).all():
-        backup['configs'].append({
-            'id': c.id, 'key': c.key, 'value': c.value,
-            'description': c.description, 'category': c.category
-        })
-    
-    return backup
+# Pasta dos comprovantes em lote, reaproveitada entre execuções como cache
+RECEIPTS_DIR = os.path.join(tempfile.gettempdir(), 'comprovantes_bolao')
+
+
+def admin_bulk_receipts(session):
+    """Comprovantes de palpites de todos os participantes, em lote (admin)."""
+    from receipts_batch import generate_receipts
+
+    st.subheader("📄 Comprovantes de Todos os Participantes")
+    st.markdown("""
+    Gera o comprovante de palpites (o mesmo de "Meus Comprovantes") de cada
+    participante ativo, para envio antes da trava da Copa. Só são gerados de
+    novo os comprovantes de quem mudou algum palpite desde a última vez.
+    """)
+    forcar = st.checkbox("Gerar todos de novo, mesmo sem mudança", key="receipts_force")
+
+    if st.button("📄 Gerar Comprovantes", key="btn_receipts"):
+        try:
+            # Pasta fixa = cache entre execuções (manifest.json); gerações
+            # simultâneas nela são serializadas por receipts_batch. O .zip é
+            # de cada execução. Sem pool de processos dentro do Streamlit.
+            fd, zip_path = tempfile.mkstemp(prefix='comprovantes_bolao_', suffix='.zip')
+            os.close(fd)
+            try:
+                with st.spinner("Gerando comprovantes..."):
+                    result = generate_receipts(session, RECEIPTS_DIR, workers=1, force=forcar,
+                                               zip_path=zip_path)
+                with open(zip_path, 'rb') as f:
+                    zip_bytes = f.read()
+            finally:
+                os.remove(zip_path)
+
+            st.success(f"✅ {result['rendered']} comprovante(s) gerado(s), "
+                       f"{result['unchanged']} sem mudança ({result['elapsed_ms'] / 1000:.1f}s)")
+            st.download_button(
+                label="⬇️ Baixar Comprovantes (.zip)",
+                data=zip_bytes,
+                file_name=f"comprovantes_bolao_{datetime.now().strftime('%Y%m%d_%H%M')}.zip",
+                mime="application/zip"
+            )
+        except Exception as e:
+            st.error(f"Erro ao gerar comprovantes: {str(e)}")
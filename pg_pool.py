@@ -0,0 +1,200 @@
+"""
+Pool de conexões psycopg2 para os scripts de cron do Bolão Copa do Mundo 2026
+
+Os crons (update_results.py, auditor.py, auto_update.py) usam psycopg2 puro
+e não instalam SQLAlchemy. Este módulo dá a eles o mesmo tratamento do
+engine do app (db.get_engine): um pool por string de conexão, reaproveitado
+dentro do processo, com keepalive TCP e timeout de conexão ajustados para o
+Postgres serverless (Neon), teste da conexão antes de reusar uma que ficou
+parada e métricas do pool.
+
+Com o pool cheio (PG_POOL_MAX conexões emprestadas), get_pooled_connection
+espera até PG_POOL_TIMEOUT segundos por uma devolução antes de desistir.
+
+Uso:
+    conn = get_pooled_connection(dsn)   # conn.close() devolve ao pool
+    with conn:                          # como no psycopg2: commit/rollback,
+        ...                             # sem devolver a conexão
+    conn.close()
+    close_all_pools()                   # no fim do script
+"""
+
+import os
+import threading
+import time
+
+import psycopg2
+from psycopg2 import pool as pg_pool
+
+PG_POOL_MIN = int(os.environ.get('PG_POOL_MIN', '1'))
+PG_POOL_MAX = int(os.environ.get('PG_POOL_MAX', '4'))
+# Conexão parada há mais que isso é testada (SELECT 1) antes de ser reusada
+PG_PRE_PING_AFTER = float(os.environ.get('PG_PRE_PING_AFTER', '30'))
+# Espera máxima por uma conexão livre quando o pool está cheio
+PG_POOL_TIMEOUT = float(os.environ.get('PG_POOL_TIMEOUT', '30'))
+
+# Keepalive TCP: evita que o Neon/NAT derrube a conexão ociosa sem aviso
+CONNECT_KWARGS = {
+    'connect_timeout': int(os.environ.get('DB_CONNECT_TIMEOUT', '10')),
+    'keepalives': 1,
+    'keepalives_idle': 30,
+    'keepalives_interval': 10,
+    'keepalives_count': 5,
+}
+
+_pools = {}  # dsn -> ThreadedConnectionPool
+_slots = {}  # dsn -> BoundedSemaphore(PG_POOL_MAX): getconn só quando há vaga
+_lock = threading.Lock()
+_metrics = {
+    'connects': 0,          # conexões físicas abertas
+    'connect_ms_total': 0.0,
+    'checkouts': 0,         # conexões entregues pelo pool
+    'pre_pings': 0,
+    'discarded': 0,         # conexões quebradas descartadas
+    'waits': 0,             # checkouts que esperaram o pool ter vaga
+}
+
+
+class _TimedConnection(psycopg2.extensions.connection):
+    """Conexão que registra o tempo de abertura (cold start) nas métricas."""
+
+    def __init__(self, *args, **kwargs):
+        start = time.perf_counter()
+        super().__init__(*args, **kwargs)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        with _lock:
+            _metrics['connects'] += 1
+            _metrics['connect_ms_total'] += elapsed_ms
+        self._last_used = time.monotonic()
+
+
+class PooledConnection:
+    """
+    Conexão emprestada do pool. Repassa tudo para a conexão psycopg2;
+    close() a devolve ao pool (desfazendo transação pendente) em vez de
+    fechá-la, para o código existente que chama conn.close() continuar igual.
+    `with conn:` mantém o sentido do psycopg2 (commit, ou rollback se houver
+    exceção) e não devolve a conexão — isso é só com close().
+    """
+
+    def __init__(self, pool, conn, slot):
+        self._pool = pool
+        self._conn = conn
+        self._slot = slot
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def close(self):
+        conn, self._conn = self._conn, None
+        if conn is None:
+            return
+        broken = conn.closed != 0
+        if not broken:
+            try:
+                if conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+            except psycopg2.Error:
+                broken = True
+        conn._last_used = time.monotonic()
+        if broken:
+            with _lock:
+                _metrics['discarded'] += 1
+        try:
+            self._pool.putconn(conn, close=broken)
+        finally:
+            self._slot.release()
+
+    def __enter__(self):
+        self._conn.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return self._conn.__exit__(exc_type, exc, tb)
+
+
+def get_pg_pool(dsn):
+    """Pool (singleton por dsn) de conexões psycopg2."""
+    return _get_pool_and_slots(dsn)[0]
+
+
+def _get_pool_and_slots(dsn):
+    dsn = dsn.strip()
+    with _lock:
+        pool = _pools.get(dsn)
+        if pool is None:
+            pool = pg_pool.ThreadedConnectionPool(
+                PG_POOL_MIN, PG_POOL_MAX, dsn,
+                connection_factory=_TimedConnection, **CONNECT_KWARGS
+            )
+            _pools[dsn] = pool
+            _slots[dsn] = threading.BoundedSemaphore(PG_POOL_MAX)
+        return pool, _slots[dsn]
+
+
+def _alive(conn):
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT 1")
+        conn.rollback()
+        return True
+    except psycopg2.Error:
+        return False
+
+
+def get_pooled_connection(dsn, timeout=None) -> PooledConnection:
+    """
+    Conexão do pool para `dsn`. Se estava parada há mais de
+    PG_PRE_PING_AFTER segundos, é testada antes e trocada se caiu.
+
+    Com o pool cheio, espera uma devolução por até `timeout` segundos
+    (padrão PG_POOL_TIMEOUT) e só então levanta PoolError.
+    """
+    pool, slots = _get_pool_and_slots(dsn)
+    if not slots.acquire(blocking=False):
+        with _lock:
+            _metrics['waits'] += 1
+        if not slots.acquire(timeout=PG_POOL_TIMEOUT if timeout is None else timeout):
+            raise pg_pool.PoolError(
+                f"pool cheio: nenhuma das {PG_POOL_MAX} conexões foi devolvida a tempo"
+            )
+    try:
+        conn = pool.getconn()
+        if conn.closed or time.monotonic() - conn._last_used > PG_PRE_PING_AFTER:
+            with _lock:
+                _metrics['pre_pings'] += 1
+            if conn.closed or not _alive(conn):
+                with _lock:
+                    _metrics['discarded'] += 1
+                pool.putconn(conn, close=True)
+                conn = pool.getconn()
+    except Exception:
+        slots.release()
+        raise
+    with _lock:
+        _metrics['checkouts'] += 1
+    return PooledConnection(pool, conn, slots)
+
+
+def get_pool_metrics() -> dict:
+    """Métricas dos pools deste processo (conexões abertas, reuso, cold start)."""
+    with _lock:
+        metrics = dict(_metrics)
+        metrics['pools'] = len(_pools)
+        metrics['in_use'] = sum(len(p._used) for p in _pools.values())
+        metrics['idle'] = sum(len(p._pool) for p in _pools.values())
+    metrics['reused'] = max(0, metrics['checkouts'] - metrics['connects'])
+    metrics['connect_ms_avg'] = (
+        round(metrics['connect_ms_total'] / metrics['connects'], 1) if metrics['connects'] else None
+    )
+    metrics['connect_ms_total'] = round(metrics['connect_ms_total'], 1)
+    return metrics
+
+
+def close_all_pools():
+    """Fecha todas as conexões de todos os pools (fim do script)."""
+    with _lock:
+        for pool in _pools.values():
+            pool.closeall()
+        _pools.clear()
+        _slots.clear()
@@ -0,0 +1,100 @@
+"""
+Cadência de consulta à API-Football conforme a agenda dos jogos
+
+update_results.run_scheduled consulta plan_poll() antes de cada ciclo para
+decidir se roda o modo live, o modo post, ambos ou nenhum, e quanto tempo
+dormir até o próximo ciclo:
+
+- janela ao vivo (de LIVE_LEAD antes do início até o fim provável do jogo,
+  com prorrogação no mata-mata): consulta a cada LIVE_INTERVAL;
+- intervalo do jogo (status HT da última resposta ou, sem ela, pelo relógio):
+  desacelera para HALF_TIME_INTERVAL, sem dormir além do fim de
+  HALF_TIME_WINDOW — passado esse limite, um HT da última resposta é tratado
+  como desatualizado e volta LIVE_INTERVAL;
+- depois da janela, enquanto o jogo não tem resultado: só o modo post, a
+  cada POST_INTERVAL, por até POST_GRACE;
+- entre jogos: nenhuma consulta (nem à API, nem ao Neon) até a próxima janela.
+"""
+
+from collections import namedtuple
+from datetime import timedelta
+
+LIVE_LEAD = timedelta(minutes=5)
+MATCH_LENGTH = timedelta(minutes=125)        # 90 + intervalo + acréscimos
+EXTRA_TIME_LENGTH = timedelta(minutes=40)    # prorrogação e pênaltis (mata-mata)
+HALF_TIME_WINDOW = (timedelta(minutes=48), timedelta(minutes=62))
+FULL_TIME_AFTER = timedelta(minutes=105)     # a partir daqui o post pode achar o FT
+POST_GRACE = timedelta(hours=3)
+
+LIVE_INTERVAL = 60
+HALF_TIME_INTERVAL = 300
+POST_INTERVAL = 180
+MAX_IDLE_SLEEP = 3600
+
+HALF_TIME_STATUSES = {'HT', 'BT'}
+
+PollPlan = namedtuple('PollPlan', 'live post interval reason')
+
+
+def match_window(match):
+    """(início, fim) da janela ao vivo de um jogo (datetimes naive de Brasília)."""
+    kickoff = match['datetime']
+    end = kickoff + MATCH_LENGTH
+    if match.get('phase') and match['phase'] != 'Grupos':
+        end += EXTRA_TIME_LENGTH
+    return kickoff - LIVE_LEAD, end
+
+
+def plan_poll(now, pending_matches, live_statuses=None) -> PollPlan:
+    """
+    Decide o próximo ciclo.
+
+    Args:
+        now: agora (naive, horário de Brasília, como matches.datetime)
+        pending_matches: jogos sem resultado (update_results.get_pending_matches)
+        live_statuses: status curtos das fixtures ao vivo na última consulta
+            (None se ainda não houve consulta)
+    """
+    live = post = False
+    intervals = []
+    reasons = []
+    next_start = None
+
+    for match in pending_matches:
+        if not match.get('datetime'):
+            continue
+        start, end = match_window(match)
+        kickoff = match['datetime']
+
+        if start <= now <= end:
+            live = True
+            half_time_end = kickoff + HALF_TIME_WINDOW[1]
+            if live_statuses is not None:
+                half_time = (bool(live_statuses) and set(live_statuses) <= HALF_TIME_STATUSES
+                             and now < half_time_end)
+            else:
+                half_time = kickoff + HALF_TIME_WINDOW[0] <= now < half_time_end
+            if half_time:
+                # O 2º tempo pode começar a qualquer momento até o fim da janela
+                remaining = int((half_time_end - now).total_seconds())
+                intervals.append(max(1, min(HALF_TIME_INTERVAL, remaining)))
+            else:
+                intervals.append(LIVE_INTERVAL)
+            reasons.append(f"jogo #{match['match_number']} {'no intervalo' if half_time else 'ao vivo'}")
+            if now >= kickoff + FULL_TIME_AFTER:
+                post = True
+        elif end < now <= end + POST_GRACE:
+            post = True
+            intervals.append(POST_INTERVAL)
+            reasons.append(f"jogo #{match['match_number']} aguardando resultado")
+        elif now < start and (next_start is None or start < next_start):
+            next_start = start
+
+    if intervals:
+        return PollPlan(live, post, min(intervals), ', '.join(reasons))
+
+    if next_start is None:
+        return PollPlan(False, False, MAX_IDLE_SLEEP, 'nenhum jogo pendente à frente')
+    wait = int((next_start - now).total_seconds())
+    return PollPlan(False, False, max(1, min(wait, MAX_IDLE_SLEEP)),
+                    f"próxima janela às {next_start.strftime('%d/%m %H:%M')}")
@@ -0,0 +1,84 @@
+"""
+Gravação de palpites de placar do Bolão Copa do Mundo 2026
+
+Um palpite ou uma rodada inteira vão para o banco num único
+INSERT ... SELECT ... ON CONFLICT (user_id, match_id) — a constraint
+uq_predictions_user_match torna o upsert atômico mesmo com dois saves quase
+simultâneos do mesmo campo.
+
+As regras de prazo de app.can_predict_match são aplicadas no próprio
+comando: só entram jogos ainda 'scheduled' que não começaram (horário de
+Brasília) e palpites já travados (locked_at) não são alterados. Um formulário
+aberto desde antes do início do jogo não consegue regravar um palpite antigo.
+"""
+
+from datetime import datetime
+
+import pytz
+from sqlalchemy import text
+
+from models import Prediction
+
+MAX_GOLS_PALPITE = 20  # mesmo limite dos campos de gols da tela
+
+
+def _now_brazil_naive():
+    brazil_tz = pytz.timezone('America/Sao_Paulo')
+    return datetime.now(brazil_tz).replace(tzinfo=None)
+
+
+def get_user_predictions(session, user_id) -> dict:
+    """Todos os palpites de placar do participante numa consulta: {match_id: Prediction}."""
+    return {p.match_id: p for p in session.query(Prediction).filter_by(user_id=user_id).all()}
+
+
+def save_predictions_bulk(session, user_id, predictions: dict, manually_confirmed=False) -> set:
+    """
+    Cria ou atualiza vários palpites do participante num único comando.
+
+    Args:
+        predictions: {match_id: (gols_time1, gols_time2)}
+        manually_confirmed: True quando o participante confirmou (botão
+            Salvar); uma vez confirmado, o palpite nunca volta a False
+
+    Returns:
+        match_ids efetivamente gravados — os que ficaram de fora já
+        começaram, não estão mais 'scheduled' ou têm palpite travado
+    """
+    if not predictions:
+        return set()
+
+    rows, params = [], {}
+    for i, (match_id, (gols1, gols2)) in enumerate(predictions.items()):
+        for gols in (gols1, gols2):
+            if not isinstance(gols, int) or not 0 <= gols <= MAX_GOLS_PALPITE:
+                raise ValueError(f"Placar inválido para o jogo {match_id}: {gols1} x {gols2}")
+        rows.append(f"(:m{i}, :a{i}, :b{i})")
+        params.update({f"m{i}": match_id, f"a{i}": gols1, f"b{i}": gols2})
+
+    now = datetime.utcnow()
+    params.update({
+        "user_id": user_id, "confirmed": manually_confirmed,
+        "now": now, "now_brt": _now_brazil_naive(),
+    })
+
+    # VALUES sem nomes de coluna: Postgres e SQLite chamam de column1..column3
+    saved = session.execute(
+        text(f"""
+            INSERT INTO predictions (user_id, match_id, pred_team1_score, pred_team2_score,
+                                     manually_confirmed, created_at, updated_at)
+            SELECT :user_id, m.id, v.column2, v.column3, :confirmed, :now, :now
+            FROM (VALUES {', '.join(rows)}) AS v
+            JOIN matches m ON m.id = v.column1
+            WHERE m.status = 'scheduled' AND m.datetime > :now_brt
+            ON CONFLICT (user_id, match_id) DO UPDATE
+            SET pred_team1_score = EXCLUDED.pred_team1_score,
+                pred_team2_score = EXCLUDED.pred_team2_score,
+                manually_confirmed = CASE WHEN :confirmed THEN TRUE ELSE predictions.manually_confirmed END,
+                updated_at = EXCLUDED.updated_at
+            WHERE predictions.locked_at IS NULL
+            RETURNING match_id
+        """),
+        params
+    ).fetchall()
+    return {row[0] for row in saved}
@@ -0,0 +1,449 @@
+"""
+Quem ainda pode ser premiado? — garantidos e eliminados da premiação
+
+Para cada participante calcula a melhor e a pior posição final ainda
+possíveis e grava na tabela `prize_status` o selo:
+  - garantido : termina entre os PRIZE_POSITIONS primeiros em qualquer cenário
+  - eliminado : não chega aos PRIZE_POSITIONS primeiros em nenhum cenário
+  - vivo      : depende do que falta
+
+O que falta é dividido em duas partes:
+  - livre: jogos que ainda aceitam palpite — cada participante pode fazer de
+    `nenhum` a `placar_exato`, independentemente dos outros (e o pódio, quando
+    ainda há seleções demais para enumerar: de 0 ao máximo possível)
+  - acoplado: jogos já iniciados (palpites travados; placar só pode subir),
+    grupos sem classificação registrada e o pódio com poucas seleções vivas —
+    o mesmo resultado vale para todos; cada resultado distinto vira uma
+    "classe" (linhas únicas da matriz de pontos por participante)
+
+A busca escolhe uma classe por evento acoplado (branch and bound): o limite
+de cada nó soma, para cada rival, o mínimo que ainda pode tirar de diferença
+nos eventos restantes; ramos que não melhoram o melhor cenário achado são
+podados. Se a busca passar de NODE_BUDGET nós, guarda os limites (a posição
+fica otimista na melhor e pessimista na pior), então "garantido" e
+"eliminado" nunca são marcados sem prova.
+
+Simplificações (todas a favor de "vivo"): grupos e pódio não são amarrados
+aos placares dos jogos, qualquer par do grupo pode se classificar, e
+empates em pontos contam a favor de quem se está avaliando na melhor posição
+e contra na pior.
+
+Roda no cron (update_results.run_post) e manualmente:
+    python prize_status.py
+"""
+
+import itertools
+import os
+from datetime import datetime
+
+import numpy as np
+import pytz
+
+import scoring_rules as rules
+
+PRIZE_POSITIONS = 3  # 1º, 2º e 3º (Admin → Premiação)
+NODE_BUDGET = 5_000  # nós por busca (por participante e por sentido)
+PODIUM_ENUM_LIMIT = 5_000  # combinações de pódio enumeradas como evento acoplado
+
+CLINCHED = 'garantido'
+ELIMINATED = 'eliminado'
+ALIVE = 'vivo'
+
+STATUS_LABELS = {
+    CLINCHED: "✅ Garantido na premiação",
+    ELIMINATED: "❌ Fora da premiação",
+    ALIVE: "🟡 Na briga",
+}
+
+
+def _now_brazil_naive():
+    brazil_tz = pytz.timezone('America/Sao_Paulo')
+    return datetime.now(brazil_tz).replace(tzinfo=None)
+
+
+# =============================================================================
+# BUSCA (BRANCH AND BOUND)
+# =============================================================================
+
+class _BudgetExceeded(Exception):
+    pass
+
+
+def _min_count_positive(base, events, budget=NODE_BUDGET):
+    """
+    Menor número possível de posições positivas em base + Σ events[i][classe_i],
+    escolhendo uma classe (linha) por evento.
+
+    Args:
+        base: array (rivais,)
+        events: arrays (classes, rivais)
+
+    Returns:
+        (valor, exato) — sem exato, valor é um limite inferior
+    """
+    base = base.astype(np.int64)
+    varying = []
+    for matrix in events:
+        if (matrix == matrix[0]).all():
+            base = base + matrix[0]
+        else:
+            varying.append(matrix)
+    # Eventos com mais variação primeiro: podam mais cedo
+    varying.sort(key=lambda m: -int((m.max(axis=0) - m.min(axis=0)).sum()))
+
+    # suffix[i]: o mínimo que cada rival ainda soma nos eventos i..fim
+    suffix = np.zeros((len(varying) + 1, len(base)), dtype=np.int64)
+    for i in range(len(varying) - 1, -1, -1):
+        suffix[i] = suffix[i + 1] + varying[i].min(axis=0)
+
+    root_bound = int(((base + suffix[0]) > 0).sum())
+    best = [len(base) + 1]
+    nodes = [0]
+
+    def dfs(i, partial):
+        if i == len(varying):
+            best[0] = int((partial > 0).sum())
+            return
+        nodes[0] += 1
+        if nodes[0] > budget:
+            raise _BudgetExceeded
+        candidates = partial + varying[i]
+        bounds = ((candidates + suffix[i + 1]) > 0).sum(axis=1)
+        for k in np.argsort(bounds, kind='stable'):
+            if bounds[k] >= best[0] or best[0] == root_bound:
+                return
+            dfs(i + 1, candidates[k])
+
+    try:
+        dfs(0, base)
+    except _BudgetExceeded:
+        return root_bound, False
+    return best[0], True
+
+
+def compute_prize_status(current, free_max, free_min, events, prize_positions=PRIZE_POSITIONS,
+                         budget=NODE_BUDGET, final_positions=None) -> list:
+    """
+    Melhor/pior posição e selo de cada participante.
+
+    Args:
+        current: pontos já garantidos (array por participante)
+        free_max, free_min: faixa de pontos da parte livre
+        events: matrizes (classes, participantes) dos eventos acoplados
+        final_positions: posições do ranking oficial, usadas quando não falta
+            nada (aí o desempate de scoring.get_ranking decide)
+
+    Returns:
+        [{melhor_posicao, pior_posicao, pontos_maximos, exato, status}] na
+        ordem dos participantes
+    """
+    n = len(current)
+    current = np.asarray(current, dtype=np.int64)
+    free_max = np.asarray(free_max, dtype=np.int64)
+    free_min = np.asarray(free_min, dtype=np.int64)
+    events = [np.unique(np.asarray(e, dtype=np.int64), axis=0) for e in events]
+    finished = not events and not free_max.any() and not free_min.any()
+    event_max = sum((e.max(axis=0) for e in events), np.zeros(n, dtype=np.int64))
+
+    results = []
+    for u in range(n):
+        if finished and final_positions is not None:
+            best = worst = final_positions[u]
+            exact = True
+        else:
+            rivals = np.arange(n) != u
+            # Melhor caso: u tira o máximo na parte livre, os rivais o mínimo;
+            # rival à frente = mais pontos (empate a favor de u)
+            ahead, exact_best = _min_count_positive(
+                current[rivals] + free_min[rivals] - current[u] - free_max[u],
+                [e[:, rivals] - e[:, [u]] for e in events], budget
+            )
+            # Pior caso: o contrário; rival atrás = menos pontos (empate contra u)
+            behind, exact_worst = _min_count_positive(
+                current[u] + free_min[u] - current[rivals] - free_max[rivals],
+                [e[:, [u]] - e[:, rivals] for e in events], budget
+            )
+            best, worst = 1 + ahead, n - behind
+            exact = exact_best and exact_worst
+
+        if worst <= prize_positions:
+            status = CLINCHED
+        elif best > prize_positions:
+            status = ELIMINATED
+        else:
+            status = ALIVE
+        results.append({
+            'melhor_posicao': int(best),
+            'pior_posicao': int(worst),
+            'pontos_maximos': int(current[u] + free_max[u] + event_max[u]),
+            'exato': exact,
+            'status': status,
+        })
+    return results
+
+
+# =============================================================================
+# ESTADO ATUAL DO BOLÃO
+# =============================================================================
+
+def _podium_matrix(triples, predictions, config):
+    """Pontos de pódio (combinações, participantes) — regra de scoring.calculate_podium_points."""
+    champion, runner_up, third = (np.asarray(col, dtype=np.int64)[:, None] for col in zip(*triples))
+    pred_champion, pred_runner_up, pred_third = (np.asarray(col, dtype=np.int64) for col in predictions)
+
+    def position_points(pred, real, key):
+        on_podium = (pred == champion) | (pred == runner_up) | (pred == third)
+        return np.where(pred == real, config[key], np.where(on_podium, config['podio_fora_ordem'], 0))
+
+    points = (position_points(pred_champion, champion, 'podio_campeao')
+              + position_points(pred_runner_up, runner_up, 'podio_vice')
+              + position_points(pred_third, third, 'podio_terceiro'))
+    complete = (pred_champion == champion) & (pred_runner_up == runner_up) & (pred_third == third)
+    return np.where(complete, config['podio_completo'], points)
+
+
+def _podium_bound(predictions, candidates, config):
+    """Máximo de pontos de pódio de cada participante sem enumerar as combinações."""
+    champions, runners_up, thirds = candidates
+    anywhere = champions | runners_up | thirds
+    bound = np.zeros(len(predictions[0]), dtype=np.int64)
+    all_exact = np.ones(len(predictions[0]), dtype=bool)
+    for preds, allowed, key in zip(predictions, candidates, ('podio_campeao', 'podio_vice', 'podio_terceiro')):
+        exact = np.array([p in allowed for p in preds])
+        on_podium = np.array([p in anywhere for p in preds])
+        bound += np.where(exact, config[key], np.where(on_podium, config['podio_fora_ordem'], 0))
+        all_exact &= exact
+    return np.maximum(bound, np.where(all_exact, config['podio_completo'], 0))
+
+
+def load_state(session) -> dict:
+    """
+    Lê o banco e separa o que já está garantido, a parte livre e os eventos
+    acoplados (ver docstring do módulo).
+    """
+    from sqlalchemy import text
+    from models import Match
+    from scoring import get_scoring_config, calculate_podium_points
+
+    config = get_scoring_config(session)
+    now = _now_brazil_naive()
+
+    users = session.execute(text(
+        "SELECT id, name FROM users WHERE active = true AND role != 'admin' ORDER BY id"
+    )).fetchall()
+    user_index = {row.id: u for u, row in enumerate(users)}
+    n = len(users)
+
+    current = np.zeros(n, dtype=np.int64)
+    free_max = np.zeros(n, dtype=np.int64)
+    free_min = np.zeros(n, dtype=np.int64)
+    events = []
+
+    match_values = [config[t] for t in rules.POINTS_TYPES]
+    max_match, min_match = max(match_values), min(match_values)
+
+    preds_by_match = {}
+    for row in session.execute(text(
+        "SELECT user_id, match_id, pred_team1_score, pred_team2_score FROM predictions"
+    )).fetchall():
+        if row.user_id in user_index:
+            preds_by_match.setdefault(row.match_id, {})[user_index[row.user_id]] = (
+                row.pred_team1_score, row.pred_team2_score
+            )
+
+    matches = session.query(Match).all()
+
+    losers_by_phase = {}
+    for m in matches:
+        if m.status == 'cancelled':
+            continue
+        preds = preds_by_match.get(m.id, {})
+        if m.status == 'finished' and m.team1_score is not None and m.team2_score is not None:
+            if preds:
+                points, _ = rules.calculate_match_points_batch(
+                    [p[0] for p in preds.values()], [p[1] for p in preds.values()],
+                    m.team1_score, m.team2_score, config
+                )
+                current[list(preds)] += points
+            if m.phase != 'Grupos' and m.team1_id and m.team2_id:
+                if m.team1_score != m.team2_score:
+                    loser = m.team2_id if m.team1_score > m.team2_score else m.team1_id
+                elif m.penalty_winner_id:
+                    loser = m.team2_id if m.penalty_winner_id == m.team1_id else m.team1_id
+                else:
+                    loser = None
+                if loser:
+                    losers_by_phase.setdefault(m.phase, set()).add(loser)
+        elif m.status == 'scheduled' and m.datetime > now:
+            # Ainda aceita palpite: cada um pode fazer de nenhum a placar exato
+            free_max += max_match
+            free_min += min_match
+        else:
+            # Já começou: palpites travados (quem não palpitou ficou com 0 x 0)
+            # e o placar atual só pode subir
+            s1, s2 = m.team1_score or 0, m.team2_score or 0
+            full = [preds.get(u, (0, 0)) for u in range(n)]
+            top = max([s1, s2] + [max(p) for p in full]) + 1
+            outcomes = [(r1, r2) for r1 in range(s1, top + 1) for r2 in range(s2, top + 1)]
+            points, _ = rules.calculate_match_points_batch(
+                [p[0] for _ in outcomes for p in full], [p[1] for _ in outcomes for p in full],
+                [r1 for r1, _ in outcomes for _ in full], [r2 for _, r2 in outcomes for _ in full],
+                config
+            )
+            events.append(np.asarray(points, dtype=np.int64).reshape(len(outcomes), n))
+
+    # Classificação dos grupos
+    group_teams = {}
+    for m in matches:
+        if m.phase == 'Grupos' and m.group:
+            group_teams.setdefault(m.group, set()).update(t for t in (m.team1_id, m.team2_id) if t)
+    group_results = {
+        row.group_name: (row.first_place_team_id, row.second_place_team_id)
+        for row in session.execute(text(
+            "SELECT group_name, first_place_team_id, second_place_team_id FROM group_results"
+        )).fetchall()
+        if row.first_place_team_id and row.second_place_team_id
+    }
+    group_preds = {}
+    for row in session.execute(text(
+        "SELECT user_id, group_name, first_place_team_id, second_place_team_id FROM group_predictions"
+    )).fetchall():
+        if row.user_id in user_index:
+            group_preds.setdefault(row.group_name, {})[user_index[row.user_id]] = (
+                row.first_place_team_id, row.second_place_team_id
+            )
+
+    for group_name, teams in sorted(group_teams.items()):
+        preds = group_preds.get(group_name, {})
+        if group_name in group_results:
+            real_first, real_second = group_results[group_name]
+            for u, (first, second) in preds.items():
+                current[u] += rules.calculate_group_points(first, second, real_first, real_second, config)[0]
+            continue
+        pairs = list(itertools.permutations(sorted(teams), 2))
+        events.append(np.array([
+            [rules.calculate_group_points(*preds.get(u, (None, None)), first, second, config)[0]
+             for u in range(n)]
+            for first, second in pairs
+        ], dtype=np.int64))
+
+    # Pódio
+    podium_preds = {
+        user_index[row.user_id]: (row.champion_team_id, row.runner_up_team_id, row.third_place_team_id)
+        for row in session.execute(text(
+            "SELECT user_id, champion_team_id, runner_up_team_id, third_place_team_id FROM podium_predictions"
+        )).fetchall()
+        if row.user_id in user_index
+    }
+    real_podium = {
+        row.result_type: row.team_id
+        for row in session.execute(text("SELECT result_type, team_id FROM tournament_results")).fetchall()
+    }
+    if real_podium.get('champion'):
+        for u, (champion, runner_up, third) in podium_preds.items():
+            current[u] += calculate_podium_points(
+                champion, runner_up, third, real_podium.get('champion'),
+                real_podium.get('runner_up'), real_podium.get('third_place'), config
+            )[0]
+    else:
+        # Seleções que ainda podem ocupar cada posição
+        round_of_32 = [m for m in matches if m.phase == 'R32']
+        if round_of_32 and all(m.team1_id and m.team2_id for m in round_of_32):
+            universe = {t for m in round_of_32 for t in (m.team1_id, m.team2_id)}
+        else:
+            universe = {t for teams in group_teams.values() for t in teams}
+        lost = set().union(*losers_by_phase.values()) if losers_by_phase else set()
+        champions = universe - lost
+        runners_up = universe - (lost - losers_by_phase.get('FINAL', set()))
+        thirds = universe - (lost - losers_by_phase.get('SF', set()))
+
+        predictions = tuple(
+            [podium_preds.get(u, (None, None, None))[k] or -1 for u in range(n)] for k in range(3)
+        )
+        if len(champions) * len(runners_up) * len(thirds) <= PODIUM_ENUM_LIMIT:
+            triples = [(c, r, t) for c in champions for r in runners_up if r != c
+                       for t in thirds if t not in (c, r)]
+            if triples:
+                events.append(_podium_matrix(triples, predictions, config))
+        else:
+            free_max += _podium_bound(predictions, (champions, runners_up, thirds), config)
+
+    return {
+        'user_ids': [row.id for row in users],
+        'current': current,
+        'free_max': free_max,
+        'free_min': free_min,
+        'events': events,
+    }
+
+
+# =============================================================================
+# GRAVAÇÃO E LEITURA
+# =============================================================================
+
+def refresh_prize_status(session) -> list:
+    """Recalcula e regrava a tabela prize_status. Retorna as linhas gravadas."""
+    from data_version import bump_data_version, PRIZE_STATUS
+    from models import PrizeStatus
+    from scoring import get_ranking
+
+    state = load_state(session)
+    final_positions = None
+    if not state['events'] and not state['free_max'].any() and not state['free_min'].any():
+        positions = {r['user_id']: r['posicao'] for r in get_ranking(session)}
+        final_positions = [positions.get(user_id, len(positions)) for user_id in state['user_ids']]
+
+    results = compute_prize_status(
+        state['current'], state['free_max'], state['free_min'], state['events'],
+        final_positions=final_positions
+    )
+
+    session.query(PrizeStatus).delete()
+    rows = [
+        PrizeStatus(user_id=user_id, pontos_atuais=int(points), **result)
+        for user_id, points, result in zip(state['user_ids'], state['current'], results)
+    ]
+    session.add_all(rows)
+    bump_data_version(session, PRIZE_STATUS)
+    session.commit()
+    return [{'user_id': user_id, **result} for user_id, result in zip(state['user_ids'], results)]
+
+
+def get_prize_status(session) -> dict:
+    """{user_id: {melhor_posicao, pior_posicao, pontos_maximos, exato, status}}"""
+    from models import PrizeStatus
+
+    return {
+        row.user_id: {
+            'melhor_posicao': row.melhor_posicao,
+            'pior_posicao': row.pior_posicao,
+            'pontos_maximos': row.pontos_maximos,
+            'exato': row.exato,
+            'status': row.status,
+        }
+        for row in session.query(PrizeStatus).all()
+    }
+
+
+def refresh_prize_status_for_url(database_url) -> list:
+    """Ponto de entrada do cron (update_results.run_post)."""
+    from db import get_engine, session_scope
+    from models import PrizeStatus
+
+    engine = get_engine(database_url)
+    # O cron pode rodar antes de o app ter criado a tabela
+    PrizeStatus.__table__.create(engine, checkfirst=True)
+    with session_scope(engine) as session:
+        return refresh_prize_status(session)
+
+
+def main():
+    database_url = os.environ.get('NEON_CONNECTION_STRING', '').strip() or None
+    rows = refresh_prize_status_for_url(database_url)
+    counts = {status: sum(1 for r in rows if r['status'] == status) for status in STATUS_LABELS}
+    print(f"Situação da premiação: {counts[CLINCHED]} garantido(s), "
+          f"{counts[ELIMINATED]} eliminado(s), {counts[ALIVE]} na briga")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+"""
+Cache do ranking compartilhado pelo processo do Bolão Copa do Mundo 2026
+
+Um único ranking calculado serve todas as sessões do Streamlit. A chave é:
+  (jogos com placar, versão das configurações, versão dos grupos,
+   versão do pódio, versão dos jogos, participantes ativos/pagos)
+
+Enquanto a chave não muda, get_cached_ranking devolve o ranking guardado
+sem recalcular; quando um placar, grupo, pódio ou pontuação muda, a próxima
+leitura já vem atualizada — sem esperar TTL. As escritas do app chamam
+mark_ranking_changed (incrementa a versão em data_versions e descarta o
+cache local); o cron incrementa as mesmas versões (data_version.py).
+
+RANKING_CACHE_MAX_AGE é só uma rede de segurança para mudanças que não
+passam por nenhuma versão (ex: nome de participante editado).
+"""
+
+import os
+import threading
+import time
+from datetime import datetime
+
+import pytz
+from sqlalchemy import func, case
+
+from models import User, Match
+from db import get_config_value, session_scope, CONFIG_VERSION_KEY
+from data_version import (
+    get_data_versions, bump_data_version, invalidate_data_versions,
+    MATCHES, GROUP_RESULTS, PODIUM
+)
+
+RANKING_CACHE_MAX_AGE = float(os.environ.get('RANKING_CACHE_MAX_AGE', '300'))
+
+_cache = {}  # url do banco -> (chave, calculado_em, ranking)
+_lock = threading.Lock()
+_stats = {'hits': 0, 'misses': 0, 'invalidations': 0, 'last_compute_ms': None}
+
+
+def _now_brazil_naive():
+    brazil_tz = pytz.timezone('America/Sao_Paulo')
+    return datetime.now(brazil_tz).replace(tzinfo=None)
+
+
+def _ranking_key(session, engine):
+    scored = session.query(Match.id, Match.team1_score, Match.team2_score).filter(
+        Match.datetime <= _now_brazil_naive(),
+        Match.team1_score.isnot(None),
+        Match.team2_score.isnot(None)
+    ).order_by(Match.id).all()
+    users = session.query(
+        func.count(User.id),
+        func.coalesce(func.sum(case((User.paid == True, 1), else_=0)), 0)
+    ).filter(User.active == True, User.role != 'admin').one()
+    versions = get_data_versions(engine)
+    return (
+        tuple(map(tuple, scored)),
+        get_config_value(session, CONFIG_VERSION_KEY, '0'),
+        versions.get(GROUP_RESULTS, 0),
+        versions.get(PODIUM, 0),
+        versions.get(MATCHES, 0),
+        tuple(users),
+    )
+
+
+def get_cached_ranking(engine) -> list:
+    """
+    Ranking completo (formato de scoring.get_ranking), do cache compartilhado
+    quando nada que o afeta mudou. Devolve cópias das linhas, para que uma
+    tela não altere o ranking visto pelas outras.
+    """
+    from ranking_state import get_incremental_ranking
+
+    url = str(engine.url)
+    with session_scope(engine) as session:
+        key = _ranking_key(session, engine)
+        now = time.monotonic()
+        with _lock:
+            cached = _cache.get(url)
+            if cached and cached[0] == key and now - cached[1] < RANKING_CACHE_MAX_AGE:
+                _stats['hits'] += 1
+                return [dict(r) for r in cached[2]]
+            _stats['misses'] += 1
+
+        start = time.perf_counter()
+        ranking = get_incremental_ranking(session)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+    with _lock:
+        _cache[url] = (key, now, ranking)
+        _stats['last_compute_ms'] = round(elapsed_ms, 1)
+    return [dict(r) for r in ranking]
+
+
+def invalidate_ranking_cache():
+    """Descarta o ranking guardado (todas as bases) neste processo."""
+    with _lock:
+        _cache.clear()
+        _stats['invalidations'] += 1
+    invalidate_data_versions()
+
+
+def mark_ranking_changed(session, key):
+    """
+    Para os caminhos de escrita do app: incrementa a versão `key`
+    (data_version.py) na transação da sessão e descarta o cache local.
+    """
+    bump_data_version(session, key)
+    invalidate_ranking_cache()
+
+
+def get_ranking_cache_stats() -> dict:
+    """Contadores do cache: acertos, recálculos, invalidações e último tempo."""
+    with _lock:
+        stats = dict(_stats)
+    total = stats['hits'] + stats['misses']
+    stats['hit_rate'] = round(stats['hits'] / total, 3) if total else None
+    return stats
@@ -0,0 +1,307 @@
+"""
+Fotos diárias do ranking do Bolão Copa do Mundo 2026
+
+Materializa na tabela `ranking_snapshots` a posição e os contadores de
+desempate de cada participante ao fim de cada dia com jogos. O gráfico de
+evolução (novas_funcionalidades.render_ranking_evolution_chart) e o resumo
+diário (daily_summary.calculate_ranking_changes) passam a ler essas fotos em
+uma única consulta, em vez de chamar get_ranking(cutoff_datetime=...) uma vez
+por dia de jogo.
+
+Cada foto guarda, na config 'ranking_snapshots_digests', um hash de tudo o
+que a determina: placares dos jogos até aquele dia, participantes ativos,
+versão da pontuação e resultados de grupos/pódio. Placar corrigido pelo
+admin, participante ativado/desativado ou pontuação alterada mudam o hash
+de todos os dias afetados, e essas fotos são regravadas.
+
+Escrita (sempre sob _lock_snapshots: lock do processo + advisory lock no
+Postgres, numa única transação):
+  - update_results.run_post regrava os dias sem foto ou desatualizados
+  - python ranking_snapshots.py --rebuild   reconstrói todas as fotos (backfill)
+
+Leitura não grava: dias sem foto ou desatualizados são calculados na hora
+com get_ranking até o próximo run_post.
+"""
+
+import hashlib
+import json
+import os
+import sys
+import threading
+from datetime import datetime
+
+import pytz
+from sqlalchemy import text
+
+from models import Match, User, Config, DataVersion, RankingSnapshot
+from scoring import get_ranking
+
+# Config com o hash de cada foto gravada ({"AAAA-MM-DD": hash})
+DIGESTS_KEY = 'ranking_snapshots_digests'
+# Chave do pg_advisory_xact_lock que serializa a gravação das fotos
+SNAPSHOT_LOCK_KEY = 2026_0002
+_write_lock = threading.Lock()
+
+
+def _now_brazil_naive():
+    brazil_tz = pytz.timezone('America/Sao_Paulo')
+    return datetime.now(brazil_tz).replace(tzinfo=None)
+
+
+def snapshot_cutoff(day):
+    """Cutoff de uma foto: fim do dia (23:59:59, horário de Brasília)."""
+    return datetime(day.year, day.month, day.day, 23, 59, 59)
+
+
+def get_match_days(session) -> list:
+    """Dias (date) que têm pelo menos um jogo já iniciado com placar registrado."""
+    rows = session.query(Match.datetime).filter(
+        Match.datetime <= _now_brazil_naive(),
+        Match.team1_score.isnot(None),
+        Match.team2_score.isnot(None)
+    ).all()
+    return sorted({dt.date() for (dt,) in rows})
+
+
+def snapshot_digests(session) -> dict:
+    """
+    Hash atual de cada dia de jogo: {date: hash}. O hash de um dia cobre os
+    placares de todos os jogos até ele, mais o que vale para todos os dias
+    (participantes ativos, pontuação, resultados de grupos e pódio).
+    """
+    from data_version import GROUP_RESULTS, PODIUM
+    from db import get_config_value, CONFIG_VERSION_KEY
+
+    scored = session.query(Match.id, Match.datetime, Match.team1_score, Match.team2_score).filter(
+        Match.datetime <= _now_brazil_naive(),
+        Match.team1_score.isnot(None),
+        Match.team2_score.isnot(None)
+    ).order_by(Match.datetime, Match.id).all()
+    user_ids = [u for (u,) in session.query(User.id).filter(
+        User.active == True, User.role != 'admin'
+    ).order_by(User.id).all()]
+    # Direto da tabela, sem o cache de get_data_versions: logo após o admin
+    # salvar grupos/pódio a versão nova já precisa valer
+    versions = dict(session.query(DataVersion.key, DataVersion.version).all())
+
+    running = hashlib.sha256(json.dumps([
+        user_ids, get_config_value(session, CONFIG_VERSION_KEY, '0'),
+        versions.get(GROUP_RESULTS, 0), versions.get(PODIUM, 0),
+    ]).encode())
+    digests = {}
+    for match_id, dt, s1, s2 in scored:
+        running.update(f"|{match_id}:{s1}:{s2}".encode())
+        digests[dt.date()] = running.hexdigest()
+    return digests
+
+
+def _stored_digests(session) -> dict:
+    row = session.query(Config).filter_by(key=DIGESTS_KEY).populate_existing().first()
+    if not row or not row.value:
+        return {}
+    try:
+        return json.loads(row.value)
+    except ValueError:
+        return {}
+
+
+def _save_digests(session, digests):
+    row = session.query(Config).filter_by(key=DIGESTS_KEY).populate_existing().first()
+    if row is None:
+        row = Config(key=DIGESTS_KEY, description='Hash das fotos diárias do ranking', category='sistema')
+        session.add(row)
+    row.value = json.dumps(digests, sort_keys=True)
+
+
+def _stale_days(session, digests, days=None) -> list:
+    """Dias (de `days`, ou todos os de jogo) sem foto ou com hash diferente do atual."""
+    days = sorted(digests) if days is None else sorted(set(days))
+    existing = _snapshot_days(session)
+    stored = _stored_digests(session)
+    return [d for d in days
+            if d not in existing or (d in digests and stored.get(d.isoformat()) != digests[d])]
+
+
+def _snapshot_days(session) -> set:
+    return {d for (d,) in session.query(RankingSnapshot.snapshot_date).distinct().all()}
+
+
+def _orphan_days(session, digests) -> list:
+    """Dias com foto (ou hash guardado) que não são mais dias de jogo — ex:
+    o admin apagou o placar do único jogo do dia."""
+    stored = {datetime.strptime(d, '%Y-%m-%d').date() for d in _stored_digests(session)}
+    return sorted((_snapshot_days(session) | stored) - set(digests))
+
+
+def _lock_snapshots(session):
+    """Lock do processo (sessões são threads) + advisory lock da transação no Postgres."""
+    _write_lock.acquire()
+    try:
+        if session.get_bind().dialect.name == 'postgresql':
+            session.execute(text("SELECT pg_advisory_xact_lock(:key)"), {'key': SNAPSHOT_LOCK_KEY})
+    except Exception:
+        _write_lock.release()
+        raise
+
+
+def write_snapshot(session, day) -> int:
+    """
+    (Re)grava a foto do ranking ao fim de `day`, sem commit — chamar com
+    _lock_snapshots na mão (ver sync_snapshots).
+    Retorna o número de participantes gravados.
+    """
+    ranking = get_ranking(session, cutoff_datetime=snapshot_cutoff(day))
+
+    session.query(RankingSnapshot).filter(RankingSnapshot.snapshot_date == day).delete()
+    session.add_all([
+        RankingSnapshot(
+            snapshot_date=day,
+            user_id=r['user_id'],
+            posicao=r['posicao'],
+            total_pontos=r['total_pontos'],
+            placares_exatos=r['placares_exatos'],
+            resultado_gols=r['resultado_gols'],
+            resultado=r['resultado'],
+            gols=r['gols'],
+            zeros=r['zeros'],
+            grupos_corretos=r['grupos_corretos'],
+            podio_corretos=r['podio_corretos'],
+        )
+        for r in ranking
+    ])
+    session.flush()
+    return len(ranking)
+
+
+def sync_snapshots(session, force=False) -> list:
+    """
+    Regrava, numa transação e sob lock, as fotos sem foto ou desatualizadas
+    e apaga as de dias que deixaram de ter jogo com placar; force=True
+    regrava todas. A lista é refeita já com o lock: outra execução pode ter
+    acabado de gravar as mesmas fotos. Retorna os dias gravados.
+    """
+    _lock_snapshots(session)
+    try:
+        digests = snapshot_digests(session)
+        if force:
+            session.query(RankingSnapshot).delete()
+            stale, stored = sorted(digests), {}
+        else:
+            orphans = _orphan_days(session, digests)
+            if orphans:
+                session.query(RankingSnapshot).filter(
+                    RankingSnapshot.snapshot_date.in_(orphans)
+                ).delete(synchronize_session=False)
+            stale = _stale_days(session, digests)
+            stored = {d: h for d, h in _stored_digests(session).items()
+                      if datetime.strptime(d, '%Y-%m-%d').date() not in orphans}
+        for day in stale:
+            write_snapshot(session, day)
+        stored.update({d.isoformat(): digests[d] for d in stale})
+        _save_digests(session, stored)
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        _write_lock.release()
+    return stale
+
+
+def refresh_snapshots(session) -> list:
+    """
+    Grava as fotos dos dias de jogo sem foto, regrava as desatualizadas
+    (placar corrigido, participantes, pontuação...) e apaga as de dias sem
+    jogo com placar. Retorna os dias gravados.
+    """
+    digests = snapshot_digests(session)
+    if not _stale_days(session, digests) and not _orphan_days(session, digests):
+        return []
+    return sync_snapshots(session)
+
+
+def rebuild_snapshots(session) -> list:
+    """Descarta todas as fotos e regrava uma por dia de jogo (backfill)."""
+    return sync_snapshots(session, force=True)
+
+
+def get_snapshot_positions(session, days=None) -> dict:
+    """
+    Posições de todas as fotos (ou só dos `days` informados) em uma consulta.
+
+    Returns:
+        {date: {user_id: posicao}}
+    """
+    query = session.query(
+        RankingSnapshot.snapshot_date, RankingSnapshot.user_id, RankingSnapshot.posicao
+    )
+    if days is not None:
+        query = query.filter(RankingSnapshot.snapshot_date.in_(list(days)))
+
+    positions = {}
+    for day, user_id, posicao in query.all():
+        positions.setdefault(day, {})[user_id] = posicao
+    return positions
+
+
+def get_positions_by_day(session, days) -> dict:
+    """
+    Igual a get_snapshot_positions, mas dias sem foto ou com foto
+    desatualizada (ex: antes do primeiro --rebuild, ou logo depois de uma
+    correção de placar pelo admin) são calculados na hora com get_ranking,
+    sem gravar nada — quem grava é o run_post/--rebuild.
+    """
+    days = list(days)
+    positions = get_snapshot_positions(session, days)
+    for day in _stale_days(session, snapshot_digests(session), days):
+        ranking = get_ranking(session, cutoff_datetime=snapshot_cutoff(day))
+        positions[day] = {r['user_id']: r['posicao'] for r in ranking}
+    return positions
+
+
+def get_positions_at(session, day):
+    """
+    Posições ao fim de `day`: foto do último dia de jogo até `day`.
+    Retorna None se ainda não havia nenhum jogo com placar até esse dia.
+    """
+    previous_days = [d for d in get_match_days(session) if d <= day]
+    if not previous_days:
+        return None
+    last_day = previous_days[-1]
+    return get_positions_by_day(session, [last_day]).get(last_day, {})
+
+
+def refresh_snapshots_for_url(database_url) -> list:
+    """
+    Ponto de entrada dos scripts de cron (update_results.run_post), que
+    recebem a conexão por NEON_CONNECTION_STRING.
+    """
+    from db import get_engine, session_scope
+
+    engine = get_engine(database_url)
+    # O cron pode rodar antes de o app ter criado as tabelas
+    DataVersion.__table__.create(engine, checkfirst=True)
+    RankingSnapshot.__table__.create(engine, checkfirst=True)
+    with session_scope(engine) as session:
+        return refresh_snapshots(session)
+
+
+def main():
+    from db import get_engine, session_scope
+
+    database_url = os.environ.get('NEON_CONNECTION_STRING', '').strip() or None
+    engine = get_engine(database_url)
+    DataVersion.__table__.create(engine, checkfirst=True)
+    RankingSnapshot.__table__.create(engine, checkfirst=True)
+
+    with session_scope(engine) as session:
+        if '--rebuild' in sys.argv:
+            days = rebuild_snapshots(session)
+            print(f"Fotos do ranking reconstruídas: {len(days)} dia(s) de jogo")
+        else:
+            days = refresh_snapshots(session)
+            print(f"Fotos do ranking atualizadas: {[d.isoformat() for d in days]}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,420 @@
+"""
+Ranking incremental do Bolão Copa do Mundo 2026
+
+Mantém um estado persistente do ranking (pontos de jogos e contadores de
+desempate por participante) que é atualizado por DELTA a cada jogo cujo
+placar mudou, em vez de recalcular todos os palpites a cada consulta como
+faz scoring.get_ranking.
+
+Tabelas (models.py):
+  - ranking_state          : totais/contadores por participante
+  - ranking_match_state    : placar (e pontuação) já aplicado de cada jogo
+  - ranking_contributions  : parcela de cada palpite no estado, para desfazer
+                             exatamente a contribuição antiga de um jogo
+
+Em cada leitura, sync_ranking_state compara o placar atual dos jogos com o
+placar já aplicado e re-pontua só os palpites dos jogos que mudaram — durante
+um jogo ao vivo, o custo é O(palpites de um jogo), não O(todos os palpites).
+A leitura roda em várias sessões ao mesmo tempo, então a aplicação é feita
+sob lock (threading + pg_advisory_xact_lock), com o plano refeito já com o
+lock na mão.
+Pontos de grupos e pódio são lidos por agregação direta (uma linha por
+participante), com as mesmas regras de get_ranking.
+"""
+
+import threading
+from collections import defaultdict
+from datetime import datetime
+
+import pytz
+from sqlalchemy import func, case, text
+
+from models import (
+    User, Match, Prediction, GroupPrediction, PodiumPrediction,
+    Config, TournamentResult, GroupResult,
+    RankingState, RankingMatchState, RankingContribution
+)
+from scoring import get_scoring_config, _max_pontos_possivel, _finalize_ranking
+from scoring_rules import calculate_match_points_batch, POINTS_TYPES
+
+# Chave em `config` com o maior predictions.id já visto pelo estado. Palpites
+# criados depois (ex: 0x0 automático do lock_missing_predictions, inserido
+# quando o jogo começa) forçam a reaplicação dos jogos afetados.
+WATERMARK_KEY = 'ranking_state_pred_watermark'
+
+# Chave do pg_advisory_xact_lock que serializa as atualizações do estado
+STATE_LOCK_KEY = 2026_0001
+_sync_lock = threading.Lock()
+
+# points_type -> coluna de contador no RankingState
+TYPE_COUNTERS = {
+    'placar_exato': 'placares_exatos',
+    'resultado_gols': 'resultado_gols',
+    'resultado': 'resultado',
+    'gols': 'gols',
+    'nenhum': 'zeros',
+}
+
+
+def _now_brazil_naive():
+    brazil_tz = pytz.timezone('America/Sao_Paulo')
+    return datetime.now(brazil_tz).replace(tzinfo=None)
+
+
+def _config_signature(config):
+    """Assinatura da pontuação por jogo — se mudar, os jogos são reaplicados."""
+    return ",".join(str(config[k]) for k in ('placar_exato', 'resultado_gols', 'resultado', 'gols', 'nenhum'))
+
+
+def _get_watermark(session):
+    row = session.query(Config).filter_by(key=WATERMARK_KEY).populate_existing().first()
+    return int(row.value) if row and row.value else 0
+
+
+def _set_watermark(session, value):
+    row = session.query(Config).filter_by(key=WATERMARK_KEY).populate_existing().first()
+    if row:
+        row.value = str(value)
+    else:
+        session.add(Config(
+            key=WATERMARK_KEY,
+            value=str(value),
+            description='Último palpite (id) considerado pelo ranking incremental',
+            category='sistema'
+        ))
+
+
+def _get_states(session, user_ids):
+    """Carrega (ou cria) as linhas de RankingState dos usuários informados."""
+    states = {}
+    if user_ids:
+        states = {
+            s.user_id: s for s in
+            session.query(RankingState).filter(RankingState.user_id.in_(user_ids))
+            .populate_existing().all()
+        }
+    for uid in user_ids:
+        if uid not in states:
+            state = RankingState(
+                user_id=uid, pontos_jogos=0, placares_exatos=0, resultado_gols=0,
+                resultado=0, gols=0, zeros=0
+            )
+            session.add(state)
+            states[uid] = state
+    return states
+
+
+def _add_contribution(state, points, points_type, sign):
+    state.pontos_jogos += sign * (points or 0)
+    column = TYPE_COUNTERS.get(points_type)
+    if column:
+        setattr(state, column, getattr(state, column) + sign)
+
+
+def _apply_match(session, match_id, team1_score, team2_score, config, signature):
+    """
+    Aplica (ou reaplica) um jogo ao estado: desfaz as contribuições antigas
+    dos palpites desse jogo e soma as novas. Só toca os palpites do jogo.
+    """
+    old = {
+        c.user_id: c for c in
+        session.query(RankingContribution).filter_by(match_id=match_id).populate_existing().all()
+    }
+    preds = session.query(
+        Prediction.user_id, Prediction.pred_team1_score, Prediction.pred_team2_score
+    ).filter(Prediction.match_id == match_id).all()
+
+    user_ids = set(old) | {p.user_id for p in preds}
+    states = _get_states(session, user_ids)
+
+    preds = [p for p in preds if p.pred_team1_score is not None and p.pred_team2_score is not None]
+    points_list, codes = calculate_match_points_batch(
+        [p.pred_team1_score for p in preds], [p.pred_team2_score for p in preds],
+        team1_score, team2_score, config
+    )
+
+    seen = set()
+    for pred, points, code in zip(preds, points_list, codes):
+        user_id, points_type = pred.user_id, POINTS_TYPES[code]
+        contrib = old.get(user_id)
+        if contrib is not None:
+            _add_contribution(states[user_id], contrib.points, contrib.points_type, -1)
+            contrib.points = points
+            contrib.points_type = points_type
+        else:
+            session.add(RankingContribution(
+                match_id=match_id, user_id=user_id, points=points, points_type=points_type
+            ))
+        _add_contribution(states[user_id], points, points_type, +1)
+        seen.add(user_id)
+
+    # Palpites que sumiram desde a última aplicação
+    for user_id, contrib in old.items():
+        if user_id not in seen:
+            _add_contribution(states[user_id], contrib.points, contrib.points_type, -1)
+            session.delete(contrib)
+
+    applied = session.get(RankingMatchState, match_id, populate_existing=True)
+    if applied is None:
+        session.add(RankingMatchState(
+            match_id=match_id, team1_score=team1_score, team2_score=team2_score,
+            config_signature=signature
+        ))
+    else:
+        applied.team1_score = team1_score
+        applied.team2_score = team2_score
+        applied.config_signature = signature
+
+
+def _unapply_match(session, match_id):
+    """Remove do estado um jogo que deixou de ter placar (resultado apagado)."""
+    old = session.query(RankingContribution).filter_by(match_id=match_id).populate_existing().all()
+    states = _get_states(session, {c.user_id for c in old})
+    for contrib in old:
+        _add_contribution(states[contrib.user_id], contrib.points, contrib.points_type, -1)
+        session.delete(contrib)
+    applied = session.get(RankingMatchState, match_id, populate_existing=True)
+    if applied is not None:
+        session.delete(applied)
+
+
+def _plan_sync(session, signature):
+    """
+    (jogos a reaplicar {match_id: placar}, jogos a remover, maior
+    predictions.id, marca d'água atual) — o que sync_ranking_state faria agora.
+    """
+    # Mesmo critério de get_ranking: jogos já iniciados e com placar registrado
+    scored = {
+        m_id: (s1, s2) for m_id, s1, s2 in session.query(
+            Match.id, Match.team1_score, Match.team2_score
+        ).filter(
+            Match.datetime <= _now_brazil_naive(),
+            Match.team1_score.isnot(None),
+            Match.team2_score.isnot(None)
+        ).all()
+    }
+    applied = {
+        a.match_id: a for a in session.query(RankingMatchState).populate_existing().all()
+    }
+
+    # Palpites criados após a última sincronização (consulta pelo índice da PK)
+    dirty = set()
+    watermark = _get_watermark(session)
+    max_pred_id = session.query(func.max(Prediction.id)).scalar() or 0
+    if max_pred_id > watermark:
+        dirty = {
+            m_id for (m_id,) in session.query(Prediction.match_id).filter(
+                Prediction.id > watermark
+            ).distinct().all()
+        }
+
+    to_apply = {}
+    for match_id, (s1, s2) in scored.items():
+        current = applied.get(match_id)
+        if (current is None or match_id in dirty
+                or current.team1_score != s1 or current.team2_score != s2
+                or current.config_signature != signature):
+            to_apply[match_id] = (s1, s2)
+    to_unapply = [match_id for match_id in applied if match_id not in scored]
+    return to_apply, to_unapply, max_pred_id, watermark
+
+
+def _lock_state(session):
+    """
+    Serializa as atualizações do estado: várias sessões do Streamlit leem o
+    ranking ao mesmo tempo e cada uma pode querer aplicar o mesmo jogo. Lock
+    do processo (sessões são threads) e, no Postgres, advisory lock da
+    transação (outros processos/réplicas) — liberado no commit/rollback.
+    """
+    _sync_lock.acquire()
+    try:
+        if session.get_bind().dialect.name == 'postgresql':
+            session.execute(text("SELECT pg_advisory_xact_lock(:key)"), {'key': STATE_LOCK_KEY})
+    except Exception:
+        _sync_lock.release()
+        raise
+
+
+def sync_ranking_state(session, config=None) -> list:
+    """
+    Leva o estado persistente até o placar atual dos jogos.
+
+    Reaplica apenas os jogos cujo placar (ou pontuação configurada) mudou
+    desde a última sincronização, ou que receberam palpites novos. Na
+    primeira execução (estado vazio) aplica todos os jogos com placar, o que
+    equivale a um rebuild.
+
+    A verificação é feita sem lock; havendo o que aplicar, o plano é refeito
+    sob _lock_state — outra sessão pode ter aplicado o mesmo jogo enquanto
+    esta esperava — e gravado numa única transação.
+
+    Returns:
+        Lista de match_ids reaplicados/removidos nesta chamada
+    """
+    if config is None:
+        config = get_scoring_config(session)
+    signature = _config_signature(config)
+
+    to_apply, to_unapply, max_pred_id, watermark = _plan_sync(session, signature)
+    if not to_apply and not to_unapply and max_pred_id == watermark:
+        return []
+
+    _lock_state(session)
+    try:
+        to_apply, to_unapply, max_pred_id, watermark = _plan_sync(session, signature)
+        for match_id, (s1, s2) in to_apply.items():
+            _apply_match(session, match_id, s1, s2, config, signature)
+        for match_id in to_unapply:
+            _unapply_match(session, match_id)
+        if max_pred_id != watermark:
+            _set_watermark(session, max_pred_id)
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        _sync_lock.release()
+
+    return list(to_apply) + to_unapply
+
+
+def clear_user_state(session, user_id: int):
+    """
+    Remove o participante do estado (sem commit) — usado antes de excluí-lo:
+    as linhas do estado referenciam users.id. As contribuições dele somem
+    junto, então os totais dos demais não mudam.
+    """
+    _lock_state(session)
+    try:
+        session.query(RankingContribution).filter_by(user_id=user_id).delete()
+        session.query(RankingState).filter_by(user_id=user_id).delete()
+    finally:
+        _sync_lock.release()
+
+
+def clear_ranking_state(session):
+    """
+    Descarta todo o estado (sem commit) — usado pela restauração de backup,
+    que pode trocar palpites sem mudar seus ids. A próxima leitura refaz o
+    estado a partir de todos os palpites.
+    """
+    _lock_state(session)
+    try:
+        session.query(RankingContribution).delete()
+        session.query(RankingMatchState).delete()
+        session.query(RankingState).delete()
+        session.query(Config).filter_by(key=WATERMARK_KEY).delete()
+    finally:
+        _sync_lock.release()
+
+
+def get_incremental_ranking(session, exclude_match_id=None, sync=True) -> list:
+    """
+    Ranking completo (mesmo formato e desempates de scoring.get_ranking),
+    lido do estado persistente.
+
+    Args:
+        exclude_match_id: se informado, desconta a contribuição desse jogo —
+            posição de cada participante "antes" do jogo, lendo só os
+            palpites dele.
+        sync: se False, não sincroniza o estado antes de ler (útil para uma
+            segunda leitura logo após outra na mesma requisição).
+    """
+    config = get_scoring_config(session)
+    if sync:
+        sync_ranking_state(session, config)
+
+    users = session.query(User).filter_by(active=True).filter(User.role != 'admin').all()
+    states = {s.user_id: s for s in session.query(RankingState).all()}
+
+    applied_ids = {m_id for (m_id,) in session.query(RankingMatchState.match_id).all()}
+
+    # Contribuição do jogo excluído, a ser descontada
+    excluded = {}
+    if exclude_match_id is not None and exclude_match_id in applied_ids:
+        excluded = {
+            c.user_id: c for c in
+            session.query(RankingContribution).filter_by(match_id=exclude_match_id).all()
+        }
+        applied_ids.discard(exclude_match_id)
+
+    # Grupos: soma e acertos por participante, agregados no banco
+    all_group_results = {gr.group_name: gr for gr in session.query(GroupResult).all()}
+    grupos_by_user = defaultdict(lambda: (0, 0))
+    group_rows = session.query(
+        GroupPrediction.user_id,
+        func.sum(func.coalesce(GroupPrediction.points_awarded, 0)),
+        func.sum(
+            case((GroupPrediction.first_place_team_id == GroupResult.first_place_team_id, 1), else_=0) +
+            case((GroupPrediction.second_place_team_id == GroupResult.second_place_team_id, 1), else_=0)
+        )
+    ).join(
+        GroupResult, GroupResult.group_name == GroupPrediction.group_name
+    ).filter(
+        GroupResult.first_place_team_id.isnot(None),
+        GroupResult.second_place_team_id.isnot(None)
+    ).group_by(GroupPrediction.user_id).all()
+    for user_id, pontos, corretos in group_rows:
+        grupos_by_user[user_id] = (int(pontos or 0), int(corretos or 0))
+
+    # Pódio: só conta se o campeão foi definido
+    all_tournament_results = {tr.result_type: tr for tr in session.query(TournamentResult).all()}
+    campeao = all_tournament_results.get('champion')
+    vice = all_tournament_results.get('runner_up')
+    terceiro = all_tournament_results.get('third_place')
+    podium_by_user = {}
+    if campeao and campeao.team_id:
+        for pp in session.query(PodiumPrediction).all():
+            corretos = 0
+            if pp.champion_team_id == campeao.team_id:
+                corretos += 1
+            if vice and pp.runner_up_team_id == vice.team_id:
+                corretos += 1
+            if terceiro and pp.third_place_team_id == terceiro.team_id:
+                corretos += 1
+            podium_by_user[pp.user_id] = (pp.points_awarded or 0, corretos)
+
+    ranking = []
+    for user in users:
+        state = states.get(user.id)
+        counters = {
+            'pontos_jogos': state.pontos_jogos if state else 0,
+            'placares_exatos': state.placares_exatos if state else 0,
+            'resultado_gols': state.resultado_gols if state else 0,
+            'resultado': state.resultado if state else 0,
+            'gols': state.gols if state else 0,
+            'zeros': state.zeros if state else 0,
+        }
+        contrib = excluded.get(user.id)
+        if contrib is not None:
+            counters['pontos_jogos'] -= contrib.points or 0
+            column = TYPE_COUNTERS.get(contrib.points_type)
+            if column:
+                counters[column] -= 1
+
+        pontos_grupos, grupos_corretos = grupos_by_user[user.id]
+        pontos_podio, podio_corretos = podium_by_user.get(user.id, (0, 0))
+
+        ranking.append({
+            'user_id': user.id,
+            'nome': user.name,
+            'total_pontos': counters['pontos_jogos'] + pontos_grupos + pontos_podio,
+            'placares_exatos': counters['placares_exatos'],
+            'resultado_gols': counters['resultado_gols'],
+            'resultado': counters['resultado'],
+            'gols': counters['gols'],
+            'zeros': counters['zeros'],
+            'grupos_corretos': grupos_corretos,
+            'pontos_grupos': pontos_grupos,
+            'pontos_podio': pontos_podio,
+            'podio_corretos': podio_corretos,
+            'resultados_corretos': counters['placares_exatos'] + counters['resultado_gols'] + counters['resultado'],
+            'created_at': user.created_at,
+            'paid': bool(user.paid)
+        })
+
+    max_pontos_possivel = _max_pontos_possivel(
+        config, len(applied_ids), all_group_results, all_tournament_results
+    )
+
+    return _finalize_ranking(ranking, max_pontos_possivel)
@@ -0,0 +1,265 @@
+"""
+Comprovantes de palpites em lote do Bolão Copa do Mundo 2026
+
+Antes da trava da Copa, gera o comprovante em PDF (o mesmo de "Meus
+Comprovantes", pdf_generator.generate_user_backup_pdf) de todos os
+participantes de uma vez:
+
+- os palpites de todos são lidos em poucas consultas (participantes,
+  seleções, palpites de jogo com o jogo, de grupo e de pódio), não três
+  consultas por participante;
+- os PDFs são renderizados num pool de processos (workers > 1), como as
+  simulações de tournament_simulator.py — a renderização do FPDF é CPU pura;
+- cada comprovante vai para um arquivo na pasta de saída, e o manifest.json
+  da pasta guarda o hash do conteúdo de cada um: numa nova execução, só é
+  renderizado de novo quem mudou algum palpite (ou o nome). Opcionalmente,
+  os arquivos são reunidos num .zip.
+
+Duas gerações na mesma pasta (ex: dois admins no app, que roda cada sessão
+numa thread) são serializadas por um lock por pasta; os arquivos são
+gravados com nome temporário único e trocados com os.replace.
+
+Uso (linha de comando):
+    python receipts_batch.py pasta_saida [--zip comprovantes.zip] [--workers 4] [--force]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+import unicodedata
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+from sqlalchemy import select
+
+from models import User, Team, Match, Prediction, GroupPrediction, PodiumPrediction
+from pdf_generator import generate_user_backup_pdf, get_brazil_time_str
+
+# Incrementar quando o layout do comprovante mudar: força a regeração de todos
+RECEIPT_LAYOUT_VERSION = 1
+MANIFEST_NAME = 'manifest.json'
+NOT_DEFINED = "Não definido"
+
+_dir_locks = {}  # pasta de saída (caminho absoluto) -> threading.Lock
+_dir_locks_guard = threading.Lock()
+
+
+def _save_time(row):
+    """Data/hora de salvamento: updated_at se existir, senão created_at."""
+    return get_brazil_time_str(row.updated_at if row.updated_at else row.created_at)
+
+
+def collect_receipt_data(session, user_ids=None) -> dict:
+    """
+    Dados dos comprovantes, no formato de generate_user_backup_pdf:
+    {user_id: (nome, palpites de jogo, palpites de grupo, pódio ou None)}.
+
+    user_ids: participantes a incluir (None = ativos, exceto admins).
+    """
+    users_query = session.query(User.id, User.name).order_by(User.name)
+    if user_ids is None:
+        users_query = users_query.filter(User.active == True, User.role != 'admin')
+    else:
+        users_query = users_query.filter(User.id.in_(list(user_ids)))
+    receipts = {u.id: (u.name, [], [], None) for u in users_query.all()}
+    if not receipts:
+        return {}
+    ids = list(receipts)
+
+    team_names = dict(session.query(Team.id, Team.name).all())
+
+    match_rows = session.execute(
+        select(
+            Prediction.user_id, Prediction.pred_team1_score, Prediction.pred_team2_score,
+            Prediction.created_at, Prediction.updated_at,
+            Match.match_number, Match.datetime, Match.phase, Match.team1_id, Match.team2_id
+        ).join(Match, Prediction.match_id == Match.id)
+        .where(Prediction.user_id.in_(ids))
+        .order_by(Prediction.user_id, Match.match_number)
+    )
+    for row in match_rows:
+        receipts[row.user_id][1].append({
+            'number': row.match_number or 0,
+            'match_time': get_brazil_time_str(row.datetime),
+            'team1': team_names.get(row.team1_id, "TBD"),
+            'team2': team_names.get(row.team2_id, "TBD"),
+            'pred1': row.pred_team1_score,
+            'pred2': row.pred_team2_score,
+            'phase': row.phase or "",
+            'updated_at': _save_time(row),
+        })
+
+    group_rows = session.query(GroupPrediction).filter(
+        GroupPrediction.user_id.in_(ids)
+    ).order_by(GroupPrediction.user_id, GroupPrediction.group_name).all()
+    for gp in group_rows:
+        receipts[gp.user_id][2].append({
+            'group': gp.group_name,
+            'first': team_names.get(gp.first_place_team_id, NOT_DEFINED),
+            'second': team_names.get(gp.second_place_team_id, NOT_DEFINED),
+            'updated_at': _save_time(gp),
+        })
+
+    podium_rows = session.query(PodiumPrediction).filter(PodiumPrediction.user_id.in_(ids)).all()
+    for podium in podium_rows:
+        name, matches, groups, _ = receipts[podium.user_id]
+        receipts[podium.user_id] = (name, matches, groups, {
+            'champion': team_names.get(podium.champion_team_id, NOT_DEFINED),
+            'runner_up': team_names.get(podium.runner_up_team_id, NOT_DEFINED),
+            'third_place': team_names.get(podium.third_place_team_id, NOT_DEFINED),
+            'updated_at': _save_time(podium),
+        })
+
+    return receipts
+
+
+def receipt_hash(receipt) -> str:
+    """Hash do conteúdo de um comprovante (não muda com a hora de geração)."""
+    payload = json.dumps([RECEIPT_LAYOUT_VERSION, *receipt], ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def receipt_filename(user_id, user_name) -> str:
+    """comprovante_0042_joao_silva.pdf (o id evita colisão entre nomes iguais)."""
+    ascii_name = unicodedata.normalize('NFKD', user_name or '').encode('ascii', 'ignore').decode()
+    slug = re.sub(r'[^a-z0-9]+', '_', ascii_name.lower()).strip('_') or 'participante'
+    return f"comprovante_{user_id:04d}_{slug}.pdf"
+
+
+def _dir_lock(out_dir):
+    key = os.path.abspath(out_dir)
+    with _dir_locks_guard:
+        return _dir_locks.setdefault(key, threading.Lock())
+
+
+def _write_atomic(path, data, mode='wb'):
+    """Grava num temporário único da mesma pasta e troca com os.replace."""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or '.',
+                                    prefix=os.path.basename(path) + '.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, mode) as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _render_receipt(path, receipt):
+    """Renderiza um comprovante e grava em `path` (roda nos processos do pool)."""
+    pdf_bytes = generate_user_backup_pdf(*receipt)
+    _write_atomic(path, pdf_bytes)
+    return len(pdf_bytes)
+
+
+def _load_manifest(out_dir):
+    try:
+        with open(os.path.join(out_dir, MANIFEST_NAME)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def generate_receipts(session, out_dir, user_ids=None, workers=1, force=False,
+                      zip_path=None) -> dict:
+    """
+    Gera os comprovantes em `out_dir`, um PDF por participante, renderizando
+    só os que mudaram desde a última execução (a menos que force=True).
+    Com `zip_path`, reúne os PDFs num .zip ainda sob o lock da pasta.
+
+    workers > 1 usa um pool de processos — só na linha de comando; o app
+    (Streamlit) deve chamar com workers=1.
+
+    Returns:
+        {'rendered', 'unchanged', 'files': {user_id: nome do arquivo},
+         'elapsed_ms'}
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    with _dir_lock(out_dir):
+        result = _generate_receipts(session, out_dir, user_ids, workers, force)
+        if zip_path:
+            write_receipts_zip(out_dir, result['files'], zip_path)
+    return result
+
+
+def _generate_receipts(session, out_dir, user_ids, workers, force) -> dict:
+    start = time.perf_counter()
+    receipts = collect_receipt_data(session, user_ids)
+    manifest = _load_manifest(out_dir)
+
+    pending, files = [], {}
+    for user_id, receipt in receipts.items():
+        filename = receipt_filename(user_id, receipt[0])
+        digest = receipt_hash(receipt)
+        files[user_id] = filename
+        previous = manifest.get(str(user_id))
+        path = os.path.join(out_dir, filename)
+        if (not force and previous and previous['hash'] == digest
+                and previous['file'] == filename and os.path.exists(path)):
+            continue
+        if previous and previous['file'] != filename:
+            # Nome mudou: o arquivo antigo sai
+            old_path = os.path.join(out_dir, previous['file'])
+            if os.path.exists(old_path):
+                os.remove(old_path)
+        pending.append((user_id, path, digest, receipt))
+
+    paths = [p for _, p, _, _ in pending]
+    contents = [r for _, _, _, r in pending]
+    if workers > 1 and len(pending) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(_render_receipt, paths, contents, chunksize=max(1, len(pending) // (workers * 4))))
+    else:
+        for path, receipt in zip(paths, contents):
+            _render_receipt(path, receipt)
+
+    for user_id, path, digest, _ in pending:
+        manifest[str(user_id)] = {'hash': digest, 'file': os.path.basename(path)}
+    _write_atomic(os.path.join(out_dir, MANIFEST_NAME),
+                  json.dumps(manifest, ensure_ascii=False, indent=1), mode='w')
+
+    return {
+        'rendered': len(pending),
+        'unchanged': len(receipts) - len(pending),
+        'files': files,
+        'elapsed_ms': round((time.perf_counter() - start) * 1000, 1),
+    }
+
+
+def write_receipts_zip(out_dir, files, zip_path):
+    """Reúne os comprovantes `files` ({user_id: arquivo}) num .zip."""
+    with zipfile.ZipFile(zip_path, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
+        for filename in sorted(files.values()):
+            zf.write(os.path.join(out_dir, filename), arcname=filename)
+    return zip_path
+
+
+def main():
+    from db import get_engine, session_scope
+
+    parser = argparse.ArgumentParser(description="Comprovantes de palpites de todos os participantes")
+    parser.add_argument('out_dir', help='pasta dos PDFs (e do manifest.json)')
+    parser.add_argument('--zip', dest='zip_path', help='reúne os PDFs neste .zip')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--force', action='store_true', help='renderiza todos, mesmo sem mudança')
+    args = parser.parse_args()
+
+    database_url = os.environ.get('NEON_CONNECTION_STRING', '').strip() or None
+    engine = get_engine(database_url)
+    with session_scope(engine) as session:
+        result = generate_receipts(session, args.out_dir, workers=args.workers, force=args.force,
+                                   zip_path=args.zip_path)
+    print(f"Comprovantes: {result['rendered']} gerado(s), {result['unchanged']} sem mudança "
+          f"({result['elapsed_ms'] / 1000:.1f}s) em {args.out_dir}")
+    if args.zip_path:
+        print(f"Arquivo: {args.zip_path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -11,6 +11,11 @@ from models import (
     Team, Config, TournamentResult, GroupResult
 )
 from db import get_config_value
+from config import DEFAULT_SCORING, DEFAULT_GROUP_SCORING
+import scoring_rules as rules
+from data_version import MATCHES, GROUP_RESULTS, PODIUM
+from ranking_cache import mark_ranking_changed
+from scoring_rules import calculate_match_points_batch, POINTS_TYPES, BREAKDOWNS
 
 
 def get_scoring_config(session):
@@ -19,17 +24,13 @@ def get_scoring_config(session):
     """
     config = {}
     
-    # Pontuação de jogos
-    config['placar_exato'] = int(get_config_value(session, 'pontos_placar_exato', '20'))
-    config['resultado_gols'] = int(get_config_value(session, 'pontos_resultado_gols', '15'))
-    config['resultado'] = int(get_config_value(session, 'pontos_resultado', '10'))
-    config['gols'] = int(get_config_value(session, 'pontos_gols', '5'))
-    config['nenhum'] = int(get_config_value(session, 'pontos_nenhum', '0'))
+    # Pontuação de jogos (chaves = tipos de acerto)
+    for points_type, key in rules.MATCH_CONFIG_KEYS.items():
+        config[points_type] = int(get_config_value(session, key, str(DEFAULT_SCORING[points_type])))
     
     # Pontuação de grupos
-    config['grupo_ordem_correta'] = int(get_config_value(session, 'grupo_ordem_correta', '20'))
-    config['grupo_ordem_invertida'] = int(get_config_value(session, 'grupo_ordem_invertida', '10'))
-    config['grupo_um_certo'] = int(get_config_value(session, 'grupo_um_certo', '5'))
+    for key, config_key in rules.GROUP_CONFIG_KEYS.items():
+        config[config_key] = int(get_config_value(session, config_key, str(DEFAULT_GROUP_SCORING[key])))
     
     # Pontuação do pódio
     config['podio_completo'] = int(get_config_value(session, 'podio_completo', '150'))
@@ -53,43 +54,10 @@ def calculate_match_points(pred_team1: int, pred_team2: int,
     - 10 pts: acertar vencedor/empate, sem acertar gols
     - 5 pts: acertar apenas os gols de uma das equipes
     - 0 pts: errar tudo
+
+    As regras ficam em scoring_rules, compartilhadas com update_results.py.
     """
-    # Determina resultado previsto e real
-    if pred_team1 > pred_team2:
-        pred_result = 'team1'
-    elif pred_team1 < pred_team2:
-        pred_result = 'team2'
-    else:
-        pred_result = 'draw'
-    
-    if real_team1 > real_team2:
-        real_result = 'team1'
-    elif real_team1 < real_team2:
-        real_result = 'team2'
-    else:
-        real_result = 'draw'
-    
-    # Verifica acertos
-    acertou_resultado = pred_result == real_result
-    acertou_gols_team1 = pred_team1 == real_team1
-    acertou_gols_team2 = pred_team2 == real_team2
-    acertou_placar = acertou_gols_team1 and acertou_gols_team2
-    
-    # Calcula pontuação
-    if acertou_placar:
-        return config['placar_exato'], 'placar_exato', "Placar exato! 🎯"
-    
-    elif acertou_resultado and (acertou_gols_team1 or acertou_gols_team2):
-        return config['resultado_gols'], 'resultado_gols', "Resultado + gols de um time ✓"
-    
-    elif acertou_resultado:
-        return config['resultado'], 'resultado', "Resultado correto ✓"
-    
-    elif acertou_gols_team1 or acertou_gols_team2:
-        return config['gols'], 'gols', "Gols de um time ✓"
-    
-    else:
-        return config['nenhum'], 'nenhum', "Não pontuou"
+    return rules.calculate_match_points(pred_team1, pred_team2, real_team1, real_team2, config)
 
 
 def calculate_group_points(pred_first_id: int, pred_second_id: int,
@@ -109,19 +77,7 @@ def calculate_group_points(pred_first_id: int, pred_second_id: int,
     if real_first_id is None or real_second_id is None:
         return 0, "Resultado ainda não definido"
     
-    # Acertou os dois na ordem correta
-    if pred_first_id == real_first_id and pred_second_id == real_second_id:
-        return config['grupo_ordem_correta'], "Acertou 1º e 2º na ordem! 🎯"
-    
-    # Acertou os dois, mas invertidos
-    if pred_first_id == real_second_id and pred_second_id == real_first_id:
-        return config['grupo_ordem_invertida'], "Acertou os 2 classificados (ordem invertida) ✓"
-    
-    # Acertou apenas um na posição errada
-    if pred_first_id in [real_first_id, real_second_id] or pred_second_id in [real_first_id, real_second_id]:
-        return config['grupo_um_certo'], "Acertou 1 classificado (posição errada) ✓"
-    
-    return 0, "Não pontuou"
+    return rules.calculate_group_points(pred_first_id, pred_second_id, real_first_id, real_second_id, config)
 
 
 def calculate_podium_points(pred_champion: int, pred_runner: int, pred_third: int,
@@ -194,6 +150,9 @@ def process_match_predictions(session, match_id: int):
     
     predictions = session.query(Prediction).filter_by(match_id=match_id).all()
     
+    # Placar/status do jogo mudou: avisa as telas ao vivo e o cache do ranking
+    mark_ranking_changed(session, MATCHES)
+    
     # Se o jogo não tem placar, zera os pontos
     if match.team1_score is None or match.team2_score is None:
         for pred in predictions:
@@ -206,16 +165,17 @@ def process_match_predictions(session, match_id: int):
     # Jogo tem placar (em andamento ou finalizado) - calcula pontos
     config = get_scoring_config(session)
     
-    for pred in predictions:
-        points, points_type, breakdown = calculate_match_points(
-            pred.pred_team1_score, pred.pred_team2_score,
-            match.team1_score, match.team2_score,
-            config
-        )
-        
+    points_list, codes = calculate_match_points_batch(
+        [p.pred_team1_score for p in predictions],
+        [p.pred_team2_score for p in predictions],
+        match.team1_score, match.team2_score,
+        config
+    )
+    
+    for pred, points, code in zip(predictions, points_list, codes):
         pred.points_awarded = points
-        pred.points_type = points_type
-        pred.breakdown = breakdown
+        pred.points_type = POINTS_TYPES[code]
+        pred.breakdown = BREAKDOWNS[code]
     
     session.commit()
 
@@ -231,6 +191,7 @@ def process_group_predictions(session, group_name: str):
     
     config = get_scoring_config(session)
     predictions = session.query(GroupPrediction).filter_by(group_name=group_name).all()
+    mark_ranking_changed(session, GROUP_RESULTS)
     
     for pred in predictions:
         points, breakdown = calculate_group_points(
@@ -258,6 +219,7 @@ def process_podium_predictions(session):
     
     config = get_scoring_config(session)
     predictions = session.query(PodiumPrediction).all()
+    mark_ranking_changed(session, PODIUM)
     
     for pred in predictions:
         points, breakdown = calculate_podium_points(
@@ -335,19 +297,17 @@ def get_user_stats(session, user_id: int) -> dict:
         'total_pontos': 0
     }
 
-    for pred in predictions:
-        # Pega placar registrado
-        scores = match_scores.get(pred.match_id)
-        if not scores:
-            continue
-
-        # Calcula pontos
-        points, points_type, _ = calculate_match_points(
-            pred.pred_team1_score, pred.pred_team2_score,
-            scores['team1_score'], scores['team2_score'],
-            config
-        )
-
+    # Calcula pontos de todos os palpites em lote
+    points_list, codes = calculate_match_points_batch(
+        [p.pred_team1_score for p in predictions],
+        [p.pred_team2_score for p in predictions],
+        [match_scores[p.match_id]['team1_score'] for p in predictions],
+        [match_scores[p.match_id]['team2_score'] for p in predictions],
+        config
+    )
+
+    for points, code in zip(points_list, codes):
+        points_type = POINTS_TYPES[code]
         stats['pontos_jogos'] += points
 
         if points_type == 'placar_exato':
@@ -457,10 +417,17 @@ def get_ranking(session, cutoff_datetime=None, exclude_match_id=None) -> list:
         Prediction.match_id.in_(matches_with_score_ids)
     ).all() if matches_with_score_ids else []
     
-    # Agrupar por user_id
+    # Pontua todos os palpites em lote e agrupa (pontos, tipo) por user_id
+    points_list, codes = calculate_match_points_batch(
+        [p.pred_team1_score for p in all_predictions],
+        [p.pred_team2_score for p in all_predictions],
+        [match_scores[p.match_id]['team1_score'] for p in all_predictions],
+        [match_scores[p.match_id]['team2_score'] for p in all_predictions],
+        config
+    )
     preds_by_user = defaultdict(list)
-    for pred in all_predictions:
-        preds_by_user[pred.user_id].append(pred)
+    for pred, points, code in zip(all_predictions, points_list, codes):
+        preds_by_user[pred.user_id].append((points, POINTS_TYPES[code]))
     
     # Todos os palpites de grupo
     all_group_preds = session.query(GroupPrediction).all()
@@ -497,19 +464,7 @@ def get_ranking(session, cutoff_datetime=None, exclude_match_id=None) -> list:
         zeros = 0
         pontos_jogos = 0
         
-        for pred in scored_predictions:
-            # Pega placar registrado
-            scores = match_scores.get(pred.match_id)
-            if not scores:
-                continue
-            
-            # Calcula pontos
-            points, points_type, _ = calculate_match_points(
-                pred.pred_team1_score, pred.pred_team2_score,
-                scores['team1_score'], scores['team2_score'],
-                config
-            )
-            
+        for points, points_type in scored_predictions:
             pontos_jogos += points
             
             if points_type == 'placar_exato':
@@ -579,18 +534,29 @@ def get_ranking(session, cutoff_datetime=None, exclude_match_id=None) -> list:
             'paid': bool(user.paid)
         })
     
-    # Ordena pelo critério de desempate completo
-    # Ordem definida pelo usuário:
-    # 1. Maior pontuação total
-    # 2. Maior número de placares exatos (20 pts)
-    # 3. Maior número de acerto de Vencedores com gols corretos (15 pts)
-    # 4. Maior número de acerto de Vencedores (10 pts)
-    # 5. Maior número de acerto de classificados no grupo
-    # 6. Maior número de acerto de pódio
-    # 7. Maior número de acerto de gols de um time (5 pts)
-    # 8. Menos palpites zerados
-    # 9. Ordem de inscrição (quem se inscreveu primeiro)
-    ranking.sort(key=lambda x: (
+    # Máximo de pontos possível até agora (para % de aproveitamento)
+    max_pontos_possivel = _max_pontos_possivel(
+        config, len(matches_with_score_ids), all_group_results, all_tournament_results
+    )
+
+    return _finalize_ranking(ranking, max_pontos_possivel)
+
+
+def _ranking_sort_key(x):
+    """
+    Chave de ordenação do ranking (critério de desempate completo).
+    Ordem definida pelo usuário:
+    1. Maior pontuação total
+    2. Maior número de placares exatos (20 pts)
+    3. Maior número de acerto de Vencedores com gols corretos (15 pts)
+    4. Maior número de acerto de Vencedores (10 pts)
+    5. Maior número de acerto de classificados no grupo
+    6. Maior número de acerto de pódio
+    7. Maior número de acerto de gols de um time (5 pts)
+    8. Menos palpites zerados
+    9. Ordem de inscrição (quem se inscreveu primeiro)
+    """
+    return (
         -x['total_pontos'],        # 1. Maior pontuação total
         -x['placares_exatos'],     # 2. Mais placares exatos (20 pts)
         -x['resultado_gols'],      # 3. Mais resultado + gols (15 pts)
@@ -600,20 +566,29 @@ def get_ranking(session, cutoff_datetime=None, exclude_match_id=None) -> list:
         -x['gols'],                # 7. Mais gols de um time (5 pts)
         x['zeros'],                # 8. Menos zeros
         x['user_id']               # 9. Ordem de inscrição
-    ))
-    
-    # Máximo de pontos possível até agora (para % de aproveitamento):
-    # placar exato em todos os jogos com resultado + ordem correta nos grupos
-    # já definidos + pódio completo (se já definido)
-    max_pontos_possivel = config['placar_exato'] * len(matches_with_score_ids)
-    for gr in all_group_results.values():
+    )
+
+
+def _max_pontos_possivel(config, qtd_jogos, group_results, tournament_results):
+    """
+    Máximo de pontos possível até agora (para % de aproveitamento):
+    placar exato em todos os jogos com resultado + ordem correta nos grupos
+    já definidos + pódio completo (se já definido)
+    """
+    max_pontos = config['placar_exato'] * qtd_jogos
+    for gr in group_results.values():
         if gr.first_place_team_id and gr.second_place_team_id:
-            max_pontos_possivel += config['grupo_ordem_correta']
-    _campeao_def = all_tournament_results.get('champion')
-    if _campeao_def and _campeao_def.team_id:
-        max_pontos_possivel += config['podio_completo']
+            max_pontos += config['grupo_ordem_correta']
+    campeao = tournament_results.get('champion')
+    if campeao and campeao.team_id:
+        max_pontos += config['podio_completo']
+    return max_pontos
+
+
+def _finalize_ranking(ranking, max_pontos_possivel):
+    """Ordena o ranking e adiciona posição e aproveitamento."""
+    ranking.sort(key=_ranking_sort_key)
 
-    # Adiciona posição e aproveitamento
     for i, r in enumerate(ranking, 1):
         r['posicao'] = i
         r['aproveitamento'] = (
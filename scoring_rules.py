@@ -0,0 +1,369 @@
+"""
+Regras de pontuação do Bolão Copa do Mundo 2026 (fonte única)
+
+Usado tanto pelo app (scoring.py, via SQLAlchemy) quanto pelos scripts de
+cron (update_results.py, via psycopg2), para que as duas pontuações não
+divirjam:
+  - tipos de acerto por jogo, chaves de config e descrições
+  - tabela pré-calculada do tipo de acerto para placares de 0 a 10
+  - pontuação em lote (vetorizada) de muitos palpites de uma vez
+  - pontuação dos palpites de classificação dos grupos
+  - classificação dos grupos com desempate por confronto direto
+
+Não depende de SQLAlchemy — os crons só instalam requests/psycopg2/pytz.
+Usa NumPy quando disponível; sem NumPy, cai para Python puro com o mesmo
+resultado.
+"""
+
+try:
+    import numpy as np
+except ImportError:  # cron (update_results.py) roda sem NumPy
+    np = None
+
+from config import DEFAULT_SCORING, DEFAULT_GROUP_SCORING
+
+# =============================================================================
+# PONTUAÇÃO POR JOGO
+# =============================================================================
+
+# Códigos de tipo de acerto, em ordem de prioridade. O código é o índice
+# nesta tupla; o nome é o mesmo gravado em predictions.points_type e usado
+# como chave no dict de get_scoring_config.
+POINTS_TYPES = ('placar_exato', 'resultado_gols', 'resultado', 'gols', 'nenhum')
+
+PLACAR_EXATO, RESULTADO_GOLS, RESULTADO, GOLS, NENHUM = range(len(POINTS_TYPES))
+
+# Descrição gravada em predictions.breakdown para cada tipo de acerto
+BREAKDOWNS = (
+    "Placar exato! 🎯",
+    "Resultado + gols de um time ✓",
+    "Resultado correto ✓",
+    "Gols de um time ✓",
+    "Não pontuou",
+)
+
+# Chave na tabela `config` com os pontos de cada tipo de acerto
+MATCH_CONFIG_KEYS = {points_type: f'pontos_{points_type}' for points_type in POINTS_TYPES}
+
+# Placar máximo coberto pela tabela pré-calculada (palpites acima disso
+# são classificados na hora, com as mesmas regras)
+LOOKUP_MAX_GOALS = 10
+_LOOKUP_SIZE = LOOKUP_MAX_GOALS + 1
+
+
+def match_config_from_values(values: dict) -> dict:
+    """
+    Monta o dict de pontos por tipo de acerto (chaves = POINTS_TYPES) a partir
+    dos valores lidos da tabela config ({chave: valor}), com os padrões de
+    config.DEFAULT_SCORING para chaves ausentes.
+    """
+    return {
+        points_type: int(values.get(key, DEFAULT_SCORING[points_type]))
+        for points_type, key in MATCH_CONFIG_KEYS.items()
+    }
+
+
+def _classify(pred_team1, pred_team2, real_team1, real_team2):
+    """Código do tipo de acerto de um único palpite (a regra em si)."""
+    acertou_gols_team1 = pred_team1 == real_team1
+    acertou_gols_team2 = pred_team2 == real_team2
+    if acertou_gols_team1 and acertou_gols_team2:
+        return PLACAR_EXATO
+
+    pred_result = (pred_team1 > pred_team2) - (pred_team1 < pred_team2)
+    real_result = (real_team1 > real_team2) - (real_team1 < real_team2)
+    if pred_result == real_result:
+        return RESULTADO_GOLS if (acertou_gols_team1 or acertou_gols_team2) else RESULTADO
+    if acertou_gols_team1 or acertou_gols_team2:
+        return GOLS
+    return NENHUM
+
+
+# Tabela (p1, p2, r1, r2) -> código, achatada em bytes no índice
+# ((p1 * 11 + p2) * 11 + r1) * 11 + r2. Calculada uma vez na importação.
+_LOOKUP = bytes(
+    _classify(p1, p2, r1, r2)
+    for p1 in range(_LOOKUP_SIZE) for p2 in range(_LOOKUP_SIZE)
+    for r1 in range(_LOOKUP_SIZE) for r2 in range(_LOOKUP_SIZE)
+)
+_LOOKUP_ARRAY = np.frombuffer(_LOOKUP, dtype=np.int8) if np is not None else None
+
+
+# A mesma tabela como dict por tupla: no caminho escalar, uma consulta ao
+# dict custa menos que conferir os limites e calcular o índice em Python
+_LOOKUP_BY_SCORE = {
+    (p1, p2, r1, r2): _LOOKUP[((p1 * _LOOKUP_SIZE + p2) * _LOOKUP_SIZE + r1) * _LOOKUP_SIZE + r2]
+    for p1 in range(_LOOKUP_SIZE) for p2 in range(_LOOKUP_SIZE)
+    for r1 in range(_LOOKUP_SIZE) for r2 in range(_LOOKUP_SIZE)
+}
+
+
+def classify(pred_team1, pred_team2, real_team1, real_team2) -> int:
+    """Código do tipo de acerto (índice de POINTS_TYPES) de um palpite."""
+    code = _LOOKUP_BY_SCORE.get((pred_team1, pred_team2, real_team1, real_team2))
+    if code is None:
+        return _classify(pred_team1, pred_team2, real_team1, real_team2)
+    return code
+
+
+def calculate_match_points(pred_team1, pred_team2, real_team1, real_team2, config: dict) -> tuple:
+    """
+    Pontos de um palpite para uma partida.
+
+    Returns:
+        (pontos, tipo de acerto, descrição)
+    """
+    code = _LOOKUP_BY_SCORE.get((pred_team1, pred_team2, real_team1, real_team2))
+    if code is None:
+        code = _classify(pred_team1, pred_team2, real_team1, real_team2)
+    points_type = POINTS_TYPES[code]
+    return config[points_type], points_type, BREAKDOWNS[code]
+
+
+def _classify_array(pred_team1, pred_team2, real_team1, real_team2):
+    """Códigos de tipo de acerto como array NumPy (int8)."""
+    p1 = np.asarray(pred_team1, dtype=np.int16)
+    p2 = np.asarray(pred_team2, dtype=np.int16)
+    r1 = np.asarray(real_team1, dtype=np.int16)
+    r2 = np.asarray(real_team2, dtype=np.int16)
+
+    # Caso comum (todos os placares na tabela): uma indexação só
+    if all(a.size == 0 or (a.min() >= 0 and a.max() <= LOOKUP_MAX_GOALS) for a in (p1, p2, r1, r2)):
+        index = ((p1.astype(np.int32) * _LOOKUP_SIZE + p2) * _LOOKUP_SIZE + r1) * _LOOKUP_SIZE + r2
+        return _LOOKUP_ARRAY[index]
+
+    acertou_gols_team1 = p1 == r1
+    acertou_gols_team2 = p2 == r2
+    algum_gol = acertou_gols_team1 | acertou_gols_team2
+    acertou_resultado = np.sign(p1 - p2) == np.sign(r1 - r2)
+
+    # Atribui do menos para o mais prioritário: cada regra sobrescreve a anterior
+    codes = np.full(np.broadcast(p1, r1).shape, NENHUM, dtype=np.int8)
+    codes[algum_gol] = GOLS
+    codes[acertou_resultado] = RESULTADO
+    codes[acertou_resultado & algum_gol] = RESULTADO_GOLS
+    codes[acertou_gols_team1 & acertou_gols_team2] = PLACAR_EXATO
+    return codes
+
+
+def classify_batch(pred_team1, pred_team2, real_team1, real_team2) -> list:
+    """
+    Códigos de tipo de acerto (índices de POINTS_TYPES) para arrays paralelos
+    de palpites. real_team1/real_team2 podem ser arrays do mesmo tamanho ou
+    um único placar aplicado a todos os palpites (ex: um jogo só).
+    """
+    if len(pred_team1) == 0:
+        return []
+    if np is None:
+        if not hasattr(real_team1, '__len__'):
+            real_team1 = [real_team1] * len(pred_team1)
+            real_team2 = [real_team2] * len(pred_team1)
+        return [classify(p1, p2, r1, r2)
+                for p1, p2, r1, r2 in zip(pred_team1, pred_team2, real_team1, real_team2)]
+    return _classify_array(pred_team1, pred_team2, real_team1, real_team2).tolist()
+
+
+def calculate_match_points_batch(pred_team1, pred_team2, real_team1, real_team2,
+                                 config: dict) -> tuple:
+    """
+    Versão em lote de scoring.calculate_match_points.
+
+    Args:
+        pred_team1, pred_team2: sequências paralelas com os palpites
+        real_team1, real_team2: sequências paralelas com o placar real de cada
+            palpite, ou um placar único para todos
+        config: dict de get_scoring_config (chaves = POINTS_TYPES)
+
+    Returns:
+        (pontos, códigos) — listas paralelas de int; o nome do tipo de acerto
+        de cada palpite é POINTS_TYPES[código].
+    """
+    points_by_code = [config[t] for t in POINTS_TYPES]
+    if len(pred_team1) == 0:
+        return [], []
+    if np is None:
+        codes = classify_batch(pred_team1, pred_team2, real_team1, real_team2)
+        return [points_by_code[c] for c in codes], codes
+
+    codes = _classify_array(pred_team1, pred_team2, real_team1, real_team2)
+    points = np.asarray(points_by_code, dtype=np.int32)[codes]
+    return points.tolist(), codes.tolist()
+
+
+# =============================================================================
+# PONTUAÇÃO DA CLASSIFICAÇÃO DOS GRUPOS
+# =============================================================================
+
+# Chaves de config (tabela e dict de get_scoring_config) da pontuação de grupos
+GROUP_CONFIG_KEYS = {key: f'grupo_{key}' for key in DEFAULT_GROUP_SCORING}
+
+# Resultado de um palpite de classificação -> (descrição, chave de config ou
+# None quando não pontua)
+GROUP_OUTCOMES = {
+    'incompleto': ("Palpite incompleto", None),
+    'ordem':      ("Acertou 1º e 2º na ordem! 🎯", 'grupo_ordem_correta'),
+    'invertida':  ("Acertou os 2 classificados (ordem invertida) ✓", 'grupo_ordem_invertida'),
+    'um_certo':   ("Acertou 1 classificado (posição errada) ✓", 'grupo_um_certo'),
+    'nenhum':     ("Não pontuou", None),
+}
+
+
+def group_config_from_values(values: dict) -> dict:
+    """Pontos de grupos ({chave de config: pontos}) com os padrões de config.py."""
+    return {
+        config_key: int(values.get(config_key, DEFAULT_GROUP_SCORING[key]))
+        for key, config_key in GROUP_CONFIG_KEYS.items()
+    }
+
+
+def classify_group_prediction(pred_first_id, pred_second_id, real_first_id, real_second_id) -> str:
+    """Resultado (chave de GROUP_OUTCOMES) de um palpite de classificação."""
+    if pred_first_id is None or pred_second_id is None:
+        return 'incompleto'
+    if pred_first_id == real_first_id and pred_second_id == real_second_id:
+        return 'ordem'
+    if pred_first_id == real_second_id and pred_second_id == real_first_id:
+        return 'invertida'
+    if pred_first_id in (real_first_id, real_second_id) or pred_second_id in (real_first_id, real_second_id):
+        return 'um_certo'
+    return 'nenhum'
+
+
+def calculate_group_points(pred_first_id, pred_second_id, real_first_id, real_second_id,
+                           config: dict) -> tuple:
+    """Pontos de um palpite de classificação: (pontos, descrição)."""
+    description, key = GROUP_OUTCOMES[
+        classify_group_prediction(pred_first_id, pred_second_id, real_first_id, real_second_id)
+    ]
+    return (config[key] if key else 0), description
+
+
+# =============================================================================
+# CLASSIFICAÇÃO DOS GRUPOS
+# =============================================================================
+
+def compute_group_standings(results, team_keys=()) -> list:
+    """
+    Classificação de um grupo: pontos, saldo de gols, gols marcados e, entre
+    times ainda empatados, confronto direto (critério oficial da FIFA).
+
+    Args:
+        results: jogos com placar, como (team1_key, team2_key, gols1, gols2)
+        team_keys: times do grupo na ordem em que aparecem (inclui times que
+            ainda não jogaram); times só presentes em `results` entram depois
+
+    Returns:
+        Lista ordenada de dicts com team_key, points, played, wins, draws,
+        losses, goals_for, goals_against e goal_difference
+    """
+    results = list(results)
+    teams_stats = {}
+
+    def _init(team_key):
+        if team_key not in teams_stats:
+            teams_stats[team_key] = {
+                'team_key': team_key,
+                'points': 0,
+                'played': 0,
+                'wins': 0,
+                'draws': 0,
+                'losses': 0,
+                'goals_for': 0,
+                'goals_against': 0,
+                'goal_difference': 0
+            }
+
+    for team_key in team_keys:
+        _init(team_key)
+
+    for team1_key, team2_key, gols1, gols2 in results:
+        _init(team1_key)
+        _init(team2_key)
+        team1, team2 = teams_stats[team1_key], teams_stats[team2_key]
+
+        team1['played'] += 1
+        team2['played'] += 1
+        team1['goals_for'] += gols1
+        team1['goals_against'] += gols2
+        team2['goals_for'] += gols2
+        team2['goals_against'] += gols1
+
+        if gols1 > gols2:
+            team1['points'] += 3
+            team1['wins'] += 1
+            team2['losses'] += 1
+        elif gols2 > gols1:
+            team2['points'] += 3
+            team2['wins'] += 1
+            team1['losses'] += 1
+        else:
+            team1['points'] += 1
+            team1['draws'] += 1
+            team2['points'] += 1
+            team2['draws'] += 1
+
+    for stats in teams_stats.values():
+        stats['goal_difference'] = stats['goals_for'] - stats['goals_against']
+
+    standings = sorted(
+        teams_stats.values(),
+        key=lambda x: (x['points'], x['goal_difference'], x['goals_for']),
+        reverse=True
+    )
+    return apply_head_to_head_tiebreak(standings, results)
+
+
+def apply_head_to_head_tiebreak(standings: list, h2h_matches: list) -> list:
+    """
+    Reordena clusters de times empatados (mesmos pontos, saldo de gols e
+    gols marcados) usando o confronto direto entre eles: pontos, depois
+    saldo de gols, depois gols marcados, considerando só os jogos entre os
+    próprios times do cluster. Se ainda houver empate total, mantém a ordem
+    original (sorteio/decisão manual ficaria a cargo do admin).
+    """
+    result = []
+    i = 0
+    n = len(standings)
+    while i < n:
+        j = i
+        key_i = (standings[i]['points'], standings[i]['goal_difference'], standings[i]['goals_for'])
+        while j + 1 < n and (
+            standings[j + 1]['points'], standings[j + 1]['goal_difference'], standings[j + 1]['goals_for']
+        ) == key_i:
+            j += 1
+
+        cluster = standings[i:j + 1]
+        if len(cluster) > 1:
+            cluster = _sort_cluster_by_head_to_head(cluster, h2h_matches)
+        result.extend(cluster)
+        i = j + 1
+
+    return result
+
+
+def _sort_cluster_by_head_to_head(cluster: list, h2h_matches: list) -> list:
+    cluster_keys = {item['team_key'] for item in cluster}
+    mini_stats = {item['team_key']: {'points': 0, 'goals_for': 0, 'goals_against': 0} for item in cluster}
+
+    for team1_key, team2_key, gols1, gols2 in h2h_matches:
+        if team1_key not in cluster_keys or team2_key not in cluster_keys:
+            continue  # só conta jogos entre os times do próprio cluster empatado
+
+        mini_stats[team1_key]['goals_for'] += gols1
+        mini_stats[team1_key]['goals_against'] += gols2
+        mini_stats[team2_key]['goals_for'] += gols2
+        mini_stats[team2_key]['goals_against'] += gols1
+
+        if gols1 > gols2:
+            mini_stats[team1_key]['points'] += 3
+        elif gols2 > gols1:
+            mini_stats[team2_key]['points'] += 3
+        else:
+            mini_stats[team1_key]['points'] += 1
+            mini_stats[team2_key]['points'] += 1
+
+    def sort_key(item):
+        m = mini_stats[item['team_key']]
+        return (m['points'], m['goals_for'] - m['goals_against'], m['goals_for'])
+
+    return sorted(cluster, key=sort_key, reverse=True)
@@ -0,0 +1,31 @@
+"""
+Fixtures compartilhadas pelos testes: um banco SQLite temporário, populado
+pelo mesmo gerador sintético dos benchmarks (benchmarks/synthetic.py).
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from db import get_session
+from benchmarks.synthetic import build_database
+
+
+@pytest.fixture
+def engine(tmp_path):
+    """Banco com 12 participantes, 30 jogos encerrados e 2 em andamento sem placar."""
+    engine, _ = build_database(
+        f"sqlite:///{tmp_path / 'bolao.db'}", n_users=12, played=30, in_progress=2, seed=7
+    )
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def session(engine):
+    session = get_session(engine)
+    yield session
+    session.close()
@@ -0,0 +1,104 @@
+"""
+Backup em fluxo (backup_stream): ida e volta para um banco vazio, arquivo
+truncado, mescla sobre o banco em uso (senhas e estado derivado) e modo
+incremental.
+"""
+
+import io
+
+import pytest
+
+from backup_stream import (
+    BACKUP_TABLES, EXCLUDED_COLUMNS, RESTORED_PASSWORD_HASH, SKIP_CONFIG_KEYS,
+    write_backup, restore_backup
+)
+from db import get_engine, get_session, create_tables, get_config_version
+from models import Config, Match, Prediction, User
+from ranking_state import sync_ranking_state, get_incremental_ranking, _get_watermark
+from scoring import get_ranking
+
+
+def _backup(session, **kwargs):
+    buffer = io.BytesIO()
+    mode, counts = write_backup(session, buffer, **kwargs)
+    return buffer.getvalue(), mode, counts
+
+
+def _table_rows(session, name, model):
+    excluded = EXCLUDED_COLUMNS.get(name, set())
+    columns = [c for c in model.__table__.columns if c.name not in excluded]
+    rows = [dict(zip([c.name for c in columns], row))
+            for row in session.execute(model.__table__.select().with_only_columns(*columns))]
+    if name == 'configs':
+        return sorted((r['key'], r['value'], r['category']) for r in rows if r['key'] not in SKIP_CONFIG_KEYS)
+    return sorted(rows, key=lambda r: r['id'])
+
+
+@pytest.fixture
+def empty_session(tmp_path):
+    engine = get_engine(f"sqlite:///{tmp_path / 'restaurado.db'}")
+    create_tables(engine)
+    session = get_session(engine)
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def test_round_trip_into_empty_database(session, empty_session):
+    raw, mode, counts = _backup(session)
+
+    restored = restore_backup(empty_session, io.BytesIO(raw))
+
+    assert mode == 'full'
+    assert restored['predictions'] == counts['predictions'] == session.query(Prediction).count()
+    for name, model in BACKUP_TABLES:
+        assert _table_rows(empty_session, name, model) == _table_rows(session, name, model), name
+    assert {h for (h,) in empty_session.query(User.password_hash)} == {RESTORED_PASSWORD_HASH}
+    assert get_incremental_ranking(empty_session) == get_ranking(empty_session)
+
+
+def test_truncated_file_restores_nothing(session, empty_session):
+    raw, _, _ = _backup(session, compress=False)
+    truncated = raw[:raw.rindex(b'{"type": "end"')]
+
+    with pytest.raises(ValueError):
+        restore_backup(empty_session, io.BytesIO(truncated))
+
+    assert empty_session.query(User).count() == 0
+
+
+def test_restore_merges_and_resets_derived_state(session):
+    sync_ranking_state(session)
+    raw, _, _ = _backup(session)
+    user = session.query(User).filter(User.role != 'admin').first()
+    user.password_hash = 'hash-atual'
+    pred = session.query(Prediction).join(Match).filter(Match.team1_score.isnot(None)).first()
+    original = (pred.pred_team1_score, pred.pred_team2_score)
+    pred.pred_team1_score = original[0] + 5
+    session.add(Config(key='so_neste_banco', value='1', category='teste'))
+    session.commit()
+    version = get_config_version(session)
+
+    restore_backup(session, io.BytesIO(raw))
+    session.expire_all()
+
+    assert (pred.pred_team1_score, pred.pred_team2_score) == original
+    assert user.password_hash == 'hash-atual'
+    assert session.query(Config).filter_by(key='so_neste_banco').count() == 1
+    assert _get_watermark(session) == 0
+    assert get_config_version(session) > version
+    assert get_incremental_ranking(session) == get_ranking(session)
+
+
+def test_incremental_has_only_changed_matches(session):
+    _backup(session)
+    match = session.query(Match).filter(Match.team1_score.isnot(None)).first()
+    match.team1_score += 1
+    session.commit()
+
+    _, mode, counts = _backup(session, incremental=True)
+
+    assert mode == 'incremental'
+    assert counts['matches'] == 1
+    assert counts['predictions'] == session.query(Prediction).filter_by(match_id=match.id).count()
+    assert counts['users'] == session.query(User).count()
@@ -0,0 +1,100 @@
+"""
+Chaveamento do mata-mata: o grafo puro (bracket_graph) e a propagação no
+banco (bracket_propagation) — classificados de grupo e vencedores/perdedores
+preenchem só as vagas que dependem deles, uma vez.
+"""
+
+import pytest
+
+from bracket_graph import (
+    BracketGraph, SlotUpdate, parse_placeholder, knockout_outcome, is_team_code
+)
+from bracket_propagation import propagate_all, resolve_knockout_winners
+from models import GroupResult, Match, Team
+
+
+@pytest.mark.parametrize('code, source', [
+    ('W73', ('W', 73)), ('L101', ('L', 101)), ('1A', ('1', 'A')), ('2L', ('2', 'L')),
+    ('3ABCDF', None), ('BRA', None), (None, None), ('W', None),
+])
+def test_parse_placeholder(code, source):
+    assert parse_placeholder(code) == source
+
+
+def test_knockout_outcome():
+    assert knockout_outcome(1, 2, 2, 1) == (1, 2)
+    assert knockout_outcome(1, 2, 0, 3) == (2, 1)
+    assert knockout_outcome(1, 2, 1, 1) is None
+    assert knockout_outcome(1, 2, 1, 1, penalty_winner_id=2) == (2, 1)
+    assert knockout_outcome(1, None, 1, 0) is None
+
+
+def test_graph_resolves_each_slot_once():
+    graph = BracketGraph([
+        (73, 'team1', '2A', None), (73, 'team2', '2B', 5),    # 2B já tem time
+        (89, 'team1', 'W73', None), (89, 'team2', 'W74', None),
+        (103, 'team1', 'L89', None), (103, 'team2', 'L90', None),
+    ])
+    assert graph.open_sources == {('2', 'A'), ('W', 73), ('W', 74), ('L', 89), ('L', 90)}
+
+    updates = graph.resolve({('W', 73): 10, ('W', 74): 11, ('L', 99): 12}, {10: 'BRA', 11: 'ARG'})
+
+    assert updates == [SlotUpdate(89, 'team1', 10, 'BRA', 'W73'), SlotUpdate(89, 'team2', 11, 'ARG', 'W74')]
+    assert graph.defined(updates) == [89]
+    assert graph.resolve({('W', 73): 10}, {10: 'BRA'}) == []
+
+
+def test_unknown_team_code_keeps_edge():
+    graph = BracketGraph([(89, 'team1', 'W73', None), (89, 'team2', 'W74', None)])
+    assert graph.resolve({('W', 73): 10}, {}) == []
+    assert ('W', 73) in graph.open_sources
+    assert graph.defined(graph.resolve({('W', 73): 10}, {10: 'BRA'})) == []
+    assert is_team_code('BRA') and not is_team_code('W74') and not is_team_code('3ABCDF')
+
+
+def _knockout(session, number):
+    return session.query(Match).filter_by(match_number=number).one()
+
+
+def test_group_result_fills_round_of_32(session):
+    teams = session.query(Team).filter_by(group='A').order_by(Team.id).all()
+    session.add(GroupResult(group_name='A', first_place_team_id=teams[0].id,
+                            second_place_team_id=teams[1].id))
+    session.commit()
+    slots = {
+        code: (m, side) for m in session.query(Match).filter(Match.phase != 'Grupos')
+        for side, code in (('team1', m.team1_code), ('team2', m.team2_code)) if code in ('1A', '2A')
+    }
+
+    assert propagate_all(session) == 2
+    for code, team in [('1A', teams[0]), ('2A', teams[1])]:
+        match, side = slots[code]
+        assert (getattr(match, f'{side}_id'), getattr(match, f'{side}_code')) == (team.id, team.code)
+    assert propagate_all(session) == 0
+
+
+def test_knockout_winner_and_loser_propagate(session):
+    third_place = session.query(Match).filter(Match.team1_code.like('L%')).one()
+    a, b = int(third_place.team1_code[1:]), int(third_place.team2_code[1:])
+    final = session.query(Match).filter(Match.team1_code == f'W{a}').one()
+    t1, t2, t3, t4 = session.query(Team).order_by(Team.id).limit(4)
+    for number, (home, away), (s1, s2), penalty in [
+        (a, (t1, t2), (2, 0), None),
+        (b, (t3, t4), (1, 1), t4.id),
+    ]:
+        match = _knockout(session, number)
+        match.team1_id, match.team1_code = home.id, home.code
+        match.team2_id, match.team2_code = away.id, away.code
+        match.team1_score, match.team2_score = s1, s2
+        match.penalty_winner_id = penalty
+        match.status = 'finished'
+    session.commit()
+
+    assert resolve_knockout_winners(session, {a}) == 2  # final e 3º lugar, só o lado de `a`
+    assert resolve_knockout_winners(session) == 2
+
+    session.expire_all()
+    assert (final.team1_id, final.team2_id) == (t1.id, t4.id)
+    assert (third_place.team1_id, third_place.team2_id) == (t2.id, t3.id)
+    assert (third_place.team1_code, third_place.team2_code) == (t2.code, t3.code)
+    assert resolve_knockout_winners(session) == 0
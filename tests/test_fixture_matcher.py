@@ -0,0 +1,125 @@
+"""
+Ligação fixture da API → jogo do banco (update_results.FixtureMatcher):
+busca pelo id gravado, pelo par de seleções em qualquer ordem e registro
+dos ids descobertos; migração da coluna matches.api_fixture_id e seu índice
+único.
+"""
+
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+import update_results
+from update_results import FixtureMatcher, ensure_api_fixture_id_column
+from benchmarks.synthetic import api_team_names, fixture_payload
+from models import Match
+
+
+def _pending(session):
+    """Jogos pendentes entre seleções já definidas (com nome na API)."""
+    names = api_team_names()
+    matches = [
+        m for m in session.query(Match).filter(Match.status != 'finished').order_by(Match.match_number)
+        if m.team1_code in names and m.team2_code in names
+    ]
+    return matches, [
+        {'id': m.id, 'match_number': m.match_number, 'team1_code': m.team1_code,
+         'team2_code': m.team2_code, 'api_fixture_id': m.api_fixture_id}
+        for m in matches
+    ]
+
+
+def test_matches_by_pair_in_either_order_and_records_id(session):
+    matches, pending = _pending(session)
+    match = matches[0]
+    fixture = fixture_payload(match, api_team_names(), 'NS', None, None, None)
+    fixture['teams']['home'], fixture['teams']['away'] = fixture['teams']['away'], fixture['teams']['home']
+
+    matcher = FixtureMatcher(pending)
+    found, home_code, away_code = matcher.match(fixture)
+
+    assert found['id'] == match.id
+    assert (home_code, away_code) == (match.team2_code, match.team1_code)
+    assert matcher.new_fixture_ids == {match.id: fixture['fixture']['id']}
+
+
+def test_known_fixture_id_wins_over_pair(session):
+    matches, pending = _pending(session)
+    first, second = matches[:2]
+    pending[1]['api_fixture_id'] = 555
+    # Fixture com as seleções do primeiro jogo, mas id já gravado no segundo
+    fixture = fixture_payload(first, api_team_names(), '1H', 10, 0, 0)
+    fixture['fixture']['id'] = 555
+
+    matcher = FixtureMatcher(pending)
+
+    assert matcher.known_fixture_ids == [555]
+    assert matcher.match(fixture)[0]['id'] == second.id
+    assert matcher.new_fixture_ids == {}
+
+
+def test_unknown_fixture_is_ignored(session):
+    matches, pending = _pending(session)
+    fixture = fixture_payload(matches[0], api_team_names(), 'NS', None, None, None)
+    fixture['teams']['away']['name'] = 'Atlantis'
+
+    assert FixtureMatcher(pending).match(fixture) is None
+    assert FixtureMatcher([]).match(fixture_payload(matches[0], api_team_names(), 'NS', None, None, None)) is None
+
+
+def test_unique_index_rejects_duplicate_fixture_id(session):
+    first, second, third = session.query(Match).order_by(Match.id).limit(3)
+    first.api_fixture_id = 1001
+    session.commit()
+
+    second.api_fixture_id = 1001
+    with pytest.raises(IntegrityError):
+        session.commit()
+    session.rollback()
+
+    # Jogos ainda sem id (NULL) não conflitam entre si
+    assert second.api_fixture_id is None and third.api_fixture_id is None
+
+
+class _RecordingCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def execute(self, sql, params=None):
+        self.conn.statements.append(' '.join(sql.split()))
+
+    def fetchone(self):
+        return (1,) if self.conn.has_column else None
+
+    def close(self):
+        pass
+
+
+class _RecordingConnection:
+    def __init__(self, has_column):
+        self.has_column = has_column
+        self.statements = []
+        self.commits = 0
+
+    def cursor(self):
+        return _RecordingCursor(self)
+
+    def commit(self):
+        self.commits += 1
+
+
+@pytest.mark.parametrize('has_column', [False, True])
+def test_runtime_migration_runs_once(monkeypatch, has_column):
+    monkeypatch.setattr(update_results, '_api_fixture_id_checked', False)
+    conn = _RecordingConnection(has_column)
+
+    ensure_api_fixture_id_column(conn)
+    ensure_api_fixture_id_column(conn)
+
+    ddl = [s for s in conn.statements if not s.startswith('SELECT')]
+    if has_column:
+        assert ddl == [] and conn.commits == 0
+    else:
+        assert ddl[0] == "ALTER TABLE matches ADD COLUMN IF NOT EXISTS api_fixture_id INTEGER"
+        assert ddl[1].startswith("CREATE UNIQUE INDEX IF NOT EXISTS ix_matches_api_fixture_id")
+        assert conn.commits == 1
+    assert len(conn.statements) == len(ddl) + 1  # a segunda chamada não consulta de novo
@@ -0,0 +1,159 @@
+"""
+Daemon ao vivo (live_daemon.LiveDaemon.cycle): intervalo devolvido conforme
+a agenda, conexão devolvida entre jogos, só fixtures que mudaram chegam ao
+banco e jogo encerrado dispara o pós-jogo. O banco e a API são trocados por
+funções falsas em update_results.
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+import pytz
+
+import live_daemon
+import update_results as ur
+from live_daemon import LiveDaemon
+from polling_schedule import HALF_TIME_INTERVAL, LIVE_LEAD
+
+
+def _now():
+    return datetime.now(pytz.timezone('America/Sao_Paulo')).replace(tzinfo=None)
+
+
+def _fixture(fixture_id, status, home, away):
+    return {
+        'fixture': {'id': fixture_id, 'status': {'short': status, 'elapsed': None}},
+        'teams': {'home': {'name': 'Brazil'}, 'away': {'name': 'Morocco'}},
+        'goals': {'home': home, 'away': away},
+        'score': {'fulltime': {'home': None, 'away': None}, 'penalty': {'home': None, 'away': None}},
+    }
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class FakeUpdater:
+    """Estado das funções falsas: jogos pendentes, fixtures ao vivo e o que foi gravado."""
+
+    def __init__(self, kickoff_minutes_ago):
+        self.pending = [{
+            'id': 1, 'match_number': 1, 'team1_code': 'BRA', 'team2_code': 'MAR',
+            'datetime': _now() - timedelta(minutes=kickoff_minutes_ago), 'status': 'scheduled',
+            'team1_score': None, 'team2_score': None, 'phase': 'Grupos', 'group': 'C',
+            'api_fixture_id': 900,
+        }]
+        self.live = []
+        self.processed = []
+        self.connections = []
+        self.pools_closed = 0
+        self.loads = 0
+        self.propagated = 0
+        self.defined = 0  # confrontos definidos pela propagação
+
+    def get_db_connection(self):
+        conn = FakeConnection()
+        self.connections.append(conn)
+        return conn
+
+    def get_pending_matches(self, conn):
+        self.loads += 1
+        return [dict(m) for m in self.pending]
+
+    def process_fixture(self, conn, fixture, matcher, mode='post'):
+        fixture_id = fixture['fixture']['id']
+        if fixture_id not in {m['api_fixture_id'] for m in self.pending}:
+            return False
+        self.processed.append(ur.fixture_state(fixture))
+        if fixture['fixture']['status']['short'] == 'FT':
+            self.pending = [m for m in self.pending if m['api_fixture_id'] != fixture_id]
+        return True
+
+    def propagate_results(self, conn):
+        self.propagated += 1
+        return self.defined
+
+
+@pytest.fixture
+def fake(monkeypatch):
+    def install(kickoff_minutes_ago):
+        updater = FakeUpdater(kickoff_minutes_ago)
+        monkeypatch.setattr(ur, 'get_db_connection', updater.get_db_connection)
+        monkeypatch.setattr(ur, 'get_pending_matches', updater.get_pending_matches)
+        monkeypatch.setattr(ur, 'lock_missing_predictions', lambda conn: None)
+        monkeypatch.setattr(ur, 'get_live_fixtures', lambda: list(updater.live))
+        monkeypatch.setattr(ur, 'get_recent_fixtures', lambda pending: list(updater.live))
+        monkeypatch.setattr(ur, 'process_fixture', updater.process_fixture)
+        monkeypatch.setattr(ur, 'propagate_results', updater.propagate_results)
+        monkeypatch.setattr(ur, 'refresh_ranking_snapshots', lambda: None)
+        monkeypatch.setattr(ur, 'refresh_prize_status', lambda: None)
+        monkeypatch.setattr(ur.FixtureMatcher, 'save_fixture_ids', lambda self, conn: 0)
+        monkeypatch.setattr(live_daemon, 'close_all_pools',
+                            lambda: setattr(updater, 'pools_closed', updater.pools_closed + 1))
+        return updater
+    return install
+
+
+def test_between_matches_sleeps_until_window_and_releases_connection(fake):
+    updater = fake(-30)
+    daemon = LiveDaemon(live_interval=15, health_port=0)
+
+    interval = asyncio.run(daemon.cycle())
+
+    expected = (timedelta(minutes=30) - LIVE_LEAD).total_seconds()
+    assert expected - 5 <= interval <= expected
+    assert daemon._conn is None and updater.connections[0].closed
+    assert updater.pools_closed == 1
+    assert updater.processed == []
+
+
+def test_live_cycle_uses_daemon_interval_and_skips_unchanged(fake):
+    updater = fake(20)
+    daemon = LiveDaemon(live_interval=15, health_port=0)
+
+    async def run():
+        updater.live = [_fixture(900, '1H', 1, 0)]
+        first = await daemon.cycle()
+        second = await daemon.cycle()
+        updater.live = [_fixture(900, '1H', 2, 0)]
+        third = await daemon.cycle()
+        return first, second, third
+
+    assert asyncio.run(run()) == (15, 15, 15)
+    assert updater.processed == [('1H', 1, 0, None, None, None, None), ('1H', 2, 0, None, None, None, None)]
+    assert daemon.metrics['updates'] == 2
+    assert daemon._conn is not None  # conexão mantida durante o jogo
+
+
+def test_half_time_slows_down(fake):
+    fake(50)
+    daemon = LiveDaemon(live_interval=15, health_port=0)
+
+    assert asyncio.run(daemon.cycle()) == HALF_TIME_INTERVAL
+
+
+@pytest.mark.parametrize('defined, loads', [(0, 2), (1, 3)])
+def test_finished_match_reloads_pending_and_runs_after_match(fake, defined, loads):
+    """Confrontos novos na propagação fazem o próximo ciclo reler os pendentes."""
+    updater = fake(115)
+    updater.defined = defined
+    daemon = LiveDaemon(live_interval=15, health_port=0)
+
+    async def run():
+        updater.live = [_fixture(900, 'FT', 2, 1)]
+        await daemon.cycle()
+        await daemon._after_match
+        return await daemon.cycle()
+
+    interval = asyncio.run(run())
+
+    assert updater.processed == [('FT', 2, 1, None, None, None, None)]
+    assert daemon.metrics['finished'] == 1
+    assert updater.propagated == 1 and daemon.metrics['after_match_runs'] == 1
+    assert updater.loads == loads
+    assert daemon._conn is None and interval > HALF_TIME_INTERVAL  # sem jogo pendente
@@ -0,0 +1,75 @@
+"""
+Tabela "e se?" de um jogo ao vivo (live_scoring): pontos e posições de cada
+placar contra o ranking completo com esse placar gravado, e o cache do
+processo (reuso, invalidação e limite de tamanho).
+"""
+
+import pytest
+
+import live_scoring
+from live_scoring import build_whatif_table, get_whatif_table, whatif_live_view
+from models import Match
+from scoring import get_ranking, calculate_match_points, get_scoring_config
+
+
+@pytest.fixture(autouse=True)
+def _empty_cache():
+    live_scoring._whatif_tables.clear()
+    yield
+    live_scoring._whatif_tables.clear()
+
+
+def _in_progress(session):
+    return session.query(Match).filter(
+        Match.status != 'finished', Match.team1_id.isnot(None), Match.team1_score.is_(None)
+    ).order_by(Match.datetime, Match.id).first()
+
+
+@pytest.mark.parametrize('scoreline', [(0, 0), (2, 1), (1, 3)])
+def test_table_matches_ranking_with_that_score(session, scoreline):
+    match = _in_progress(session)
+    table = get_whatif_table(session, match.id)
+
+    match.team1_score, match.team2_score = scoreline
+    session.commit()
+    expected = {r['user_id']: r['posicao'] for r in get_ranking(session)}
+
+    assert {u: row[2] for u, row in table['scorelines'][scoreline].items()} == expected
+
+
+def test_live_view_points(session):
+    match = _in_progress(session)
+    config = get_scoring_config(session)
+    table = build_whatif_table(session, match.id)
+
+    predictions, ranking = whatif_live_view(table, 2, 2)
+
+    assert len(ranking) == len(table['users'])
+    for p in predictions:
+        points, points_type, _ = calculate_match_points(
+            p['pred_team1_score'], p['pred_team2_score'], 2, 2, config
+        )
+        assert (p['points'], p['points_type']) == (points, points_type)
+    assert whatif_live_view(table, 9, 0) is None
+
+
+def test_cache_reused_until_another_match_changes(session):
+    match = _in_progress(session)
+    table = get_whatif_table(session, match.id)
+    assert get_whatif_table(session, match.id) is table
+
+    other = session.query(Match).filter(Match.team1_score.isnot(None)).first()
+    other.team1_score += 1
+    session.commit()
+
+    assert get_whatif_table(session, match.id) is not table
+
+
+def test_cache_is_bounded(session, monkeypatch):
+    monkeypatch.setattr(live_scoring, 'WHATIF_CACHE_SIZE', 2)
+    match_ids = [m.id for m in session.query(Match).filter(Match.team1_score.isnot(None)).limit(3)]
+
+    for match_id in match_ids:
+        get_whatif_table(session, match_id)
+
+    assert list(live_scoring._whatif_tables) == match_ids[1:]
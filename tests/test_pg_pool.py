@@ -0,0 +1,131 @@
+"""
+Pool psycopg2 dos crons (pg_pool): vagas limitadas com espera e timeout,
+devolução com rollback e descarte de conexões quebradas. Sem Postgres aqui,
+o ThreadedConnectionPool é trocado por um pool falso com a mesma interface.
+"""
+
+import threading
+import time
+
+import psycopg2
+import pytest
+from psycopg2.pool import PoolError
+
+import pg_pool
+
+DSN = 'dbname=teste'
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = 0
+        self.in_transaction = False
+        self.rollbacks = 0
+        self._last_used = time.monotonic()
+
+    def get_transaction_status(self):
+        if self.closed:
+            raise psycopg2.InterfaceError("connection already closed")
+        if self.in_transaction:
+            return psycopg2.extensions.TRANSACTION_STATUS_INTRANS
+        return psycopg2.extensions.TRANSACTION_STATUS_IDLE
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.in_transaction = False
+
+
+class FakePool:
+    """Mesma interface usada de ThreadedConnectionPool (getconn/putconn, _used, _pool)."""
+
+    def __init__(self):
+        self._pool = []
+        self._used = {}
+        self.closed_conns = []
+
+    def getconn(self):
+        conn = self._pool.pop() if self._pool else FakeConnection()
+        self._used[id(conn)] = conn
+        return conn
+
+    def putconn(self, conn, close=False):
+        del self._used[id(conn)]
+        if close:
+            self.closed_conns.append(conn)
+        else:
+            self._pool.append(conn)
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    fake = FakePool()
+    monkeypatch.setattr(pg_pool, '_pools', {DSN: fake})
+    monkeypatch.setattr(pg_pool, '_slots', {DSN: threading.BoundedSemaphore(pg_pool.PG_POOL_MAX)})
+    monkeypatch.setattr(pg_pool, '_metrics', dict.fromkeys(pg_pool._metrics, 0))
+    return fake
+
+
+def test_full_pool_times_out(pool):
+    conns = [pg_pool.get_pooled_connection(DSN) for _ in range(pg_pool.PG_POOL_MAX)]
+
+    with pytest.raises(PoolError):
+        pg_pool.get_pooled_connection(DSN, timeout=0.05)
+
+    assert pg_pool.get_pool_metrics()['waits'] == 1
+    assert pg_pool.get_pool_metrics()['in_use'] == pg_pool.PG_POOL_MAX
+    for conn in conns:
+        conn.close()
+    assert pg_pool.get_pool_metrics()['in_use'] == 0
+
+
+def test_waiting_checkout_gets_returned_connection(pool):
+    conns = [pg_pool.get_pooled_connection(DSN) for _ in range(pg_pool.PG_POOL_MAX)]
+    returned = conns[0]._conn
+    threading.Timer(0.05, conns[0].close).start()
+
+    conn = pg_pool.get_pooled_connection(DSN, timeout=5)
+
+    assert conn._conn is returned
+    assert pg_pool.get_pool_metrics()['waits'] == 1
+    conn.close()
+    for c in conns[1:]:
+        c.close()
+
+
+def test_close_rolls_back_and_reuses(pool):
+    conn = pg_pool.get_pooled_connection(DSN)
+    raw = conn._conn
+    raw.in_transaction = True
+    conn.close()
+    conn.close()  # segunda chamada não devolve de novo
+
+    assert raw.rollbacks == 1
+    again = pg_pool.get_pooled_connection(DSN)
+    assert again._conn is raw
+    again.close()
+
+
+def test_broken_connection_is_discarded_on_close(pool):
+    conn = pg_pool.get_pooled_connection(DSN)
+    raw = conn._conn
+    raw.closed = 2
+    conn.close()
+
+    assert pool.closed_conns == [raw]
+    assert pg_pool.get_pool_metrics()['discarded'] == 1
+    assert pg_pool.get_pooled_connection(DSN)._conn is not raw
+
+
+def test_stale_dead_connection_is_replaced(pool, monkeypatch):
+    monkeypatch.setattr(pg_pool, '_alive', lambda conn: False)
+    conn = pg_pool.get_pooled_connection(DSN)
+    raw = conn._conn
+    conn.close()
+    raw._last_used -= pg_pool.PG_PRE_PING_AFTER + 1
+
+    replacement = pg_pool.get_pooled_connection(DSN)
+
+    assert replacement._conn is not raw
+    assert pool.closed_conns == [raw]
+    metrics = pg_pool.get_pool_metrics()
+    assert (metrics['pre_pings'], metrics['discarded']) == (1, 1)
@@ -0,0 +1,71 @@
+"""
+Cadência de consulta à API (polling_schedule.plan_poll): janela ao vivo,
+intervalo do jogo limitado ao fim de HALF_TIME_WINDOW, espera pelo
+resultado e sono até a próxima janela.
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from polling_schedule import (
+    plan_poll, LIVE_INTERVAL, HALF_TIME_INTERVAL, POST_INTERVAL, MAX_IDLE_SLEEP,
+    LIVE_LEAD, HALF_TIME_WINDOW, MATCH_LENGTH, EXTRA_TIME_LENGTH, POST_GRACE
+)
+
+KICKOFF = datetime(2026, 6, 20, 16, 0)
+
+
+def _match(kickoff=KICKOFF, phase='Grupos', number=1):
+    return {'match_number': number, 'datetime': kickoff, 'phase': phase}
+
+
+@pytest.mark.parametrize('minutes, live, post, interval', [
+    (-60, False, False, int((timedelta(minutes=60) - LIVE_LEAD).total_seconds())),
+    (-4, True, False, LIVE_INTERVAL),
+    (20, True, False, LIVE_INTERVAL),
+    (110, True, True, LIVE_INTERVAL),
+    (130, False, True, POST_INTERVAL),
+])
+def test_windows(minutes, live, post, interval):
+    plan = plan_poll(KICKOFF + timedelta(minutes=minutes), [_match()])
+    assert (plan.live, plan.post, plan.interval) == (live, post, interval)
+
+
+def test_half_time_by_clock_is_capped_at_window_end():
+    now = KICKOFF + timedelta(minutes=59)
+    plan = plan_poll(now, [_match()])
+    assert plan.interval == 180  # só até os 62 minutos
+
+    plan = plan_poll(KICKOFF + timedelta(minutes=49), [_match()])
+    assert plan.interval == HALF_TIME_INTERVAL
+
+
+def test_half_time_status_expires_after_window():
+    inside = KICKOFF + timedelta(minutes=40)
+    assert plan_poll(inside, [_match()], live_statuses=['HT']).interval == HALF_TIME_INTERVAL
+    assert plan_poll(inside, [_match()], live_statuses=['2H']).interval == LIVE_INTERVAL
+
+    late = KICKOFF + HALF_TIME_WINDOW[1] + timedelta(minutes=1)
+    assert plan_poll(late, [_match()], live_statuses=['HT']).interval == LIVE_INTERVAL
+
+
+def test_any_match_live_keeps_live_interval():
+    other = _match(KICKOFF + timedelta(minutes=-30), number=2)
+    plan = plan_poll(KICKOFF + timedelta(minutes=50), [_match(), other], live_statuses=['HT', '2H'])
+    assert plan.interval == LIVE_INTERVAL
+
+
+def test_knockout_window_covers_extra_time():
+    now = KICKOFF + MATCH_LENGTH + EXTRA_TIME_LENGTH - timedelta(minutes=1)
+    assert plan_poll(now, [_match(phase='Oitavas')]).live
+    assert not plan_poll(now, [_match()]).live
+
+
+def test_idle():
+    assert plan_poll(KICKOFF, []).interval == MAX_IDLE_SLEEP
+    after_grace = KICKOFF + MATCH_LENGTH + POST_GRACE + timedelta(minutes=1)
+    plan = plan_poll(after_grace, [_match()])
+    assert (plan.live, plan.post, plan.interval) == (False, False, MAX_IDLE_SLEEP)
+    far = plan_poll(KICKOFF - timedelta(days=2), [_match()])
+    assert far.interval == MAX_IDLE_SLEEP
@@ -0,0 +1,101 @@
+"""
+Gravação de palpites em lote (predictions.save_predictions_bulk): insere os
+que faltam, atualiza os existentes e deixa de fora jogos já iniciados e
+palpites travados, num único comando.
+"""
+
+from datetime import datetime
+
+import pytest
+
+from models import Match, Prediction, User
+from predictions import save_predictions_bulk, MAX_GOLS_PALPITE
+
+
+@pytest.fixture
+def user_id(session):
+    return session.query(User.id).filter(User.role != 'admin').order_by(User.id).first()[0]
+
+
+def _upcoming(session, n):
+    return [m.id for m in session.query(Match).filter(Match.status == 'scheduled', Match.team1_score.is_(None))
+            .order_by(Match.datetime.desc()).limit(n)]
+
+
+def _prediction(session, user_id, match_id):
+    session.expire_all()
+    return session.query(Prediction).filter_by(user_id=user_id, match_id=match_id).first()
+
+
+def test_inserts_missing_and_updates_existing(session, user_id):
+    new_id, existing_id = _upcoming(session, 2)
+    session.query(Prediction).filter_by(user_id=user_id, match_id=new_id).delete()
+    session.commit()
+
+    saved = save_predictions_bulk(session, user_id, {new_id: (2, 1), existing_id: (0, 4)})
+    session.commit()
+
+    assert saved == {new_id, existing_id}
+    for match_id, score in [(new_id, (2, 1)), (existing_id, (0, 4))]:
+        pred = _prediction(session, user_id, match_id)
+        assert (pred.pred_team1_score, pred.pred_team2_score) == score
+    assert session.query(Prediction).filter_by(user_id=user_id, match_id=new_id).count() == 1
+
+
+def test_started_matches_are_skipped(session, user_id):
+    started = session.query(Match).join(Prediction).filter(
+        Match.status == 'finished', Prediction.user_id == user_id
+    ).first()
+    before = _prediction(session, user_id, started.id)
+    before_score = (before.pred_team1_score, before.pred_team2_score)
+    (upcoming,) = _upcoming(session, 1)
+
+    saved = save_predictions_bulk(session, user_id, {started.id: (9, 9), upcoming: (1, 1)})
+    session.commit()
+
+    assert saved == {upcoming}
+    after = _prediction(session, user_id, started.id)
+    assert (after.pred_team1_score, after.pred_team2_score) == before_score
+
+
+def test_locked_prediction_is_not_updated(session, user_id):
+    (match_id,) = _upcoming(session, 1)
+    pred = _prediction(session, user_id, match_id)
+    pred.pred_team1_score, pred.pred_team2_score = 1, 0
+    pred.locked_at = datetime.utcnow()
+    session.commit()
+
+    assert save_predictions_bulk(session, user_id, {match_id: (3, 3)}) == set()
+    session.commit()
+    pred = _prediction(session, user_id, match_id)
+    assert (pred.pred_team1_score, pred.pred_team2_score) == (1, 0)
+
+
+def test_manual_confirmation_never_reverts(session, user_id):
+    (match_id,) = _upcoming(session, 1)
+
+    save_predictions_bulk(session, user_id, {match_id: (1, 2)}, manually_confirmed=True)
+    session.commit()
+    save_predictions_bulk(session, user_id, {match_id: (2, 2)}, manually_confirmed=False)
+    session.commit()
+
+    pred = _prediction(session, user_id, match_id)
+    assert pred.manually_confirmed
+    assert (pred.pred_team1_score, pred.pred_team2_score) == (2, 2)
+
+
+@pytest.mark.parametrize('score', [(-1, 0), (0, MAX_GOLS_PALPITE + 1), ('1', 0), (None, 2)])
+def test_invalid_score_rejects_whole_batch(session, user_id, score):
+    valid, invalid = _upcoming(session, 2)
+    before = _prediction(session, user_id, valid)
+    before_score = (before.pred_team1_score, before.pred_team2_score)
+
+    with pytest.raises(ValueError):
+        save_predictions_bulk(session, user_id, {valid: (5, 5), invalid: score})
+
+    after = _prediction(session, user_id, valid)
+    assert (after.pred_team1_score, after.pred_team2_score) == before_score
+
+
+def test_empty_batch(session, user_id):
+    assert save_predictions_bulk(session, user_id, {}) == set()
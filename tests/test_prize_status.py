@@ -0,0 +1,104 @@
+"""
+Garantidos e eliminados da premiação (prize_status): a busca branch and
+bound de compute_prize_status contra força bruta sobre todas as combinações
+de classes dos eventos acoplados, em casos pequenos sorteados.
+"""
+
+import itertools
+import random
+
+import pytest
+
+from prize_status import (
+    compute_prize_status, refresh_prize_status, get_prize_status,
+    PRIZE_POSITIONS, CLINCHED, ELIMINATED, ALIVE
+)
+
+
+def brute_force_positions(current, free_max, free_min, events):
+    """(melhor, pior) posição de cada participante testando todo cenário acoplado."""
+    n = len(current)
+    best = [n] * n
+    worst = [1] * n
+    for choice in itertools.product(*[range(len(e)) for e in events]):
+        totals = list(current)
+        for event, k in zip(events, choice):
+            totals = [t + p for t, p in zip(totals, event[k])]
+        for u in range(n):
+            rivals = [r for r in range(n) if r != u]
+            # u no máximo da parte livre e rivais no mínimo; empate a favor de u
+            ahead = sum(totals[r] + free_min[r] > totals[u] + free_max[u] for r in rivals)
+            # o contrário; empate contra u
+            behind = sum(totals[r] + free_max[r] < totals[u] + free_min[u] for r in rivals)
+            best[u] = min(best[u], 1 + ahead)
+            worst[u] = max(worst[u], n - behind)
+    return best, worst
+
+
+def _random_case(rng):
+    n = rng.randint(2, 7)
+    current = [rng.randint(0, 40) for _ in range(n)]
+    free_min = [rng.randint(0, 3) for _ in range(n)]
+    free_max = [m + rng.choice([0, 0, 5, 20]) for m in free_min]
+    events = [
+        [[rng.choice([0, 5, 10, 15, 20]) for _ in range(n)] for _ in range(rng.randint(1, 4))]
+        for _ in range(rng.randint(0, 4))
+    ]
+    return current, free_max, free_min, events
+
+
+def test_branch_and_bound_matches_brute_force():
+    rng = random.Random(2026)
+    for trial in range(300):
+        case = _random_case(rng)
+        best, worst = brute_force_positions(*case)
+
+        results = compute_prize_status(*case, budget=10 ** 6)
+
+        assert [r['melhor_posicao'] for r in results] == best, (trial, case)
+        assert [r['pior_posicao'] for r in results] == worst, (trial, case)
+        assert all(r['exato'] for r in results)
+        for r in results:
+            if r['pior_posicao'] <= PRIZE_POSITIONS:
+                assert r['status'] == CLINCHED
+            elif r['melhor_posicao'] > PRIZE_POSITIONS:
+                assert r['status'] == ELIMINATED
+            else:
+                assert r['status'] == ALIVE
+
+
+def test_exhausted_budget_keeps_safe_bounds():
+    """Sem orçamento, os limites ficam folgados — nunca mais apertados que o real."""
+    rng = random.Random(7)
+    for _ in range(100):
+        case = _random_case(rng)
+        best, worst = brute_force_positions(*case)
+
+        results = compute_prize_status(*case, budget=0)
+
+        for r, b, w in zip(results, best, worst):
+            assert r['melhor_posicao'] <= b
+            assert r['pior_posicao'] >= w
+
+
+def test_finished_uses_official_positions():
+    results = compute_prize_status([30, 30, 10, 5], [0] * 4, [0] * 4, [], final_positions=[2, 1, 3, 4])
+
+    assert [r['melhor_posicao'] for r in results] == [2, 1, 3, 4]
+    assert [r['status'] for r in results] == [CLINCHED, CLINCHED, CLINCHED, ELIMINATED]
+
+
+def test_refresh_stores_one_row_per_participant(session):
+    rows = refresh_prize_status(session)
+    stored = get_prize_status(session)
+
+    assert {r['user_id'] for r in rows} == set(stored)
+    for r in rows:
+        assert stored[r['user_id']]['status'] == r['status']
+        assert r['melhor_posicao'] <= r['pior_posicao']
+
+
+@pytest.mark.parametrize('n', [1, 2])
+def test_single_or_pair_always_clinched(n):
+    results = compute_prize_status([10] * n, [5] * n, [0] * n, [[[0] * n, [10] * n]])
+    assert all(r['status'] == CLINCHED for r in results)
@@ -0,0 +1,83 @@
+"""
+Fotos diárias do ranking (ranking_snapshots): gravação por dia de jogo,
+detecção de fotos desatualizadas pelo hash, leitura sem gravar e limpeza de
+dias que deixaram de ter jogo com placar.
+"""
+
+from models import Match, RankingSnapshot
+from ranking_snapshots import (
+    get_match_days, refresh_snapshots, rebuild_snapshots, get_snapshot_positions,
+    get_positions_by_day, snapshot_cutoff, _stored_digests
+)
+from scoring import get_ranking
+
+
+def _positions(session, day):
+    ranking = get_ranking(session, cutoff_datetime=snapshot_cutoff(day))
+    return {r['user_id']: r['posicao'] for r in ranking}
+
+
+def _matches_on(session, day):
+    return [m for m in session.query(Match).filter(Match.team1_score.isnot(None))
+            if m.datetime.date() == day]
+
+
+def test_refresh_writes_every_match_day_once(session):
+    days = get_match_days(session)
+    assert len(days) > 2
+
+    assert refresh_snapshots(session) == days
+    assert refresh_snapshots(session) == []
+
+    snapshots = get_snapshot_positions(session)
+    assert sorted(snapshots) == days
+    for day in days:
+        assert snapshots[day] == _positions(session, day)
+
+
+def test_score_correction_makes_that_day_and_later_stale(session):
+    refresh_snapshots(session)
+    days = get_match_days(session)
+    day = days[1]
+    match = _matches_on(session, day)[0]
+    match.team2_score += 2
+    session.commit()
+
+    assert refresh_snapshots(session) == days[1:]
+    for d in days:
+        assert get_snapshot_positions(session, [d])[d] == _positions(session, d)
+
+
+def test_positions_by_day_is_read_only(session):
+    refresh_snapshots(session)
+    days = get_match_days(session)
+    match = _matches_on(session, days[0])[0]
+    match.team1_score += 3
+    session.commit()
+    stored = _stored_digests(session)
+    rows = session.query(RankingSnapshot).count()
+
+    positions = get_positions_by_day(session, days)
+
+    assert positions == {d: _positions(session, d) for d in days}
+    assert _stored_digests(session) == stored
+    assert session.query(RankingSnapshot).count() == rows
+    assert refresh_snapshots(session) == days
+
+
+def test_day_without_scores_is_pruned(session):
+    refresh_snapshots(session)
+    days = get_match_days(session)
+    last = days[-1]
+    for match in _matches_on(session, last):
+        match.team1_score = match.team2_score = None
+    session.commit()
+
+    assert refresh_snapshots(session) == []
+    assert sorted(get_snapshot_positions(session)) == days[:-1]
+    assert last.isoformat() not in _stored_digests(session)
+
+
+def test_rebuild_rewrites_every_day(session):
+    refresh_snapshots(session)
+    assert rebuild_snapshots(session) == get_match_days(session)
@@ -0,0 +1,83 @@
+"""
+Ranking incremental (ranking_state) contra o cálculo completo de
+scoring.get_ranking: primeira sincronização, correção de placar, palpite
+novo acima da marca d'água e descarte do estado.
+"""
+
+from datetime import datetime
+
+from models import Match, Prediction, RankingState
+from ranking_state import (
+    sync_ranking_state, get_incremental_ranking, clear_ranking_state, _get_watermark
+)
+from scoring import get_ranking
+
+
+def _scored_ids(session):
+    return {m.id for m in session.query(Match).filter(Match.team1_score.isnot(None))}
+
+
+def test_first_sync_applies_every_scored_match(session):
+    applied = sync_ranking_state(session)
+
+    assert set(applied) == _scored_ids(session)
+    assert get_incremental_ranking(session) == get_ranking(session)
+    assert sync_ranking_state(session) == []
+
+
+def test_score_correction_reapplies_only_that_match(session):
+    sync_ranking_state(session)
+    match = session.query(Match).filter(Match.team1_score.isnot(None)).first()
+    match.team1_score += 1
+    session.commit()
+
+    assert sync_ranking_state(session) == [match.id]
+    assert get_incremental_ranking(session) == get_ranking(session)
+
+
+def test_removed_score_unapplies_match(session):
+    sync_ranking_state(session)
+    match = session.query(Match).filter(Match.team1_score.isnot(None)).first()
+    match.team1_score = match.team2_score = None
+    session.commit()
+
+    assert sync_ranking_state(session) == [match.id]
+    assert get_incremental_ranking(session) == get_ranking(session)
+
+
+def test_new_prediction_above_watermark_reapplies_match(session):
+    """Ex.: o 0x0 automático inserido quando o jogo começa, sem mudar o placar."""
+    match = session.query(Match).filter(Match.team1_score.isnot(None)).first()
+    removed = session.query(Prediction).filter_by(match_id=match.id).first()
+    user_id = removed.user_id
+    session.delete(removed)
+    session.commit()
+    sync_ranking_state(session)
+    watermark = _get_watermark(session)
+
+    session.add(Prediction(
+        user_id=user_id, match_id=match.id, pred_team1_score=match.team1_score,
+        pred_team2_score=match.team2_score, created_at=datetime.utcnow()
+    ))
+    session.commit()
+
+    assert sync_ranking_state(session) == [match.id]
+    assert _get_watermark(session) > watermark
+    assert get_incremental_ranking(session) == get_ranking(session)
+
+
+def test_exclude_match_matches_full_ranking(session):
+    match_id = min(_scored_ids(session))
+
+    assert (get_incremental_ranking(session, exclude_match_id=match_id)
+            == get_ranking(session, exclude_match_id=match_id))
+
+
+def test_clear_forces_full_rebuild(session):
+    sync_ranking_state(session)
+    clear_ranking_state(session)
+    session.commit()
+
+    assert session.query(RankingState).count() == 0
+    assert set(sync_ranking_state(session)) == _scored_ids(session)
+    assert get_incremental_ranking(session) == get_ranking(session)
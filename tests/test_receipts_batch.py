@@ -0,0 +1,96 @@
+"""
+Comprovantes em lote (receipts_batch): o manifest.json faz a segunda
+execução pular quem não mudou; palpite alterado, nome novo, arquivo apagado
+e force=True renderizam de novo.
+"""
+
+import json
+import os
+import zipfile
+
+import pytest
+
+from models import Match, Prediction, User
+from receipts_batch import MANIFEST_NAME, generate_receipts, receipt_filename
+
+# pdf_generator usa a API antiga do fpdf2 (cell com ln=, output(dest=))
+pytestmark = pytest.mark.filterwarnings('ignore::DeprecationWarning')
+
+
+@pytest.fixture
+def first_run(session, tmp_path):
+    out_dir = str(tmp_path / 'comprovantes')
+    result = generate_receipts(session, out_dir)
+    return out_dir, result
+
+
+def test_first_run_renders_everyone(first_run):
+    out_dir, result = first_run
+
+    assert result['rendered'] == len(result['files']) > 0 and result['unchanged'] == 0
+    with open(os.path.join(out_dir, MANIFEST_NAME)) as f:
+        manifest = json.load(f)
+    assert {int(uid) for uid in manifest} == set(result['files'])
+    for filename in result['files'].values():
+        with open(os.path.join(out_dir, filename), 'rb') as f:
+            assert f.read(5) == b'%PDF-'
+
+
+def test_unchanged_are_skipped_and_force_renders_all(session, first_run):
+    out_dir, first = first_run
+
+    again = generate_receipts(session, out_dir)
+    forced = generate_receipts(session, out_dir, force=True)
+
+    assert (again['rendered'], again['unchanged']) == (0, len(first['files']))
+    assert (forced['rendered'], forced['unchanged']) == (len(first['files']), 0)
+
+
+def test_changed_prediction_renders_only_that_user(session, first_run):
+    out_dir, first = first_run
+    pred = session.query(Prediction).join(Match).filter(Match.status == 'scheduled').first()
+    pred.pred_team1_score += 1
+    session.commit()
+
+    result = generate_receipts(session, out_dir)
+
+    assert (result['rendered'], result['unchanged']) == (1, len(first['files']) - 1)
+
+
+def test_renamed_user_replaces_old_file(session, first_run):
+    out_dir, first = first_run
+    user = session.query(User).filter(User.id.in_(first['files'])).first()
+    old_file = first['files'][user.id]
+    user.name = 'Nome Novo'
+    session.commit()
+
+    result = generate_receipts(session, out_dir)
+
+    assert result['rendered'] == 1
+    assert result['files'][user.id] == receipt_filename(user.id, 'Nome Novo')
+    assert not os.path.exists(os.path.join(out_dir, old_file))
+    assert os.path.exists(os.path.join(out_dir, result['files'][user.id]))
+
+
+def test_missing_file_is_rendered_again(session, first_run, tmp_path):
+    out_dir, first = first_run
+    filename = next(iter(first['files'].values()))
+    os.remove(os.path.join(out_dir, filename))
+    zip_path = str(tmp_path / 'comprovantes.zip')
+
+    result = generate_receipts(session, out_dir, zip_path=zip_path)
+
+    assert result['rendered'] == 1
+    with zipfile.ZipFile(zip_path) as zf:
+        assert sorted(zf.namelist()) == sorted(first['files'].values())
+
+
+def test_subset_keeps_other_entries(session, first_run):
+    out_dir, first = first_run
+    user_id = next(iter(first['files']))
+
+    result = generate_receipts(session, out_dir, user_ids=[user_id], force=True)
+
+    assert result['files'] == {user_id: first['files'][user_id]}
+    with open(os.path.join(out_dir, MANIFEST_NAME)) as f:
+        assert len(json.load(f)) == len(first['files'])
@@ -0,0 +1,111 @@
+"""
+Regras de pontuação por jogo: scoring_rules (tabela pré-calculada, lote
+NumPy e lote em Python puro) contra uma referência independente — o
+if/else original de scoring.calculate_match_points, escrito de novo aqui
+sem reaproveitar nada de scoring_rules.
+
+Uso:
+    python -m pytest tests
+"""
+
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import scoring
+import scoring_rules
+from scoring_rules import POINTS_TYPES, BREAKDOWNS, LOOKUP_MAX_GOALS, calculate_match_points_batch
+
+# Valores diferentes entre si, para um tipo trocado não passar despercebido
+CONFIG = {'placar_exato': 20, 'resultado_gols': 15, 'resultado': 10, 'gols': 5, 'nenhum': 1}
+
+# Cobre a tabela pré-calculada (0 a 10 gols) e palpites acima dela
+MAX_GOLS = LOOKUP_MAX_GOALS + 2
+
+
+def reference_match_points(pred_team1, pred_team2, real_team1, real_team2, config):
+    """As regras do bolão, como eram escritas em scoring.py antes do lote."""
+    if pred_team1 > pred_team2:
+        pred_result = 'team1'
+    elif pred_team1 < pred_team2:
+        pred_result = 'team2'
+    else:
+        pred_result = 'draw'
+
+    if real_team1 > real_team2:
+        real_result = 'team1'
+    elif real_team1 < real_team2:
+        real_result = 'team2'
+    else:
+        real_result = 'draw'
+
+    acertou_resultado = pred_result == real_result
+    acertou_gols_team1 = pred_team1 == real_team1
+    acertou_gols_team2 = pred_team2 == real_team2
+
+    if acertou_gols_team1 and acertou_gols_team2:
+        return config['placar_exato'], 'placar_exato', "Placar exato! 🎯"
+    elif acertou_resultado and (acertou_gols_team1 or acertou_gols_team2):
+        return config['resultado_gols'], 'resultado_gols', "Resultado + gols de um time ✓"
+    elif acertou_resultado:
+        return config['resultado'], 'resultado', "Resultado correto ✓"
+    elif acertou_gols_team1 or acertou_gols_team2:
+        return config['gols'], 'gols', "Gols de um time ✓"
+    else:
+        return config['nenhum'], 'nenhum', "Não pontuou"
+
+
+ALL_CASES = [
+    (p1, p2, r1, r2)
+    for p1 in range(MAX_GOLS + 1) for p2 in range(MAX_GOLS + 1)
+    for r1 in range(MAX_GOLS + 1) for r2 in range(MAX_GOLS + 1)
+]
+
+
+def _columns(cases):
+    return tuple(list(col) for col in zip(*cases))
+
+
+@pytest.mark.parametrize('calculate', [scoring.calculate_match_points, scoring_rules.calculate_match_points])
+def test_scalar_matches_reference(calculate):
+    for case in ALL_CASES:
+        assert calculate(*case, CONFIG) == reference_match_points(*case, CONFIG), case
+
+
+@pytest.mark.parametrize('use_numpy', [True, False])
+def test_batch_matches_reference(monkeypatch, use_numpy):
+    if use_numpy and scoring_rules.np is None:
+        pytest.skip("NumPy não instalado")
+    if not use_numpy:
+        monkeypatch.setattr(scoring_rules, 'np', None)
+
+    points, codes = calculate_match_points_batch(*_columns(ALL_CASES), CONFIG)
+
+    assert len(points) == len(codes) == len(ALL_CASES)
+    for case, pts, code in zip(ALL_CASES, points, codes):
+        exp_points, exp_type, exp_breakdown = reference_match_points(*case, CONFIG)
+        assert (pts, POINTS_TYPES[code], BREAKDOWNS[code]) == (exp_points, exp_type, exp_breakdown), case
+
+
+@pytest.mark.parametrize('use_numpy', [True, False])
+def test_batch_broadcasts_single_result(monkeypatch, use_numpy):
+    """Placar real único para todos os palpites — o caminho usado por jogo."""
+    if use_numpy and scoring_rules.np is None:
+        pytest.skip("NumPy não instalado")
+    if not use_numpy:
+        monkeypatch.setattr(scoring_rules, 'np', None)
+
+    rng = random.Random(42)
+    p1 = [rng.randint(0, 15) for _ in range(2000)]
+    p2 = [rng.randint(0, 15) for _ in range(2000)]
+    for r1, r2 in [(0, 0), (2, 1), (1, 3), (14, 14)]:
+        points, _ = calculate_match_points_batch(p1, p2, r1, r2, CONFIG)
+        assert points == [reference_match_points(a, b, r1, r2, CONFIG)[0] for a, b in zip(p1, p2)]
+
+
+def test_batch_empty():
+    assert calculate_match_points_batch([], [], [], [], CONFIG) == ([], [])
@@ -0,0 +1,49 @@
+"""
+Simulador Monte Carlo (tournament_simulator): saída coerente (uma posição
+por sorteio, pontos atuais iguais ao ranking), reprodutibilidade com semente
+e tamanho dos blocos pelo orçamento de memória.
+"""
+
+import pytest
+
+from scoring import get_ranking
+from tournament_simulator import (
+    load_model, simulate, chunk_size_for, CHUNK_SIZE, BYTES_PER_CELL
+)
+
+
+@pytest.fixture
+def model(session):
+    return load_model(session, source='fifa')
+
+
+def test_each_draw_has_one_first_second_and_third(model):
+    result = simulate(model, n_simulations=600, seed=1, chunk_size=250)
+
+    assert result['simulations'] == 600
+    for key in ('p_primeiro', 'p_segundo', 'p_terceiro'):
+        assert sum(r[key] for r in result['rows']) == pytest.approx(1.0)
+    chances = [r['p_primeiro'] for r in result['rows']]
+    assert chances == sorted(chances, reverse=True)
+
+
+def test_current_points_match_ranking(session, model):
+    result = simulate(model, n_simulations=200, seed=2)
+    ranking = {r['user_id']: r['total_pontos'] for r in get_ranking(session)}
+
+    assert {r['user_id']: r['pontos_atuais'] for r in result['rows']} == ranking
+    for r in result['rows']:
+        assert r['pontos_medios'] >= r['pontos_atuais']
+
+
+def test_same_seed_same_result(model):
+    first = simulate(model, n_simulations=500, seed=3, chunk_size=200)
+    second = simulate(model, n_simulations=500, seed=3, chunk_size=200)
+
+    assert first['rows'] == second['rows']
+
+
+def test_chunk_size_fits_budget():
+    assert chunk_size_for(1) == CHUNK_SIZE
+    assert chunk_size_for(1000, budget=1000 * BYTES_PER_CELL * 300) == 300
+    assert chunk_size_for(10 ** 9, budget=1) == 1
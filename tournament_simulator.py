@@ -0,0 +1,649 @@
+"""
+Simulação Monte Carlo do bolão
+
+Sorteia os jogos que faltam milhares de vezes e pontua cada sorteio com as
+regras do bolão (scoring_rules), para estimar a chance de cada participante
+terminar em 1º, 2º, 3º ou na zona de rebaixamento.
+
+Modelo:
+  - força das seleções: pontos do Power Ranking FIFA (pagina_dicas.py) ou um
+    Elo calculado da tabela international_results (auto_update.py)
+  - gols: Poisson, com média que cresce/diminui com a diferença de força
+  - grupos: pontos, saldo e gols pró; empate restante é sorteado (o confronto
+    direto de scoring_rules não é aplicado aqui)
+  - 8 melhores terceiros: entram nas vagas "3ABCDF" de copa2026_data pela
+    primeira distribuição válida (aproximação da tabela oficial da FIFA)
+  - mata-mata: empate no placar vai para os pênaltis (50%)
+  - jogos já encerrados, confrontos já definidos e classificações de grupo já
+    registradas são fixos em todos os sorteios
+
+Tudo é vetorizado com numpy: cada bloco de sorteios simula o torneio inteiro
+de uma vez (um vetor por jogo). Com workers > 1, os blocos rodam em processos
+separados.
+
+Uso no app:
+    model = load_model(session)
+    result = simulate(model, n_simulations=100_000)
+"""
+
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import scoring_rules as rules
+from copa2026_data import ALL_MATCHES
+from pagina_dicas import POWER_RANKING
+
+DEFAULT_SIMULATIONS = 100_000
+# Teto de sorteios por bloco; o tamanho real vem do orçamento de memória
+CHUNK_SIZE = 20_000
+# Memória por bloco: os arrays grandes são (sorteios x participantes) — totais,
+# exatos, temporários dos palpites de grupo/pódio e a ordenação final. Medido:
+# ~58 bytes por célula (584 MB com 500 participantes e 20.000 sorteios).
+SIM_MEMORY_BUDGET = int(os.environ.get('SIM_MEMORY_BUDGET_MB', '256')) * 1024 * 1024
+BYTES_PER_CELL = 64
+
+# Modelo de gols
+BASE_GOALS = 1.3            # média de gols de cada seleção num jogo equilibrado
+RATING_GOAL_FACTOR = 0.0015  # 400 pontos de diferença ≈ 2,4 x 0,7 gols
+HOST_BONUS = 60             # EUA, México e Canadá jogam em casa
+HOST_CODES = {'USA', 'MEX', 'CAN'}
+DEFAULT_RATING = 1500       # seleções sem rating (ex.: vindas da repescagem)
+MAX_GOALS = rules.LOOKUP_MAX_GOALS
+SCORE_CELLS = (MAX_GOALS + 1) ** 2
+
+# Elo a partir de international_results
+ELO_START = 1500
+ELO_K = 40
+ELO_HOME_ADVANTAGE = 100
+ELO_SINCE = '2014-01-01'
+
+# Nome usado em international_results → código da seleção no banco
+RESULTS_NAME_TO_CODE = {
+    "Algeria": "ALG", "Argentina": "ARG", "Australia": "AUS", "Austria": "AUT",
+    "Belgium": "BEL", "Bosnia and Herzegovina": "BIH", "Brazil": "BRA",
+    "Canada": "CAN", "Cape Verde": "CPV", "Colombia": "COL", "DR Congo": "COD",
+    "Croatia": "CRO", "Curaçao": "CUW", "Czech Republic": "CZE", "Ecuador": "ECU",
+    "Egypt": "EGY", "England": "ENG", "France": "FRA", "Germany": "GER",
+    "Ghana": "GHA", "Haiti": "HAI", "Iran": "IRN", "Iraq": "IRQ",
+    "Ivory Coast": "CIV", "Japan": "JPN", "Jordan": "JOR", "Mexico": "MEX",
+    "Morocco": "MAR", "Netherlands": "NED", "New Zealand": "NZL", "Norway": "NOR",
+    "Panama": "PAN", "Paraguay": "PAR", "Portugal": "POR", "Qatar": "QAT",
+    "Saudi Arabia": "KSA", "Scotland": "SCO", "Senegal": "SEN",
+    "South Africa": "RSA", "South Korea": "KOR", "Spain": "ESP", "Sweden": "SWE",
+    "Switzerland": "SUI", "Tunisia": "TUN", "Turkey": "TUR",
+    "United States": "USA", "Uruguay": "URU", "Uzbekistan": "UZB",
+}
+# Códigos diferentes para a mesma seleção (copa2026_data × API-Football)
+CODE_ALIASES = {'CUW': 'CUR'}
+
+
+# =============================================================================
+# FORÇA DAS SELEÇÕES
+# =============================================================================
+
+def ratings_from_power_ranking() -> dict:
+    """{código: pontos do Ranking FIFA} do Power Ranking da página de Dicas."""
+    return {team['code']: team['points'] for tier in POWER_RANKING for team in tier['teams']}
+
+
+def ratings_from_international_results(session, since=ELO_SINCE) -> dict:
+    """
+    {código: Elo} calculado dos jogos de international_results desde `since`
+    (fórmula do World Football Elo: K fixo, mando de campo e peso pelo saldo).
+    """
+    from sqlalchemy import text
+
+    rows = session.execute(text("""
+        SELECT home_team, away_team, home_score, away_score, neutral
+        FROM international_results
+        WHERE date >= :since AND home_score IS NOT NULL AND away_score IS NOT NULL
+        ORDER BY date
+    """), {'since': since}).fetchall()
+
+    elo = {}
+    for home, away, home_score, away_score, neutral in rows:
+        home_elo = elo.get(home, ELO_START)
+        away_elo = elo.get(away, ELO_START)
+        diff = home_elo - away_elo + (0 if neutral else ELO_HOME_ADVANTAGE)
+        expected = 1 / (1 + 10 ** (-diff / 400))
+        result = 1.0 if home_score > away_score else 0.5 if home_score == away_score else 0.0
+        margin = abs(home_score - away_score)
+        weight = 1 if margin <= 1 else 1.5 if margin == 2 else (11 + margin) / 8
+        delta = ELO_K * weight * (result - expected)
+        elo[home] = home_elo + delta
+        elo[away] = away_elo - delta
+
+    ratings = {}
+    for name, code in RESULTS_NAME_TO_CODE.items():
+        if name in elo:
+            ratings[code] = elo[name]
+            if code in CODE_ALIASES:
+                ratings[CODE_ALIASES[code]] = elo[name]
+    return ratings
+
+
+# =============================================================================
+# MONTAGEM DO MODELO
+# =============================================================================
+
+def _parse_slot(code: str, group_index: dict, third_index: dict):
+    """Placeholder de copa2026_data ("1A", "3ABCDF", "W73", "L101") → vaga."""
+    if code[0] in '12' and code[1:] in group_index:
+        return ('group', group_index[code[1:]], int(code[0]) - 1)
+    if code[0] == '3':
+        return ('third', third_index[code])
+    if code[0] == 'W':
+        return ('winner', int(code[1:]))
+    if code[0] == 'L':
+        return ('loser', int(code[1:]))
+    raise ValueError(f"Placeholder desconhecido: {code}")
+
+
+def build_model(teams, matches, users, predictions, group_predictions, podium_predictions,
+                group_results, config, ratings, relegation=2) -> dict:
+    """
+    Monta o modelo da simulação a partir de linhas simples (sem banco).
+
+    Args:
+        teams: [(team_id, code)]
+        matches: [(match_id, match_number, phase, group, team1_id, team2_id,
+                   status, team1_score, team2_score, penalty_winner_id)]
+        users: [(user_id, name)] na ordem de inscrição (último desempate)
+        predictions: [(user_id, match_id, pred_team1_score, pred_team2_score)]
+        group_predictions: [(user_id, group_name, first_team_id, second_team_id)]
+        podium_predictions: [(user_id, champion_id, runner_up_id, third_id)]
+        group_results: {group_name: (first_team_id, second_team_id)}
+        config: dict de scoring.get_scoring_config
+        ratings: {código: força}
+        relegation: tamanho da zona de rebaixamento
+
+    Returns:
+        dict só com listas/arrays (pode ser enviado a outros processos)
+    """
+    team_ids = [team_id for team_id, _ in teams]
+    team_index = {team_id: i for i, team_id in enumerate(team_ids)}
+    team_ratings = np.array([
+        ratings.get(code, ratings.get(CODE_ALIASES.get(code), DEFAULT_RATING))
+        + (HOST_BONUS if code in HOST_CODES else 0)
+        for _, code in teams
+    ], dtype=np.float64)
+
+    user_ids = [user_id for user_id, _ in users]
+    user_index = {user_id: i for i, user_id in enumerate(user_ids)}
+    n_users = len(user_ids)
+
+    preds_by_match = {}
+    for user_id, match_id, p1, p2 in predictions:
+        if user_id in user_index and p1 is not None and p2 is not None:
+            preds_by_match.setdefault(match_id, []).append((user_index[user_id], p1, p2))
+
+    # Pontos já garantidos: jogos encerrados
+    base_points = np.zeros(n_users, dtype=np.int64)
+    base_exacts = np.zeros(n_users, dtype=np.int64)
+
+    placeholders = {number: (code1, code2) for number, _, code1, code2, *_ in ALL_MATCHES}
+    group_names = sorted({m[3] for m in matches if m[2] == 'Grupos' and m[3]})
+    group_index = {name: g for g, name in enumerate(group_names)}
+    groups = [{'name': name, 'teams': [], 'matches': []} for name in group_names]
+    knockout = []
+
+    # Vagas dos 8 melhores terceiros, todas (mesmo as já preenchidas), para a
+    # distribuição sorteada não repetir um grupo já colocado no chaveamento
+    third_codes = [code for number in sorted(placeholders) for code in placeholders[number]
+                   if code.startswith('3')]
+    third_index = {code: k for k, code in enumerate(third_codes)}
+    third_slots = tuple(tuple(group_index[g] for g in code[1:] if g in group_index) for code in third_codes)
+
+    for (match_id, number, phase, group, team1_id, team2_id,
+         status, score1, score2, penalty_winner_id) in sorted(matches, key=lambda m: m[1]):
+        finished = status == 'finished' and score1 is not None and score2 is not None
+        match_preds = preds_by_match.get(match_id, [])
+
+        table = None
+        if finished:
+            if match_preds:
+                points, codes = rules.calculate_match_points_batch(
+                    [p[1] for p in match_preds], [p[2] for p in match_preds], score1, score2, config
+                )
+                for (u, _, _), pts, code in zip(match_preds, points, codes):
+                    base_points[u] += pts
+                    base_exacts[u] += code == rules.PLACAR_EXATO
+        elif match_preds:
+            table = _match_points_table(match_preds, n_users, config)
+
+        entry = {
+            'number': number,
+            'score': (score1, score2) if finished else None,
+            'points': table,
+        }
+
+        if phase == 'Grupos':
+            info = groups[group_index[group]]
+            local = []
+            for team_id in (team1_id, team2_id):
+                idx = team_index[team_id]
+                if idx not in info['teams']:
+                    info['teams'].append(idx)
+                local.append(info['teams'].index(idx))
+            entry['local'] = tuple(local)
+            info['matches'].append(entry)
+            continue
+
+        slots = []
+        for team_id, code in zip((team1_id, team2_id), placeholders.get(number, (None, None))):
+            if team_id is not None and team_id in team_index:
+                slots.append(('team', team_index[team_id]))
+            elif code:
+                slots.append(_parse_slot(code, group_index, third_index))
+            else:
+                raise ValueError(f"Jogo {number} sem seleção nem placeholder")
+        entry['phase'] = phase
+        entry['slots'] = tuple(slots)
+        entry['winner'] = None
+        if finished and team1_id is not None and team2_id is not None:
+            if score1 != score2:
+                entry['winner'] = team_index[team1_id] if score1 > score2 else team_index[team2_id]
+            elif penalty_winner_id in team_index:
+                entry['winner'] = team_index[penalty_winner_id]
+        knockout.append(entry)
+
+    # Palpites e resultados de classificação dos grupos
+    for info in groups:
+        info['teams'] = np.array(info['teams'], dtype=np.int64)
+        info['pred_first'] = np.full(n_users, -1, dtype=np.int64)
+        info['pred_second'] = np.full(n_users, -1, dtype=np.int64)
+        real = group_results.get(info['name'])
+        teams_local = {int(t): i for i, t in enumerate(info['teams'])}
+        info['fixed'] = None
+        if real and all(team_index.get(t) in teams_local for t in real):
+            info['fixed'] = tuple(teams_local[team_index[t]] for t in real)
+    groups_by_name = {info['name']: info for info in groups}
+    for user_id, group_name, first_id, second_id in group_predictions:
+        info = groups_by_name.get(group_name)
+        if info is None or user_id not in user_index:
+            continue
+        u = user_index[user_id]
+        info['pred_first'][u] = team_index.get(first_id, -1)
+        info['pred_second'][u] = team_index.get(second_id, -1)
+
+    podium = np.full((3, n_users), -1, dtype=np.int64)
+    for user_id, champion_id, runner_up_id, third_id in podium_predictions:
+        if user_id in user_index:
+            podium[:, user_index[user_id]] = [team_index.get(t, -1) for t in (champion_id, runner_up_id, third_id)]
+
+    final = next((m['number'] for m in knockout if m['phase'] == 'FINAL'), None)
+    third_place = next((m['number'] for m in knockout if m['phase'] == '3RD'), None)
+
+    return {
+        'user_ids': user_ids,
+        'user_names': [name for _, name in users],
+        'team_ids': team_ids,
+        'ratings': team_ratings,
+        'base_points': base_points,
+        'base_exacts': base_exacts,
+        'groups': groups,
+        'knockout': knockout,
+        'third_slots': third_slots,
+        'podium_predictions': podium,
+        'final': final,
+        'third_place': third_place,
+        'group_points': {
+            outcome: config[key] for outcome, (_, key) in rules.GROUP_OUTCOMES.items() if key
+        },
+        'podium_points': {
+            key: config[key]
+            for key in ('podio_completo', 'podio_campeao', 'podio_vice', 'podio_terceiro', 'podio_fora_ordem')
+        },
+        'relegation': min(relegation, n_users),
+    }
+
+
+def _match_points_table(match_preds, n_users, config):
+    """
+    Pontos e placares exatos de cada participante para cada placar possível
+    do jogo (0..MAX_GOALS × 0..MAX_GOALS): arrays (SCORE_CELLS, n_users).
+    Quem não palpitou fica com 0.
+    """
+    real1 = [r1 for r1 in range(MAX_GOALS + 1) for _ in range(MAX_GOALS + 1)]
+    real2 = [r2 for _ in range(MAX_GOALS + 1) for r2 in range(MAX_GOALS + 1)]
+    n_preds = len(match_preds)
+    points, codes = rules.calculate_match_points_batch(
+        [p1 for _, p1, _ in match_preds for _ in range(SCORE_CELLS)],
+        [p2 for _, _, p2 in match_preds for _ in range(SCORE_CELLS)],
+        real1 * n_preds, real2 * n_preds,
+        config
+    )
+    users = [u for u, _, _ in match_preds]
+    table = np.zeros((SCORE_CELLS, n_users), dtype=np.int16)
+    exact = np.zeros((SCORE_CELLS, n_users), dtype=np.int16)
+    table[:, users] = np.asarray(points, dtype=np.int16).reshape(n_preds, SCORE_CELLS).T
+    exact[:, users] = (np.asarray(codes).reshape(n_preds, SCORE_CELLS).T == rules.PLACAR_EXATO)
+    return table, exact
+
+
+def load_model(session, ratings=None, source='fifa') -> dict:
+    """
+    Lê do banco o estado atual do bolão e monta o modelo da simulação.
+
+    Args:
+        ratings: {código: força}; se None, usa `source`
+        source: 'fifa' (Power Ranking) ou 'elo' (international_results)
+    """
+    from sqlalchemy import text
+    from db import get_config_value
+    from scoring import get_scoring_config
+
+    if ratings is None:
+        ratings = (ratings_from_international_results(session) if source == 'elo'
+                   else ratings_from_power_ranking())
+
+    teams = session.execute(text("SELECT id, code FROM teams ORDER BY id")).fetchall()
+    matches = session.execute(text("""
+        SELECT id, match_number, phase, "group", team1_id, team2_id,
+               status, team1_score, team2_score, penalty_winner_id
+        FROM matches
+    """)).fetchall()
+    users = session.execute(text("""
+        SELECT id, name FROM users
+        WHERE active = true AND role != 'admin'
+        ORDER BY created_at, id
+    """)).fetchall()
+    predictions = session.execute(text(
+        "SELECT user_id, match_id, pred_team1_score, pred_team2_score FROM predictions"
+    )).fetchall()
+    group_predictions = session.execute(text(
+        "SELECT user_id, group_name, first_place_team_id, second_place_team_id FROM group_predictions"
+    )).fetchall()
+    podium_predictions = session.execute(text(
+        "SELECT user_id, champion_team_id, runner_up_team_id, third_place_team_id FROM podium_predictions"
+    )).fetchall()
+    group_results = {
+        row.group_name: (row.first_place_team_id, row.second_place_team_id)
+        for row in session.execute(text(
+            "SELECT group_name, first_place_team_id, second_place_team_id FROM group_results"
+        )).fetchall()
+        if row.first_place_team_id and row.second_place_team_id
+    }
+
+    return build_model(
+        [tuple(t) for t in teams], [tuple(m) for m in matches], [tuple(u) for u in users],
+        [tuple(p) for p in predictions], [tuple(g) for g in group_predictions],
+        [tuple(p) for p in podium_predictions], group_results,
+        get_scoring_config(session), ratings,
+        relegation=int(get_config_value(session, 'rebaixamento_quantidade', '2')),
+    )
+
+
+# =============================================================================
+# SIMULAÇÃO
+# =============================================================================
+
+_third_assignments = {}
+
+
+def _assign_thirds(mask: int, slots: tuple) -> tuple:
+    """
+    Grupo de cada vaga de terceiro colocado, dado o conjunto (bitmask) dos
+    grupos cujos terceiros se classificaram. Primeira distribuição válida em
+    que cada vaga recebe um grupo permitido; sem nenhuma válida, distribui
+    na ordem.
+    """
+    key = (mask, slots)
+    if key in _third_assignments:
+        return _third_assignments[key]
+
+    qualified = [g for g in range(mask.bit_length()) if mask >> g & 1]
+    chosen = []
+
+    def search(k, used):
+        if k == len(slots):
+            return True
+        for g in slots[k]:
+            if g in qualified and g not in used:
+                chosen.append(g)
+                if search(k + 1, used | {g}):
+                    return True
+                chosen.pop()
+        return False
+
+    if not search(0, frozenset()):
+        chosen = qualified[:len(slots)]
+    _third_assignments[key] = tuple(chosen)
+    return _third_assignments[key]
+
+
+def _play(rng, match, team1, team2, n, ratings, totals, exacts):
+    """Placar (arrays de n) de um jogo; soma os pontos dos palpites."""
+    if match['score'] is not None:
+        score1 = np.full(n, match['score'][0], dtype=np.int64)
+        score2 = np.full(n, match['score'][1], dtype=np.int64)
+    else:
+        diff = ratings[team1] - ratings[team2]
+        score1 = np.minimum(rng.poisson(BASE_GOALS * np.exp(RATING_GOAL_FACTOR * diff), n), MAX_GOALS)
+        score2 = np.minimum(rng.poisson(BASE_GOALS * np.exp(-RATING_GOAL_FACTOR * diff), n), MAX_GOALS)
+        if match['points'] is not None:
+            points, exact = match['points']
+            cell = score1 * (MAX_GOALS + 1) + score2
+            totals += points[cell]
+            exacts += exact[cell]
+    return score1, score2
+
+
+def _simulate_groups(rng, model, n, totals, exacts):
+    """Classificação (n, 4) de cada grupo e dados dos terceiros colocados."""
+    ratings = model['ratings']
+    group_points = model['group_points']
+    rows = np.arange(n)
+    standings, third_keys = [], []
+
+    for info in model['groups']:
+        size = len(info['teams'])
+        points = np.zeros((n, size), dtype=np.int64)
+        goal_diff = np.zeros((n, size), dtype=np.int64)
+        goals_for = np.zeros((n, size), dtype=np.int64)
+        for match in info['matches']:
+            l1, l2 = match['local']
+            s1, s2 = _play(rng, match, info['teams'][l1], info['teams'][l2], n, ratings, totals, exacts)
+            points[:, l1] += np.where(s1 > s2, 3, np.where(s1 == s2, 1, 0))
+            points[:, l2] += np.where(s2 > s1, 3, np.where(s1 == s2, 1, 0))
+            goal_diff[:, l1] += s1 - s2
+            goal_diff[:, l2] += s2 - s1
+            goals_for[:, l1] += s1
+            goals_for[:, l2] += s2
+
+        # Pontos, saldo, gols pró; o sorteio (< 1) só desempata o que sobrar
+        key = points * 1_000_000 + (goal_diff + 500) * 1_000 + goals_for + rng.random((n, size))
+        if info['fixed'] is not None:
+            first, second = info['fixed']
+            key[:, first] += 2e12
+            key[:, second] += 1e12
+        order = np.argsort(-key, axis=1)
+        ranked = info['teams'][order]
+        standings.append(ranked)
+
+        if size > 2:
+            third = order[:, 2]
+            third_keys.append(
+                points[rows, third] * 1_000_000 + (goal_diff[rows, third] + 500) * 1_000
+                + goals_for[rows, third] + rng.random(n)
+            )
+        else:
+            third_keys.append(np.full(n, -np.inf))
+
+        # Palpites de classificação
+        first, second = ranked[:, :1], ranked[:, 1:2]
+        pred_first, pred_second = info['pred_first'], info['pred_second']
+        complete = (pred_first >= 0) & (pred_second >= 0)
+        in_order = (pred_first == first) & (pred_second == second)
+        inverted = (pred_first == second) & (pred_second == first)
+        one_right = ((pred_first == first) | (pred_first == second)
+                     | (pred_second == first) | (pred_second == second))
+        totals += np.where(
+            ~complete, 0,
+            np.where(in_order, group_points['ordem'],
+                     np.where(inverted, group_points['invertida'],
+                              np.where(one_right, group_points['um_certo'], 0)))
+        )
+
+    return standings, np.stack(third_keys, axis=1) if third_keys else None
+
+
+def _simulate_chunk(model, n, seed):
+    """Simula n vezes o restante do torneio; devolve contagens por participante."""
+    rng = np.random.default_rng(seed)
+    n_users = len(model['user_ids'])
+    ratings = model['ratings']
+    totals = np.tile(model['base_points'], (n, 1))
+    exacts = np.tile(model['base_exacts'], (n, 1))
+    rows = np.arange(n)
+
+    standings, third_keys = _simulate_groups(rng, model, n, totals, exacts)
+
+    # Terceiros classificados, se alguma vaga deles ainda não tem seleção
+    third_teams = None
+    if any(slot[0] == 'third' for match in model['knockout'] for slot in match['slots']):
+        slots = model['third_slots']
+        qualified = np.argsort(-third_keys, axis=1)[:, :len(slots)]
+        masks = (np.int64(1) << qualified).sum(axis=1)
+        unique_masks, inverse = np.unique(masks, return_inverse=True)
+        assignment = np.array([_assign_thirds(int(mask), slots) for mask in unique_masks], dtype=np.int64)
+        thirds_by_group = np.stack([ranked[:, 2] for ranked in standings], axis=1)
+        third_teams = [thirds_by_group[rows, assignment[inverse, k]] for k in range(len(slots))]
+
+    winners, losers = {}, {}
+    for match in model['knockout']:
+        sides = []
+        for slot in match['slots']:
+            kind = slot[0]
+            if kind == 'team':
+                sides.append(np.full(n, slot[1], dtype=np.int64))
+            elif kind == 'group':
+                sides.append(standings[slot[1]][:, slot[2]])
+            elif kind == 'third':
+                sides.append(third_teams[slot[1]])
+            elif kind == 'winner':
+                sides.append(winners[slot[1]])
+            else:
+                sides.append(losers[slot[1]])
+        team1, team2 = sides
+        s1, s2 = _play(rng, match, team1, team2, n, ratings, totals, exacts)
+        if match['winner'] is not None:
+            winner = np.full(n, match['winner'], dtype=np.int64)
+        else:
+            penalties = np.where(rng.random(n) < 0.5, team1, team2)
+            winner = np.where(s1 > s2, team1, np.where(s2 > s1, team2, penalties))
+        winners[match['number']] = winner
+        losers[match['number']] = team1 + team2 - winner
+
+    # Pódio
+    if model['final'] in winners and model['third_place'] in winners:
+        champion = winners[model['final']][:, None]
+        runner_up = losers[model['final']][:, None]
+        third = winners[model['third_place']][:, None]
+        pred_champion, pred_runner_up, pred_third = model['podium_predictions']
+        cfg = model['podium_points']
+
+        def position_points(pred, real, key):
+            on_podium = (pred == champion) | (pred == runner_up) | (pred == third)
+            return np.where(pred == real, cfg[key], np.where(on_podium & (pred >= 0), cfg['podio_fora_ordem'], 0))
+
+        podium_points = (position_points(pred_champion, champion, 'podio_campeao')
+                         + position_points(pred_runner_up, runner_up, 'podio_vice')
+                         + position_points(pred_third, third, 'podio_terceiro'))
+        complete = (pred_champion == champion) & (pred_runner_up == runner_up) & (pred_third == third)
+        totals += np.where(complete, cfg['podio_completo'], podium_points)
+
+    # Classificação final: total, placares exatos, ordem de inscrição
+    key = totals * 1_000 + exacts - np.arange(n_users) / (n_users + 1)
+    order = np.argsort(-key, axis=1)
+    relegation = model['relegation']
+
+    return {
+        'n': n,
+        'first': np.bincount(order[:, 0], minlength=n_users),
+        'second': np.bincount(order[:, 1], minlength=n_users) if n_users > 1 else np.zeros(n_users, dtype=np.int64),
+        'third': np.bincount(order[:, 2], minlength=n_users) if n_users > 2 else np.zeros(n_users, dtype=np.int64),
+        'relegation': (np.bincount(order[:, n_users - relegation:].ravel(), minlength=n_users)
+                       if relegation else np.zeros(n_users, dtype=np.int64)),
+        'points_sum': totals.sum(axis=0),
+    }
+
+
+def chunk_size_for(n_users, budget=SIM_MEMORY_BUDGET) -> int:
+    """Sorteios por bloco que cabem em `budget` bytes (no máximo CHUNK_SIZE)."""
+    return max(1, min(CHUNK_SIZE, budget // (max(1, n_users) * BYTES_PER_CELL)))
+
+
+def _chunk_sizes(n_simulations, chunk_size):
+    full, rest = divmod(n_simulations, chunk_size)
+    return [chunk_size] * full + ([rest] if rest else [])
+
+
+def simulate(model, n_simulations=DEFAULT_SIMULATIONS, seed=None, workers=1,
+             chunk_size=None) -> dict:
+    """
+    Roda a simulação Monte Carlo.
+
+    Args:
+        model: dict de load_model/build_model
+        n_simulations: número de torneios sorteados
+        seed: semente (None = aleatória); com a mesma semente e o mesmo
+            chunk_size o resultado é reproduzível, com qualquer nº de workers
+        workers: processos em paralelo (1 = no processo atual); cada um
+            ocupa até SIM_MEMORY_BUDGET
+        chunk_size: sorteios por bloco (None = chunk_size_for(participantes))
+
+    Returns:
+        {'simulations', 'elapsed_ms', 'rows': [{user_id, nome, pontos_atuais,
+         pontos_medios, p_primeiro, p_segundo, p_terceiro, p_rebaixamento}]}
+        com as linhas em ordem decrescente de chance de título
+    """
+    start = time.perf_counter()
+    n_users = len(model['user_ids'])
+    if n_users == 0 or n_simulations <= 0:
+        return {'simulations': 0, 'elapsed_ms': 0.0, 'rows': []}
+    sizes = _chunk_sizes(n_simulations, chunk_size or chunk_size_for(n_users))
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+
+    if workers > 1 and len(sizes) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            chunks = list(pool.map(_simulate_chunk, [model] * len(sizes), sizes, seeds))
+    else:
+        chunks = [_simulate_chunk(model, size, s) for size, s in zip(sizes, seeds)]
+
+    total = sum(c['n'] for c in chunks)
+    counts = {
+        key: np.sum([c[key] for c in chunks], axis=0)
+        for key in ('first', 'second', 'third', 'relegation', 'points_sum')
+    }
+
+    rows = []
+    for u, user_id in enumerate(model['user_ids']):
+        rows.append({
+            'user_id': user_id,
+            'nome': model['user_names'][u],
+            'pontos_atuais': int(model['base_points'][u]),
+            'pontos_medios': round(float(counts['points_sum'][u]) / total, 1),
+            'p_primeiro': float(counts['first'][u]) / total,
+            'p_segundo': float(counts['second'][u]) / total,
+            'p_terceiro': float(counts['third'][u]) / total,
+            'p_rebaixamento': float(counts['relegation'][u]) / total,
+        })
+    rows.sort(key=lambda r: (-r['p_primeiro'], -r['pontos_medios']))
+
+    return {
+        'simulations': total,
+        'elapsed_ms': round((time.perf_counter() - start) * 1000, 1),
+        'rows': rows,
+    }
+
+
+def standard_error(probability: float, n_simulations: int) -> float:
+    """Erro padrão de uma probabilidade estimada com n_simulations sorteios."""
+    if n_simulations <= 0:
+        return 0.0
+    return math.sqrt(probability * (1 - probability) / n_simulations)
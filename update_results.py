@@ -6,6 +6,9 @@ Modos de execução:
   --mode live     : Busca jogos em andamento (durante os jogos)
   --mode post     : Busca jogos finalizados do dia (pós-jogo)
   --mode nightly  : Varredura de todos os jogos sem resultado (segurança)
+  --mode scheduled [--duration s] : live/post só nas janelas dos jogos
+                    (polling_schedule.py), num único processo
+  (para um processo contínuo, com endpoint de saúde: live_daemon.py)
 
 Variáveis de ambiente necessárias:
   API_FOOTBALL_KEY    : Chave da API-Football
@@ -15,12 +18,28 @@ Variáveis de ambiente necessárias:
 import os
 import sys
 import json
+import time
+import hashlib
 import logging
-import requests
-import psycopg2
 import pytz
+from collections import defaultdict
+from contextlib import contextmanager
+from psycopg2.extras import execute_values
 from datetime import datetime, timedelta, timezone
 
+from bracket_graph import BracketGraph, knockout_outcome, knockout_sources, group_sources
+from config import DEFAULT_SCORING, DEFAULT_GROUP_SCORING
+from fixture_sources import (
+    fixture_source_from_env, FINISHED_STATUSES, LIVE_STATUSES, NOT_STARTED_STATUSES
+)
+from pg_pool import get_pooled_connection, get_pool_metrics, close_all_pools
+from polling_schedule import plan_poll, LIVE_INTERVAL, POST_INTERVAL
+from data_version import bump_data_version_pg, MATCHES, GROUP_RESULTS
+from scoring_rules import (
+    calculate_match_points_batch, classify_group_prediction, compute_group_standings,
+    POINTS_TYPES, BREAKDOWNS, MATCH_CONFIG_KEYS, GROUP_CONFIG_KEYS, GROUP_OUTCOMES
+)
+
 # Configurar logging
 logging.basicConfig(
     level=logging.INFO,
@@ -35,9 +54,14 @@ logger = logging.getLogger(__name__)
 
 API_KEY = os.environ.get('API_FOOTBALL_KEY', '').strip()
 NEON_CONN = os.environ.get('NEON_CONNECTION_STRING', '').strip()
-API_BASE_URL = 'https://v3.football.api-sports.io'
 LEAGUE_ID = 1  # FIFA World Cup
 SEASON = 2026
+FIXTURE_IDS_PER_REQUEST = 20
+# Janela do modo post: jogos iniciados há até 36h (cobre o "hoje e ontem" UTC)
+RECENT_HOURS = 36
+# Modo scheduled: duração padrão do processo e releitura da agenda (s)
+SCHEDULED_DURATION = 3 * 3600
+SCHEDULE_REFRESH = 30 * 60
 
 # Mapeamento API-Football team name → código Neon
 API_NAME_TO_NEON_CODE = {
@@ -92,28 +116,49 @@ API_NAME_TO_NEON_CODE = {
     "Uzbekistan": "UZB",
 }
 
-# Status da API-Football que indicam jogo finalizado
-FINISHED_STATUSES = {'FT', 'AET', 'PEN'}
-# Status da API-Football que indicam jogo em andamento
-LIVE_STATUSES = {'1H', '2H', 'HT', 'ET', 'BT', 'P', 'SUSP', 'INT', 'LIVE'}
-# Status que indicam jogo não iniciado
-NOT_STARTED_STATUSES = {'TBD', 'NS'}
+# Fonte das fixtures (fixture_sources.py): a API de verdade por padrão;
+# gravação reproduzida ou stand-in local nos ensaios
+_fixture_source = None
+
+# Hash das últimas fixtures ao vivo processadas: resposta idêntica à
+# anterior não tem nada de novo para gravar
+_last_live_digest = None
+
+# Tempo (ms) de cada etapa da atualização nesta execução do processo:
+# fetch, match, update, score, propagate
+STAGE_TIMINGS = defaultdict(list)
+
+
+@contextmanager
+def timed_stage(name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_TIMINGS[name].append((time.perf_counter() - start) * 1000)
 
 
 # ============================================================
 # FUNÇÕES DA API-FOOTBALL
 # ============================================================
 
+def get_fixture_source():
+    global _fixture_source
+    if _fixture_source is None:
+        _fixture_source = fixture_source_from_env(API_KEY)
+    return _fixture_source
+
+
+def set_fixture_source(source):
+    """Troca a fonte das fixtures (ReplaySource, stand-in...) — usado pelos ensaios."""
+    global _fixture_source
+    _fixture_source = source
+
+
 def api_request(endpoint, params=None):
-    """Faz uma requisição à API-Football."""
-    headers = {
-        'x-apisports-key': API_KEY,
-    }
-    url = f'{API_BASE_URL}/{endpoint}'
+    """Faz uma requisição à API-Football (pela fonte configurada)."""
     try:
-        response = requests.get(url, headers=headers, params=params, timeout=30)
-        response.raise_for_status()
-        data = response.json()
+        data = get_fixture_source().request(endpoint, params)
         if data.get('errors'):
             logger.error(f"API errors: {data['errors']}")
             return None
@@ -170,6 +215,34 @@ def get_today_fixtures():
     return fixtures
 
 
+def get_fixtures_by_ids(fixture_ids):
+    """Busca só as fixtures informadas (a API aceita até 20 ids por chamada)."""
+    fixtures = []
+    for start in range(0, len(fixture_ids), FIXTURE_IDS_PER_REQUEST):
+        chunk = fixture_ids[start:start + FIXTURE_IDS_PER_REQUEST]
+        data = api_request('fixtures', {'ids': '-'.join(str(i) for i in chunk)})
+        if data and data.get('results', 0) > 0:
+            fixtures.extend(data['response'])
+    logger.info(f"Encontrados {len(fixtures)} de {len(fixture_ids)} jogos buscados por id")
+    return fixtures
+
+
+def get_recent_fixtures(pending_matches):
+    """
+    Fixtures para o modo post. Quando todos os jogos pendentes que já
+    começaram (nas últimas RECENT_HOURS) têm api_fixture_id, busca só esses
+    ids; senão, cai na busca por data de get_today_fixtures.
+    """
+    now_naive = datetime.now(pytz.timezone('America/Sao_Paulo')).replace(tzinfo=None)
+    recent = [
+        m for m in pending_matches
+        if m['datetime'] and now_naive - timedelta(hours=RECENT_HOURS) <= m['datetime'] <= now_naive
+    ]
+    if recent and all(m.get('api_fixture_id') for m in recent):
+        return get_fixtures_by_ids([m['api_fixture_id'] for m in recent])
+    return get_today_fixtures()
+
+
 def get_all_finished_fixtures():
     """Busca todos os jogos finalizados da Copa 2026 (para varredura noturna)."""
     logger.info("Buscando todos os jogos finalizados da Copa 2026...")
@@ -190,21 +263,51 @@ def get_all_finished_fixtures():
 # ============================================================
 
 def get_db_connection():
-    """Cria conexão com o banco Neon."""
+    """Conexão com o banco Neon, do pool do processo (pg_pool.py)."""
     try:
-        conn = psycopg2.connect(NEON_CONN)
+        conn = get_pooled_connection(NEON_CONN)
         return conn
     except Exception as e:
         logger.error(f"Falha ao conectar ao banco: {e}")
         return None
 
 
+_api_fixture_id_checked = False
+
+
+def ensure_api_fixture_id_column(conn):
+    """
+    Migração: coluna matches.api_fixture_id (id da fixture na API-Football,
+    gravado na primeira vez que o jogo é reconhecido). Confere uma vez por
+    processo; o ALTER só roda se a coluna ainda não existir.
+    """
+    global _api_fixture_id_checked
+    if _api_fixture_id_checked:
+        return
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT 1 FROM information_schema.columns
+        WHERE table_name = 'matches' AND column_name = 'api_fixture_id'
+    """)
+    if cursor.fetchone() is None:
+        cursor.execute("ALTER TABLE matches ADD COLUMN IF NOT EXISTS api_fixture_id INTEGER")
+        cursor.execute("""
+            CREATE UNIQUE INDEX IF NOT EXISTS ix_matches_api_fixture_id
+            ON matches (api_fixture_id)
+        """)
+        conn.commit()
+        logger.info("Coluna matches.api_fixture_id criada")
+    cursor.close()
+    _api_fixture_id_checked = True
+
+
 def get_pending_matches(conn):
     """Busca jogos no banco que ainda não têm resultado (status != 'finished')."""
+    ensure_api_fixture_id_column(conn)
     cursor = conn.cursor()
     cursor.execute("""
         SELECT id, match_number, team1_code, team2_code, datetime, status,
-               team1_score, team2_score, phase, "group"
+               team1_score, team2_score, phase, "group", api_fixture_id
         FROM matches
         WHERE status != 'finished'
         ORDER BY match_number;
@@ -244,14 +347,21 @@ def update_match_result(conn, match_id, team1_score, team2_score, status='finish
               AND (status != 'finished' OR status IS NULL);
         """, (team1_score, team2_score, status, match_id))
     updated = cursor.rowcount
+    if updated > 0:
+        bump_data_version_pg(conn, MATCHES)
     conn.commit()
     cursor.close()
     return updated > 0
 
 
 def update_match_live(conn, match_id, team1_score, team2_score):
-    """Atualiza o placar de um jogo ao vivo (sem marcar como finished)."""
+    """
+    Atualiza o placar de um jogo ao vivo (sem marcar como finished).
+    Só incrementa a versão de dados (data_version) se placar ou status mudou.
+    """
     cursor = conn.cursor()
+    cursor.execute("SELECT team1_score, team2_score, status FROM matches WHERE id = %s", (match_id,))
+    current = cursor.fetchone()
     cursor.execute("""
         UPDATE matches
         SET team1_score = %s,
@@ -262,29 +372,116 @@ def update_match_live(conn, match_id, team1_score, team2_score):
           AND status != 'finished';
     """, (team1_score, team2_score, match_id))
     updated = cursor.rowcount
+    if updated > 0 and current != (team1_score, team2_score, 'live'):
+        bump_data_version_pg(conn, MATCHES)
     conn.commit()
     cursor.close()
     return updated > 0
 
 
-def score_finished_match(conn, match_id, team1_score, team2_score):
-    """Calcula e salva pontos para todos os palpites de um jogo finalizado."""
-    cursor = conn.cursor()
+# Pontuação dos palpites de jogo: tipo de acerto -> (chave em config, padrão, descrição).
+# Regras, chaves e descrições vêm de scoring_rules (as mesmas do app).
+MATCH_SCORING = {
+    points_type: (MATCH_CONFIG_KEYS[points_type], DEFAULT_SCORING[points_type], BREAKDOWNS[code])
+    for code, points_type in enumerate(POINTS_TYPES)
+}
 
-    # Busca config de pontuação do banco (com defaults caso não esteja configurado)
-    cursor.execute("""
-        SELECT key, value FROM config
-        WHERE key IN ('pontos_placar_exato','pontos_resultado_gols',
-                      'pontos_resultado','pontos_gols','pontos_nenhum')
-    """)
+# Pontuação dos palpites de classificação: chave em config -> padrão
+GROUP_SCORING = {
+    config_key: DEFAULT_GROUP_SCORING[key] for key, config_key in GROUP_CONFIG_KEYS.items()
+}
+
+# 'sql'    : um único UPDATE ... FROM por jogo/grupo, pontuado no próprio banco
+# 'values' : pontua em Python e grava tudo com um UPDATE ... FROM (VALUES ...)
+SCORING_MODE = os.environ.get('SCORING_MODE', 'sql').strip().lower()
+
+
+def _config_cte(defaults):
+    """
+    CTE `cfg` com uma coluna inteira por chave de config (com o valor padrão
+    quando a chave não existe), para as expressões CASE da pontuação.
+    """
+    columns = ",\n".join(
+        f"COALESCE(MAX(CASE WHEN key = '{key}' THEN value END), '{default}')::int AS {key}"
+        for key, default in defaults.items()
+    )
+    return f"cfg AS (SELECT {columns} FROM config)"
+
+
+def _read_int_config(cursor, defaults):
+    """Lê do config as chaves informadas, com os valores padrão."""
+    cursor.execute("SELECT key, value FROM config WHERE key = ANY(%s)", (list(defaults),))
     config = {row[0]: int(row[1]) for row in cursor.fetchall()}
-    pts_exato    = config.get('pontos_placar_exato', 20)
-    pts_res_gols = config.get('pontos_resultado_gols', 15)
-    pts_res      = config.get('pontos_resultado', 10)
-    pts_gols     = config.get('pontos_gols', 5)
-    pts_nenhum   = config.get('pontos_nenhum', 0)
+    return {key: config.get(key, default) for key, default in defaults.items()}
+
+
+def _bulk_update(cursor, table, rows, columns):
+    """
+    Grava `rows` (id, col1, col2, ...) em `table` com um único
+    UPDATE ... FROM (VALUES ...) via execute_values.
+    """
+    if not rows:
+        return 0
+    assignments = ", ".join(f"{col} = v.{col}" for col in columns)
+    execute_values(cursor, f"""
+        UPDATE {table} AS t
+        SET {assignments}
+        FROM (VALUES %s) AS v(id, {", ".join(columns)})
+        WHERE t.id = v.id
+    """, rows, page_size=1000)
+    return len(rows)
+
+
+def _match_points_type_sql():
+    """CASE com o tipo de acerto — mesmas regras de scoring.calculate_match_points."""
+    return """
+        CASE
+            WHEN p.pred_team1_score = %(team1)s AND p.pred_team2_score = %(team2)s
+                THEN 'placar_exato'
+            WHEN SIGN(p.pred_team1_score - p.pred_team2_score) = SIGN(%(team1)s - %(team2)s)
+                 AND (p.pred_team1_score = %(team1)s OR p.pred_team2_score = %(team2)s)
+                THEN 'resultado_gols'
+            WHEN SIGN(p.pred_team1_score - p.pred_team2_score) = SIGN(%(team1)s - %(team2)s)
+                THEN 'resultado'
+            WHEN p.pred_team1_score = %(team1)s OR p.pred_team2_score = %(team2)s
+                THEN 'gols'
+            ELSE 'nenhum'
+        END"""
+
+
+def _score_match_sql(cursor, match_id, team1_score, team2_score):
+    """Pontua todos os palpites do jogo em um único UPDATE ... FROM."""
+    defaults = {key: default for key, default, _ in MATCH_SCORING.values()}
+    points_case = " ".join(
+        f"WHEN '{tipo}' THEN cfg.{key}" for tipo, (key, _, _) in MATCH_SCORING.items()
+    )
+    breakdown_case = " ".join(
+        f"WHEN '{tipo}' THEN '{desc}'" for tipo, (_, _, desc) in MATCH_SCORING.items()
+    )
+    cursor.execute(f"""
+        WITH {_config_cte(defaults)},
+        classified AS (
+            SELECT p.id, {_match_points_type_sql()} AS tipo
+            FROM predictions p
+            WHERE p.match_id = %(match_id)s
+              AND p.pred_team1_score IS NOT NULL
+              AND p.pred_team2_score IS NOT NULL
+        )
+        UPDATE predictions p
+        SET points_awarded = CASE c.tipo {points_case} END,
+            points_type = c.tipo,
+            breakdown = CASE c.tipo {breakdown_case} END
+        FROM classified c, cfg
+        WHERE p.id = c.id
+    """, {'match_id': match_id, 'team1': team1_score, 'team2': team2_score})
+    return cursor.rowcount
+
+
+def _score_match_values(cursor, match_id, team1_score, team2_score):
+    """Pontua em Python (scoring_rules) e grava com um único execute_values."""
+    config = _read_int_config(cursor, {key: default for key, default, _ in MATCH_SCORING.values()})
+    points_by_type = {tipo: config[key] for tipo, (key, _, _) in MATCH_SCORING.items()}
 
-    # Busca todos os palpites deste jogo
     cursor.execute("""
         SELECT id, pred_team1_score, pred_team2_score
         FROM predictions
@@ -293,39 +490,36 @@ def score_finished_match(conn, match_id, team1_score, team2_score):
           AND pred_team2_score IS NOT NULL
     """, (match_id,))
     preds = cursor.fetchall()
-
     if not preds:
-        cursor.close()
         return 0
 
-    real_result = 'team1' if team1_score > team2_score else ('team2' if team1_score < team2_score else 'draw')
+    rows = _match_score_rows(preds, team1_score, team2_score, points_by_type)
+    return _bulk_update(cursor, 'predictions', rows, ('points_awarded', 'points_type', 'breakdown'))
 
-    updated = 0
-    for pred_id, p1, p2 in preds:
-        pred_result = 'team1' if p1 > p2 else ('team2' if p1 < p2 else 'draw')
-        acertou_resultado = pred_result == real_result
-        acertou_p1 = p1 == team1_score
-        acertou_p2 = p2 == team2_score
-
-        if acertou_p1 and acertou_p2:
-            pts, tipo, desc = pts_exato, 'placar_exato', 'Placar exato!'
-        elif acertou_resultado and (acertou_p1 or acertou_p2):
-            pts, tipo, desc = pts_res_gols, 'resultado_gols', 'Resultado + gols de um time'
-        elif acertou_resultado:
-            pts, tipo, desc = pts_res, 'resultado', 'Resultado correto'
-        elif acertou_p1 or acertou_p2:
-            pts, tipo, desc = pts_gols, 'gols', 'Gols de um time'
-        else:
-            pts, tipo, desc = pts_nenhum, 'nenhum', 'Nao pontuou'
 
-        cursor.execute("""
-            UPDATE predictions
-            SET points_awarded = %s,
-                points_type = %s,
-                breakdown = %s
-            WHERE id = %s
-        """, (pts, tipo, desc, pred_id))
-        updated += 1
+def _match_score_rows(preds, team1_score, team2_score, points_by_type):
+    """(id, pontos, tipo, descrição) de cada palpite (id, gols1, gols2)."""
+    points, codes = calculate_match_points_batch(
+        [p[1] for p in preds], [p[2] for p in preds], team1_score, team2_score, points_by_type
+    )
+    return [
+        (pred[0], pts, POINTS_TYPES[code], BREAKDOWNS[code])
+        for pred, pts, code in zip(preds, points, codes)
+    ]
+
+
+def score_finished_match(conn, match_id, team1_score, team2_score):
+    """
+    Calcula e salva pontos para todos os palpites de um jogo finalizado.
+
+    Por padrão pontua direto no banco (um UPDATE por jogo); com
+    SCORING_MODE=values usa o caminho alternativo em Python + execute_values.
+    """
+    cursor = conn.cursor()
+    if SCORING_MODE == 'values':
+        updated = _score_match_values(cursor, match_id, team1_score, team2_score)
+    else:
+        updated = _score_match_sql(cursor, match_id, team1_score, team2_score)
 
     conn.commit()
     cursor.close()
@@ -363,6 +557,8 @@ def lock_missing_predictions(conn):
         RETURNING match_id
     """, (now_naive,))
     rows = cursor.fetchall()
+    if rows:
+        bump_data_version_pg(conn, MATCHES)
     conn.commit()
 
     if not rows:
@@ -399,86 +595,72 @@ def _calculate_group_standings_with_tiebreak(matches_rows):
     (team1_id, team2_id, team1_score, team2_score), aplicando pontos, saldo
     de gols, gols marcados e, em caso de empate total, confronto direto
     entre os times empatados (critério oficial da FIFA).
-    """
-    teams_stats = {}
-    h2h_matches = []
-
-    for team1_id, team2_id, gols1, gols2 in matches_rows:
-        if team1_id is None or team2_id is None or gols1 is None or gols2 is None:
-            continue
-
-        for team_id in (team1_id, team2_id):
-            if team_id not in teams_stats:
-                teams_stats[team_id] = {'team_id': team_id, 'points': 0, 'goals_for': 0, 'goals_against': 0}
 
-        teams_stats[team1_id]['goals_for'] += gols1
-        teams_stats[team1_id]['goals_against'] += gols2
-        teams_stats[team2_id]['goals_for'] += gols2
-        teams_stats[team2_id]['goals_against'] += gols1
-
-        if gols1 > gols2:
-            teams_stats[team1_id]['points'] += 3
-        elif gols2 > gols1:
-            teams_stats[team2_id]['points'] += 3
-        else:
-            teams_stats[team1_id]['points'] += 1
-            teams_stats[team2_id]['points'] += 1
-
-        h2h_matches.append((team1_id, team2_id, gols1, gols2))
-
-    for stats in teams_stats.values():
-        stats['goal_difference'] = stats['goals_for'] - stats['goals_against']
-
-    standings = sorted(
-        teams_stats.values(),
-        key=lambda x: (x['points'], x['goal_difference'], x['goals_for']),
-        reverse=True
+    Mesma regra do app (group_standings.py), em scoring_rules.
+    """
+    results = [
+        (team1_id, team2_id, gols1, gols2)
+        for team1_id, team2_id, gols1, gols2 in matches_rows
+        if team1_id is not None and team2_id is not None and gols1 is not None and gols2 is not None
+    ]
+    standings = compute_group_standings(results)
+    for item in standings:
+        item['team_id'] = item['team_key']
+    return standings
+
+
+def _score_group_sql(cursor, group, first_id, second_id):
+    """Pontua todos os palpites do grupo em um único UPDATE ... FROM."""
+    outcome_case = """
+        CASE
+            WHEN gp.first_place_team_id IS NULL OR gp.second_place_team_id IS NULL
+                THEN 'incompleto'
+            WHEN gp.first_place_team_id = %(first)s AND gp.second_place_team_id = %(second)s
+                THEN 'ordem'
+            WHEN gp.first_place_team_id = %(second)s AND gp.second_place_team_id = %(first)s
+                THEN 'invertida'
+            WHEN gp.first_place_team_id IN (%(first)s, %(second)s)
+                 OR gp.second_place_team_id IN (%(first)s, %(second)s)
+                THEN 'um_certo'
+            ELSE 'nenhum'
+        END"""
+    points_case = " ".join(
+        f"WHEN '{outcome}' THEN {'cfg.' + key if key else '0'}"
+        for outcome, (_, key) in GROUP_OUTCOMES.items()
     )
+    breakdown_case = " ".join(
+        f"WHEN '{outcome}' THEN '{desc}'" for outcome, (desc, _) in GROUP_OUTCOMES.items()
+    )
+    cursor.execute(f"""
+        WITH {_config_cte(GROUP_SCORING)},
+        classified AS (
+            SELECT gp.id, {outcome_case} AS outcome
+            FROM group_predictions gp
+            WHERE gp.group_name = %(group)s
+        )
+        UPDATE group_predictions gp
+        SET points_awarded = CASE c.outcome {points_case} END,
+            breakdown = CASE c.outcome {breakdown_case} END
+        FROM classified c, cfg
+        WHERE gp.id = c.id
+    """, {'group': group, 'first': first_id, 'second': second_id})
+    return cursor.rowcount
+
+
+def _score_group_values(cursor, group, first_id, second_id):
+    """Pontua em Python e grava com um único execute_values."""
+    config = _read_int_config(cursor, GROUP_SCORING)
+    cursor.execute("""
+        SELECT id, first_place_team_id, second_place_team_id
+        FROM group_predictions
+        WHERE group_name = %s
+    """, (group,))
 
-    # Desempate por confronto direto entre times empatados em pontos/saldo/gols
-    result = []
-    i = 0
-    n = len(standings)
-    while i < n:
-        j = i
-        key_i = (standings[i]['points'], standings[i]['goal_difference'], standings[i]['goals_for'])
-        while j + 1 < n and (
-            standings[j + 1]['points'], standings[j + 1]['goal_difference'], standings[j + 1]['goals_for']
-        ) == key_i:
-            j += 1
-
-        cluster = standings[i:j + 1]
-        if len(cluster) > 1:
-            cluster_ids = {item['team_id'] for item in cluster}
-            mini = {item['team_id']: {'points': 0, 'goals_for': 0, 'goals_against': 0} for item in cluster}
-            for t1, t2, g1, g2 in h2h_matches:
-                if t1 not in cluster_ids or t2 not in cluster_ids:
-                    continue
-                mini[t1]['goals_for'] += g1
-                mini[t1]['goals_against'] += g2
-                mini[t2]['goals_for'] += g2
-                mini[t2]['goals_against'] += g1
-                if g1 > g2:
-                    mini[t1]['points'] += 3
-                elif g2 > g1:
-                    mini[t2]['points'] += 3
-                else:
-                    mini[t1]['points'] += 1
-                    mini[t2]['points'] += 1
-
-            cluster = sorted(
-                cluster,
-                key=lambda item: (
-                    mini[item['team_id']]['points'],
-                    mini[item['team_id']]['goals_for'] - mini[item['team_id']]['goals_against'],
-                    mini[item['team_id']]['goals_for'],
-                ),
-                reverse=True
-            )
-        result.extend(cluster)
-        i = j + 1
-
-    return result
+    rows = []
+    for pred_id, pred_first, pred_second in cursor.fetchall():
+        desc, key = GROUP_OUTCOMES[classify_group_prediction(pred_first, pred_second, first_id, second_id)]
+        rows.append((pred_id, config[key] if key else 0, desc))
+    return _bulk_update(cursor, 'group_predictions', rows, ('points_awarded', 'breakdown'))
 
 
 def score_group_predictions(conn, group, first_id, second_id):
@@ -489,42 +671,12 @@ def score_group_predictions(conn, group, first_id, second_id):
     linha sem nenhuma alteração — só lê e pontua.
     """
     cursor = conn.cursor()
-
-    cursor.execute("""
-        SELECT key, value FROM config
-        WHERE key IN ('grupo_ordem_correta', 'grupo_ordem_invertida', 'grupo_um_certo')
-    """)
-    config = {row[0]: int(row[1]) for row in cursor.fetchall()}
-    pts_ordem_correta = config.get('grupo_ordem_correta', 20)
-    pts_ordem_invertida = config.get('grupo_ordem_invertida', 10)
-    pts_um_certo = config.get('grupo_um_certo', 5)
-
-    cursor.execute("""
-        SELECT id, first_place_team_id, second_place_team_id
-        FROM group_predictions
-        WHERE group_name = %s
-    """, (group,))
-    preds = cursor.fetchall()
-
-    updated = 0
-    for pred_id, pred_first, pred_second in preds:
-        if pred_first is None or pred_second is None:
-            pts, desc = 0, "Palpite incompleto"
-        elif pred_first == first_id and pred_second == second_id:
-            pts, desc = pts_ordem_correta, "Acertou 1º e 2º na ordem!"
-        elif pred_first == second_id and pred_second == first_id:
-            pts, desc = pts_ordem_invertida, "Acertou os 2 classificados (ordem invertida)"
-        elif pred_first in (first_id, second_id) or pred_second in (first_id, second_id):
-            pts, desc = pts_um_certo, "Acertou 1 classificado (posição errada)"
-        else:
-            pts, desc = 0, "Nao pontuou"
-
-        cursor.execute("""
-            UPDATE group_predictions
-            SET points_awarded = %s, breakdown = %s
-            WHERE id = %s
-        """, (pts, desc, pred_id))
-        updated += 1
+    if SCORING_MODE == 'values':
+        updated = _score_group_values(cursor, group, first_id, second_id)
+    else:
+        updated = _score_group_sql(cursor, group, first_id, second_id)
+    if updated > 0:
+        bump_data_version_pg(conn, GROUP_RESULTS)
 
     conn.commit()
     cursor.close()
@@ -537,7 +689,7 @@ def update_completed_group_results(conn):
     """
     Para cada grupo com todos os jogos finalizados, calcula 1º e 2º lugar
     (com desempate por confronto direto), atualiza group_results — que
-    alimenta propagate_group_results() — e pontua os palpites de
+    alimenta propagate_bracket() — e pontua os palpites de
     classificação (group_predictions) desse grupo.
     """
     cursor = conn.cursor()
@@ -605,190 +757,243 @@ def update_completed_group_results(conn):
     return updated
 
 
-def propagate_knockout_winners(conn):
+def propagate_bracket(conn):
     """
-    Propaga vencedores de jogos finalizados do mata-mata para a próxima fase.
-    Resolve placeholders W73, W74, L101, etc.
-    Quando o jogo vai para pênaltis (placar empatado), usa penalty_winner_id.
-    Retorna o número de jogos atualizados.
+    Propaga para as próximas fases os classificados dos grupos ("1A", "2B")
+    e os vencedores/perdedores do mata-mata ("W73", "L101").
+
+    Monta o grafo do chaveamento (bracket_graph.py) com as vagas ainda
+    abertas, lê só as origens que elas esperam — jogos e grupos — e grava
+    todas as vagas resolvidas num único UPDATE. Quando o jogo vai para
+    pênaltis (placar empatado), usa penalty_winner_id.
+
+    Retorna (vagas preenchidas [SlotUpdate], jogos que ficaram com os dois
+    times definidos).
     """
     cursor = conn.cursor()
-    updated = 0
-
-    # Busca jogos finalizados do mata-mata com ambos os times e placar
     cursor.execute("""
-        SELECT m.match_number, m.team1_id, m.team2_id, m.team1_score, m.team2_score,
-               m.team1_code, m.team2_code,
-               t1.code as t1_code, t1.name as t1_name,
-               t2.code as t2_code, t2.name as t2_name,
-               m.penalty_winner_id
-        FROM matches m
-        JOIN teams t1 ON m.team1_id = t1.id
-        JOIN teams t2 ON m.team2_id = t2.id
-        WHERE m.phase != 'Grupos'
-          AND m.status = 'finished'
-          AND m.team1_score IS NOT NULL
-          AND m.team2_score IS NOT NULL
+        SELECT match_number, team1_code, team1_id, team2_code, team2_id
+        FROM matches
+        WHERE phase != 'Grupos'
     """)
+    graph = BracketGraph(
+        slot
+        for match_number, code1, id1, code2, id2 in cursor.fetchall()
+        for slot in ((match_number, 'team1', code1, id1), (match_number, 'team2', code2, id2))
+    )
+    sources = graph.open_sources
+    if not sources:
+        cursor.close()
+        return [], []
 
-    finished_matches = cursor.fetchall()
-
-    for row in finished_matches:
-        match_num, t1_id, t2_id, t1_score, t2_score, t1_code, t2_code, t1_cd, t1_nm, t2_cd, t2_nm, pen_winner_id = row
-
-        # Determina vencedor e perdedor
-        if t1_score > t2_score:
-            winner_id, winner_code = t1_id, t1_cd
-            loser_id, loser_code = t2_id, t2_cd
-        elif t2_score > t1_score:
-            winner_id, winner_code = t2_id, t2_cd
-            loser_id, loser_code = t1_id, t1_cd
-        elif pen_winner_id is not None:
-            # Empate no tempo normal/prorrogação — decidido nos pênaltis
-            if pen_winner_id == t1_id:
-                winner_id, winner_code = t1_id, t1_cd
-                loser_id, loser_code = t2_id, t2_cd
-            else:
-                winner_id, winner_code = t2_id, t2_cd
-                loser_id, loser_code = t1_id, t1_cd
-            logger.info(f"Jogo #{match_num} decidido nos penaltis: vencedor={winner_code}")
-        else:
-            logger.warning(f"Jogo #{match_num} empatado sem penalty_winner_id — nao propaga")
-            continue
-        
-        w_code = f"W{match_num}"
-        l_code = f"L{match_num}"
-        
-        # Atualiza jogos que têm W{match_num} como team1
-        # Sem AND team1_id IS NULL: corrige também casos onde o id foi setado
-        # mas o code ficou como placeholder (estado inconsistente)
+    decided = {}
+    match_numbers = sorted({n for kind, n in sources if kind in 'WL'})
+    if match_numbers:
         cursor.execute("""
-            UPDATE matches SET team1_id = %s, team1_code = %s
-            WHERE team1_code = %s
-        """, (winner_id, winner_code, w_code))
-        updated += cursor.rowcount
-
-        # Atualiza jogos que têm W{match_num} como team2
+            SELECT match_number, team1_id, team2_id, team1_score, team2_score, penalty_winner_id
+            FROM matches
+            WHERE status = 'finished' AND match_number = ANY(%s)
+        """, (match_numbers,))
+        for match_number, id1, id2, s1, s2, pen_winner_id in cursor.fetchall():
+            outcome = knockout_outcome(id1, id2, s1, s2, pen_winner_id)
+            if outcome is None:
+                logger.warning(f"Jogo #{match_number} empatado sem penalty_winner_id — nao propaga")
+                continue
+            if s1 == s2:
+                logger.info(f"Jogo #{match_number} decidido nos penaltis: vencedor id={outcome[0]}")
+            decided.update(knockout_sources(match_number, outcome))
+
+    groups = sorted({g for kind, g in sources if kind in '12'})
+    if groups:
         cursor.execute("""
-            UPDATE matches SET team2_id = %s, team2_code = %s
-            WHERE team2_code = %s
-        """, (winner_id, winner_code, w_code))
-        updated += cursor.rowcount
+            SELECT group_name, first_place_team_id, second_place_team_id
+            FROM group_results
+            WHERE group_name = ANY(%s)
+        """, (groups,))
+        for group_name, first_id, second_id in cursor.fetchall():
+            decided.update(group_sources(group_name, first_id, second_id))
+
+    if not decided:
+        cursor.close()
+        return [], []
+    cursor.execute("SELECT id, code FROM teams WHERE id = ANY(%s)", (sorted(set(decided.values())),))
+    updates = graph.resolve(decided, dict(cursor.fetchall()))
+    if not updates:
+        cursor.close()
+        return [], []
+
+    # Uma linha por jogo: (jogo, placeholder/time/código do team1, idem do team2).
+    # Só troca a vaga que ainda tem o placeholder esperado.
+    rows = {}
+    for u in updates:
+        row = rows.setdefault(u.match_number, [u.match_number, None, None, None, None, None, None])
+        offset = 1 if u.side == 'team1' else 4
+        row[offset:offset + 3] = [u.placeholder, u.team_id, u.team_code]
+    execute_values(cursor, """
+        UPDATE matches AS m
+        SET team1_id = CASE WHEN m.team1_code = v.ph1 THEN v.id1 ELSE m.team1_id END,
+            team1_code = CASE WHEN m.team1_code = v.ph1 THEN v.code1 ELSE m.team1_code END,
+            team2_id = CASE WHEN m.team2_code = v.ph2 THEN v.id2 ELSE m.team2_id END,
+            team2_code = CASE WHEN m.team2_code = v.ph2 THEN v.code2 ELSE m.team2_code END
+        FROM (VALUES %s) AS v(match_number, ph1, id1, code1, ph2, id2, code2)
+        WHERE m.match_number = v.match_number
+    """, list(rows.values()),
+        template='(%s, %s::varchar, %s::integer, %s::varchar, %s::varchar, %s::integer, %s::varchar)')
+    bump_data_version_pg(conn, MATCHES)
+    conn.commit()
+    cursor.close()
 
-        # Atualiza jogos que têm L{match_num} como team1 (disputa de 3º)
-        cursor.execute("""
-            UPDATE matches SET team1_id = %s, team1_code = %s
-            WHERE team1_code = %s
-        """, (loser_id, loser_code, l_code))
-        updated += cursor.rowcount
+    for u in updates:
+        logger.info(f"🔄 Jogo #{u.match_number} {u.side}: {u.placeholder} -> {u.team_code}")
+    defined = graph.defined(updates)
+    if defined:
+        logger.info(f"Confrontos definidos: {', '.join(f'#{n}' for n in defined)}")
+    return updates, defined
 
-        # Atualiza jogos que têm L{match_num} como team2 (disputa de 3º)
-        cursor.execute("""
-            UPDATE matches SET team2_id = %s, team2_code = %s
-            WHERE team2_code = %s
-        """, (loser_id, loser_code, l_code))
-        updated += cursor.rowcount
-    
-    if updated > 0:
-        conn.commit()
-        logger.info(f"🔄 Propagados {updated} confronto(s) do mata-mata")
-    
-    cursor.close()
-    return updated
 
+def propagate_results(conn):
+    """
+    Resultados de grupo concluídos, classificados de grupo e vencedores do
+    mata-mata para os próximos confrontos. Retorna os jogos que ficaram com
+    os dois times definidos.
+    """
+    with timed_stage('propagate'):
+        update_completed_group_results(conn)
+        updates, defined = propagate_bracket(conn)
+    if updates:
+        logger.info(f"Propagadas {len(updates)} vaga(s) do chaveamento")
+    return defined
 
-def propagate_group_results(conn):
+
+def refresh_ranking_snapshots():
     """
-    Propaga classificados dos grupos (1º e 2º) para jogos R32.
-    Resolve placeholders 1A, 2B, etc.
-    Retorna o número de jogos atualizados.
+    Atualiza as fotos diárias do ranking (tabela ranking_snapshots), lidas
+    pelo gráfico de evolução e pelo resumo diário. Usa o mesmo cálculo do
+    app (scoring.get_ranking via SQLAlchemy); falha ao calcular não
+    interrompe o restante da atualização, mas dependência ausente derruba o
+    job (o workflow precisa instalá-la).
     """
-    cursor = conn.cursor()
-    updated = 0
-    
-    # Busca resultados de grupo definidos
-    cursor.execute("""
-        SELECT gr.group_name, gr.first_place_team_id, gr.second_place_team_id,
-               t1.code as first_code, t2.code as second_code
-        FROM group_results gr
-        JOIN teams t1 ON gr.first_place_team_id = t1.id
-        JOIN teams t2 ON gr.second_place_team_id = t2.id
-    """)
-    
-    for row in cursor.fetchall():
-        group_name, first_id, second_id, first_code, second_code = row
-        
-        first_placeholder = f"1{group_name}"  # Ex: "1A"
-        second_placeholder = f"2{group_name}"  # Ex: "2A"
-        
-        # Atualiza jogos com placeholder do 1º lugar
-        cursor.execute("""
-            UPDATE matches SET team1_id = %s, team1_code = %s
-            WHERE team1_code = %s AND team1_id IS NULL
-        """, (first_id, first_code, first_placeholder))
-        updated += cursor.rowcount
-        
-        cursor.execute("""
-            UPDATE matches SET team2_id = %s, team2_code = %s
-            WHERE team2_code = %s AND team2_id IS NULL
-        """, (first_id, first_code, first_placeholder))
-        updated += cursor.rowcount
-        
-        # Atualiza jogos com placeholder do 2º lugar
-        cursor.execute("""
-            UPDATE matches SET team1_id = %s, team1_code = %s
-            WHERE team1_code = %s AND team1_id IS NULL
-        """, (second_id, second_code, second_placeholder))
-        updated += cursor.rowcount
-        
-        cursor.execute("""
-            UPDATE matches SET team2_id = %s, team2_code = %s
-            WHERE team2_code = %s AND team2_id IS NULL
-        """, (second_id, second_code, second_placeholder))
-        updated += cursor.rowcount
-    
-    if updated > 0:
-        conn.commit()
-        logger.info(f"🔄 Propagados {updated} classificado(s) de grupo para R32")
-    
-    cursor.close()
-    return updated
+    from ranking_snapshots import refresh_snapshots_for_url
+
+    try:
+        days = refresh_snapshots_for_url(NEON_CONN)
+    except Exception as e:
+        logger.error(f"Falha ao atualizar fotos do ranking: {e}")
+        return []
+
+    if days:
+        logger.info(f"📸 Fotos do ranking atualizadas: {', '.join(d.strftime('%d/%m') for d in days)}")
+    return days
+
+
+def refresh_prize_status():
+    """
+    Recalcula quem já garantiu e quem não pode mais alcançar a premiação
+    (tabela prize_status, lida pela página de ranking). Como as fotos do
+    ranking, usa o app via SQLAlchemy (e numpy) e não interrompe a
+    atualização se o cálculo falhar; dependência ausente derruba o job.
+    """
+    from prize_status import refresh_prize_status_for_url, CLINCHED, ELIMINATED
+
+    try:
+        rows = refresh_prize_status_for_url(NEON_CONN)
+    except Exception as e:
+        logger.error(f"Falha ao atualizar a situação da premiação: {e}")
+        return []
+
+    clinched = sum(1 for r in rows if r['status'] == CLINCHED)
+    eliminated = sum(1 for r in rows if r['status'] == ELIMINATED)
+    logger.info(f"🏆 Premiação: {clinched} garantido(s), {eliminated} eliminado(s), "
+                f"{len(rows) - clinched - eliminated} na briga")
+    return rows
 
 
 # ============================================================
 # LÓGICA DE MATCHING E ATUALIZAÇÃO
 # ============================================================
 
-def match_fixture_to_db(fixture, pending_matches):
+class FixtureMatcher:
     """
-    Encontra o jogo correspondente no banco Neon baseado nos times.
-    Retorna o match do banco ou None.
+    Liga as fixtures da API aos jogos pendentes do banco. Montado uma vez
+    por execução, com dois índices — pelo id da fixture (matches.api_fixture_id)
+    e pelo par de seleções sem ordem —, resolve cada fixture em O(1) em vez
+    de varrer a lista de pendentes (a varredura noturna cruza todas as
+    fixtures da Copa com todos os jogos pendentes).
+
+    Jogos reconhecidos pelo par de seleções ganham o id da fixture, gravado
+    por save_fixture_ids(): nas execuções seguintes a busca é pelo id.
     """
-    home_name = fixture['teams']['home']['name']
-    away_name = fixture['teams']['away']['name']
 
-    home_code = API_NAME_TO_NEON_CODE.get(home_name)
-    away_code = API_NAME_TO_NEON_CODE.get(away_name)
+    def __init__(self, pending_matches):
+        self.by_fixture_id = {}
+        self.by_pair = {}
+        for match in pending_matches:
+            if match.get('api_fixture_id'):
+                self.by_fixture_id[match['api_fixture_id']] = match
+            # Mesmo par pendente duas vezes: vale o de menor match_number
+            self.by_pair.setdefault(frozenset((match['team1_code'], match['team2_code'])), match)
+        self.new_fixture_ids = {}  # match_id -> id da fixture descoberto nesta execução
+
+    @property
+    def known_fixture_ids(self):
+        return sorted(self.by_fixture_id)
+
+    def match(self, fixture):
+        """
+        Retorna (jogo do banco, código do mandante na API, código do
+        visitante na API) ou None se a fixture não for de um jogo pendente.
+        """
+        home_name = fixture['teams']['home']['name']
+        away_name = fixture['teams']['away']['name']
+        home_code = API_NAME_TO_NEON_CODE.get(home_name)
+        away_code = API_NAME_TO_NEON_CODE.get(away_name)
+
+        if not home_code or not away_code:
+            logger.warning(f"Time não mapeado: {home_name} ou {away_name}")
+            return None
 
-    if not home_code or not away_code:
-        logger.warning(f"Time não mapeado: {home_name} ou {away_name}")
-        return None
+        fixture_id = fixture['fixture'].get('id')
+        match = self.by_fixture_id.get(fixture_id)
+        if match is None:
+            match = self.by_pair.get(frozenset((home_code, away_code)))
+            if match is None:
+                return None
+            if fixture_id and not match.get('api_fixture_id'):
+                self.new_fixture_ids[match['id']] = fixture_id
+        return match, home_code, away_code
+
+    def save_fixture_ids(self, conn):
+        """Grava em matches.api_fixture_id os ids descobertos nesta execução."""
+        if not self.new_fixture_ids:
+            return 0
+        cursor = conn.cursor()
+        execute_values(cursor, """
+            UPDATE matches AS m SET api_fixture_id = v.fixture_id
+            FROM (VALUES %s) AS v(id, fixture_id)
+            WHERE m.id = v.id AND m.api_fixture_id IS NULL
+              AND NOT EXISTS (SELECT 1 FROM matches o WHERE o.api_fixture_id = v.fixture_id)
+        """, list(self.new_fixture_ids.items()))
+        saved = cursor.rowcount
+        conn.commit()
+        cursor.close()
+        self.new_fixture_ids.clear()
+        if saved:
+            logger.info(f"Ids de fixture gravados para {saved} jogo(s)")
+        return saved
 
-    # Procurar jogo no banco onde os times batem (em qualquer ordem)
-    for match in pending_matches:
-        db_t1 = match['team1_code']
-        db_t2 = match['team2_code']
-        if (db_t1 == home_code and db_t2 == away_code) or \
-           (db_t1 == away_code and db_t2 == home_code):
-            # Retornar match com info de quem é home/away na API
-            match['_api_home_code'] = home_code
-            match['_api_away_code'] = away_code
-            return match
 
-    return None
+def fixture_state(fixture):
+    """O que importa de uma fixture para o banco: status e placares."""
+    score = fixture.get('score', {}) or {}
+    fulltime = score.get('fulltime') or {}
+    penalty = score.get('penalty') or {}
+    return (fixture['fixture']['status']['short'],
+            fixture['goals']['home'], fixture['goals']['away'],
+            fulltime.get('home'), fulltime.get('away'),
+            penalty.get('home'), penalty.get('away'))
 
 
-def process_fixture(conn, fixture, pending_matches, mode='post'):
+def process_fixture(conn, fixture, matcher, mode='post'):
     """
     Processa um fixture da API e atualiza o banco.
     Retorna True se atualizou, False caso contrário.
@@ -808,13 +1013,13 @@ def process_fixture(conn, fixture, pending_matches, mode='post'):
     goals_away = fixture['goals']['away']
 
     # Encontrar jogo correspondente no banco
-    db_match = match_fixture_to_db(fixture, pending_matches)
-    if not db_match:
+    with timed_stage('match'):
+        resolved = matcher.match(fixture)
+    if not resolved:
         logger.debug(f"Jogo não encontrado no banco: {home_name} vs {away_name}")
         return False
 
-    home_code = db_match['_api_home_code']
-    away_code = db_match['_api_away_code']
+    db_match, home_code, away_code = resolved
     match_id = db_match['id']
     match_num = db_match['match_number']
 
@@ -893,8 +1098,9 @@ def process_fixture(conn, fixture, pending_matches, mode='post'):
                 else:
                     logger.warning(f"  Time '{winner_code}' nao encontrado para registrar tiebreak")
 
-        success = update_match_result(conn, match_id, team1_score, team2_score, 'finished',
-                                      penalty_winner_id=penalty_winner_id)
+        with timed_stage('update'):
+            success = update_match_result(conn, match_id, team1_score, team2_score, 'finished',
+                                          penalty_winner_id=penalty_winner_id)
         if success:
             extra = ""
             if status_short == 'AET':
@@ -905,7 +1111,8 @@ def process_fixture(conn, fixture, pending_matches, mode='post'):
                 f"Jogo #{match_num} FINALIZADO ({status_short}): "
                 f"{db_match['team1_code']} {team1_score}x{team2_score} {db_match['team2_code']}{extra}"
             )
-            score_finished_match(conn, match_id, team1_score, team2_score)
+            with timed_stage('score'):
+                score_finished_match(conn, match_id, team1_score, team2_score)
         return success
 
     # Jogo ao vivo (só atualiza no modo live)
@@ -925,7 +1132,8 @@ def process_fixture(conn, fixture, pending_matches, mode='post'):
         else:
             team1_score, team2_score = goals_away, goals_home
         elapsed = fix_info['status'].get('elapsed', '?')
-        success = update_match_live(conn, match_id, team1_score, team2_score)
+        with timed_stage('update'):
+            success = update_match_live(conn, match_id, team1_score, team2_score)
         if success:
             logger.info(f"🔴 Jogo #{match_num} AO VIVO ({elapsed}'): {db_match['team1_code']} {team1_score}x{team2_score} {db_match['team2_code']}")
         return success
@@ -938,14 +1146,19 @@ def process_fixture(conn, fixture, pending_matches, mode='post'):
 # ============================================================
 
 def run_live():
-    """Modo LIVE: atualiza jogos em andamento."""
+    """
+    Modo LIVE: atualiza jogos em andamento.
+    Retorna as fixtures ao vivo consultadas (usadas por run_scheduled para
+    perceber o intervalo do jogo).
+    """
+    global _last_live_digest
     logger.info("=" * 50)
     logger.info("MODO LIVE - Atualizando jogos em andamento")
     logger.info("=" * 50)
 
     conn = get_db_connection()
     if not conn:
-        return
+        return []
 
     try:
         # Palpites não salvos viram 0x0 quando o jogo começa
@@ -954,18 +1167,31 @@ def run_live():
         pending = get_pending_matches(conn)
         if not pending:
             logger.info("Nenhum jogo pendente no banco")
-            return
+            return []
+        matcher = FixtureMatcher(pending)
 
-        fixtures = get_live_fixtures()
+        with timed_stage('fetch'):
+            fixtures = get_live_fixtures()
         if not fixtures:
-            return
+            return []
+
+        # Só id, status e placares: minuto do jogo e demais campos mudam a
+        # cada consulta e nunca deixariam o "nada mudou" acontecer
+        states = sorted((f['fixture']['id'], fixture_state(f)) for f in fixtures)
+        digest = hashlib.sha1(json.dumps(states).encode()).hexdigest()
+        if digest == _last_live_digest:
+            logger.info("Fixtures ao vivo iguais às da consulta anterior, nada a atualizar")
+            return fixtures
 
         updated = 0
         for fixture in fixtures:
-            if process_fixture(conn, fixture, pending, mode='live'):
+            if process_fixture(conn, fixture, matcher, mode='live'):
                 updated += 1
+        matcher.save_fixture_ids(conn)
+        _last_live_digest = digest
 
         logger.info(f"Total de jogos atualizados: {updated}")
+        return fixtures
     finally:
         conn.close()
 
@@ -988,25 +1214,27 @@ def run_post():
         if not pending:
             logger.info("Nenhum jogo pendente no banco")
             return
+        matcher = FixtureMatcher(pending)
 
-        fixtures = get_today_fixtures()
+        with timed_stage('fetch'):
+            fixtures = get_recent_fixtures(pending)
         if not fixtures:
             return
 
         updated = 0
         for fixture in fixtures:
-            if process_fixture(conn, fixture, pending, mode='post'):
+            if process_fixture(conn, fixture, matcher, mode='post'):
                 updated += 1
+        matcher.save_fixture_ids(conn)
 
         logger.info(f"Total de jogos atualizados: {updated}")
 
         # Propaga sempre — independente de ter atualizado jogos nesta execução,
         # pode haver placeholders pendentes de execuções anteriores
-        update_completed_group_results(conn)
-        prop_groups = propagate_group_results(conn)
-        prop_knockout = propagate_knockout_winners(conn)
-        if prop_groups + prop_knockout > 0:
-            logger.info(f"Propagados: {prop_groups} de grupo + {prop_knockout} de mata-mata")
+        propagate_results(conn)
+
+        refresh_ranking_snapshots()
+        refresh_prize_status()
     finally:
         conn.close()
 
@@ -1028,24 +1256,23 @@ def run_nightly():
             return
 
         logger.info(f"Jogos pendentes no banco: {len(pending)}")
+        matcher = FixtureMatcher(pending)
 
-        fixtures = get_all_finished_fixtures()
+        with timed_stage('fetch'):
+            fixtures = get_all_finished_fixtures()
         if not fixtures:
             return
 
         updated = 0
         for fixture in fixtures:
-            if process_fixture(conn, fixture, pending, mode='post'):
+            if process_fixture(conn, fixture, matcher, mode='post'):
                 updated += 1
+        matcher.save_fixture_ids(conn)
 
         logger.info(f"Total de jogos atualizados na varredura: {updated}")
         
         # Propaga confrontos do mata-mata (sempre na varredura noturna)
-        update_completed_group_results(conn)
-        prop_groups = propagate_group_results(conn)
-        prop_knockout = propagate_knockout_winners(conn)
-        if prop_groups + prop_knockout > 0:
-            logger.info(f"Propagados: {prop_groups} de grupo + {prop_knockout} de mata-mata")
+        propagate_results(conn)
 
         # Garante pontuação de todos os jogos finalizados sem pontuação
         cursor = conn.cursor()
@@ -1080,12 +1307,82 @@ def run_nightly():
         conn.close()
 
 
+def run_scheduled(duration):
+    """
+    Modo SCHEDULED: um único processo por `duration` segundos que roda os
+    modos live e post só quando há jogo na janela (polling_schedule.py),
+    dormindo entre jogos. A agenda é relida do banco a cada
+    SCHEDULE_REFRESH segundos e depois de cada post.
+    """
+    logger.info("=" * 50)
+    logger.info(f"MODO SCHEDULED - Consultas conforme a agenda por {duration // 60} min")
+    logger.info("=" * 50)
+
+    brazil_tz = pytz.timezone('America/Sao_Paulo')
+    deadline = time.monotonic() + duration
+    pending = None
+    loaded_at = 0.0
+    live_statuses = None
+    last_post = float('-inf')
+    interval = LIVE_INTERVAL
+
+    while True:
+        if pending is None or time.monotonic() - loaded_at > SCHEDULE_REFRESH:
+            refreshed = None
+            conn = get_db_connection()
+            if conn:
+                try:
+                    refreshed = get_pending_matches(conn)
+                except Exception as e:
+                    logger.error(f"Falha ao ler a agenda: {e}")
+                finally:
+                    conn.close()
+            if refreshed is not None:
+                pending = refreshed
+                loaded_at = time.monotonic()
+            elif pending is None:
+                # Falha passageira do Neon: tenta de novo no próximo ciclo,
+                # como o loop em bash fazia, em vez de encerrar o processo
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                logger.warning(f"Agenda indisponível; nova tentativa em {interval}s")
+                close_all_pools()
+                time.sleep(min(interval, remaining))
+                continue
+            else:
+                logger.warning("Agenda não atualizada; seguindo com a última lida")
+
+        now_naive = datetime.now(brazil_tz).replace(tzinfo=None)
+        plan = plan_poll(now_naive, pending, live_statuses)
+        interval = plan.interval
+        logger.info(f"Agenda: {plan.reason} (próximo ciclo em {plan.interval}s)")
+
+        if plan.live:
+            fixtures = run_live()
+            live_statuses = [f['fixture']['status']['short'] for f in fixtures]
+        else:
+            live_statuses = None
+        if plan.post and time.monotonic() - last_post >= POST_INTERVAL:
+            run_post()
+            last_post = time.monotonic()
+            loaded_at = float('-inf')  # relê a agenda no próximo ciclo
+
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        if not plan.live and not plan.post:
+            # Entre jogos: não segura conexões abertas com o Neon
+            close_all_pools()
+        time.sleep(min(plan.interval, remaining))
+
+
 # ============================================================
 # MAIN
 # ============================================================
 
 def main():
-    if not API_KEY:
+    if not API_KEY and not os.environ.get('FIXTURE_REPLAY'):
         logger.error("API_FOOTBALL_KEY não configurada!")
         sys.exit(1)
     if not NEON_CONN:
@@ -1097,17 +1394,30 @@ def main():
     if len(sys.argv) > 2 and sys.argv[1] == '--mode':
         mode = sys.argv[2]
 
+    if mode in ('post', 'scheduled'):
+        # run_post atualiza fotos do ranking e premiação pelo app (SQLAlchemy,
+        # numpy): sem eles o job falha já no início, não horas depois
+        import ranking_snapshots, prize_status  # noqa: F401
+
     if mode == 'live':
         run_live()
     elif mode == 'post':
         run_post()
     elif mode == 'nightly':
         run_nightly()
+    elif mode == 'scheduled':
+        duration = SCHEDULED_DURATION
+        if '--duration' in sys.argv:
+            duration = int(sys.argv[sys.argv.index('--duration') + 1])
+        run_scheduled(duration)
     else:
         logger.error(f"Modo desconhecido: {mode}")
-        logger.info("Modos disponíveis: live, post, nightly")
+        logger.info("Modos disponíveis: live, post, nightly, scheduled")
         sys.exit(1)
 
+    logger.info(f"Pool de conexoes: {get_pool_metrics()}")
+    close_all_pools()
+
 
 if __name__ == '__main__':
     main()